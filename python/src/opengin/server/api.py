@@ -1,15 +1,26 @@
+import asyncio
+import json
 import logging
+import mimetypes
 import os
 import shutil
 import tempfile
 import uuid
 
 import yaml
-from fastapi import APIRouter, BackgroundTasks, File, Form, HTTPException, UploadFile
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, BackgroundTasks, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
-from opengin.tracer.agents.orchestrator import Agent0
+from opengin.tracer import formats
+from opengin.tracer.agents.orchestrator import RESUMABLE_STATUSES, Agent0
+from opengin.tracer.archive import ARCHIVE_FILENAME, write_archive
+from opengin.tracer.cancellation import RunCancelled
+from opengin.tracer.events import TERMINAL_EVENTS
+from opengin.tracer.jobqueue import queue_from_env
+from opengin.tracer.retention import DEFAULT_SWEEP_INTERVAL, ENV_SWEEP_INTERVAL, RetentionPolicy, RetentionSweeper
+from opengin.tracer.storage import storage_from_env
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -19,12 +30,31 @@ logger = logging.getLogger(__name__)
 # We use a fixed directory for the sandbox/pipelines
 base_pipeline_path = os.path.abspath(os.path.join(os.getcwd(), "sandbox", "pipelines"))
 os.makedirs(base_pipeline_path, exist_ok=True)
-agent0 = Agent0(base_path=base_pipeline_path)
+# With OPENGIN_STORAGE_URL set, the sandbox is a local working copy of the shared storage.
+# With OPENGIN_QUEUE_URL set, pages are extracted by page workers (`opengin tracer worker`)
+agent0 = Agent0(
+    base_path=base_pipeline_path,
+    retention=RetentionPolicy.from_env(),
+    storage=storage_from_env(),
+    job_queue=queue_from_env(),
+)
 
 # Temporary storage for upload before pipeline creation
 UPLOAD_DIR = os.path.abspath(os.path.join(os.getcwd(), "sandbox", "uploads"))
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Applies the retention policy in the background; started with the app (see main.py)
+retention_sweeper = RetentionSweeper(
+    agent0.fs_manager,
+    upload_dir=UPLOAD_DIR,
+    interval=float(os.getenv(ENV_SWEEP_INTERVAL) or DEFAULT_SWEEP_INTERVAL),
+)
+
+
+# Longest time /events waits for a new event, and the keep-alive interval of /events/{job_id}/stream
+MAX_EVENT_WAIT = 30.0
+EVENT_KEEPALIVE = 15.0
+
 
 class ExtractionConfig(BaseModel):
     api_key: str
@@ -32,15 +62,45 @@ class ExtractionConfig(BaseModel):
     prompt: str
 
 
+def _upload_digest_path(file_id: str) -> str:
+    return os.path.join(UPLOAD_DIR, f"{file_id}.sha256")
+
+
+def _read_upload_digest(file_id: str):
+    try:
+        with open(_upload_digest_path(file_id)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _remove_upload(file_id: str):
+    for path in (os.path.join(UPLOAD_DIR, f"{file_id}.pdf"), _upload_digest_path(file_id)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
 @router.post("/upload")
 async def upload_pdf(file: UploadFile = File(...)):
-    """Upload a PDF file and return a temporary file ID."""
+    """
+    Upload a PDF file and return a temporary file ID.
+
+    The upload is hashed while it is written into the content-addressed input store
+    and linked into the upload directory, so creating the pipeline later links the
+    same bytes into the run instead of copying them again.
+    """
     file_id = str(uuid.uuid4())
     file_path = os.path.join(UPLOAD_DIR, f"{file_id}.pdf")
 
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        blobs = agent0.fs_manager.blobs
+        digest = blobs.put_stream(file.file)
+        blobs.link(digest, file_path)
+        # Remembered for /extract, which links the stored blob without hashing the upload again
+        with open(_upload_digest_path(file_id), "w") as f:
+            f.write(digest)
     except OSError as e:
         logger.error(f"Failed to save file {file_path}: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to save file: {e}")
@@ -112,10 +172,14 @@ async def quick_setup():
     }
 
 
-def run_extraction_task(pipeline_name: str, run_id: str, prompt: str, metadata_schema: dict, api_key: str = None):
+def run_extraction_task(
+    pipeline_name: str, run_id: str, prompt: str, metadata_schema: dict, api_key: str = None, options: dict = None
+):
     """Background task to run the extraction pipeline."""
     try:
-        agent0.run_pipeline(pipeline_name, run_id, prompt, metadata_schema, api_key=api_key)
+        agent0.run_pipeline(pipeline_name, run_id, prompt, metadata_schema, api_key=api_key, options=options)
+    except RunCancelled:
+        logger.info(f"Extraction cancelled for run_id {run_id} in pipeline {pipeline_name}")
     except Exception as e:
         logger.error(f"Extraction failed for run_id {run_id} in pipeline {pipeline_name}: {e}", exc_info=True)
 
@@ -127,8 +191,15 @@ async def extract_document(
     api_key: str = Form(...),
     metadata: str = Form(...),
     prompt: str = Form(...),
+    scan_workers: int = Form(None, ge=1),
+    early_export: bool = Form(False),
 ):
-    """Trigger the document extraction process."""
+    """
+    Trigger the document extraction process.
+
+    Pages are extracted one at a time and tables are exported once all pages are done,
+    unless `scan_workers` asks for more pages at a time or `early_export` is set.
+    """
 
     # Validate file existence
     pdf_path = os.path.join(UPLOAD_DIR, f"{file_id}.pdf")
@@ -156,21 +227,84 @@ async def extract_document(
             pipeline_name=pipeline_name,
             input_file_path=pdf_path,
             filename=f"doc_{file_id}.pdf",  # or original filename if we preserved it
+            input_sha256=_read_upload_digest(file_id),
         )
     except (OSError, ValueError) as e:
         logger.error(f"Failed to create pipeline '{pipeline_name}' for file {pdf_path}: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to create pipeline: {e}")
 
+    options = {}
+    if scan_workers:
+        options["scan_workers"] = scan_workers
+    if early_export:
+        options["early_export"] = True
+
     # Run in background
-    # Run in background
-    background_tasks.add_task(run_extraction_task, pipeline_name, run_id, prompt, metadata_schema, api_key=api_key)
+    background_tasks.add_task(
+        run_extraction_task, pipeline_name, run_id, prompt, metadata_schema, api_key=api_key, options=options
+    )
 
-    # Cleanup the uploaded file as it has been copied to the pipeline
-    background_tasks.add_task(os.remove, pdf_path)
+    # Cleanup the uploaded file as it has been linked into the pipeline
+    background_tasks.add_task(_remove_upload, file_id)
 
     return {"job_id": run_id, "status": "pending", "pipeline_name": pipeline_name}
 
 
+def resume_extraction_task(pipeline_name: str, run_id: str, api_key: str = None):
+    """Background task to resume a cancelled or failed extraction."""
+    try:
+        agent0.resume_pipeline(pipeline_name, run_id, api_key=api_key)
+    except RunCancelled:
+        logger.info(f"Extraction cancelled for run_id {run_id} in pipeline {pipeline_name}")
+    except Exception as e:
+        logger.error(f"Resumed extraction failed for run_id {run_id} in pipeline {pipeline_name}: {e}", exc_info=True)
+
+
+@router.post("/cancel/{job_id}")
+async def cancel_job(job_id: str):
+    """
+    Cancel a running job.
+
+    The job stops at its next page and is marked CANCELLED; the pages extracted so far
+    are kept, so it can be continued with /resume.
+    """
+    pipeline_name = "ui_extraction"
+    try:
+        cancelled = agent0.cancel_run(pipeline_name, job_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not cancelled:
+        raise HTTPException(status_code=409, detail="Job is not running")
+    return {"job_id": job_id, "status": "cancelling"}
+
+
+@router.post("/resume/{job_id}")
+async def resume_job(job_id: str, background_tasks: BackgroundTasks, api_key: str = Form(...)):
+    """
+    Resume a cancelled or failed job, extracting only the pages it has not extracted yet.
+    """
+    pipeline_name = "ui_extraction"
+    metadata = agent0.fs_manager.load_metadata(pipeline_name, job_id)
+    if not metadata:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if metadata.get("status") not in RESUMABLE_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job is {metadata.get('status')} and cannot be resumed")
+
+    background_tasks.add_task(resume_extraction_task, pipeline_name, job_id, api_key=api_key)
+    return {"job_id": job_id, "status": "pending", "pipeline_name": pipeline_name}
+
+
+def write_run_archive(run_path: str, zip_path: str, run_archive=None):
+    """
+    Writes all files of a run directory into a zip archive.
+
+    Already compressed files are stored as-is, everything else is deflated. The
+    members of `run_archive` (the archive of an archived run) are copied over, so
+    the download has the same layout whether or not the run is archived.
+    """
+    write_archive(run_path, zip_path, exclude=[ARCHIVE_FILENAME], members_from=run_archive)
+
+
 def get_directory_structure(root_dir):
     """
     Recursively builds a tree structure of the directory.
@@ -190,46 +324,150 @@ def get_directory_structure(root_dir):
     return params
 
 
+def add_archived_members(tree: dict, run_path: str, members: list):
+    """
+    Adds the members of a run archive to the directory tree of the run.
+    """
+    for member in members:
+        node = tree
+        parts = member.split("/")
+        for i, part in enumerate(parts[:-1]):
+            child = next((c for c in node["children"] if c["name"] == part and c["type"] == "directory"), None)
+            if child is None:
+                child_path = os.path.join(run_path, *parts[: i + 1])
+                child = {"name": part, "path": child_path, "type": "directory", "children": []}
+                node["children"].append(child)
+                node["children"].sort(key=lambda c: c["name"])
+            node = child
+        if not any(c["name"] == parts[-1] for c in node["children"]):
+            node["children"].append({"name": parts[-1], "path": os.path.join(run_path, *parts), "type": "file"})
+            node["children"].sort(key=lambda c: c["name"])
+
+
 @router.get("/results/{job_id}")
 async def get_results(job_id: str):
     pipeline_name = "ui_extraction"
 
-    # Check current status from metadata.json
-    try:
-        metadata = agent0.fs_manager.load_metadata(pipeline_name, job_id)
-    except (OSError, ValueError) as e:
-        logger.error(f"Error loading metadata for job {job_id}: {e}")
-        raise HTTPException(status_code=404, detail="Job not found")
+    # Metadata and files are read as one operation, which checks a storage backend once
+    with agent0.fs_manager.reading_run(pipeline_name, job_id):
+        # Check current status from metadata.json
+        try:
+            metadata = agent0.fs_manager.load_metadata(pipeline_name, job_id)
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading metadata for job {job_id}: {e}")
+            raise HTTPException(status_code=404, detail="Job not found")
 
+        if not metadata:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        fs_manager = agent0.fs_manager
+        run_path = fs_manager.get_pipeline_path(pipeline_name, job_id)
+
+        # Files of an archived run are listed from its archive and served from it by /file
+        system = get_directory_structure(run_path)
+        add_archived_members(system, run_path, fs_manager.archived_members(pipeline_name, job_id))
+
+        # Construct response
+        response_data = {
+            "status": metadata.get("status", "UNKNOWN"),
+            "error": metadata.get("error"),
+            "timings": metadata.get("timings"),
+            "progress": agent0.events.progress(pipeline_name, job_id),
+            "metadata": metadata,
+            "files": {"csv": [], "metadata": [], "system": system},
+        }
+
+        # Find CSVs in output and aggregated (compressed ones included, e.g. table.csv.gz)
+        output_dir = os.path.join(run_path, "output")
+        if fs_manager.run_path_exists(output_dir):
+            msg_files = [
+                {"name": f, "path": os.path.join(output_dir, f)}
+                for f in fs_manager.list_run_dir(output_dir)
+                if formats.split_compression_suffix(f)[0].endswith(".csv")
+            ]
+            response_data["files"]["csv"] = msg_files
+
+        # Find Metadata JSONs in output directory (per table metadata)
+        if fs_manager.run_path_exists(output_dir):
+            meta_files = [
+                {"name": f, "path": os.path.join(output_dir, f)}
+                for f in fs_manager.list_run_dir(output_dir)
+                if formats.split_compression_suffix(f)[0].endswith(".json")
+            ]
+            response_data["files"]["metadata"] = meta_files
+
+        return response_data
+
+
+def job_finished(pipeline_name: str, job_id: str) -> bool:
+    """
+    Returns True if a job that is not running in this process has completed, failed or was cancelled.
+
+    Raises:
+        HTTPException: 404 if the job does not exist.
+    """
+    metadata = agent0.fs_manager.load_metadata(pipeline_name, job_id)
     if not metadata:
         raise HTTPException(status_code=404, detail="Job not found")
+    return metadata.get("status") in ("COMPLETED", "FAILED", "CANCELLED")
 
-    run_path = agent0.fs_manager.get_pipeline_path(pipeline_name, job_id)
 
-    # Construct response
-    response_data = {
-        "status": metadata.get("status", "UNKNOWN"),
-        "error": metadata.get("error"),
-        "metadata": metadata,
-        "files": {"csv": [], "metadata": [], "system": get_directory_structure(run_path)},
-    }
+@router.get("/events/{job_id}")
+async def get_events(job_id: str, after: int = 0, wait: float = 0):
+    """
+    Returns the progress events of a job after the cursor `after`.
+
+    Pass the returned 'cursor' as `after` on the next call to get only new events.
+    With `wait` (seconds, at most MAX_EVENT_WAIT) the call blocks until there is a
+    new event instead of returning an empty list, so clients can long-poll.
+    """
+    pipeline_name = "ui_extraction"
+    wait = min(max(wait, 0.0), MAX_EVENT_WAIT)
+    if wait:
+        events = await agent0.events.wait_async(pipeline_name, job_id, after, wait)
+    else:
+        events = await run_in_threadpool(agent0.events.events, pipeline_name, job_id, after)
 
-    # Find CSVs in output and aggregated
-    output_dir = os.path.join(run_path, "output")
-    if os.path.exists(output_dir):
-        msg_files = [
-            {"name": f, "path": os.path.join(output_dir, f)} for f in os.listdir(output_dir) if f.endswith(".csv")
-        ]
-        response_data["files"]["csv"] = msg_files
+    if events:
+        done = events[-1]["type"] in TERMINAL_EVENTS
+    else:
+        done = not agent0.events.is_active(pipeline_name, job_id) and job_finished(pipeline_name, job_id)
+    return {"events": events, "cursor": events[-1]["seq"] if events else after, "done": done}
 
-    # Find Metadata JSONs in output directory (per table metadata)
-    if os.path.exists(output_dir):
-        meta_files = [
-            {"name": f, "path": os.path.join(output_dir, f)} for f in os.listdir(output_dir) if f.endswith(".json")
-        ]
-        response_data["files"]["metadata"] = meta_files
 
-    return response_data
+@router.get("/events/{job_id}/stream")
+async def stream_events(job_id: str, request: Request, after: int = 0):
+    """
+    Streams the progress events of a job as Server-Sent Events.
+
+    Each event is sent with its 'seq' as the event ID and its 'type' as the event
+    name, so a reconnecting EventSource resumes after the last event it received.
+    The stream ends after the job's final event.
+    """
+    pipeline_name = "ui_extraction"
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        after = int(last_event_id)
+    job_finished(pipeline_name, job_id)
+
+    async def generate():
+        cursor = after
+        while not await request.is_disconnected():
+            events = await agent0.events.wait_async(pipeline_name, job_id, cursor, EVENT_KEEPALIVE)
+            for event in events:
+                cursor = event["seq"]
+                yield f"id: {cursor}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            if events and events[-1]["type"] in TERMINAL_EVENTS:
+                return
+            if not events:
+                # A job that is not running here is checked on its metadata, once a second
+                if not agent0.events.is_active(pipeline_name, job_id):
+                    if job_finished(pipeline_name, job_id):
+                        return
+                    await asyncio.sleep(1)
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(generate(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 
 def is_safe_path(base_path: str, target_path: str) -> bool:
@@ -249,9 +487,38 @@ def is_safe_path(base_path: str, target_path: str) -> bool:
         return False
 
 
+def accepted_encodings(request: Request) -> set:
+    """
+    Returns the content codings the client accepts, ignoring quality values.
+    """
+    encodings = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            encodings.add(coding.lower())
+    return encodings
+
+
+def iter_file(f, chunk_size: int = 64 * 1024):
+    """
+    Yields the content of an open binary file in chunks and closes it.
+    """
+    with f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            yield chunk
+
+
 @router.get("/file")
-async def get_file_content(path: str):
-    """Serve file content."""
+async def get_file_content(path: str, request: Request):
+    """
+    Serve file content.
+
+    Compressed artifacts (.gz, .zst) are sent as stored. If the client accepts the
+    compression, the file is sent with a Content-Encoding header so the client sees
+    the original content; otherwise the compressed file itself is downloaded.
+
+    Files of archived runs are streamed from the run archive.
+    """
     # Define trusted roots (allow access strictly to sandboxed areas)
     # Ensure roots themselves are resolved
     trusted_roots = [os.path.realpath(UPLOAD_DIR), os.path.realpath(base_pipeline_path)]
@@ -275,8 +542,33 @@ async def get_file_content(path: str):
         logger.warning(f"Security violation access attempt: {path} resolved to {real_path}")
         raise HTTPException(status_code=403, detail="Access denied: Security violation")
 
+    original_path, suffix = formats.split_compression_suffix(real_path)
+    encoding = formats.CONTENT_ENCODINGS.get(suffix)
+    send_encoded = encoding is not None and encoding in accepted_encodings(request)
+
     if not os.path.exists(real_path):
-        raise HTTPException(status_code=404, detail="File not found")
+        if not agent0.fs_manager.run_path_exists(real_path):
+            raise HTTPException(status_code=404, detail="File not found")
+        try:
+            member = agent0.fs_manager.open_run_file_binary(real_path)
+        except (OSError, KeyError):
+            raise HTTPException(status_code=404, detail="File not found")
+
+        filename = os.path.basename(original_path if send_encoded else real_path)
+        headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+        if send_encoded:
+            headers["Content-Encoding"] = encoding
+        media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        return StreamingResponse(iter_file(member), media_type=media_type, headers=headers)
+
+    if send_encoded:
+        media_type = mimetypes.guess_type(original_path)[0] or "application/octet-stream"
+        return FileResponse(
+            real_path,
+            filename=os.path.basename(original_path),
+            media_type=media_type,
+            headers={"Content-Encoding": encoding},
+        )
 
     return FileResponse(real_path, filename=os.path.basename(real_path))
 
@@ -295,13 +587,9 @@ async def download_all(job_id: str, background_tasks: BackgroundTasks):
 
         # Create a secure temporary directory
         tmp_dir = tempfile.mkdtemp()
-        zip_base_name = os.path.join(tmp_dir, f"run_{job_id}")
-
-        # shutil.make_archive(base_name, format, root_dir)
-        # resulting file will be zip_base_name + .zip
-        shutil.make_archive(zip_base_name, "zip", run_path)
-
-        final_zip_path = zip_base_name + ".zip"
+        final_zip_path = os.path.join(tmp_dir, f"run_{job_id}.zip")
+        run_archive = agent0.fs_manager.get_run_archive(pipeline_name, job_id)
+        write_run_archive(run_path, final_zip_path, run_archive=run_archive)
 
         # Define a cleanup function to remove the temp directory and its contents
         def cleanup():
@@ -1,10 +1,23 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from opengin.server.api import retention_sweeper
 from opengin.server.api import router as api_router
 
-app = FastAPI(title="OpenGIN Ingestion Server", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    retention_sweeper.start()
+    try:
+        yield
+    finally:
+        retention_sweeper.stop()
+
+
+app = FastAPI(title="OpenGIN Ingestion Server", version="0.1.0", lifespan=lifespan)
 
 # Configure CORS
 origins = [
@@ -1,15 +1,312 @@
+import copy
+import json
 import logging
+import os
+import shutil
+import threading
+from typing import Any, Dict, List, Tuple
+
+from opengin.tracer import formats
+from opengin.tracer.agents.continuation import ContinuationIndex, column_signature, is_header_row
+from opengin.tracer.agents.dedup import RowDeduplicator
+from opengin.tracer.agents.normalizer import merge_column_info
 
 logger = logging.getLogger(__name__)
 
 
+class IncrementalAggregator:
+    """
+    Running aggregation state for a single pipeline run.
+
+    Page results can be handed over as soon as each page finishes, in any order.
+    Out-of-order pages are buffered and consumed strictly in page order, so the
+    merged rows always follow the document order regardless of which page
+    completed first.
+
+    With continuation detection enabled, a table whose header matches (exactly or
+    fuzzily) a table extended on the previous page is merged into it even if the
+    model inferred a different name, and header rows repeated at the top of the
+    continued part are dropped.
+
+    With a deduplicator, rows already aggregated into the same table are dropped.
+
+    With a `spill_dir`, aggregation runs out-of-core: rows are appended to one JSON
+    Lines file per table as pages are consumed, and only table headers, row counts
+    and lookup indexes stay in memory.
+
+    With `settle_after`, tables that were not extended on that many consecutive pages
+    are reported as settled (see `take_settled`), so they can be exported while later
+    pages are still being extracted. A settled table that turns up again on a later
+    page is recorded in `reopened`.
+    """
+
+    def __init__(
+        self,
+        first_page: int = 1,
+        detect_continuations: bool = False,
+        similarity_threshold: float = 0.8,
+        deduplicator: RowDeduplicator = None,
+        spill_dir: str = None,
+        spill_compression: str = None,
+        settle_after: int = None,
+    ):
+        """
+        Initialize an empty aggregation state.
+
+        Args:
+            first_page (int): The page number the document starts at.
+            detect_continuations (bool): Merge tables continued on the next page under a different name.
+            similarity_threshold (float): Minimum column similarity for a fuzzy continuation match.
+            deduplicator (RowDeduplicator, optional): Drops duplicate rows per table.
+            spill_dir (str, optional): Directory for per-table row files. Rows are kept in
+                                       memory if None.
+            spill_compression (str, optional): Compress the row files ('gzip' or 'zstd').
+            settle_after (int, optional): Pages without new rows after which a table is
+                                          reported as settled. None to not track settling.
+        """
+        # Aggregated tables indexed by (normalized name, column tuple) -> {name, columns, rows, metadata}.
+        # Insertion order is the first-seen order of each table variant.
+        self.aggregated_map = {}
+        # normalized name -> number of schema variants seen so far
+        self._variant_counts = {}
+        self.next_page = first_page
+        self.pages_consumed = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+
+        self.continuations = ContinuationIndex(similarity_threshold) if detect_continuations else None
+        self.continuations_merged = 0
+        self.header_rows_stripped = 0
+        self.deduplicator = deduplicator
+        self.spill_dir = spill_dir
+        self.spill_suffix = ".jsonl" + formats.compression_suffix(spill_compression)
+
+        self.settle_after = settle_after
+        # Table names by position (first-seen order), and the position of each table key
+        self._names = []
+        self._positions = {}
+        # key -> last page that extended the table, for tables not settled yet
+        self._open_tables = {}
+        self._settled = set()
+        # Positions of tables extended again after they were reported as settled
+        self.reopened = set()
+        self._ready = []
+
+    def add_page(self, page_num: int, page_data: Dict[str, Any]):
+        """
+        Hands a finished page result to the aggregator.
+
+        The page is merged immediately if it is the next page in order, otherwise it
+        is buffered until all pages before it have arrived. Failed pages must be
+        added as well (their data simply has no tables) so the order can advance.
+
+        Args:
+            page_num (int): The page number of the result.
+            page_data (Dict[str, Any]): The page result as saved by Agent 1.
+        """
+        with self._lock:
+            self._pending[page_num] = page_data
+            while self.next_page in self._pending:
+                self._consume(self.next_page, self._pending.pop(self.next_page))
+                if self.settle_after is not None:
+                    self._settle(self.next_page)
+                self.next_page += 1
+
+    def take_settled(self) -> List[Tuple[int, Dict[str, Any], List[str]]]:
+        """
+        Returns the tables settled since the last call.
+
+        Each entry is (position, table, names): the table's position in the aggregated
+        result, a snapshot of the table as `finish` would return it (spilled tables
+        carry the 'row_count' of rows written so far), and the names of all tables up
+        to and including it, in order.
+        """
+        with self._lock:
+            ready, self._ready = self._ready, []
+            return ready
+
+    def _settle(self, page_num: int):
+        for key, last_page in list(self._open_tables.items()):
+            if last_page > page_num - self.settle_after:
+                continue
+            del self._open_tables[key]
+            self._settled.add(key)
+            position = self._positions[key]
+            data = self.aggregated_map[key]
+            # Snapshot the table, as it is exported on another thread while pages keep coming
+            snapshot = copy.deepcopy({k: v for k, v in data.items() if k != "rows"})
+            snapshot["rows"] = list(data["rows"])
+            self._ready.append((position, self._build_table(key, snapshot), self._names[: position + 1]))
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """
+        Consumes any pages still buffered behind a gap and returns the aggregated tables.
+
+        Returns:
+            List[Dict[str, Any]]: The consolidated tables in first-seen order.
+        """
+        with self._lock:
+            for page_num in sorted(self._pending):
+                self._consume(page_num, self._pending.pop(page_num))
+                self.next_page = page_num + 1
+            tables = [self._build_table(key, data) for key, data in self.aggregated_map.items()]
+            if self.deduplicator is not None:
+                self.deduplicator.close()
+            return tables
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns counters describing what the aggregator merged or dropped.
+        """
+        stats = {
+            "pages_consumed": self.pages_consumed,
+            "tables": len(self.aggregated_map),
+        }
+        if self.continuations is not None:
+            stats["continuations_merged"] = self.continuations_merged
+            stats["header_rows_stripped"] = self.header_rows_stripped
+        if self.deduplicator is not None:
+            stats["duplicate_rows_dropped"] = self.deduplicator.total_dropped
+        if self.settle_after is not None:
+            stats["tables_settled_early"] = len(self._settled)
+            stats["tables_reopened"] = len(self.reopened)
+        return stats
+
+    def _consume(self, page_num: int, page_data: Dict[str, Any]):
+        self.pages_consumed += 1
+        aggregated_map = self.aggregated_map
+        continuations = self.continuations
+        if continuations is not None:
+            continuations.prune(page_num)
+
+        for table in page_data.get("tables", []):
+            orig_name = table.get("name", "Untitled")
+            columns = table.get("columns", [])
+            rows = table.get("rows", [])
+            metadata = table.get("metadata", None)
+
+            # Normalize Name
+            norm_name = orig_name.strip().lower()
+
+            # Find matching table by name AND schema
+            key = (norm_name, self._column_key(columns))
+
+            if key not in aggregated_map and continuations is not None:
+                continued = continuations.find(columns, page_num)
+                if continued is not None:
+                    logger.info(
+                        f"Table '{orig_name}' on page {page_num} continues "
+                        f"'{aggregated_map[continued]['name']}' from page {page_num - 1}."
+                    )
+                    key = continued
+                    self.continuations_merged += 1
+
+            if key not in aggregated_map:
+                variant = self._variant_counts.get(norm_name, 0)
+                self._variant_counts[norm_name] = variant + 1
+
+                if variant:
+                    # Schema mismatch with every known variant
+                    logger.warning(
+                        f"Schema mismatch for table '{orig_name}' (key: {norm_name}). "
+                        f"Got {columns}, which matches none of {variant} known variant(s). Creating variant."
+                    )
+
+                aggregated_map[key] = {
+                    "name": orig_name if variant == 0 else f"{orig_name} ({variant})",
+                    "columns": columns,
+                    "rows": [],
+                    "metadata": metadata,
+                }
+                self._positions[key] = len(self._names)
+                self._names.append(aggregated_map[key]["name"])
+                if self.spill_dir:
+                    aggregated_map[key]["rows_file"] = f"table_{len(aggregated_map)}{self.spill_suffix}"
+                    aggregated_map[key]["row_count"] = 0
+
+            if continuations is not None and rows:
+                rows = self._strip_header_rows(rows, columns, aggregated_map[key]["columns"])
+
+            if self.deduplicator is not None and rows:
+                rows = self.deduplicator.filter(key, aggregated_map[key]["columns"], rows)
+
+            # Append rows
+            if rows and self.spill_dir:
+                self._spill_rows(aggregated_map[key], rows)
+            elif rows:
+                aggregated_map[key]["rows"].extend(rows)
+
+            # Carry over column types and counts from the normalization stage
+            merge_column_info(aggregated_map[key], table)
+
+            if continuations is not None:
+                continuations.update(key, aggregated_map[key]["columns"], page_num)
+
+            if self.settle_after is not None:
+                if key in self._settled:
+                    self._settled.discard(key)
+                    self.reopened.add(self._positions[key])
+                self._open_tables[key] = page_num
+
+    def _spill_rows(self, entry: Dict[str, Any], rows: List[Any]):
+        """
+        Appends a chunk of rows to the table's row file. The file is only held open
+        for the duration of the chunk, so thousands of tables do not exhaust file handles.
+        Compressed row files get one compressed member (frame) per chunk.
+        """
+        with formats.open_artifact(os.path.join(self.spill_dir, entry["rows_file"]), "a") as f:
+            f.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        entry["row_count"] += len(rows)
+
+    def _strip_header_rows(self, rows: List[Any], columns: List[Any], target_columns: List[Any]) -> List[Any]:
+        """
+        Drops leading rows that merely repeat the table header at a page boundary.
+        """
+        signatures = {column_signature(columns), column_signature(target_columns)}
+        start = 0
+        while start < len(rows) and any(is_header_row(rows[start], sig) for sig in signatures):
+            start += 1
+        self.header_rows_stripped += start
+        return rows[start:] if start else rows
+
+    @staticmethod
+    def _column_key(columns: List[Any]) -> tuple:
+        try:
+            key = tuple(columns)
+            hash(key)
+            return key
+        except TypeError:
+            # Columns that are not plain strings (e.g. nested header cells)
+            return tuple(repr(c) for c in columns)
+
+    def _build_table(self, key: tuple, data: Dict[str, Any]) -> Dict[str, Any]:
+        aggregated_table = {
+            "name": data["name"],
+            "columns": data["columns"],
+            "rows": data["rows"],
+            "metadata": data.get("metadata"),
+        }
+        if "rows_file" in data:
+            del aggregated_table["rows"]
+            aggregated_table["rows_file"] = os.path.join(os.path.basename(self.spill_dir), data["rows_file"])
+            aggregated_table["row_count"] = data["row_count"]
+        if "column_types" in data:
+            aggregated_table["column_types"] = data["column_types"]
+            aggregated_table["column_stats"] = data["column_stats"]
+            aggregated_table["normalization"] = data["normalization"]
+        if self.deduplicator is not None:
+            aggregated_table["duplicate_rows_dropped"] = self.deduplicator.dropped.get(key, 0)
+        return aggregated_table
+
+
 class Agent2:
     """
     The Aggregator Agent (Agent 2).
 
     This agent is responsible for consolidating extraction results from multiple pages.
     It identifies tables that span across pages by matching their names (case-insensitive)
-    and merges their rows into a single unified table structure.
+    and merges their rows into a single unified table structure. Optionally, tables that
+    continue on the next page under a different name are detected by their columns.
     """
 
     def __init__(self, fs_manager):
@@ -21,82 +318,94 @@ class Agent2:
         """
         self.fs_manager = fs_manager
 
-    def run(self, pipeline_name: str, run_id: str):
+    def create_aggregator(
+        self, pipeline_name: str, run_id: str, options: dict = None, settle_after: int = None
+    ) -> IncrementalAggregator:
         """
-        Executes the aggregation phase.
-
-        1. Loads intermediate results from all processed pages.
-        2. Groups tables by their normalized name (lowercase, stripped).
-        3. Merges rows for tables with the same name.
-        4. Saves the consolidated list of tables to the 'aggregated' directory.
+        Creates a running aggregation state that can be fed while pages are still being extracted.
 
         Args:
             pipeline_name (str): The name of the pipeline.
             run_id (str): The unique identifier for the run.
+            options (dict, optional): Run options.
+                - 'detect_continuations', 'similarity_threshold': continuation detection.
+                - 'dedup' ('exact' or 'key'), 'dedup_key_columns': duplicate row elimination.
+                - 'dedup_spill' (bool), 'dedup_max_in_memory' (int): spill row hashes of huge
+                  tables to disk in the 'aggregated' directory.
+                - 'out_of_core' (bool): stream rows into per-table files under 'aggregated/tables'
+                  instead of holding them in memory. The files honour the 'compression' option.
+            settle_after (int, optional): Report tables as settled after that many pages
+                                          without new rows (see `IncrementalAggregator.take_settled`).
+
+        Returns:
+            IncrementalAggregator: An empty aggregator.
         """
-        logger.info(f"Agent 2: Starting aggregation for '{pipeline_name}' run '{run_id}'")
+        options = options or {}
 
-        # Load all intermediate results
-        pages_data = self.fs_manager.load_intermediate_results(pipeline_name, run_id)
+        deduplicator = None
+        if options.get("dedup"):
+            spill_dir = None
+            if options.get("dedup_spill"):
+                spill_dir = self.fs_manager.get_aggregated_dir(pipeline_name, run_id)
+            deduplicator = RowDeduplicator(
+                mode=options["dedup"],
+                key_columns=options.get("dedup_key_columns"),
+                spill_dir=spill_dir,
+                max_in_memory=options.get("dedup_max_in_memory", 1_000_000),
+            )
 
-        # Dictionary to hold aggregated tables: normalized_name -> {name, csv_content (list of strings)}
-        aggregated_map = {}
+        spill_dir = None
+        if options.get("out_of_core"):
+            spill_dir = os.path.join(self.fs_manager.get_aggregated_dir(pipeline_name, run_id), "tables")
+            # Start from empty row files if the run is aggregated again
+            shutil.rmtree(spill_dir, ignore_errors=True)
+            os.makedirs(spill_dir)
 
-        for page_data in pages_data:
-            tables = page_data.get("tables", [])
+        return IncrementalAggregator(
+            detect_continuations=options.get("detect_continuations", False),
+            similarity_threshold=options.get("similarity_threshold", 0.8),
+            deduplicator=deduplicator,
+            spill_dir=spill_dir,
+            spill_compression=options.get("compression"),
+            settle_after=settle_after,
+        )
 
-            for table in tables:
-                orig_name = table.get("name", "Untitled")
-                columns = table.get("columns", [])
-                rows = table.get("rows", [])
-                metadata = table.get("metadata", None)
+    def run(self, pipeline_name: str, run_id: str, aggregator: IncrementalAggregator = None):
+        """
+        Executes the aggregation phase.
 
-                # Normalize Name
-                norm_name = orig_name.strip().lower()
+        1. Loads intermediate results from all processed pages, unless an aggregator that
+           was already fed during scanning is given.
+        2. Groups tables by their normalized name (lowercase, stripped).
+        3. Merges rows for tables with the same name.
+        4. Saves the consolidated list of tables to the 'aggregated' directory.
 
-                # Find matching table by name AND schema
-                key = norm_name
-                counter = 1
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+            aggregator (IncrementalAggregator, optional): Aggregation state built incrementally
+                                                          while pages completed.
+        """
+        logger.info(f"Agent 2: Starting aggregation for '{pipeline_name}' run '{run_id}'")
 
-                while key in aggregated_map:
-                    existing_cols = aggregated_map[key]["columns"]
-                    if columns == existing_cols:
-                        break  # Found a match with same name and schema
+        if aggregator is None:
+            # Load all intermediate results
+            options = self.fs_manager.load_metadata(pipeline_name, run_id).get("options", {})
+            aggregator = self.create_aggregator(pipeline_name, run_id, options)
+            for page_num, page_data in self.fs_manager.iter_intermediate_results(pipeline_name, run_id):
+                aggregator.add_page(page_num, page_data)
 
-                    # Schema mismatch, try next variant
-                    logger.warning(
-                        f"Schema mismatch for table '{orig_name}' (key: {key}). "
-                        f"Expected {existing_cols}, got {columns}. Creating variant."
-                    )
-                    key = f"{norm_name}_{counter}"
-                    counter += 1
-
-                if key not in aggregated_map:
-                    aggregated_map[key] = {
-                        "name": orig_name if counter == 1 else f"{orig_name} ({counter-1})",
-                        "columns": columns,
-                        "rows": [],
-                        "metadata": metadata,
-                    }
-
-                # Append rows
-                if rows:
-                    aggregated_map[key]["rows"].extend(rows)
-
-        # Construct final aggregated list
-        aggregated_tables = []
-        for norm_name, data in aggregated_map.items():
-            aggregated_tables.append(
-                {
-                    "name": data["name"],
-                    "columns": data["columns"],
-                    "rows": data["rows"],
-                    "metadata": data.get("metadata"),
-                }
-            )
+        aggregated_tables = aggregator.finish()
 
         # Save aggregated result
         self.fs_manager.save_aggregated_result(pipeline_name, run_id, aggregated_tables)
+
+        # Record what was merged or dropped along the way
+        stats = aggregator.stats()
+        self.fs_manager.update_metadata(pipeline_name, run_id, {"aggregation": stats})
+        if stats.get("duplicate_rows_dropped"):
+            logger.info(f"Agent 2: Dropped {stats['duplicate_rows_dropped']} duplicate rows")
+
         msg = (
             f"Agent 2: Completed aggregation for '{pipeline_name}' run '{run_id}'. "
             f"Total tables: {len(aggregated_tables)}"
@@ -0,0 +1,248 @@
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from opengin.tracer.agents.normalizer import COLUMN_TYPES, coerce_column, coerce_values, widen_type
+
+logger = logging.getLogger(__name__)
+
+# Columnar export formats and the file extension each one is written with
+COLUMNAR_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+DEFAULT_ROW_GROUP_SIZE = 64 * 1024
+DEFAULT_PARQUET_COMPRESSION = "snappy"
+PARQUET_COMPRESSIONS = ("none", "snappy", "gzip", "zstd", "brotli", "lz4")
+ARROW_COMPRESSIONS = ("none", "lz4", "zstd")
+
+# Keys of the file (schema) metadata written into every columnar file
+METADATA_KEY = b"opengin.metadata"
+TABLE_KEY = b"opengin.table"
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "Parquet/Arrow export requires pyarrow. Install it with: pip install 'opengin[export]'"
+        ) from e
+    return pyarrow
+
+
+def field_names(columns: List[Any], ignore_case: bool = False) -> List[str]:
+    """
+    Turns a table header into unique, non-empty field names.
+
+    Extracted headers may be blank or repeated, which columnar schemas do not allow
+    in practice, so blanks become 'column_<n>' and repeats get a '_<n>' suffix.
+
+    Args:
+        columns (List[Any]): The table header.
+        ignore_case (bool): Treat names differing only in case as repeats, as SQL does.
+    """
+    names = []
+    seen = set()
+    for i, column in enumerate(columns):
+        base = str(column).strip() if column is not None else ""
+        base = base or f"column_{i + 1}"
+        name = base
+        counter = 1
+        while (name.lower() if ignore_case else name) in seen:
+            name = f"{base}_{counter}"
+            counter += 1
+        seen.add(name.lower() if ignore_case else name)
+        names.append(name)
+    return names
+
+
+class ColumnarWriter:
+    """
+    Writes a single table to a Parquet or Arrow IPC file in row groups.
+
+    Rows are buffered until `row_group_size` rows are available, then converted to
+    one Arrow record batch. Column types come from the table's 'column_types' (set
+    by the normalizer) or are inferred from the first row group. A later row group
+    holding values that do not fit widens the column (integer to number, anything
+    to string), and the row groups already written are rewritten with the wider
+    schema, so no value is lost. The table header and its metadata are embedded as
+    JSON in the file metadata.
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        export_format: str,
+        table: Dict[str, Any],
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        compression: Optional[str] = None,
+    ):
+        """
+        Initialize the writer. The file is created when the first row group is flushed.
+
+        Args:
+            filepath (str): The destination path.
+            export_format (str): 'parquet' or 'arrow'.
+            table (Dict[str, Any]): The aggregated table header ('name', 'columns', ...).
+            row_group_size (int): Rows per Parquet row group / Arrow record batch.
+            compression (str, optional): Codec name. Defaults to snappy for Parquet and
+                                         no compression for Arrow IPC.
+
+        Raises:
+            ImportError: If pyarrow is not installed.
+            ValueError: If the format or compression is not supported.
+        """
+        self.pa = _require_pyarrow()
+        if export_format not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unknown columnar format '{export_format}'. Expected one of {tuple(COLUMNAR_FORMATS)}.")
+        supported = PARQUET_COMPRESSIONS if export_format == "parquet" else ARROW_COMPRESSIONS
+        if compression and compression not in supported:
+            raise ValueError(f"Compression '{compression}' is not supported for {export_format}: {supported}.")
+
+        self.filepath = filepath
+        self.export_format = export_format
+        self.table = table
+        self.row_group_size = max(1, row_group_size)
+        self.compression = compression
+        self.columns = table.get("columns", [])
+        self.column_types = self._valid_types(table.get("column_types"))
+        self.row_count = 0
+        self._buffer = []
+        self._schema = None
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, rows: List[List[Any]]):
+        """
+        Appends rows, flushing a row group whenever enough rows are buffered.
+        """
+        self._buffer.extend(rows)
+        while len(self._buffer) >= self.row_group_size:
+            chunk = self._buffer[: self.row_group_size]
+            del self._buffer[: self.row_group_size]
+            self._flush(chunk)
+
+    def close(self) -> int:
+        """
+        Flushes the remaining rows and closes the file.
+
+        Returns:
+            int: The number of data rows written.
+        """
+        if self._buffer or self._writer is None:
+            chunk, self._buffer = self._buffer, []
+            self._flush(chunk)
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        return self.row_count
+
+    def _valid_types(self, column_types: Optional[List[str]]) -> Optional[List[str]]:
+        if column_types and len(column_types) == len(self.columns) and all(t in COLUMN_TYPES for t in column_types):
+            return list(column_types)
+        return None
+
+    def _transpose(self, rows: List[List[Any]]) -> List[List[Any]]:
+        width = len(self.columns)
+        columns = [[] for _ in range(width)]
+        for row in rows:
+            if not isinstance(row, list):
+                row = [row]
+            for i in range(width):
+                columns[i].append(row[i] if i < len(row) else None)
+        return columns
+
+    def _flush(self, rows: List[List[Any]]):
+        raw_columns = self._transpose(rows)
+
+        column_types = []
+        arrays = []
+        for i, values in enumerate(raw_columns):
+            column_type = self.column_types[i] if self.column_types else None
+            coerced, failures = coerce_values(values, column_type) if column_type else (None, 1)
+            if failures:
+                column_type = widen_type(column_type, coerce_column(values, numeric_threshold=1.0)[0])
+                coerced, _ = coerce_values(values, column_type)
+            column_types.append(column_type)
+            arrays.append(coerced)
+
+        if self._writer is None:
+            self.column_types = column_types
+            self._open()
+        elif column_types != self.column_types:
+            self._rewrite(column_types)
+        batch = self.pa.RecordBatch.from_arrays(
+            [self.pa.array(values, type=field.type) for values, field in zip(arrays, self._schema)],
+            schema=self._schema,
+        )
+        self._write_batch(batch)
+        self.row_count += len(rows)
+
+    def _write_batch(self, batch):
+        if self.export_format == "parquet":
+            self._writer.write_batch(batch, row_group_size=self.row_group_size)
+        else:
+            self._writer.write_batch(batch)
+
+    def _rewrite(self, column_types: List[str]):
+        # The schema of an open file cannot change, so the rows written so far are
+        # copied into a new file with the wider column types
+        widened = [
+            name for name, old, new in zip(field_names(self.columns), self.column_types, column_types) if old != new
+        ]
+        logger.info(f"{self.filepath}: Widening columns {widened}, rewriting {self.row_count} rows")
+        self._writer.close()
+        self._writer = None
+        previous_path = f"{self.filepath}.previous"
+        os.replace(self.filepath, previous_path)
+        try:
+            self.column_types = column_types
+            self._open()
+            for batch in self._read_batches(previous_path):
+                for cast in self.pa.Table.from_batches([batch]).cast(self._schema).to_batches():
+                    self._write_batch(cast)
+        finally:
+            os.remove(previous_path)
+
+    def _read_batches(self, path: str):
+        if self.export_format == "parquet":
+            import pyarrow.parquet as pq
+
+            with pq.ParquetFile(path) as parquet_file:
+                yield from parquet_file.iter_batches(batch_size=self.row_group_size)
+        else:
+            import pyarrow.ipc as ipc
+
+            with self.pa.memory_map(path) as source:
+                reader = ipc.open_file(source)
+                for i in range(reader.num_record_batches):
+                    yield reader.get_batch(i)
+
+    def _open(self):
+        pa = self.pa
+        arrow_types = {"integer": pa.int64(), "number": pa.float64(), "string": pa.string()}
+        header = {k: v for k, v in self.table.items() if k not in ("rows", "metadata")}
+        metadata = {TABLE_KEY: json.dumps(header, ensure_ascii=False, default=str).encode("utf-8")}
+        if self.table.get("metadata"):
+            metadata[METADATA_KEY] = json.dumps(self.table["metadata"], ensure_ascii=False, default=str).encode("utf-8")
+
+        self._schema = pa.schema(
+            [pa.field(name, arrow_types[t]) for name, t in zip(field_names(self.columns), self.column_types)],
+            metadata=metadata,
+        )
+
+        if self.export_format == "parquet":
+            import pyarrow.parquet as pq
+
+            compression = self.compression or DEFAULT_PARQUET_COMPRESSION
+            self._writer = pq.ParquetWriter(self.filepath, self._schema, compression=compression)
+        else:
+            import pyarrow.ipc as ipc
+
+            codec = None if self.compression in (None, "none") else self.compression
+            self._writer = ipc.new_file(self.filepath, self._schema, options=ipc.IpcWriteOptions(compression=codec))
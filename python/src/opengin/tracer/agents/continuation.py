@@ -0,0 +1,128 @@
+import re
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from typing import Any, Hashable, List, Optional, Tuple
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def column_signature(columns: List[Any]) -> Tuple[str, ...]:
+    """
+    Reduces a column list to a comparable signature.
+
+    Each header is lower-cased and stripped of whitespace and punctuation, so
+    "Amount (Rs.)" and "amount rs" produce the same token.
+    """
+    return tuple(_NON_ALNUM.sub("", str(c).lower()) for c in columns)
+
+
+def signature_similarity(left: Tuple[str, ...], right: Tuple[str, ...]) -> float:
+    """
+    Positional similarity of two column signatures of the same width, between 0 and 1.
+    """
+    if len(left) != len(right):
+        return 0.0
+    if not left:
+        return 1.0
+    total = 0.0
+    for a, b in zip(left, right):
+        total += 1.0 if a == b else SequenceMatcher(None, a, b).ratio()
+    return total / len(left)
+
+
+def is_header_row(row: List[Any], signature: Tuple[str, ...]) -> bool:
+    """
+    Returns True if a data row is a repetition of the table header.
+    """
+    return bool(signature) and isinstance(row, list) and column_signature(row) == signature
+
+
+class ContinuationIndex:
+    """
+    Similarity index over the tables that were extended on the most recent pages.
+
+    A table that ends on page N can only be continued on page N+1, so entries older
+    than that are pruned as pages advance. Candidates are found through an exact
+    signature lookup first, then through an inverted index from column tokens to
+    tables, so only tables sharing at least one header are ever compared.
+    """
+
+    def __init__(self, threshold: float = 0.8):
+        """
+        Initialize an empty index.
+
+        Args:
+            threshold (float): Minimum positional column similarity for a fuzzy match.
+        """
+        self.threshold = threshold
+        self._entries = {}
+        self._by_signature = defaultdict(set)
+        self._by_token = defaultdict(set)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def update(self, key: Hashable, columns: List[Any], page_num: int):
+        """
+        Records that the table `key` (with header `columns`) received rows on `page_num`.
+        """
+        self._remove(key)
+        signature = column_signature(columns)
+        self._entries[key] = (page_num, signature)
+        self._by_signature[signature].add(key)
+        for token in set(signature):
+            self._by_token[token].add(key)
+
+    def prune(self, page_num: int):
+        """
+        Drops tables that can no longer be continued on `page_num` or later.
+        """
+        stale = [key for key, (last_page, _) in self._entries.items() if last_page < page_num - 1]
+        for key in stale:
+            self._remove(key)
+
+    def find(self, columns: List[Any], page_num: int) -> Optional[Hashable]:
+        """
+        Finds the table from the previous page that a table on `page_num` continues.
+
+        Args:
+            columns (List[Any]): The header of the table found on `page_num`.
+            page_num (int): The page the table was found on.
+
+        Returns:
+            Hashable: The key of the continued table, or None.
+        """
+        signature = column_signature(columns)
+
+        for key in self._by_signature.get(signature, ()):
+            if self._entries[key][0] == page_num - 1:
+                return key
+
+        shared = Counter()
+        for token in set(signature):
+            for key in self._by_token.get(token, ()):
+                shared[key] += 1
+
+        best_key = None
+        best_score = 0.0
+        for key, _ in shared.most_common():
+            last_page, other = self._entries[key]
+            if last_page != page_num - 1 or len(other) != len(signature):
+                continue
+            score = signature_similarity(signature, other)
+            if score >= self.threshold and score > best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        _, signature = entry
+        self._by_signature[signature].discard(key)
+        if not self._by_signature[signature]:
+            del self._by_signature[signature]
+        for token in set(signature):
+            self._by_token[token].discard(key)
+            if not self._by_token[token]:
+                del self._by_token[token]
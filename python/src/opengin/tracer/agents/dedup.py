@@ -0,0 +1,178 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from typing import Any, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEDUP_MODES = ("exact", "key")
+
+
+def row_digest(values: List[Any]) -> int:
+    """
+    Hashes a row (or a projection of it) into a signed 64-bit integer.
+
+    Signed so the value fits an SQLite INTEGER when the hash set spills to disk.
+    """
+    payload = json.dumps(values, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(payload, digest_size=8).digest(), "big", signed=True)
+
+
+def _is_blank(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+class RowHashSet:
+    """
+    A set of 64-bit row digests.
+
+    Digests are kept as plain ints in memory. Once `max_in_memory` digests have been
+    added and a `spill_path` is configured, the set is moved into an on-disk SQLite
+    table and all further lookups go there, so memory stays bounded for huge tables.
+    """
+
+    def __init__(self, spill_path: Optional[str] = None, max_in_memory: int = 1_000_000):
+        self.spill_path = spill_path
+        self.max_in_memory = max_in_memory
+        self._hashes = set()
+        self._db = None
+
+    @property
+    def spilled(self) -> bool:
+        return self._db is not None
+
+    def add(self, digest: int) -> bool:
+        """
+        Adds a digest to the set.
+
+        Returns:
+            bool: True if the digest was not in the set yet.
+        """
+        if self._db is not None:
+            cursor = self._db.execute("INSERT OR IGNORE INTO hashes (h) VALUES (?)", (digest,))
+            return cursor.rowcount == 1
+
+        if digest in self._hashes:
+            return False
+        self._hashes.add(digest)
+        if self.spill_path and len(self._hashes) >= self.max_in_memory:
+            self._spill()
+        return True
+
+    def close(self):
+        """
+        Releases the in-memory set and removes the spill file, if any.
+        """
+        self._hashes = set()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+            for suffix in ("", "-journal"):
+                if os.path.exists(self.spill_path + suffix):
+                    os.remove(self.spill_path + suffix)
+
+    def _spill(self):
+        logger.info(f"Row hash set reached {len(self._hashes)} entries, spilling to {self.spill_path}")
+        self._db = sqlite3.connect(self.spill_path)
+        self._db.execute("PRAGMA journal_mode=OFF")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.execute("CREATE TABLE IF NOT EXISTS hashes (h INTEGER PRIMARY KEY) WITHOUT ROWID")
+        self._db.executemany("INSERT OR IGNORE INTO hashes (h) VALUES (?)", ((h,) for h in self._hashes))
+        self._hashes = set()
+
+
+class RowDeduplicator:
+    """
+    Drops rows that were already aggregated into the same table.
+
+    In 'exact' mode the whole row is compared. In 'key' mode only the configured
+    key columns are compared (case-insensitive column names); tables that lack
+    any of the key columns, and rows whose key cells are all blank, fall back to
+    exact comparison.
+    """
+
+    def __init__(
+        self,
+        mode: str = "exact",
+        key_columns: Optional[List[str]] = None,
+        spill_dir: Optional[str] = None,
+        max_in_memory: int = 1_000_000,
+    ):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            mode (str): 'exact' or 'key'.
+            key_columns (List[str], optional): Column names identifying a row in 'key' mode.
+            spill_dir (str, optional): Directory for on-disk hash sets. No spilling if None.
+            max_in_memory (int): Digests held in memory per table before spilling.
+
+        Raises:
+            ValueError: If the mode is unknown or 'key' mode has no key columns.
+        """
+        if mode not in DEDUP_MODES:
+            raise ValueError(f"Unknown dedup mode '{mode}'. Expected one of {DEDUP_MODES}.")
+        if mode == "key" and not key_columns:
+            raise ValueError("Dedup mode 'key' requires at least one key column.")
+
+        self.mode = mode
+        self.key_columns = [c.strip().lower() for c in key_columns or []]
+        self.spill_dir = spill_dir
+        self.max_in_memory = max_in_memory
+        self.dropped: Dict[Hashable, int] = {}
+        self._sets: Dict[Hashable, RowHashSet] = {}
+        self._projections: Dict[Hashable, Optional[List[int]]] = {}
+
+    @property
+    def total_dropped(self) -> int:
+        return sum(self.dropped.values())
+
+    def filter(self, table_key: Hashable, columns: List[Any], rows: List[Any]) -> List[Any]:
+        """
+        Returns the rows of a chunk that have not been seen for `table_key` before.
+
+        Duplicates inside the chunk itself are dropped as well.
+        """
+        hashes = self._sets.get(table_key)
+        if hashes is None:
+            spill_path = None
+            if self.spill_dir:
+                spill_path = os.path.join(self.spill_dir, f"dedup_{len(self._sets)}.sqlite")
+            hashes = self._sets[table_key] = RowHashSet(spill_path, self.max_in_memory)
+            self._projections[table_key] = self._projection(columns)
+
+        projection = self._projections[table_key]
+        kept = []
+        for row in rows:
+            values = row
+            if projection is not None and isinstance(row, list):
+                key = [row[i] if i < len(row) else None for i in projection]
+                # Rows with a blank key are not identified by it and are compared whole
+                if not all(_is_blank(v) for v in key):
+                    values = key
+            if hashes.add(row_digest(values)):
+                kept.append(row)
+
+        dropped = len(rows) - len(kept)
+        if dropped:
+            self.dropped[table_key] = self.dropped.get(table_key, 0) + dropped
+        return kept
+
+    def close(self):
+        """
+        Frees all hash sets and removes their spill files.
+        """
+        for hashes in self._sets.values():
+            hashes.close()
+        self._sets = {}
+
+    def _projection(self, columns: List[Any]) -> Optional[List[int]]:
+        if self.mode != "key":
+            return None
+        lookup = {str(c).strip().lower(): i for i, c in enumerate(columns)}
+        if not all(c in lookup for c in self.key_columns):
+            logger.warning(f"Key columns {self.key_columns} not all present in {columns}; using exact dedup.")
+            return None
+        return [lookup[c] for c in self.key_columns]
@@ -1,11 +1,280 @@
 import csv
-import io
 import json
 import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Sequence, Tuple
+
+from opengin.tracer import formats
+from opengin.tracer.agents.columnar import COLUMNAR_FORMATS, DEFAULT_ROW_GROUP_SIZE, ColumnarWriter
+from opengin.tracer.agents.sqlite_export import SQLITE_FILENAME, SqliteExporter, SqliteTableWriter
 
 logger = logging.getLogger(__name__)
 
+# Write buffer used for CSV files unless the 'csv_buffer_size' run option says otherwise
+DEFAULT_CSV_BUFFER_SIZE = 1024 * 1024
+
+EXPORT_FORMATS = ("csv",) + tuple(COLUMNAR_FORMATS) + ("sqlite",)
+# Run metadata key listing the files the run's export planned in the 'output' directory
+OUTPUT_FILES_KEY = "output_files"
+# Formats written as one file per table; 'sqlite' writes all tables into SQLITE_FILENAME
+EXPORT_EXTENSIONS = {"csv": ".csv", **COLUMNAR_FORMATS}
+
+
+class CsvWriter:
+    """
+    Streams a table into a CSV file.
+
+    Rows are written straight into a buffered file handle as they arrive, so memory
+    use does not depend on the size of the table.
+    """
+
+    def __init__(self, filepath: str, columns: List[Any], buffer_size: int = DEFAULT_CSV_BUFFER_SIZE):
+        """
+        Opens the file and writes the header row (skipped if empty).
+
+        Args:
+            filepath (str): The destination path.
+            columns (List[Any]): The header row.
+            buffer_size (int): Size in bytes of the file write buffer.
+        """
+        self.filepath = filepath
+        self.row_count = 0
+        self._file = formats.open_artifact(filepath, "w", newline="", buffering=buffer_size)
+        self._writer = csv.writer(self._file)
+        if columns:
+            self._writer.writerow(columns)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, rows: Iterable[List[Any]]):
+        for row in rows:
+            self._writer.writerow(row)
+            self.row_count += 1
+
+    def close(self) -> int:
+        """
+        Closes the file.
+
+        Returns:
+            int: The number of data rows written.
+        """
+        if not self._file.closed:
+            self._file.close()
+        return self.row_count
+
+
+def write_csv(filepath: str, columns: List[Any], rows: Iterable[List[Any]], buffer_size: int = DEFAULT_CSV_BUFFER_SIZE):
+    """
+    Streams a table into a CSV file.
+
+    Args:
+        filepath (str): The destination path.
+        columns (List[Any]): The header row. Skipped if empty.
+        rows (Iterable[List[Any]]): The data rows, typically a lazy iterator.
+        buffer_size (int): Size in bytes of the file write buffer.
+
+    Returns:
+        int: The number of data rows written.
+    """
+    with CsvWriter(filepath, columns, buffer_size) as writer:
+        writer.write(rows)
+    return writer.row_count
+
+
+def sanitize_table_name(name: str) -> str:
+    """
+    Turns a table name into a filename stem: lower-case, spaces to underscores,
+    and only alphanumerics, '_' and '-' kept.
+    """
+    table_name = (name or "untitled").replace(" ", "_").lower()
+    return "".join(c for c in table_name if c.isalnum() or c in ("_", "-"))
+
+
+class FilenamePlanner:
+    """
+    Hands out unique output filename stems without touching the filesystem.
+
+    The planner is seeded once with the files already in the output directory and
+    records every stem it hands out, so colliding table names become 'name',
+    'name_1', 'name_2', ... exactly as if each file had been probed on disk.
+    """
+
+    def __init__(self, existing: Iterable[str], suffixes: List[str]):
+        """
+        Args:
+            existing (Iterable[str]): Filenames already present in the output directory.
+            suffixes (List[str]): Suffixes written for every stem, e.g. ['.csv', '.parquet'].
+        """
+        self.taken = set(existing)
+        self.suffixes = suffixes
+
+    def reserve(self, table_name: str) -> str:
+        """
+        Returns an unused filename stem for a table and marks it as used.
+        """
+        stem = sanitize_table_name(table_name)
+        base = stem
+        counter = 1
+        while any(f"{base}{suffix}" in self.taken for suffix in self.suffixes):
+            base = f"{stem}_{counter}"
+            counter += 1
+        self.taken.update(f"{base}{suffix}" for suffix in self.suffixes)
+        return base
+
+
+class ExportSession:
+    """
+    The export of one run, which can start before the run has been aggregated.
+
+    Holds the run's export options, the filename planner and the SQLite database.
+    Tables that are final while later pages are still being extracted are written
+    with `export_settled`; `Agent3.run` then writes the remaining tables and closes
+    the session. Filename stems are planned in table order either way, so the output
+    is the same as an export of the finished aggregation. SQLite tables are always
+    written by `Agent3.run`, as a table cannot be rewritten in place in the database.
+
+    The files planned for each table are recorded in the run metadata under
+    'output_files' before they are written. A new session of the same run (a resumed
+    run, or an export run again) removes them first, so only files that do not belong
+    to the run keep their names from being planned.
+    """
+
+    def __init__(self, agent: "Agent3", pipeline_name: str, run_id: str):
+        """
+        Args:
+            agent (Agent3): The exporter writing the tables.
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+
+        Raises:
+            ValueError: If an unknown export format is requested.
+        """
+        fs_manager = agent.fs_manager
+        self.agent = agent
+        self.pipeline_name = pipeline_name
+        self.run_id = run_id
+        self.output_dir = fs_manager.get_output_path(pipeline_name, run_id)
+        self.options = fs_manager.get_run_options(pipeline_name, run_id)
+        self.export_formats = self.options.get("export_formats") or ["csv"]
+        unknown = [f for f in self.export_formats if f not in EXPORT_FORMATS]
+        if unknown:
+            raise ValueError(f"Unknown export format(s) {unknown}. Expected any of {EXPORT_FORMATS}.")
+        self.workers = max(1, int(self.options.get("export_workers", 1)))
+
+        # Files written by an earlier attempt are planned and written again
+        previous = fs_manager.load_metadata(pipeline_name, run_id).get(OUTPUT_FILES_KEY) or []
+        for filename in previous:
+            try:
+                os.remove(os.path.join(self.output_dir, filename))
+            except FileNotFoundError:
+                pass
+        extensions = [agent._extension(f, self.options) for f in self.export_formats if f in EXPORT_EXTENSIONS]
+        self._table_suffixes = list(dict.fromkeys(extensions + [agent._metadata_suffix(self.options)]))
+        self.planner = FilenamePlanner(
+            os.listdir(self.output_dir), extensions or [agent._metadata_suffix(self.options)]
+        )
+        self._output_files = []
+        self.sqlite = None
+        if "sqlite" in self.export_formats:
+            self.sqlite = SqliteExporter(
+                os.path.join(self.output_dir, SQLITE_FILENAME), self.options.get("sqlite_indexes")
+            )
+
+        # Filename stems by table position, and the positions already written ahead of the final export
+        self._stems = []
+        self._exported = set()
+        self._lock = threading.Lock()
+
+    @property
+    def file_formats(self) -> List[str]:
+        return [f for f in self.export_formats if f != "sqlite"]
+
+    def stem(self, position: int, names: Sequence[str]) -> str:
+        """
+        Returns the filename stem of the table at `position`, planning the stems of all
+        tables before it first.
+
+        Args:
+            position (int): The position of the table in the aggregated result.
+            names (Sequence[str]): The names of the tables up to at least `position`.
+        """
+        with self._lock:
+            if len(self._stems) <= position:
+                while len(self._stems) <= position:
+                    base = self.planner.reserve(names[len(self._stems)] or "untitled")
+                    self._stems.append(base)
+                    self._output_files.extend(base + suffix for suffix in self._table_suffixes)
+                self.agent.fs_manager.update_metadata(
+                    self.pipeline_name, self.run_id, {OUTPUT_FILES_KEY: list(self._output_files)}
+                )
+            return self._stems[position]
+
+    def export_settled(self, position: int, table: dict, names: Sequence[str]) -> int:
+        """
+        Writes a table that can no longer grow, before the run is aggregated.
+
+        A failed write is logged and left to `Agent3.run`, which writes the table again.
+
+        Args:
+            position (int): The position of the table in the aggregated result.
+            table (dict): A snapshot of the table. A spilled table is read up to its 'row_count'.
+            names (Sequence[str]): The names of the tables up to `position`.
+
+        Returns:
+            int: The number of data rows exported.
+        """
+        if not self.file_formats:
+            return 0
+        rows = table.get("rows", [])
+        if "rows_file" in table:
+            rows = islice(
+                self.agent.fs_manager.iter_table_rows(self.pipeline_name, self.run_id, table), table["row_count"]
+            )
+        base_filename = self.stem(position, names)
+        try:
+            count = self.agent._export_table(
+                table, rows, self.output_dir, base_filename, self.file_formats, self.options
+            )
+        except Exception as e:
+            logger.warning(f"Agent 3: Early export of '{base_filename}' failed, retrying after aggregation: {e}")
+            return 0
+        with self._lock:
+            self._exported.add(position)
+        return count
+
+    def reopen(self, positions: Iterable[int]):
+        """
+        Marks tables written by `export_settled` as changed since, so `Agent3.run` writes them again.
+        """
+        with self._lock:
+            self._exported.difference_update(positions)
+
+    @property
+    def exported(self) -> List[int]:
+        with self._lock:
+            return sorted(self._exported)
+
+    def remaining_formats(self, position: int) -> List[str]:
+        """
+        Returns the formats `Agent3.run` still has to write for the table at `position`.
+        """
+        with self._lock:
+            if position not in self._exported:
+                return self.export_formats
+        return ["sqlite"] if self.sqlite else []
+
+    def close(self):
+        if self.sqlite:
+            self.sqlite.close()
+            self.sqlite = None
+
 
 class Agent3:
     """
@@ -13,7 +282,8 @@ class Agent3:
 
     This agent is responsible for the final output generation.
     It takes the aggregated table data (from Agent 2) and converts each table
-    into a separate CSV file in the 'output' directory.
+    into a separate CSV file in the 'output' directory, and optionally into
+    Parquet or Arrow IPC files.
     """
 
     def __init__(self, fs_manager):
@@ -25,18 +295,35 @@ class Agent3:
         """
         self.fs_manager = fs_manager
 
-    def run(self, pipeline_name: str, run_id: str):
+    def run(self, pipeline_name: str, run_id: str, session: ExportSession = None):
         """
         Executes the export phase.
 
         1. Loads the aggregated tables from the 'aggregated' directory.
         2. Iterates through each table.
-        3. Sanitizes the table name to create a valid filename.
-        4. Writes the table content (headers and rows) to a CSV file.
+        3. Sanitizes the table name and plans a unique filename for it.
+        4. Streams the table content (headers and rows) into one file per export format.
+           The formats are chosen with the 'export_formats' run option ('csv' by default,
+           'parquet' and 'arrow' need pyarrow). The CSV write buffer size can be set with
+           'csv_buffer_size'; columnar files use 'row_group_size' and 'parquet_compression'
+           or 'arrow_compression'. 'sqlite' loads every table into one database per run,
+           indexed on the 'sqlite_indexes' columns. With the 'compression' run option, CSV
+           and metadata files are compressed as they are written (e.g. 'table.csv.gz').
+
+        With the 'export_workers' run option above 1, tables are written concurrently by a
+        thread pool of that size. Filenames are still planned in table order, so the output
+        is the same as a sequential export.
+
+        Tables already written through `session` are skipped, except in the SQLite database.
 
         Args:
             pipeline_name (str): The name of the pipeline.
             run_id (str): The unique identifier for the run.
+            session (ExportSession, optional): The session the run was exported through while
+                                               it was extracted. Closed when the export ends.
+
+        Raises:
+            ValueError: If an unknown export format is requested.
         """
         logger.info(f"Agent 3: Starting export for '{pipeline_name}' run '{run_id}'")
 
@@ -44,60 +331,170 @@ class Agent3:
         aggregated_path = self.fs_manager.get_aggregated_results_path(pipeline_name, run_id)
         if not os.path.exists(aggregated_path):
             logger.warning("No aggregated tables found to export.")
+            if session:
+                session.close()
             return
 
-        with open(aggregated_path, "r") as f:
-            tables = json.load(f)
+        session = session or self.open_session(pipeline_name, run_id)
+        try:
+            tables = self._pending_tables(session, self.fs_manager.iter_aggregated_tables(pipeline_name, run_id))
+            if session.workers == 1:
+                for table, rows, base_filename, export_formats in tables:
+                    self._export_table(
+                        table, rows, session.output_dir, base_filename, export_formats, session.options, session.sqlite
+                    )
+            else:
+                self._export_parallel(tables, session)
+        finally:
+            session.close()
 
-        output_dir = self.fs_manager.get_output_path(pipeline_name, run_id)
+        # Update metadata to status COMPLETED
+        self.fs_manager.update_metadata(pipeline_name, run_id, {"status": "COMPLETED"})
 
-        for table in tables:
-            table_name = table.get("name", "untitled").replace(" ", "_").lower()
-            # Clean filename
-            table_name = "".join(c for c in table_name if c.isalnum() or c in ("_", "-"))
+        logger.info(f"Agent 3: Completed export for '{pipeline_name}' run '{run_id}'")
 
-            # Ensure unique filename
-            base_filename = table_name
-            extension = ".csv"
-            counter = 1
-            filename = f"{base_filename}{extension}"
-            filepath = os.path.join(output_dir, filename)
+    def open_session(self, pipeline_name: str, run_id: str) -> ExportSession:
+        """
+        Starts the export of a run, so tables can be written before the run is aggregated.
 
-            while os.path.exists(filepath):
-                filename = f"{base_filename}_{counter}{extension}"
-                filepath = os.path.join(output_dir, filename)
-                counter += 1
+        Raises:
+            ValueError: If an unknown export format is requested.
+        """
+        return ExportSession(self, pipeline_name, run_id)
 
-            columns = table.get("columns", [])
-            rows = table.get("rows", [])
+    def _pending_tables(self, session: ExportSession, tables) -> Iterator[Tuple[dict, Iterable, str, List[str]]]:
+        # Pairs each aggregated table with its filename stem and the formats still to be written
+        names = []
+        for position, (table, rows) in enumerate(tables):
+            names.append(table.get("name", "untitled"))
+            base_filename = session.stem(position, names)
+            export_formats = session.remaining_formats(position)
+            if export_formats:
+                yield table, rows, base_filename, export_formats
 
-            output = io.StringIO()
-            writer = csv.writer(output)
+    def _export_parallel(self, tables, session: ExportSession):
+        """
+        Exports tables through a thread pool.
 
-            if columns:
-                writer.writerow(columns)
+        Tables are read in order on the calling thread. Rows that come from a shared
+        stream (or are held in memory) are detached into a list before the next table
+        is read; out-of-core tables keep their lazy row iterator, which opens its own
+        row file. At most two tables per worker are in flight, which bounds memory.
+        """
+        in_flight = threading.BoundedSemaphore(session.workers * 2)
+        failed = threading.Event()
+        futures = []
 
-            if rows:
-                writer.writerows(rows)
+        def finished(future):
+            # A failed table stops the submission of the remaining tables
+            if future.exception() is not None:
+                failed.set()
+            in_flight.release()
 
-            with open(filepath, "w") as f:
-                f.write(output.getvalue())
+        with ThreadPoolExecutor(max_workers=session.workers, thread_name_prefix="export") as executor:
+            try:
+                for table, rows, base_filename, export_formats in tables:
+                    if failed.is_set():
+                        break
+                    if "rows_file" not in table:
+                        rows = list(rows)
+                    in_flight.acquire()
+                    if failed.is_set():
+                        in_flight.release()
+                        break
+                    future = executor.submit(
+                        self._export_table,
+                        table,
+                        rows,
+                        session.output_dir,
+                        base_filename,
+                        export_formats,
+                        session.options,
+                        session.sqlite,
+                    )
+                    future.add_done_callback(finished)
+                    futures.append(future)
+            finally:
+                # Surface the first failure once all submitted tables have finished
+                for future in futures:
+                    future.result()
 
-            logger.info(f"Agent 3: Exported {filename}")
+    def _export_table(
+        self,
+        table: dict,
+        rows: Iterable[List[Any]],
+        output_dir: str,
+        base_filename: str,
+        export_formats: List[str],
+        options: dict,
+        sqlite=None,
+    ) -> int:
+        """
+        Writes one table in every export format, reading its rows once.
 
-            # Export metadata if present
-            metadata_content = table.get("metadata")
-            if metadata_content:
-                metadata_filename = filename.replace(".csv", "_metadata.json")
-                metadata_filepath = os.path.join(output_dir, metadata_filename)
+        Returns:
+            int: The number of data rows exported.
+        """
+        row_group_size = options.get("row_group_size", DEFAULT_ROW_GROUP_SIZE)
+        writers = []
+        try:
+            for export_format in export_formats:
+                writers.append(self._open_writer(export_format, output_dir, base_filename, table, options, sqlite))
+            # Every writer sees the same batches, so the rows are read only once
+            rows = iter(rows)
+            while True:
+                batch = list(islice(rows, row_group_size))
+                if not batch:
+                    break
+                for writer in writers:
+                    writer.write(batch)
+        except BaseException:
+            # A table that failed part way is rolled back in the SQLite database
+            for writer in writers:
+                if isinstance(writer, SqliteTableWriter):
+                    writer.abort()
+                else:
+                    writer.close()
+            raise
+        row_counts = [writer.close() for writer in writers]
 
-                with open(metadata_filepath, "w") as f:
-                    json.dump(metadata_content, f, indent=4)
-                logger.info(f"Agent 3: Exported {metadata_filename}")
+        logger.info(f"Agent 3: Exported '{base_filename}' as {', '.join(export_formats)} ({row_counts[0]} rows)")
 
-        # Update metadata to status COMPLETED
-        metadata = self.fs_manager.load_metadata(pipeline_name, run_id)
-        metadata["status"] = "COMPLETED"
-        self.fs_manager.save_metadata(pipeline_name, run_id, metadata)
+        # Export metadata if present
+        metadata_content = table.get("metadata")
+        if metadata_content:
+            metadata_filename = base_filename + self._metadata_suffix(options)
+            metadata_filepath = os.path.join(output_dir, metadata_filename)
 
-        logger.info(f"Agent 3: Completed export for '{pipeline_name}' run '{run_id}'")
+            with formats.open_artifact(metadata_filepath, "w") as f:
+                json.dump(metadata_content, f, indent=4)
+            logger.info(f"Agent 3: Exported {metadata_filename}")
+
+        return row_counts[0]
+
+    def _open_writer(
+        self, export_format: str, output_dir: str, base_filename: str, table: dict, options: dict, sqlite=None
+    ):
+        if export_format == "sqlite":
+            return sqlite.table_writer(base_filename, table)
+        filepath = os.path.join(output_dir, base_filename + self._extension(export_format, options))
+        if export_format == "csv":
+            return CsvWriter(
+                filepath, table.get("columns", []), options.get("csv_buffer_size", DEFAULT_CSV_BUFFER_SIZE)
+            )
+        return ColumnarWriter(
+            filepath,
+            export_format,
+            table,
+            row_group_size=options.get("row_group_size", DEFAULT_ROW_GROUP_SIZE),
+            compression=options.get(f"{export_format}_compression"),
+        )
+
+    def _extension(self, export_format: str, options: dict) -> str:
+        # Columnar formats compress internally, only CSV gets the run's 'compression'
+        if export_format == "csv":
+            return ".csv" + formats.compression_suffix(options.get("compression"))
+        return EXPORT_EXTENSIONS[export_format]
+
+    def _metadata_suffix(self, options: dict) -> str:
+        return "_metadata.json" + formats.compression_suffix(options.get("compression"))
@@ -0,0 +1,329 @@
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cell values that are treated as missing data regardless of column type
+NULL_TOKENS = frozenset({"", "-", "--", "—", "n/a", "na", "null", "none", "nil"})
+
+# Currency symbols removed from a cell before attempting numeric coercion
+_NUMERIC_STRIP = str.maketrans("", "", "$€£¥₹")
+_CURRENCY_PREFIX = re.compile(r"^(?:rs\.?|lkr|usd|inr)\s*", re.IGNORECASE)
+# Commas are only removed where they separate valid thousands groups, e.g. "1,200,000.50"
+_THOUSANDS = re.compile(r"^[+-]?\d{1,3}(?:,\d{3})+(?:\.\d*)?$")
+# Numbers with a leading zero, like IDs and phone numbers such as "0771234567", are kept as text
+_LEADING_ZERO = re.compile(r"^[+-]?0\d")
+
+COLUMN_TYPES = ("integer", "number", "string")
+
+_INT64_RANGE = (-(2**63), 2**63 - 1)
+
+
+def _is_null(value: Any) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return value.strip().lower() in NULL_TOKENS
+    return False
+
+
+def _as_text(value: Any) -> str:
+    return value.strip() if isinstance(value, str) else str(value)
+
+
+def _parse_number(value: Any) -> Optional[float]:
+    """
+    Parses a single cell as a number, tolerating thousands separators,
+    currency symbols and accounting-style negatives like "(1,200)".
+
+    Separate values that would only parse once merged, like "3, 4" or "1 2", and
+    values with a leading zero, like "0771234567", are not numeric.
+
+    Returns:
+        int | float | None: The parsed value, or None if the cell is not numeric.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+
+    text = _CURRENCY_PREFIX.sub("", str(value).strip()).translate(_NUMERIC_STRIP).strip()
+    negative = False
+    if text.startswith("(") and text.endswith(")"):
+        negative = True
+        text = text[1:-1].strip()
+    if _THOUSANDS.match(text):
+        text = text.replace(",", "")
+    if not text or _LEADING_ZERO.match(text):
+        return None
+
+    try:
+        number = int(text)
+    except ValueError:
+        try:
+            number = float(text)
+        except ValueError:
+            return None
+        if number != number or number in (float("inf"), float("-inf")):
+            return None
+    return -number if negative else number
+
+
+def widen_type(left: Optional[str], right: Optional[str]) -> Optional[str]:
+    """
+    Returns the narrowest column type that can hold values of both types.
+
+    Used when the same table is seen on several pages with different inferred types.
+    """
+    if left is None:
+        return right
+    if right is None:
+        return left
+    return COLUMN_TYPES[max(COLUMN_TYPES.index(left), COLUMN_TYPES.index(right))]
+
+
+def coerce_column(values: List[Any], numeric_threshold: float = 0.9) -> Tuple[str, List[Any], Dict[str, int]]:
+    """
+    Infers the type of a single column and coerces all of its values in one pass.
+
+    Cells of a numeric column that do not parse as numbers keep their (stripped) text
+    and are counted as coercion failures. Columns holding integers beyond the int64
+    range, such as long numeric IDs, are typed as strings so no digits are lost.
+
+    Args:
+        values (List[Any]): The raw cell values of the column.
+        numeric_threshold (float): Fraction of non-null cells that must parse as numbers
+                                   for the column to be typed as numeric.
+
+    Returns:
+        tuple: (column_type, coerced_values, stats) where stats holds the
+               'nulls' and 'coercion_failures' counts for the column.
+    """
+    parsed = []
+    nulls = 0
+    numeric = 0
+    all_int = True
+    fits_int64 = True
+
+    for value in values:
+        if _is_null(value):
+            nulls += 1
+            parsed.append(None)
+            continue
+        number = _parse_number(value)
+        if number is not None:
+            numeric += 1
+            if not isinstance(number, int):
+                all_int = False
+            elif not _INT64_RANGE[0] <= number <= _INT64_RANGE[1]:
+                fits_int64 = False
+        parsed.append(number)
+
+    non_null = len(values) - nulls
+    if non_null == 0:
+        return "string", [None] * len(values), {"nulls": nulls, "coercion_failures": 0}
+
+    if numeric / non_null < numeric_threshold or not fits_int64:
+        coerced = [None if _is_null(v) else _as_text(v) for v in values]
+        return "string", coerced, {"nulls": nulls, "coercion_failures": 0}
+
+    column_type = "integer" if all_int else "number"
+    coerced = [
+        _as_text(value) if number is None and not _is_null(value) else number for value, number in zip(values, parsed)
+    ]
+    return column_type, coerced, {"nulls": nulls, "coercion_failures": non_null - numeric}
+
+
+def coerce_values(values: List[Any], column_type: str, keep_invalid: bool = False) -> Tuple[List[Any], int]:
+    """
+    Coerces the values of a column to an already known type.
+
+    Unlike `coerce_column` the type is not inferred, which lets a writer keep a
+    fixed schema across batches. Values that do not fit the type become None,
+    unless `keep_invalid` is set.
+
+    Args:
+        values (List[Any]): The cell values of the column.
+        column_type (str): One of COLUMN_TYPES.
+        keep_invalid (bool): Keep the text of values that do not fit the type instead of None.
+
+    Returns:
+        tuple: (coerced_values, coercion_failures)
+    """
+    coerced = []
+    failures = 0
+    for value in values:
+        if _is_null(value):
+            coerced.append(None)
+            continue
+        if column_type == "string":
+            coerced.append(_as_text(value))
+            continue
+
+        number = _parse_number(value)
+        if number is not None and column_type == "integer":
+            if isinstance(number, float) and number.is_integer():
+                number = int(number)
+            if not isinstance(number, int) or not _INT64_RANGE[0] <= number <= _INT64_RANGE[1]:
+                number = None
+        elif number is not None:
+            number = float(number)
+
+        if number is None:
+            failures += 1
+            if keep_invalid:
+                number = _as_text(value)
+        coerced.append(number)
+    return coerced, failures
+
+
+def normalize_table(table: Dict[str, Any], numeric_threshold: float = 0.9) -> Dict[str, Any]:
+    """
+    Normalizes the rows of a single extracted table against its column schema.
+
+    1. Pads short rows with nulls and truncates long rows to the number of columns.
+    2. Transposes the rows into columns and coerces each column in bulk.
+    3. Records the inferred column types and per-column null/failure counts.
+
+    Tables without a column list are returned unchanged.
+
+    Args:
+        table (Dict[str, Any]): A table as produced by Agent 1.
+        numeric_threshold (float): See `coerce_column`.
+
+    Returns:
+        Dict[str, Any]: A new table dict with normalized rows and 'column_types',
+                        'column_stats' and 'normalization' entries.
+    """
+    columns = table.get("columns") or []
+    rows = table.get("rows") or []
+    width = len(columns)
+    if not width:
+        return table
+
+    padded = 0
+    truncated = 0
+    shaped = []
+    for row in rows:
+        if not isinstance(row, list):
+            row = [row]
+        if len(row) < width:
+            padded += 1
+            row = row + [None] * (width - len(row))
+        elif len(row) > width:
+            truncated += 1
+            row = row[:width]
+        shaped.append(row)
+
+    column_types = []
+    column_stats = []
+    coerced_columns = []
+    raw_columns = list(zip(*shaped)) if shaped else [()] * width
+    for raw in raw_columns:
+        column_type, coerced, stats = coerce_column(list(raw), numeric_threshold)
+        column_types.append(column_type)
+        column_stats.append(stats)
+        coerced_columns.append(coerced)
+
+    normalized = dict(table)
+    normalized["rows"] = [list(row) for row in zip(*coerced_columns)] if shaped else []
+    normalized["column_types"] = column_types
+    normalized["column_stats"] = column_stats
+    normalized["normalization"] = {"padded_rows": padded, "truncated_rows": truncated}
+    return normalized
+
+
+def normalize_page(page_data: Dict[str, Any], numeric_threshold: float = 0.9) -> Dict[str, Any]:
+    """
+    Normalizes every table of a single page result. Error pages are returned unchanged.
+    """
+    if "tables" not in page_data:
+        return page_data
+    normalized = dict(page_data)
+    normalized["tables"] = [normalize_table(t, numeric_threshold) for t in page_data.get("tables", [])]
+    return normalized
+
+
+def merge_column_info(target: Dict[str, Any], table: Dict[str, Any]):
+    """
+    Folds the normalization info of `table` into `target` when their rows are merged.
+
+    Column types are widened and null/failure counts are summed.
+    """
+    if "column_types" not in table:
+        return
+    if "column_types" not in target:
+        target["column_types"] = list(table["column_types"])
+        target["column_stats"] = [dict(s) for s in table.get("column_stats", [])]
+        target["normalization"] = dict(table.get("normalization", {}))
+        return
+
+    target["column_types"] = [widen_type(a, b) for a, b in zip(target["column_types"], table["column_types"])]
+    for existing, stats in zip(target["column_stats"], table.get("column_stats", [])):
+        for key, value in stats.items():
+            existing[key] = existing.get(key, 0) + value
+    for key, value in table.get("normalization", {}).items():
+        target["normalization"][key] = target["normalization"].get(key, 0) + value
+
+
+class RowNormalizer:
+    """
+    The Normalizer stage.
+
+    Runs between scanning (Agent 1) and aggregation (Agent 2). It rewrites each
+    intermediate page result so that every row matches its table's column count
+    and every column holds values of a single inferred type.
+    """
+
+    def __init__(self, fs_manager):
+        """
+        Initialize the Normalizer.
+
+        Args:
+            fs_manager (FileSystemManager): Instance for handling file operations.
+        """
+        self.fs_manager = fs_manager
+
+    def run(self, pipeline_name: str, run_id: str):
+        """
+        Normalizes all intermediate page results of a run in place.
+
+        The 'numeric_threshold' run option (default 0.9) controls how many cells of a
+        column must parse as numbers for the column to be typed as numeric.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+        """
+        logger.info(f"Normalizer: Starting normalization for '{pipeline_name}' run '{run_id}'")
+        options = self.fs_manager.load_metadata(pipeline_name, run_id).get("options", {})
+        numeric_threshold = options.get("numeric_threshold", 0.9)
+
+        tables = 0
+        for page_num, page_data in self.fs_manager.iter_intermediate_results(pipeline_name, run_id):
+            normalized = self.process_page(pipeline_name, run_id, page_num, page_data, numeric_threshold)
+            tables += len(normalized.get("tables", []))
+
+        logger.info(f"Normalizer: Completed normalization for '{pipeline_name}' run '{run_id}'. Tables: {tables}")
+
+    def process_page(
+        self, pipeline_name: str, run_id: str, page_num: int, page_data: Dict[str, Any], numeric_threshold: float = 0.9
+    ) -> Dict[str, Any]:
+        """
+        Normalizes a single page result and saves it back to the 'intermediate' directory.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+            page_num (int): The page number of the result.
+            page_data (Dict[str, Any]): The page result as saved by Agent 1.
+            numeric_threshold (float): See `coerce_column`.
+
+        Returns:
+            Dict[str, Any]: The normalized page result.
+        """
+        normalized = normalize_page(page_data, numeric_threshold)
+        if normalized is not page_data:
+            self.fs_manager.save_intermediate_result(pipeline_name, run_id, page_num, normalized)
+        return normalized
@@ -1,17 +1,47 @@
+import heapq
 import json
 import logging
 import os
 import shutil
+import sqlite3
+import threading
+import time
 import uuid
+from concurrent.futures import Executor, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
 
+from opengin.tracer import formats
 from opengin.tracer.agents.aggregator import Agent2
 from opengin.tracer.agents.exporter import Agent3
+from opengin.tracer.agents.normalizer import RowNormalizer
 from opengin.tracer.agents.scanner import Agent1
+from opengin.tracer.agents.scheduler import DEFAULT_QUEUE_SIZE, RateLimiter, Stage, StagePipeline
+from opengin.tracer.archive import ARCHIVE_FILENAME, RunArchive, archive_run_directory, unarchive_run_directory
+from opengin.tracer.batch import BatchReport
+from opengin.tracer.blobstore import BLOBS_DIRNAME, BlobStore
+from opengin.tracer.cancellation import CANCEL_FILENAME, CancelToken, RunCancelled, request_cancel
+from opengin.tracer.events import EventBus, ProgressTracker
+from opengin.tracer.jobqueue import JobQueue
+from opengin.tracer.manifest import MANIFEST_FILENAME, RunManifest, VerifyReport, changed_entries
+from opengin.tracer.registry import REGISTRY_FILENAME, RunRegistry
+from opengin.tracer.retention import GarbageCollector, RetentionPolicy, SweepReport, disk_usage
+from opengin.tracer.run_state import RunState, read_json_locked, write_json_atomic
+from opengin.tracer.storage import StorageBackend, StorageError, join_key
+from opengin.tracer.timing import StageTimer
 
 logger = logging.getLogger(__name__)
 
+# Pages extracted concurrently unless the 'scan_workers' run option says otherwise
+DEFAULT_SCAN_WORKERS = 1
+
+# Runs that `Agent0.cancel_run` can stop and that `Agent0.resume_pipeline` can continue
+CANCELLABLE_STATUSES = ("READY", "RUNNING")
+RESUMABLE_STATUSES = ("CANCELLED", "FAILED")
+# Runs whose files no longer change, so replicas can copy them from the storage backend
+FINISHED_STATUSES = ("COMPLETED", "CANCELLED", "FAILED")
+
 
 class FileSystemManager:
     """
@@ -26,21 +56,65 @@ class FileSystemManager:
       /{pipeline_name}/
         /{run_id}/
             metadata.json       # Stores run status, timestamps, and config
+            manifest.json       # Size, mtime and SHA-256 of every other file of the run
             /input/             # Raw input files (e.g., PDFs)
-            /intermediate/      # Per-page extraction results (JSON)
+            /intermediate/      # Per-page extraction results (JSON or JSON Lines, optionally compressed)
+                pages.jsonl.gz  # All page results once compacted by the retention policy
             /aggregated/        # Combined results before final export
+                /tables/        # Per-table row files of out-of-core aggregation (JSON Lines)
             /output/            # Final exported files (CSV, etc.)
+            run.zip             # All of the above except metadata.json and manifest.json, once archived
+
+    The manifest is updated as results are saved and refreshed when a run ends, so
+    `verify_run` checks a run without rereading it and `sync_run` copies only the
+    artifacts that changed.
+
+    Reads of run files go through `run_path_exists`, `list_run_dir` and `open_run_file`,
+    which fall back to the members of `run.zip`, so archived runs are read transparently.
+
+    With a storage backend, the base directory is a local working copy: metadata is
+    written through to the backend, runs are pushed with `sync_run`, and finished runs
+    are fetched from the backend when their files are read, and fetched again once the
+    backend holds a newer sync. The metadata of runs not in progress in this process
+    is read from the backend, so replicas see each other's status changes.
     """
 
-    def __init__(self, base_path: str = "pipelines"):
+    def __init__(self, base_path: str = "pipelines", retention: RetentionPolicy = None, storage: StorageBackend = None):
         """
         Initialize the FileSystemManager.
 
         Args:
             base_path (str): The root directory where all pipelines will be stored.
                              Defaults to "pipelines".
+            retention (RetentionPolicy, optional): What `collect_garbage` removes.
+                                                   Defaults to `RetentionPolicy()`.
+            storage (StorageBackend, optional): Durable storage the local directory is
+                                                mirrored to. None to keep runs on local disk only.
         """
         self.base_path = base_path
+        self.retention = retention or RetentionPolicy()
+        self.storage = storage
+        # (pipeline_name, run_id) -> run options, kept in sync by save_metadata
+        self._options_cache = {}
+        # (pipeline_name, run_id) -> [RunState, open count] for runs in progress
+        self._run_states = {}
+        self._run_states_lock = threading.Lock()
+        # Index of all runs, kept in sync with every metadata write
+        self.registry = RunRegistry(os.path.join(base_path, REGISTRY_FILENAME))
+        # Content-addressed store of input files, linked into run directories
+        self.blobs = BlobStore(os.path.join(base_path, BLOBS_DIRNAME))
+        # archive path -> RunArchive, so the central directory is read once per archive
+        self._archives = {}
+        self._archives_lock = threading.Lock()
+        # run path -> RunManifest of runs in progress, saved when the run state is closed
+        self._manifests = {}
+        self._manifests_lock = threading.Lock()
+        # (pipeline_name, run_id) -> stored manifest the local copy was last fetched at
+        self._fetched_manifests = {}
+        # Per thread: (pipeline_name, run_id) -> stored metadata of the runs in a `reading_run` block
+        self._reads = threading.local()
+        # Runs whose latest metadata could not be written through to the storage backend
+        self._unstored_metadata = set()
 
     def get_pipeline_path(self, pipeline_name: str, run_id: str) -> str:
         """
@@ -90,19 +164,29 @@ class FileSystemManager:
         """
         Saves metadata to the metadata.json file.
 
+        The file is replaced atomically. While a run state is open for the run, the
+        write goes through it and may be coalesced with other updates.
+
         Args:
             pipeline_name (str): The name of the pipeline.
             run_id (str): The unique identifier for the run.
             metadata (Dict[str, Any]): The metadata dictionary to save.
         """
-        path = os.path.join(self.get_pipeline_path(pipeline_name, run_id), "metadata.json")
-        with open(path, "w") as f:
-            json.dump(metadata, f, indent=2)
+        state = self._get_run_state(pipeline_name, run_id)
+        if state is not None:
+            state.replace(metadata)
+        else:
+            self._write_metadata(pipeline_name, run_id, metadata)
+        self._options_cache[(pipeline_name, run_id)] = metadata.get("options", {})
 
     def load_metadata(self, pipeline_name: str, run_id: str) -> Dict[str, Any]:
         """
         Loads metadata from the metadata.json file.
 
+        While a run state is open for the run, a copy of the in-memory state is returned.
+        Otherwise, with a storage backend, the stored metadata is read, as another replica
+        may have updated it; the local file is the fallback.
+
         Args:
             pipeline_name (str): The name of the pipeline.
             run_id (str): The unique identifier for the run.
@@ -110,47 +194,705 @@ class FileSystemManager:
         Returns:
             Dict[str, Any]: The loaded metadata, or an empty dict if file not found.
         """
-        path = os.path.join(self.get_pipeline_path(pipeline_name, run_id), "metadata.json")
+        state = self._get_run_state(pipeline_name, run_id)
+        if state is not None:
+            return state.snapshot()
+        if (pipeline_name, run_id) not in self._unstored_metadata:
+            stored = self._load_stored_metadata(pipeline_name, run_id)
+            if stored:
+                return stored
+        path = self._metadata_path(pipeline_name, run_id)
         if not os.path.exists(path):
             return {}
-        with open(path, "r") as f:
-            return json.load(f)
+        return read_json_locked(path)
+
+    def update_metadata(self, pipeline_name: str, run_id: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Merges `changes` into the run metadata.
+
+        With an open run state this is a single atomic read-modify-write, so stages
+        updating different keys concurrently do not overwrite each other.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+            changes (Dict[str, Any]): The top-level keys to set.
+
+        Returns:
+            Dict[str, Any]: A copy of the updated metadata.
+        """
+        state = self._get_run_state(pipeline_name, run_id)
+        if state is not None:
+            metadata = state.update(changes)
+        else:
+            metadata = self.load_metadata(pipeline_name, run_id)
+            metadata.update(changes)
+            self._write_metadata(pipeline_name, run_id, metadata)
+        self._options_cache[(pipeline_name, run_id)] = metadata.get("options", {})
+        return metadata
+
+    def open_run_state(self, pipeline_name: str, run_id: str) -> RunState:
+        """
+        Starts holding the run's metadata in memory until `close_run_state` is called.
+
+        Calls can be nested; the state is flushed and released when the last user closes it.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+
+        Returns:
+            RunState: The shared state of the run.
+        """
+        key = (pipeline_name, run_id)
+        with self._run_states_lock:
+            entry = self._run_states.get(key)
+            if entry is None:
+                state = RunState(
+                    self._metadata_path(pipeline_name, run_id),
+                    on_write=lambda metadata: self._on_metadata_written(pipeline_name, run_id, metadata),
+                )
+                entry = self._run_states[key] = [state, 0]
+            entry[1] += 1
+            return entry[0]
+
+    def close_run_state(self, pipeline_name: str, run_id: str):
+        """
+        Releases the run state opened with `open_run_state`, flushing pending updates.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+        """
+        key = (pipeline_name, run_id)
+        with self._run_states_lock:
+            entry = self._run_states.get(key)
+            if entry is None:
+                return
+            entry[1] -= 1
+            if entry[1] > 0:
+                entry[0].flush()
+                return
+            del self._run_states[key]
+        entry[0].close()
+        with self._manifests_lock:
+            manifest = self._manifests.pop(self.get_pipeline_path(pipeline_name, run_id), None)
+        if manifest is not None and manifest.dirty:
+            manifest.save()
+
+    def _get_run_state(self, pipeline_name: str, run_id: str):
+        entry = self._run_states.get((pipeline_name, run_id))
+        return entry[0] if entry else None
+
+    def _metadata_path(self, pipeline_name: str, run_id: str) -> str:
+        return os.path.join(self.get_pipeline_path(pipeline_name, run_id), "metadata.json")
+
+    def _write_metadata(self, pipeline_name: str, run_id: str, metadata: Dict[str, Any]):
+        write_json_atomic(self._metadata_path(pipeline_name, run_id), metadata)
+        self._on_metadata_written(pipeline_name, run_id, metadata)
+
+    def _on_metadata_written(self, pipeline_name: str, run_id: str, metadata: Dict[str, Any]):
+        self._register(pipeline_name, run_id, metadata)
+        if self.storage is None:
+            return
+        # Write through, so other replicas see the current status; sync_run retries the rest
+        try:
+            data = json.dumps(metadata, indent=2).encode("utf-8")
+            self.storage.write_bytes(self._storage_key(pipeline_name, run_id, "metadata.json"), data)
+            self._unstored_metadata.discard((pipeline_name, run_id))
+            reading = self._reading_runs()
+            if (pipeline_name, run_id) in reading:
+                reading[(pipeline_name, run_id)] = data
+        except (OSError, StorageError) as e:
+            # Until a write succeeds, the local file is newer than the stored one
+            self._unstored_metadata.add((pipeline_name, run_id))
+            logger.warning(f"Could not store metadata of '{pipeline_name}' run '{run_id}': {e}")
+
+    def _load_stored_metadata(self, pipeline_name: str, run_id: str) -> Dict[str, Any]:
+        if self.storage is None:
+            return {}
+        reading = self._reading_runs()
+        key = (pipeline_name, run_id)
+        if reading.get(key) is not None:
+            return json.loads(reading[key])
+        try:
+            data = self.storage.read_bytes(self._storage_key(pipeline_name, run_id, "metadata.json"))
+            metadata = json.loads(data)
+        except FileNotFoundError:
+            data, metadata = b"{}", {}
+        except (OSError, StorageError, ValueError) as e:
+            logger.warning(f"Could not read stored metadata of '{pipeline_name}' run '{run_id}': {e}")
+            return {}
+        if key in reading:
+            reading[key] = data
+        return metadata
+
+    def _reading_runs(self) -> Dict[Tuple[str, str], Optional[bytes]]:
+        if not hasattr(self._reads, "runs"):
+            self._reads.runs = {}
+        return self._reads.runs
+
+    @contextmanager
+    def reading_run(self, pipeline_name: str, run_id: str):
+        """
+        Groups the reads of a run into one operation, which checks the storage backend once.
+
+        Without a block, every read of a run not open in this process fetches its stored
+        metadata and manifest to pick up syncs of other replicas. Inside the block (on the
+        same thread) the run is refreshed when the block starts, and the stored metadata is
+        read at most once. Nested blocks for the same run share the outer one's check.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+        """
+        reading = self._reading_runs()
+        key = (pipeline_name, run_id)
+        if key in reading:
+            yield
+            return
+        reading[key] = None
+        try:
+            self._refresh_local_copy(pipeline_name, run_id, force=True)
+            yield
+        finally:
+            reading.pop(key, None)
+
+    def _manifest(self, pipeline_name: str, run_id: str) -> RunManifest:
+        # Runs in progress keep their manifest in memory; a run without one gets it built from disk
+        run_path = self.get_pipeline_path(pipeline_name, run_id)
+        with self._manifests_lock:
+            manifest = self._manifests.get(run_path)
+            if manifest is None:
+                manifest = RunManifest.load(run_path)
+                if manifest is None:
+                    manifest = RunManifest(run_path)
+                    manifest.refresh()
+                if self.is_run_open(pipeline_name, run_id):
+                    self._manifests[run_path] = manifest
+            return manifest
+
+    def _save_manifest(self, pipeline_name: str, run_id: str, manifest: RunManifest):
+        if manifest.dirty and not self.is_run_open(pipeline_name, run_id):
+            manifest.save()
+
+    def _record_artifact(self, pipeline_name: str, run_id: str, path: str, removed: List[str] = ()):
+        # Adds a file just written (and drops the files it replaced) to the run manifest
+        run_path = self.get_pipeline_path(pipeline_name, run_id)
+        manifest = self._manifest(pipeline_name, run_id)
+        manifest.record(os.path.relpath(path, run_path).replace(os.sep, "/"))
+        for removed_path in removed:
+            manifest.forget(os.path.relpath(removed_path, run_path).replace(os.sep, "/"))
+        self._save_manifest(pipeline_name, run_id, manifest)
+
+    def refresh_manifest(self, pipeline_name: str, run_id: str) -> List[str]:
+        """
+        Updates the manifest of a run from the files on disk.
+
+        Only files that are new or whose size or mtime changed are hashed.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+
+        Returns:
+            List[str]: The paths, relative to the run directory, that were added, changed or removed.
+        """
+        if not os.path.isdir(self.get_pipeline_path(pipeline_name, run_id)):
+            return []
+        manifest = self._manifest(pipeline_name, run_id)
+        changed = manifest.refresh()
+        self._save_manifest(pipeline_name, run_id, manifest)
+        return changed
+
+    def record_run_files(self, pipeline_name: str, run_id: str):
+        """
+        Brings the manifest of a run up to date after its files were written or removed,
+        and mirrors the changes to the storage backend if there is one.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+        """
+        if self.storage is not None:
+            self.sync_run(pipeline_name, run_id)
+        else:
+            self.refresh_manifest(pipeline_name, run_id)
 
-    def save_input_file(self, pipeline_name: str, run_id: str, file_path: str, filename: str) -> str:
+    def verify_run(self, pipeline_name: str, run_id: str, full: bool = False) -> VerifyReport:
         """
-        Copies the input file to the pipeline's input directory.
+        Checks the files of a run against its manifest.
+
+        Files whose size and mtime match their entry are not read, unless `full` is set.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+            full (bool): Rehash every file.
+
+        Returns:
+            VerifyReport: The files that are missing, modified or not in the manifest.
+
+        Raises:
+            FileNotFoundError: If the run has no manifest.
+        """
+        run_path = self.get_pipeline_path(pipeline_name, run_id)
+        self.fetch_run(pipeline_name, run_id)
+        with self._manifests_lock:
+            manifest = self._manifests.get(run_path)
+        if manifest is None:
+            manifest = RunManifest.load(run_path)
+        if manifest is None:
+            raise FileNotFoundError(f"Run '{run_id}' of '{pipeline_name}' has no manifest")
+        return manifest.verify(full=full)
+
+    def _storage_key(self, pipeline_name: str, run_id: str = None, *parts: str) -> str:
+        return join_key(pipeline_name, run_id or "", *parts)
+
+    def _stored_manifest(self, storage: StorageBackend, prefix: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        try:
+            return json.loads(storage.read_bytes(join_key(prefix, MANIFEST_FILENAME))).get("files", {})
+        except FileNotFoundError:
+            return None
+
+    def sync_run(self, pipeline_name: str, run_id: str, storage: StorageBackend = None) -> int:
+        """
+        Pushes a run to a storage backend, copying only the artifacts that changed.
+
+        The run manifest is refreshed and compared with the manifest stored by the
+        previous sync: new and modified files are uploaded, files removed locally are
+        deleted from the backend, and the metadata and manifest are written last. A run
+        stored without a manifest is uploaded in full.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+            storage (StorageBackend, optional): The backend to push to, e.g. one on another
+                                                host. Defaults to the manager's own backend.
+
+        Returns:
+            int: The number of artifacts uploaded (0 without a storage backend).
+        """
+        storage = storage or self.storage
+        run_path = self.get_pipeline_path(pipeline_name, run_id)
+        if storage is None or not os.path.isdir(run_path):
+            return 0
+        self.refresh_manifest(pipeline_name, run_id)
+        manifest = self._manifest(pipeline_name, run_id)
+        local = manifest.to_dict()["files"]
+        prefix = self._storage_key(pipeline_name, run_id)
+
+        stored = self._stored_manifest(storage, prefix)
+        if stored is None:
+            base = prefix + "/"
+            stored_files = [key[len(base) :] for key in storage.list_keys(prefix) if key.startswith(base)]
+            stored = {rel: {} for rel in stored_files if rel not in (MANIFEST_FILENAME, "metadata.json")}
+        changed = changed_entries(local, stored)
+        removed = sorted(set(stored) - set(local))
+
+        storage.push_files(run_path, prefix, changed)
+        storage.delete_keys([join_key(prefix, rel) for rel in removed])
+        metadata_path = self._metadata_path(pipeline_name, run_id)
+        if os.path.exists(metadata_path):
+            storage.upload_file(metadata_path, join_key(prefix, "metadata.json"))
+        storage.write_bytes(join_key(prefix, MANIFEST_FILENAME), json.dumps(manifest.to_dict(), indent=2).encode())
+        logger.info(
+            f"Stored '{pipeline_name}' run '{run_id}': {len(changed)} changed, {len(removed)} removed, "
+            f"{len(local) - len(changed)} unchanged"
+        )
+        return len(changed)
+
+    def push_run_files(self, pipeline_name: str, run_id: str, paths: List[str]):
+        """
+        Uploads some files of a run to the storage backend, e.g. the pages handed to workers.
+
+        Without a storage backend the files are already where the other processes look
+        for them (a shared volume), and nothing is done.
+        """
+        if self.storage is None:
+            return
+        run_path = self.get_pipeline_path(pipeline_name, run_id)
+        rels = [os.path.relpath(path, run_path).replace(os.sep, "/") for path in paths]
+        self.storage.push_files(run_path, self._storage_key(pipeline_name, run_id), rels)
+
+    def remove_local_copies(self, paths: List[str]):
+        """
+        Removes the local copies of some files of a run that are kept in the storage
+        backend, e.g. the pages and results of a worker once its job is done.
+
+        Without a storage backend the local files are the only copies, and nothing is done.
+        """
+        if self.storage is None:
+            return
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def fetch_run_file(self, pipeline_name: str, run_id: str, rel: str, refresh: bool = False) -> str:
+        """
+        Returns the local path of one file of a run, downloading it from the storage
+        backend if it is missing locally (or always, with `refresh`).
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+            rel (str): The '/'-separated path of the file in the run directory.
+            refresh (bool): Download the file even if it exists locally.
+
+        Raises:
+            FileNotFoundError: If the file is missing and there is no storage backend to fetch it from.
+        """
+        path = os.path.join(self.get_pipeline_path(pipeline_name, run_id), *rel.split("/"))
+        if self.storage is not None and (refresh or not os.path.exists(path)):
+            self.storage.download_file(self._storage_key(pipeline_name, run_id, rel), path)
+        elif not os.path.exists(path):
+            raise FileNotFoundError(f"File '{rel}' of run '{run_id}' not found")
+        return path
+
+    def fetch_run(self, pipeline_name: str, run_id: str, refresh: bool = False) -> bool:
+        """
+        Downloads a run from the storage backend into the local directory, with
+        parallel prefetch of all its files.
+
+        Runs already on local disk are only updated with `refresh`; then only the
+        artifacts whose hash differs from the local manifest are downloaded.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+            refresh (bool): Update the run even if it exists locally.
+
+        Returns:
+            bool: True if the run was downloaded or updated.
+        """
+        run_path = self.get_pipeline_path(pipeline_name, run_id)
+        local_exists = os.path.isdir(run_path)
+        if self.storage is None or (local_exists and not refresh):
+            return False
+        if self.is_run_open(pipeline_name, run_id):
+            return False
+        prefix = self._storage_key(pipeline_name, run_id)
+        stored = self._stored_manifest(self.storage, prefix) if local_exists else None
+
+        if stored is None:
+            count = self.storage.pull_tree(prefix, run_path)
+            if not count:
+                return False
+            logger.info(f"Fetched {count} files of '{pipeline_name}' run '{run_id}' from storage")
+        else:
+            local = self._manifest(pipeline_name, run_id)
+            local.refresh()
+            changed = changed_entries(stored, local.entries)
+            removed = sorted(set(local.entries) - set(stored))
+            self.storage.pull_files(prefix, run_path, changed + ["metadata.json"])
+            for rel in removed:
+                os.remove(os.path.join(run_path, *rel.split("/")))
+            logger.info(
+                f"Updated '{pipeline_name}' run '{run_id}' from storage: {len(changed)} changed, {len(removed)} removed"
+            )
+        self._forget_archive(run_path)
+        # Downloaded files have new mtimes; rebase the manifest on them
+        self.refresh_manifest(pipeline_name, run_id)
+        return True
+
+    def _register(self, pipeline_name: str, run_id: str, metadata: Dict[str, Any]):
+        # The registry is an index only; a failure to update it must not fail the run
+        try:
+            self.registry.upsert(pipeline_name, run_id, metadata)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not update run registry for '{pipeline_name}' run '{run_id}': {e}")
+
+    def _unregister(self, pipeline_name: str, run_id: str = None):
+        # Drop the run(s) from the registry and delete input blobs nobody uses anymore
+        try:
+            self.registry.remove(pipeline_name, run_id)
+            for digest in self.registry.remove_blob_refs(pipeline_name, run_id):
+                self.blobs.remove(digest)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Could not update run registry for '{pipeline_name}': {e}")
+
+    def query_runs(self, **filters) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Lists runs from the registry, backfilling it from the directory tree on first use.
+
+        Args:
+            **filters: Passed to `RunRegistry.query` (pipeline_name, status, since, until,
+                       sort, descending, limit, offset).
+
+        Returns:
+            tuple: (runs, total) as returned by `RunRegistry.query`.
+        """
+        if not self.registry.is_built():
+            self.rebuild_registry()
+        return self.registry.query(**filters)
+
+    def rebuild_registry(self) -> int:
+        """
+        Rebuilds the run registry from the pipelines directory tree.
+
+        Returns:
+            int: The number of runs registered.
+        """
+
+        def scan():
+            for pipeline_name in self.list_pipelines():
+                for run_id in self.list_runs(pipeline_name):
+                    try:
+                        metadata = self.load_metadata(pipeline_name, run_id)
+                    except (OSError, ValueError):
+                        metadata = {}
+                    yield pipeline_name, run_id, metadata
+
+        count = self.registry.rebuild(scan())
+        logger.info(f"Run registry rebuilt with {count} runs")
+        return count
+
+    def save_input_file(
+        self, pipeline_name: str, run_id: str, file_path: str, filename: str, digest: str = None
+    ) -> str:
+        """
+        Stores the input file in the content-addressed blob store and links it into
+        the pipeline's input directory.
+
+        Identical inputs are stored once however many runs use them. The run is
+        recorded as a reference to the blob, and the SHA-256 of the input is saved
+        in the run metadata as 'input_sha256'.
 
         Args:
             pipeline_name (str): The name of the pipeline.
             run_id (str): The unique identifier for the run.
             file_path (str): The source path of the input file.
             filename (str): The destination filename.
+            digest (str, optional): The SHA-256 of the file, if it is already stored
+                                    (e.g. an upload written with `BlobStore.put_stream`).
 
         Returns:
             str: The path to the saved input file within the pipeline structure.
         """
         filename = os.path.basename(filename)
         dest_path = os.path.join(self.get_pipeline_path(pipeline_name, run_id), "input", filename)
-        shutil.copy(file_path, dest_path)
+        if digest is None or not self.blobs.exists(digest):
+            digest = self.blobs.put_file(file_path)
+        # Reference the blob before linking it, so deleting the last other run using it cannot remove it in between
+        try:
+            self.registry.add_blob_ref(digest, pipeline_name, run_id)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not record blob reference for '{pipeline_name}' run '{run_id}': {e}")
+        try:
+            method = self.blobs.link(digest, dest_path)
+        except FileNotFoundError:
+            # The blob was removed before the reference was recorded; store it again
+            digest = self.blobs.put_file(file_path)
+            method = self.blobs.link(digest, dest_path)
+        self._record_artifact(pipeline_name, run_id, dest_path)
+        logger.info(f"Input {filename} ({digest[:12]}) linked into run '{run_id}' by {method}")
+        self.update_metadata(pipeline_name, run_id, {"input_sha256": digest})
         return dest_path
 
-    def save_intermediate_result(self, pipeline_name: str, run_id: str, page_num: int, data: Any):
+    def get_run_options(self, pipeline_name: str, run_id: str) -> Dict[str, Any]:
+        """
+        Returns the per-run options stored in the run metadata.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+
+        Returns:
+            Dict[str, Any]: The options, or an empty dict if none were set.
+        """
+        key = (pipeline_name, run_id)
+        if key not in self._options_cache:
+            self._options_cache[key] = self.load_metadata(pipeline_name, run_id).get("options", {})
+        return self._options_cache[key]
+
+    def _artifact_suffix(self, pipeline_name: str, run_id: str) -> str:
+        options = self.get_run_options(pipeline_name, run_id)
+        return formats.artifact_suffix(options.get("storage_format", "json"), options.get("compression"))
+
+    def save_intermediate_result(
+        self, pipeline_name: str, run_id: str, page_num: int, data: Any, record: bool = True
+    ) -> str:
         """
         Saves extraction results for a specific page.
 
+        The file is written in the run's 'storage_format' ('json' or 'jsonl') and
+        'compression' options. Files of the same page in another format are replaced.
+
         Args:
             pipeline_name (str): The name of the pipeline.
             run_id (str): The unique identifier for the run.
             page_num (int): The page number associated with the data.
             data (Any): The extraction result data (usually a dictionary).
+            record (bool): Record the file in the run manifest. Page workers leave that to
+                           the process running the run (see `record_intermediate_result`).
+
+        Returns:
+            str: The path of the saved file.
         """
-        path = os.path.join(
-            self.get_pipeline_path(pipeline_name, run_id),
-            "intermediate",
-            f"page_{page_num}.json",
-        )
-        with open(path, "w") as f:
-            json.dump(data, f, indent=2)
+        path = self.get_intermediate_result_path(pipeline_name, run_id, page_num)
+        # Workers save pages of runs they only have parts of
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with formats.open_artifact(path, "w") as f:
+            if formats.is_jsonl(path):
+                formats.write_page(f, data)
+            else:
+                json.dump(data, f, indent=2)
+        if record:
+            self.record_intermediate_result(pipeline_name, run_id, path)
+        return path
+
+    def record_intermediate_result(self, pipeline_name: str, run_id: str, path: str):
+        """
+        Records a saved page result in the run manifest, replacing the files of the
+        same page in another format.
+
+        Called for the results of page workers by the process running the run, which
+        alone updates the manifest of the run.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+            path (str): The path of the page file.
+        """
+        intermediate_path, filename = os.path.split(path)
+        page_num = int(formats.PAGE_FILE_PATTERN.match(filename).group(1))
+        replaced = []
+        for existing in os.listdir(intermediate_path):
+            match = formats.PAGE_FILE_PATTERN.match(existing)
+            if match and int(match.group(1)) == page_num and existing != filename:
+                replaced.append(os.path.join(intermediate_path, existing))
+                os.remove(replaced[-1])
+        self._record_artifact(pipeline_name, run_id, path, removed=replaced)
+
+    def get_intermediate_result_path(self, pipeline_name: str, run_id: str, page_num: int) -> str:
+        """
+        Returns the path a page result is saved at, in the run's storage format and compression.
+        """
+        intermediate_path = os.path.join(self.get_pipeline_path(pipeline_name, run_id), "intermediate")
+        return os.path.join(intermediate_path, f"page_{page_num}{self._artifact_suffix(pipeline_name, run_id)}")
+
+    def read_page_file(self, path: str) -> Any:
+        """
+        Reads a page result file, whatever format it was written in.
+        """
+        with self.open_run_file(path) as f:
+            return formats.read_page(f) if formats.is_jsonl(path) else json.load(f)
+
+    def iter_intermediate_results(self, pipeline_name: str, run_id: str) -> Iterator[Tuple[int, Any]]:
+        """
+        Iterates over intermediate page results in page order.
+
+        Page files are read one at a time, whatever format they were written in. Pages
+        of a compacted run are read from the compacted file; a page file saved after
+        compaction takes precedence over the compacted copy of the same page.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+
+        Yields:
+            Tuple[int, Any]: The page number and the data saved for that page.
+        """
+        with self.reading_run(pipeline_name, run_id):
+            intermediate_path = os.path.join(self.get_pipeline_path(pipeline_name, run_id), "intermediate")
+            if not self.run_path_exists(intermediate_path):
+                return
+
+            # Sort by page number to ensure order
+            pages = self._page_files(self.list_run_dir(intermediate_path))
+
+            def read_page_files():
+                for page_num, filename in pages:
+                    yield page_num, self.read_page_file(os.path.join(intermediate_path, filename))
+
+            compacted_path = os.path.join(intermediate_path, formats.COMPACTED_PAGES_FILENAME)
+            if not self.run_path_exists(compacted_path):
+                yield from read_page_files()
+                return
+
+            loose = {page_num for page_num, _ in pages}
+            with self.open_run_file(compacted_path) as f:
+                compacted = ((n, data) for n, data in formats.iter_compacted_pages(f) if n not in loose)
+                yield from heapq.merge(read_page_files(), compacted, key=lambda page: page[0])
+
+    @staticmethod
+    def _page_files(filenames: List[str]) -> List[Tuple[int, str]]:
+        pages = []
+        for filename in filenames:
+            match = formats.PAGE_FILE_PATTERN.match(filename)
+            if match:
+                pages.append((int(match.group(1)), filename))
+        pages.sort()
+        return pages
+
+    def compact_intermediate_results(self, pipeline_name: str, run_id: str) -> int:
+        """
+        Combines the per-page intermediate files of a run into one gzip-compressed
+        JSON Lines file ('intermediate/pages.jsonl.gz') and removes the page files.
+
+        The compacted pages are still returned by `iter_intermediate_results`, so a
+        compacted run can be aggregated again.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+
+        Returns:
+            int: The number of bytes freed.
+        """
+        intermediate_path = os.path.join(self.get_pipeline_path(pipeline_name, run_id), "intermediate")
+        if not os.path.isdir(intermediate_path):
+            return 0
+        pages = self._page_files(os.listdir(intermediate_path))
+        if not pages:
+            return 0
+
+        compacted_path = os.path.join(intermediate_path, formats.COMPACTED_PAGES_FILENAME)
+        paths = [os.path.join(intermediate_path, filename) for _, filename in pages]
+        if os.path.exists(compacted_path):
+            paths.append(compacted_path)
+        size_before = sum(os.path.getsize(path) for path in paths)
+
+        tmp_path = os.path.join(intermediate_path, ".compacting." + formats.COMPACTED_PAGES_FILENAME)
+        try:
+            with formats.open_artifact(tmp_path, "w") as f:
+                for page_num, data in self.iter_intermediate_results(pipeline_name, run_id):
+                    formats.write_compacted_page(f, page_num, data)
+            os.replace(tmp_path, compacted_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        for _, filename in pages:
+            os.remove(os.path.join(intermediate_path, filename))
+        freed = size_before - os.path.getsize(compacted_path)
+        self.record_run_files(pipeline_name, run_id)
+        logger.info(f"Compacted {len(pages)} page files of '{pipeline_name}' run '{run_id}', freed {freed} bytes")
+        return freed
+
+    def remove_page_files(self, pipeline_name: str, run_id: str) -> int:
+        """
+        Removes the single-page PDFs split from the input of a run.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+
+        Returns:
+            int: The number of bytes freed.
+        """
+        pages_dir = self.get_input_pages_dir(pipeline_name, run_id)
+        if not os.path.isdir(pages_dir):
+            return 0
+        freed = disk_usage(pages_dir)
+        shutil.rmtree(pages_dir)
+        self.record_run_files(pipeline_name, run_id)
+        logger.info(f"Removed page files of '{pipeline_name}' run '{run_id}', freed {freed} bytes")
+        return freed
 
     def load_intermediate_results(self, pipeline_name: str, run_id: str) -> List[Any]:
         """
@@ -163,34 +905,121 @@ class FileSystemManager:
         Returns:
             List[Any]: A list of data from all page files, sorted by page number.
         """
-        intermediate_path = os.path.join(self.get_pipeline_path(pipeline_name, run_id), "intermediate")
-        results = []
-        if not os.path.exists(intermediate_path):
-            return results
-
-        # Sort by page number to ensure order
-        files = sorted(
-            [f for f in os.listdir(intermediate_path) if f.startswith("page_") and f.endswith(".json")],
-            key=lambda x: int(x.split("_")[1].split(".")[0]),
-        )
-
-        for filename in files:
-            with open(os.path.join(intermediate_path, filename), "r") as f:
-                results.append(json.load(f))
-        return results
+        return [data for _, data in self.iter_intermediate_results(pipeline_name, run_id)]
 
     def save_aggregated_result(self, pipeline_name: str, run_id: str, data: Any):
         """
         Saves the aggregated results to the 'aggregated' directory.
 
+        In the 'jsonl' storage format, rows of out-of-core tables are streamed from
+        their row files into the single aggregated file, and the row files are removed.
+
         Args:
             pipeline_name (str): The name of the pipeline.
             run_id (str): The unique identifier for the run.
             data (Any): The combined data from all pages.
         """
-        path = os.path.join(self.get_pipeline_path(pipeline_name, run_id), "aggregated", "tables.json")
-        with open(path, "w") as f:
-            json.dump(data, f, indent=2)
+        aggregated_dir = self.get_aggregated_dir(pipeline_name, run_id)
+        filename = formats.AGGREGATED_BASENAME + self._artifact_suffix(pipeline_name, run_id)
+        path = os.path.join(aggregated_dir, filename)
+
+        with formats.open_artifact(path, "w") as f:
+            if formats.is_jsonl(path):
+                tables = (
+                    (
+                        {k: v for k, v in table.items() if k not in ("rows", "rows_file")},
+                        self.iter_table_rows(pipeline_name, run_id, table),
+                    )
+                    for table in data
+                )
+                batch_size = self.get_run_options(pipeline_name, run_id).get("row_batch_size")
+                formats.write_tables(f, tables, batch_size)
+            else:
+                json.dump(data, f, indent=2)
+
+        # Remove aggregated files of other formats, and row files merged into the JSON Lines file
+        replaced = []
+        for existing in os.listdir(aggregated_dir):
+            if existing.startswith(formats.AGGREGATED_BASENAME + ".") and existing != filename:
+                replaced.append(os.path.join(aggregated_dir, existing))
+                os.remove(replaced[-1])
+        tables_dir = os.path.join(aggregated_dir, "tables")
+        if formats.is_jsonl(path) and os.path.isdir(tables_dir):
+            replaced.extend(os.path.join(tables_dir, name) for name in os.listdir(tables_dir))
+            shutil.rmtree(tables_dir, ignore_errors=True)
+        self._record_artifact(pipeline_name, run_id, path, removed=replaced)
+
+    def load_aggregated_result(self, pipeline_name: str, run_id: str) -> List[Dict[str, Any]]:
+        """
+        Loads the aggregated tables of a run.
+
+        Tables aggregated out-of-core in the 'json' format carry a 'rows_file' reference
+        instead of their rows; use `iter_table_rows` to read the rows of any table, or
+        `iter_aggregated_tables` to stream the whole result.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+
+        Returns:
+            List[Dict[str, Any]]: The aggregated tables, or an empty list if there are none.
+        """
+        with self.reading_run(pipeline_name, run_id):
+            path = self.get_aggregated_results_path(pipeline_name, run_id)
+            if not self.run_path_exists(path):
+                return []
+            if formats.is_jsonl(path):
+                return [
+                    dict(table, rows=list(rows)) for table, rows in self.iter_aggregated_tables(pipeline_name, run_id)
+                ]
+            with self.open_run_file(path) as f:
+                return json.load(f)
+
+    def iter_aggregated_tables(
+        self, pipeline_name: str, run_id: str
+    ) -> Iterator[Tuple[Dict[str, Any], Iterator[List[Any]]]]:
+        """
+        Streams the aggregated tables of a run, whatever format they were saved in.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+
+        Yields:
+            Tuple[Dict[str, Any], Iterator[List[Any]]]: The table header and an iterator over
+            its rows. The rows must be consumed before the next table is requested.
+        """
+        with self.reading_run(pipeline_name, run_id):
+            path = self.get_aggregated_results_path(pipeline_name, run_id)
+            if not self.run_path_exists(path):
+                return
+            if not formats.is_jsonl(path):
+                for table in self.load_aggregated_result(pipeline_name, run_id):
+                    yield table, self.iter_table_rows(pipeline_name, run_id, table)
+                return
+            with self.open_run_file(path) as f:
+                yield from formats.iter_tables(f)
+
+    def iter_table_rows(self, pipeline_name: str, run_id: str, table: Dict[str, Any]) -> Iterator[List[Any]]:
+        """
+        Iterates over the rows of an aggregated table without loading spilled rows into memory.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+            table (Dict[str, Any]): A table as returned by `load_aggregated_result`.
+
+        Yields:
+            List[Any]: One row at a time.
+        """
+        if "rows_file" not in table:
+            yield from table.get("rows", [])
+            return
+
+        path = os.path.join(self.get_aggregated_dir(pipeline_name, run_id), table["rows_file"])
+        with self.open_run_file(path) as f:
+            for line in f:
+                yield json.loads(line)
 
     def get_output_path(self, pipeline_name: str, run_id: str) -> str:
         """
@@ -218,18 +1047,225 @@ class FileSystemManager:
         """
         return os.path.join(self.get_pipeline_path(pipeline_name, run_id), "input", "pages")
 
+    def get_aggregated_dir(self, pipeline_name: str, run_id: str) -> str:
+        """
+        Returns the path to the aggregated directory.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+
+        Returns:
+            str: The full path to the aggregated directory.
+        """
+        return os.path.join(self.get_pipeline_path(pipeline_name, run_id), "aggregated")
+
     def get_aggregated_results_path(self, pipeline_name: str, run_id: str) -> str:
         """
-        Returns the path to the aggregated tables JSON file.
+        Returns the path to the aggregated tables file.
+
+        If an aggregated file already exists it is returned whatever its format,
+        otherwise the path for the run's configured format is returned.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+
+        Returns:
+            str: The full path to the aggregated file, e.g. aggregated/tables.json.
+        """
+        with self.reading_run(pipeline_name, run_id):
+            aggregated_dir = self.get_aggregated_dir(pipeline_name, run_id)
+            if self.run_path_exists(aggregated_dir):
+                for existing in self.list_run_dir(aggregated_dir):
+                    if existing.startswith(formats.AGGREGATED_BASENAME + "."):
+                        return os.path.join(aggregated_dir, existing)
+            filename = formats.AGGREGATED_BASENAME + self._artifact_suffix(pipeline_name, run_id)
+            return os.path.join(aggregated_dir, filename)
+
+    def run_path_exists(self, path: str) -> bool:
+        """
+        Returns True if a file or directory of a run exists on disk or in the run's archive.
+
+        Args:
+            path (str): A path inside a run directory.
+        """
+        archive, member = self._locate(path)
+        if os.path.exists(path):
+            return True
+        return archive is not None and (archive.exists(member) or archive.isdir(member))
+
+    def list_run_dir(self, path: str) -> List[str]:
+        """
+        Lists a directory of a run, including the entries held in the run's archive.
+
+        Args:
+            path (str): A directory inside a run directory.
+
+        Returns:
+            List[str]: The sorted entry names.
+        """
+        archive, member = self._locate(path)
+        entries = set(os.listdir(path)) if os.path.isdir(path) else set()
+        if archive is not None:
+            entries.update(archive.listdir(member))
+        return sorted(entries)
+
+    def open_run_file(self, path: str, newline: Optional[str] = None) -> IO[str]:
+        """
+        Opens a run file for text reading, from disk or from the run's archive.
+
+        Compressed artifacts are decompressed based on their suffix.
+
+        Args:
+            path (str): A file inside a run directory.
+            newline (str, optional): Passed to the text layer.
+
+        Raises:
+            FileNotFoundError: If the file is neither on disk nor archived.
+        """
+        archive, member = self._locate(path)
+        if os.path.exists(path):
+            return formats.open_artifact(path, "r", newline=newline)
+        if archive is None or not archive.exists(member):
+            raise FileNotFoundError(path)
+        return archive.open(member, newline=newline)
+
+    def open_run_file_binary(self, path: str) -> IO[bytes]:
+        """
+        Opens a run file as stored (without decompressing it), from disk or from the run's archive.
+
+        Raises:
+            FileNotFoundError: If the file is neither on disk nor archived.
+        """
+        archive, member = self._locate(path)
+        if os.path.exists(path):
+            return open(path, "rb")
+        if archive is None or not archive.exists(member):
+            raise FileNotFoundError(path)
+        return archive.open_binary(member)
+
+    def is_run_archived(self, pipeline_name: str, run_id: str) -> bool:
+        return os.path.exists(os.path.join(self.get_pipeline_path(pipeline_name, run_id), ARCHIVE_FILENAME))
+
+    def get_run_archive(self, pipeline_name: str, run_id: str) -> Optional[RunArchive]:
+        """
+        Returns the archive of a run, or None if the run is not archived.
+        """
+        return self._run_archive(self.get_pipeline_path(pipeline_name, run_id))
+
+    def archived_members(self, pipeline_name: str, run_id: str) -> List[str]:
+        """
+        Returns the paths, relative to the run directory, of the files in a run's archive.
+        """
+        archive = self.get_run_archive(pipeline_name, run_id)
+        return archive.names() if archive is not None else []
+
+    def archive_run(self, pipeline_name: str, run_id: str) -> Dict[str, Any]:
+        """
+        Packs the files of a completed run into one zip archive ('run.zip').
+
+        The metadata stays on disk and records the archive under 'archive'.
 
         Args:
             pipeline_name (str): The name of the pipeline.
             run_id (str): The unique identifier for the run.
 
         Returns:
-            str: The full path to the aggregated/tables.json file.
+            Dict[str, Any]: The archive file name, member count and sizes before and after.
+
+        Raises:
+            ValueError: If the run is not completed, is in progress or is already archived.
         """
-        return os.path.join(self.get_pipeline_path(pipeline_name, run_id), "aggregated", "tables.json")
+        metadata = self.load_metadata(pipeline_name, run_id)
+        if metadata.get("status") != "COMPLETED":
+            raise ValueError(f"Only completed runs can be archived, '{run_id}' is {metadata.get('status')}")
+        if self.is_run_open(pipeline_name, run_id):
+            raise ValueError(f"Run '{run_id}' is in progress")
+
+        self.fetch_run(pipeline_name, run_id)
+        info = archive_run_directory(self.get_pipeline_path(pipeline_name, run_id))
+        info["archived_at"] = str(datetime.now())
+        self.update_metadata(pipeline_name, run_id, {"archive": info})
+        self.record_run_files(pipeline_name, run_id)
+        return info
+
+    def unarchive_run(self, pipeline_name: str, run_id: str):
+        """
+        Extracts the archive of a run back into its directory, e.g. before running it again.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+        """
+        run_path = self.get_pipeline_path(pipeline_name, run_id)
+        self._forget_archive(run_path)
+        unarchive_run_directory(run_path)
+        for directory in ("input", "intermediate", "aggregated", "output"):
+            os.makedirs(os.path.join(run_path, directory), exist_ok=True)
+
+        metadata = self.load_metadata(pipeline_name, run_id)
+        metadata.pop("archive", None)
+        self.save_metadata(pipeline_name, run_id, metadata)
+        self.record_run_files(pipeline_name, run_id)
+
+    def _run_archive(self, run_path: str) -> Optional[RunArchive]:
+        archive_path = os.path.join(run_path, ARCHIVE_FILENAME)
+        with self._archives_lock:
+            cached = self._archives.get(archive_path)
+            try:
+                mtime = os.path.getmtime(archive_path)
+            except FileNotFoundError:
+                mtime = None
+            if cached is not None and cached.mtime == mtime:
+                return cached
+            if cached is not None:
+                cached.close()
+                del self._archives[archive_path]
+            if mtime is None:
+                return None
+            archive = self._archives[archive_path] = RunArchive(archive_path)
+            return archive
+
+    def _forget_archive(self, run_path: str):
+        with self._archives_lock:
+            archive = self._archives.pop(os.path.join(run_path, ARCHIVE_FILENAME), None)
+        if archive is not None:
+            archive.close()
+
+    def _locate(self, path: str) -> Tuple[Optional[RunArchive], str]:
+        # Maps a path inside a run directory to the run's archive (if any) and the member name
+        rel = os.path.relpath(os.path.realpath(path), os.path.realpath(self.base_path))
+        parts = rel.split(os.sep)
+        if len(parts) < 2 or parts[0] == ".." or parts[0].startswith("."):
+            return None, ""
+        self._refresh_local_copy(parts[0], parts[1])
+        archive = self._run_archive(os.path.join(self.base_path, parts[0], parts[1]))
+        return archive, "/".join(parts[2:])
+
+    def _refresh_local_copy(self, pipeline_name: str, run_id: str, force: bool = False):
+        # Before a run is read, fetches it if the backend holds a sync the local copy does not have.
+        # Runs still in progress elsewhere are left alone: their stored files are incomplete.
+        # Inside a `reading_run` block the run was already checked when the block started.
+        if self.storage is None or self.is_run_open(pipeline_name, run_id):
+            return
+        if not force and (pipeline_name, run_id) in self._reading_runs():
+            return
+        if self._load_stored_metadata(pipeline_name, run_id).get("status") not in FINISHED_STATUSES:
+            return
+        key = (pipeline_name, run_id)
+        try:
+            stored_manifest = self.storage.read_bytes(self._storage_key(pipeline_name, run_id, MANIFEST_FILENAME))
+        except FileNotFoundError:
+            return
+        except (OSError, StorageError) as e:
+            logger.warning(f"Could not check storage for '{pipeline_name}' run '{run_id}': {e}")
+            return
+        run_path = self.get_pipeline_path(pipeline_name, run_id)
+        if self._fetched_manifests.get(key) == stored_manifest and os.path.isdir(run_path):
+            return
+        self.fetch_run(pipeline_name, run_id, refresh=True)
+        self._fetched_manifests[key] = stored_manifest
 
     def list_pipelines(self) -> List[str]:
         """
@@ -238,10 +1274,18 @@ class FileSystemManager:
         Returns:
             List[str]: A list of pipeline names found in the base directory.
         """
-        if not os.path.exists(self.base_path):
-            return []
-
-        return [d for d in os.listdir(self.base_path) if os.path.isdir(os.path.join(self.base_path, d))]
+        pipelines = []
+        if os.path.exists(self.base_path):
+            # Hidden directories hold shared data such as the blob store, not pipelines
+            pipelines = [
+                d
+                for d in os.listdir(self.base_path)
+                if not d.startswith(".") and os.path.isdir(os.path.join(self.base_path, d))
+            ]
+        if self.storage is not None:
+            stored = [d for d in self.storage.list_children("") if not d.startswith(".") and d not in pipelines]
+            pipelines.extend(stored)
+        return pipelines
 
     def list_runs(self, pipeline_name: str) -> List[str]:
         """
@@ -254,10 +1298,12 @@ class FileSystemManager:
             List[str]: A list of run IDs found for the pipeline.
         """
         pipeline_path = os.path.join(self.base_path, pipeline_name)
-        if not os.path.exists(pipeline_path):
-            return []
-
-        return [d for d in os.listdir(pipeline_path) if os.path.isdir(os.path.join(pipeline_path, d))]
+        runs = []
+        if os.path.exists(pipeline_path):
+            runs = [d for d in os.listdir(pipeline_path) if os.path.isdir(os.path.join(pipeline_path, d))]
+        if self.storage is not None:
+            runs.extend(d for d in self.storage.list_children(self._storage_key(pipeline_name)) if d not in runs)
+        return runs
 
     def delete_run(self, pipeline_name: str, run_id: str) -> bool:
         """
@@ -271,8 +1317,14 @@ class FileSystemManager:
             bool: True if deleted, False if not found.
         """
         run_path = self.get_pipeline_path(pipeline_name, run_id)
-        if os.path.exists(run_path):
-            shutil.rmtree(run_path)
+        stored = self.storage is not None and bool(self.storage.list_keys(self._storage_key(pipeline_name, run_id)))
+        if stored:
+            self.storage.delete_prefix(self._storage_key(pipeline_name, run_id))
+        if os.path.exists(run_path) or stored:
+            self._forget_archive(run_path)
+            shutil.rmtree(run_path, ignore_errors=True)
+            self._fetched_manifests.pop((pipeline_name, run_id), None)
+            self._unregister(pipeline_name, run_id)
 
             # Clean up pipeline dir if empty
             pipeline_path = os.path.join(self.base_path, pipeline_name)
@@ -284,6 +1336,27 @@ class FileSystemManager:
             return True
         return False
 
+    def is_run_open(self, pipeline_name: str, run_id: str) -> bool:
+        """
+        Returns True while a pipeline run holds the run state open in this process.
+        """
+        with self._run_states_lock:
+            return (pipeline_name, run_id) in self._run_states
+
+    def collect_garbage(self, dry_run: bool = False, upload_dir: str = None) -> SweepReport:
+        """
+        Applies the retention policy to all runs.
+
+        Args:
+            dry_run (bool): Only report what would be removed and how many bytes it frees.
+            upload_dir (str, optional): Directory of uploads awaiting a pipeline, swept
+                                        of files older than the policy's upload TTL.
+
+        Returns:
+            SweepReport: The actions taken (or that would be taken).
+        """
+        return GarbageCollector(self, self.retention, upload_dir=upload_dir).sweep(dry_run=dry_run)
+
     def delete_pipeline(self, pipeline_name: str) -> bool:
         """
         Deletes an entire pipeline directory.
@@ -295,8 +1368,12 @@ class FileSystemManager:
             bool: True if deleted, False if not found.
         """
         pipeline_path = os.path.join(self.base_path, pipeline_name)
-        if os.path.exists(pipeline_path):
-            shutil.rmtree(pipeline_path)
+        stored = self.storage is not None and bool(self.storage.list_children(self._storage_key(pipeline_name)))
+        if stored:
+            self.storage.delete_prefix(self._storage_key(pipeline_name))
+        if os.path.exists(pipeline_path) or stored:
+            shutil.rmtree(pipeline_path, ignore_errors=True)
+            self._unregister(pipeline_name)
             return True
         return False
 
@@ -307,6 +1384,9 @@ class FileSystemManager:
         if os.path.exists(self.base_path):
             shutil.rmtree(self.base_path)
             os.makedirs(self.base_path)
+        if self.storage is not None:
+            for pipeline_name in self.storage.list_children(""):
+                self.storage.delete_prefix(pipeline_name)
 
 
 class Agent0:
@@ -318,16 +1398,34 @@ class Agent0:
     sub-agents (Scanner, Aggregator, Exporter).
     """
 
-    def __init__(self, base_path: str = "pipelines"):
+    def __init__(
+        self,
+        base_path: str = "pipelines",
+        retention: RetentionPolicy = None,
+        storage: StorageBackend = None,
+        job_queue: JobQueue = None,
+    ):
         """
         Initialize the Orchestrator with its sub-agents.
 
         Args:
             base_path (str): The root directory for storing pipeline data.
+            retention (RetentionPolicy, optional): Retention policy of the run data.
+            storage (StorageBackend, optional): Durable storage runs are mirrored to.
+            job_queue (JobQueue, optional): Hands the pages of every run to page workers
+                                            (`opengin tracer worker`) instead of extracting
+                                            them in this process.
         """
-        self.fs_manager = FileSystemManager(base_path)
+        self.fs_manager = FileSystemManager(base_path, retention=retention, storage=storage)
+        self.job_queue = job_queue
+        # Progress events of the runs started by this orchestrator
+        self.events = EventBus(self.fs_manager)
+        # Cancellation tokens of the runs in progress in this process
+        self._cancel_tokens: Dict[Tuple[str, str], CancelToken] = {}
+        self._cancel_lock = threading.Lock()
 
         self.agent1 = Agent1(self.fs_manager)
+        self.normalizer = RowNormalizer(self.fs_manager)
         self.agent2 = Agent2(self.fs_manager)
         self.agent3 = Agent3(self.fs_manager)
 
@@ -337,6 +1435,7 @@ class Agent0:
         input_file_path: str,
         filename: str,
         run_id: str = None,
+        input_sha256: str = None,
     ):
         """
         Initialize and setup a new extraction pipeline run.
@@ -349,6 +1448,8 @@ class Agent0:
             input_file_path (str): Path to the source file to process.
             filename (str): The name to use for the saved file.
             run_id (str, optional): A unique ID for the run. Auto-generated if None.
+            input_sha256 (str, optional): The digest of an input already in the blob store,
+                                          so it is not hashed again.
 
         Returns:
             tuple: (run_id, metadata)
@@ -362,13 +1463,13 @@ class Agent0:
         self.fs_manager.initialize_pipeline(pipeline_name, run_id)
 
         # 2. Save Input
-        saved_path = self.fs_manager.save_input_file(pipeline_name, run_id, input_file_path, filename)
+        saved_path = self.fs_manager.save_input_file(
+            pipeline_name, run_id, input_file_path, filename, digest=input_sha256
+        )
 
         # Update metadata
-        metadata = self.fs_manager.load_metadata(pipeline_name, run_id)
-        metadata["status"] = "READY"
-        metadata["input_file"] = saved_path
-        self.fs_manager.save_metadata(pipeline_name, run_id, metadata)
+        metadata = self.fs_manager.update_metadata(pipeline_name, run_id, {"status": "READY", "input_file": saved_path})
+        self._store_run(pipeline_name, run_id)
 
         logger.info(f"Agent 0: Pipeline '{pipeline_name}' run '{run_id}' ready. Input saved to {saved_path}")
         return run_id, metadata
@@ -380,72 +1481,440 @@ class Agent0:
         prompt: str = "Extract all tables.",
         metadata_schema: dict = None,
         api_key: str = None,
+        options: dict = None,
+        executor: Executor = None,
+        rate_limiter: RateLimiter = None,
+        resume: bool = False,
     ):
         """
-        Executes the full pipeline lifecycle sequentially.
+        Executes the full pipeline lifecycle.
 
         1. Scanning & Extraction (Agent 1)
         2. Aggregation (Agent 2)
         3. Export (Agent 3)
 
+        The stages are pipelined: Agent 1 extracts 'scan_workers' pages at a time and
+        hands each page result to the aggregation stage as soon as it is saved, so the
+        aggregation phase only has to finalize the running state once the last page is
+        done. When the 'normalize' option is set, each page is normalized on the way in.
+        With 'early_export' (off by default), tables that were not extended for 'settle_pages'
+        pages are handed on to the export stage while later pages are still extracted;
+        the export phase then writes only the remaining tables. The stages are connected
+        by queues of 'stage_queue_size' items, so a slow stage holds back the ones before it.
+
+        With a job queue (see `__init__`), the pages are extracted by page workers in
+        other processes; this process only splits the document, collects the page results
+        from the storage layer and aggregates and exports them.
+
+        The wall time, CPU time and peak RSS of each stage are recorded in the run
+        metadata under 'timings' as the stage ends (see `opengin.tracer.timing`). Since
+        the stages overlap, 'scanning' covers splitting as well as the aggregation and
+        early export of pages while they are extracted.
+
+        Progress is published on `self.events` and logged to the run's 'events.jsonl':
+        stage boundaries, each finished page with the throughput and an ETA, and the
+        outcome of the run.
+
+        The run can be stopped with `cancel_run`: pages not yet extracted are dropped,
+        the run is marked CANCELLED and `RunCancelled` is raised. The pages extracted so
+        far are kept, and `resume` (see `resume_pipeline`) extracts only the others.
+
         Args:
             pipeline_name (str): The name of the pipeline.
             run_id (str): The unique identifier for the run.
             prompt (str): The extraction instruction prompt for the LLM.
             metadata_schema (dict, optional): The metadata schema to use for extraction.
+            options (dict, optional): Per-run options. They are stored in the run metadata
+                                      under 'options' so every stage can read them.
+            executor (Executor, optional): A pool shared with other runs to extract the pages in,
+                                           instead of one of 'scan_workers' threads for this run.
+            rate_limiter (RateLimiter, optional): Limits the rate of extraction requests.
+            resume (bool): Keep the pages extracted by an earlier attempt of the run.
+
+        Raises:
+            RunCancelled: If the run was cancelled.
         """
         logger.info(f"Agent 0: Running pipeline '{pipeline_name}' run '{run_id}'")
 
+        # A run created by another replica is fetched, and an archived run is unpacked
+        # before its stages write to it again
+        self.fs_manager.fetch_run(pipeline_name, run_id)
+        if self.fs_manager.is_run_archived(pipeline_name, run_id):
+            self.fs_manager.unarchive_run(pipeline_name, run_id)
+
+        # Hold the run metadata in memory while the stages update it
+        self.fs_manager.open_run_state(pipeline_name, run_id)
+        if options:
+            self.fs_manager.update_metadata(pipeline_name, run_id, {"options": options})
+        options = options or {}
+        # The prompt and schema are kept so the run can be resumed with them
+        changes = {"status": "RUNNING", "prompt": prompt, "metadata_schema": metadata_schema}
+        if resume:
+            changes["error"] = None
+        self.fs_manager.update_metadata(pipeline_name, run_id, changes)
+
+        cancel = CancelToken(os.path.join(self.fs_manager.get_pipeline_path(pipeline_name, run_id), CANCEL_FILENAME))
+        if resume:
+            cancel.clear_marker()
+        with self._cancel_lock:
+            self._cancel_tokens[(pipeline_name, run_id)] = cancel
+
+        timer = StageTimer(
+            on_change=lambda timings: self.fs_manager.update_metadata(pipeline_name, run_id, {"timings": timings})
+        )
+        progress = ProgressTracker(self.events, pipeline_name, run_id)
+        self.events.publish(pipeline_name, run_id, "run_started")
+        session = None
         try:
-            self.run_scaning_and_extraction(pipeline_name, run_id, prompt, metadata_schema, api_key=api_key)
-            self.run_aggregation(pipeline_name, run_id)
-            self.run_export(pipeline_name, run_id)
-
+            # A run cancelled before it started stops here
+            cancel.raise_if_cancelled()
+            early_export = options.get("early_export", False)
+            settle_after = options.get("settle_pages", 1) if early_export else None
+            aggregator = self.agent2.create_aggregator(pipeline_name, run_id, options, settle_after=settle_after)
+            handle_page = self._page_handler(pipeline_name, run_id, aggregator, options)
+            if early_export:
+                session = self.agent3.open_session(pipeline_name, run_id)
+
+            def aggregate(page):
+                handle_page(*page)
+                return aggregator.take_settled() if session else None
+
+            def export(settled):
+                session.export_settled(*settled)
+
+            stages = [Stage("aggregate", aggregate)]
+            if session:
+                stages.append(Stage("export", export))
+
+            with self._stage(timer, pipeline_name, run_id, "scanning"):
+                with StagePipeline(stages, queue_size=options.get("stage_queue_size", DEFAULT_QUEUE_SIZE)) as pipeline:
+                    self.run_scaning_and_extraction(
+                        pipeline_name,
+                        run_id,
+                        prompt,
+                        metadata_schema,
+                        api_key=api_key,
+                        on_page=lambda page_num, page_data: pipeline.put((page_num, page_data)),
+                        workers=options.get("scan_workers", DEFAULT_SCAN_WORKERS),
+                        executor=executor,
+                        rate_limiter=rate_limiter,
+                        timer=timer,
+                        progress=progress,
+                        cancel=cancel,
+                        resume=resume,
+                    )
+            timer.page_count = self.fs_manager.load_metadata(pipeline_name, run_id).get("page_count", 0)
+
+            cancel.raise_if_cancelled()
+            if session:
+                # Tables that grew again after they were exported are written by the export phase
+                session.reopen(aggregator.reopened)
+            with self._stage(timer, pipeline_name, run_id, "aggregating"):
+                self.run_aggregation(pipeline_name, run_id, aggregator=aggregator)
+            cancel.raise_if_cancelled()
+            with self._stage(timer, pipeline_name, run_id, "exporting"):
+                self.run_export(pipeline_name, run_id, session=session)
+            self.events.publish(pipeline_name, run_id, "run_completed", **self._event_summary(timer, progress))
+
+        except RunCancelled:
+            logger.info(f"Agent 0: Pipeline '{pipeline_name}' run '{run_id}' cancelled")
+            self.fs_manager.update_metadata(pipeline_name, run_id, {"status": "CANCELLED"})
+            self.events.publish(pipeline_name, run_id, "run_cancelled", **self._event_summary(timer, progress))
+            raise
         except Exception as e:
             logger.error(f"Agent 0: Pipeline failed - {e}")
-            metadata = self.fs_manager.load_metadata(pipeline_name, run_id)
-            metadata["status"] = "FAILED"
-            metadata["error"] = str(e)
-            self.fs_manager.save_metadata(pipeline_name, run_id, metadata)
+            self.fs_manager.update_metadata(pipeline_name, run_id, {"status": "FAILED", "error": str(e)})
+            self.events.publish(
+                pipeline_name, run_id, "run_failed", error=str(e), **self._event_summary(timer, progress)
+            )
             raise e
+        finally:
+            with self._cancel_lock:
+                self._cancel_tokens.pop((pipeline_name, run_id), None)
+            cancel.clear_marker()
+            if session:
+                session.close()
+            self.fs_manager.close_run_state(pipeline_name, run_id)
+            self._store_run(pipeline_name, run_id)
+
+    def cancel_run(self, pipeline_name: str, run_id: str) -> bool:
+        """
+        Asks a run that is ready or running to stop.
+
+        A run in progress in this process is signalled directly; a run of another
+        process sharing the pipelines directory (e.g. the server, for the CLI) is
+        signalled through a marker file in its directory. The run stops at its next
+        page or extraction step and is then marked CANCELLED.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+
+        Returns:
+            bool: True if the run was asked to stop, False if it is not ready or running.
+
+        Raises:
+            FileNotFoundError: If the run does not exist.
+        """
+        with self._cancel_lock:
+            cancel = self._cancel_tokens.get((pipeline_name, run_id))
+        if cancel is not None:
+            cancel.cancel()
+            logger.info(f"Agent 0: Cancelling pipeline '{pipeline_name}' run '{run_id}'")
+            return True
+
+        metadata = self.fs_manager.load_metadata(pipeline_name, run_id)
+        if not metadata:
+            raise FileNotFoundError(f"Run '{run_id}' of pipeline '{pipeline_name}' not found")
+        run_path = self.fs_manager.get_pipeline_path(pipeline_name, run_id)
+        if metadata.get("status") not in CANCELLABLE_STATUSES or not os.path.isdir(run_path):
+            return False
+        request_cancel(run_path)
+        logger.info(f"Agent 0: Requested cancellation of pipeline '{pipeline_name}' run '{run_id}'")
+        return True
+
+    def resume_pipeline(
+        self,
+        pipeline_name: str,
+        run_id: str,
+        api_key: str = None,
+        executor: Executor = None,
+        rate_limiter: RateLimiter = None,
+    ):
+        """
+        Runs a cancelled or failed run again, extracting only the pages it has not extracted yet.
+
+        The run keeps the prompt, metadata schema and options it was started with.
+        Pages that failed are extracted again.
+
+        Args:
+            pipeline_name (str): The name of the pipeline.
+            run_id (str): The unique identifier for the run.
+            api_key (str, optional): The Google API Key.
+            executor (Executor, optional): A pool shared with other runs to extract the pages in.
+            rate_limiter (RateLimiter, optional): Limits the rate of extraction requests.
+
+        Raises:
+            FileNotFoundError: If the run does not exist.
+            ValueError: If the run is not cancelled or failed.
+            RunCancelled: If the run was cancelled again.
+        """
+        metadata = self.fs_manager.load_metadata(pipeline_name, run_id)
+        if not metadata:
+            raise FileNotFoundError(f"Run '{run_id}' of pipeline '{pipeline_name}' not found")
+        status = metadata.get("status")
+        if status not in RESUMABLE_STATUSES:
+            raise ValueError(f"Run '{run_id}' is {status}; only cancelled or failed runs can be resumed")
+
+        logger.info(f"Agent 0: Resuming pipeline '{pipeline_name}' run '{run_id}'")
+        self.run_pipeline(
+            pipeline_name,
+            run_id,
+            metadata.get("prompt") or "Extract all tables.",
+            metadata.get("metadata_schema"),
+            api_key=api_key,
+            options=metadata.get("options"),
+            executor=executor,
+            rate_limiter=rate_limiter,
+            resume=True,
+        )
+
+    @contextmanager
+    def _stage(self, timer: StageTimer, pipeline_name: str, run_id: str, name: str):
+        # Times a stage and publishes its start and end
+        self.events.publish(pipeline_name, run_id, "stage_started", stage=name)
+        with timer.stage(name):
+            yield
+        self.events.publish(pipeline_name, run_id, "stage_finished", stage=name, **timer.stages[name])
+
+    @staticmethod
+    def _event_summary(timer: StageTimer, progress: ProgressTracker) -> Dict[str, Any]:
+        timings = timer.to_dict()
+        return {
+            "pages_completed": progress.completed,
+            "pages_failed": progress.failed,
+            "page_count": progress.page_count,
+            "wall_seconds": timings["wall_seconds"],
+            "pages_per_second": timings["pages_per_second"],
+        }
+
+    def run_batch(
+        self,
+        pipeline_name: str,
+        input_paths: List[str],
+        prompt: str = "Extract all tables.",
+        metadata_schema: dict = None,
+        api_key: str = None,
+        options: dict = None,
+        max_documents: int = None,
+        requests_per_minute: float = None,
+        on_document=None,
+    ) -> BatchReport:
+        """
+        Runs the pipeline on many documents, one run per document.
+
+        The pages of all documents are extracted by one pool of 'scan_workers' threads,
+        so pages of the next documents are extracted while earlier documents are split,
+        aggregated or exported. Up to `max_documents` documents are in progress at once.
+        A failed document is recorded in the report and does not stop the batch.
+
+        Args:
+            pipeline_name (str): The pipeline the runs are created in.
+            input_paths (List[str]): The documents to process.
+            prompt (str): The extraction instruction prompt for the LLM.
+            metadata_schema (dict, optional): The metadata schema to use for extraction.
+            api_key (str, optional): The Google API Key.
+            options (dict, optional): Per-run options, applied to every run.
+            max_documents (int, optional): Documents in progress at once. Defaults to the
+                                           number of page workers.
+            requests_per_minute (float, optional): Limit on extraction requests across the
+                                                   whole batch.
+            on_document (Callable, optional): Called with each document's report entry as
+                                              soon as the document is done.
+
+        Returns:
+            BatchReport: The status, page count and throughput of each document.
+        """
+        options = options or {}
+        workers = max(1, options.get("scan_workers", DEFAULT_SCAN_WORKERS))
+        max_documents = max(1, max_documents or workers)
+        rate_limiter = RateLimiter.per_minute(requests_per_minute, burst=workers) if requests_per_minute else None
+        report = BatchReport(pipeline_name, input_paths)
+        logger.info(f"Agent 0: Starting batch of {len(input_paths)} documents in '{pipeline_name}'")
+
+        def run_document(input_path: str):
+            started = time.monotonic()
+            run_id, error = None, None
+            status = "COMPLETED"
+            try:
+                run_id, _ = self.create_pipeline(pipeline_name, input_path, os.path.basename(input_path))
+                self.run_pipeline(
+                    pipeline_name,
+                    run_id,
+                    prompt,
+                    metadata_schema=metadata_schema,
+                    api_key=api_key,
+                    options=options,
+                    executor=pages,
+                    rate_limiter=rate_limiter,
+                )
+            except RunCancelled:
+                status = "CANCELLED"
+            except Exception as e:
+                logger.error(f"Agent 0: Batch document '{input_path}' failed - {e}")
+                error = str(e)
+            page_count = 0
+            if run_id:
+                page_count = self.fs_manager.load_metadata(pipeline_name, run_id).get("page_count", 0)
+            entry = report.add(
+                input_path,
+                run_id,
+                "FAILED" if error is not None else status,
+                page_count,
+                time.monotonic() - started,
+                error,
+            )
+            if on_document:
+                on_document(entry)
+
+        with (
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan") as pages,
+            ThreadPoolExecutor(max_workers=max_documents, thread_name_prefix="document") as documents,
+        ):
+            wait([documents.submit(run_document, input_path) for input_path in input_paths])
+
+        report.finish()
+        logger.info(
+            f"Agent 0: Completed batch in '{pipeline_name}': {len(report.failed)} of {len(input_paths)} documents "
+            f"failed, {report.page_count} pages at {report.pages_per_second} pages/s"
+        )
+        return report
+
+    def _store_run(self, pipeline_name: str, run_id: str):
+        # Failing to record or push a finished run must not hide the outcome of the run itself
+        try:
+            self.fs_manager.record_run_files(pipeline_name, run_id)
+        except (OSError, StorageError) as e:
+            logger.error(f"Agent 0: Could not store run '{run_id}' of '{pipeline_name}': {e}")
+
+    def _page_handler(self, pipeline_name: str, run_id: str, aggregator, options: dict):
+        """
+        Builds the callback that forwards finished page results from Agent 1 to the aggregator.
+        """
+
+        def handle_page(page_num: int, page_data: dict):
+            if options.get("normalize"):
+                page_data = self.normalizer.process_page(
+                    pipeline_name, run_id, page_num, page_data, options.get("numeric_threshold", 0.9)
+                )
+            aggregator.add_page(page_num, page_data)
+
+        return handle_page
 
     def run_scaning_and_extraction(
-        self, pipeline_name: str, run_id: str, prompt: str, metadata_schema: dict = None, api_key: str = None
+        self,
+        pipeline_name: str,
+        run_id: str,
+        prompt: str,
+        metadata_schema: dict = None,
+        api_key: str = None,
+        on_page=None,
+        workers: int = 1,
+        executor: Executor = None,
+        rate_limiter: RateLimiter = None,
+        timer: StageTimer = None,
+        progress: ProgressTracker = None,
+        cancel: CancelToken = None,
+        resume: bool = False,
     ):
         """
         Phase 1: Trigger Document Scanning and Extraction.
 
-        Delegates to Agent 1 (Scanner) to process the document page by page.
+        Delegates to Agent 1 (Scanner) to process the document, `workers` pages at a time
+        or in the threads of `executor`, or hands the pages to page workers through
+        `self.job_queue`. `on_page` is called with each page result as soon as it is
+        saved. With `resume`, pages extracted by an earlier attempt are reused.
         """
         logger.info(f"Agent 0: Triggering Scanning & Extraction for '{pipeline_name}' run '{run_id}'")
-        metadata = self.fs_manager.load_metadata(pipeline_name, run_id)
-        metadata["current_stage"] = "SCANNING"
-        self.fs_manager.save_metadata(pipeline_name, run_id, metadata)
-
-        self.agent1.run(pipeline_name, run_id, prompt, metadata_schema, api_key=api_key)
+        self.fs_manager.update_metadata(pipeline_name, run_id, {"current_stage": "SCANNING"})
+
+        self.agent1.run(
+            pipeline_name,
+            run_id,
+            prompt,
+            metadata_schema,
+            api_key=api_key,
+            on_page=on_page,
+            workers=workers,
+            executor=executor,
+            rate_limiter=rate_limiter,
+            timer=timer,
+            progress=progress,
+            cancel=cancel,
+            resume=resume,
+            job_queue=self.job_queue,
+        )
 
-    def run_aggregation(self, pipeline_name: str, run_id: str):
+    def run_aggregation(self, pipeline_name: str, run_id: str, aggregator=None):
         """
         Phase 2: Trigger Result Aggregation.
 
-        Delegates to Agent 2 (Aggregator) to combine per-page results.
+        Delegates to Agent 2 (Aggregator) to combine per-page results. If an aggregator
+        was fed during scanning it is finalized, otherwise all page results are loaded.
         """
         logger.info(f"Agent 0: Triggering Aggregation for '{pipeline_name}' run '{run_id}'")
-        metadata = self.fs_manager.load_metadata(pipeline_name, run_id)
-        metadata["current_stage"] = "AGGREGATING"
-        self.fs_manager.save_metadata(pipeline_name, run_id, metadata)
+        self.fs_manager.update_metadata(pipeline_name, run_id, {"current_stage": "AGGREGATING"})
 
-        self.agent2.run(pipeline_name, run_id)
+        self.agent2.run(pipeline_name, run_id, aggregator=aggregator)
 
-    def run_export(self, pipeline_name: str, run_id: str):
+    def run_export(self, pipeline_name: str, run_id: str, session=None):
         """
         Phase 3: Trigger Final Export.
 
-        Delegates to Agent 3 (Exporter) to format and save the final output.
+        Delegates to Agent 3 (Exporter) to format and save the final output. Tables
+        already written through `session` during scanning are not written again.
         """
         logger.info(f"Agent 0: Triggering Export for '{pipeline_name}' run '{run_id}'")
-        metadata = self.fs_manager.load_metadata(pipeline_name, run_id)
-        metadata["current_stage"] = "EXPORTING"
-        self.fs_manager.save_metadata(pipeline_name, run_id, metadata)
+        self.fs_manager.update_metadata(pipeline_name, run_id, {"current_stage": "EXPORTING"})
 
-        self.agent3.run(pipeline_name, run_id)
+        self.agent3.run(pipeline_name, run_id, session=session)
@@ -1,10 +1,20 @@
 import logging
 import os
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from typing import Any, Callable, Dict
 
 from pypdf import PdfReader, PdfWriter
 
+from opengin.tracer.agents.scheduler import RateLimiter
+from opengin.tracer.cancellation import CancelToken, RunCancelled
+from opengin.tracer.events import ProgressTracker
+from opengin.tracer.jobqueue import Job, JobQueue, job_group
 from opengin.tracer.schema import parse_extraction_response
 from opengin.tracer.services.gemini import extract_data_with_gemini
+from opengin.tracer.timing import StageTimer
 
 logger = logging.getLogger(__name__)
 
@@ -29,11 +39,40 @@ class Agent1:
         """
         self.fs_manager = fs_manager
 
-    def run(self, pipeline_name: str, run_id: str, prompt: str, metadata_schema: dict = None, api_key: str = None):
+    def run(
+        self,
+        pipeline_name: str,
+        run_id: str,
+        prompt: str,
+        metadata_schema: dict = None,
+        api_key: str = None,
+        on_page: Callable[[int, Dict[str, Any]], None] = None,
+        workers: int = 1,
+        executor: Executor = None,
+        rate_limiter: RateLimiter = None,
+        timer: StageTimer = None,
+        progress: ProgressTracker = None,
+        cancel: CancelToken = None,
+        resume: bool = False,
+        job_queue: JobQueue = None,
+    ):
         """
         Executes the scanning and extraction phase.
 
-        Iterates through each page of the split PDF and performs extraction.
+        Splits the input PDF and performs extraction on each page. With `workers` above 1,
+        that many pages are extracted at the same time, so the phase takes about as long
+        as its slowest pages rather than the sum of all pages. With an `executor`, pages
+        are extracted by its threads instead, which lets several runs share one pool.
+
+        Once `cancel` is set, pages not yet started are dropped, extraction requests in
+        progress stop at their next step and `RunCancelled` is raised. Pages saved so far
+        are kept; with `resume`, pages already extracted without error are not extracted
+        again but handed to `on_page` from their saved results.
+
+        With a `job_queue`, pages are not extracted in this process: they are put on the
+        queue for page workers (see `PageWorker`) and their results are read through the
+        storage layer as the jobs finish. `workers`, `executor` and `rate_limiter` then
+        do not apply.
 
         Args:
             pipeline_name (str): The name of the pipeline.
@@ -41,9 +80,22 @@ class Agent1:
             prompt (str): The extraction prompt to send to the LLM.
             metadata_schema (dict, optional): The metadata schema to use for extraction.
             api_key (str, optional): The Google API Key.
+            on_page (Callable, optional): Called with (page_num, page_data) as soon as a page
+                                          result has been saved, including failed pages. With
+                                          several workers it is called from the worker threads,
+                                          in the order pages finish.
+            workers (int): Number of pages extracted concurrently. Ignored with an `executor`.
+            executor (Executor, optional): A pool shared with other runs to extract the pages in.
+            rate_limiter (RateLimiter, optional): Limits the rate of extraction requests.
+            timer (StageTimer, optional): Records the time taken to split the PDF as 'splitting'.
+            progress (ProgressTracker, optional): Told the page count and each finished page.
+            cancel (CancelToken, optional): Stops the scan once the run is cancelled.
+            resume (bool): Skip the pages extracted by an earlier attempt of the run.
+            job_queue (JobQueue, optional): The queue to hand the pages to workers through.
 
         Raises:
             FileNotFoundError: If the input file recorded in metadata does not exist.
+            RunCancelled: If the run was cancelled before all pages were extracted.
         """
         logger.info(f"Agent 1: Starting scanning for '{pipeline_name}' run '{run_id}'")
         metadata = self.fs_manager.load_metadata(pipeline_name, run_id)
@@ -56,50 +108,223 @@ class Agent1:
         pages_dir = self.fs_manager.get_input_pages_dir(pipeline_name, run_id)
         os.makedirs(pages_dir, exist_ok=True)
 
-        page_files = self._split_pdf(input_path, pages_dir)
+        with timer.stage("splitting") if timer else nullcontext():
+            page_files = self._split_pdf(input_path, pages_dir)
 
         # Update metadata with page count
-        metadata["page_count"] = len(page_files)
-        self.fs_manager.save_metadata(pipeline_name, run_id, metadata)
+        self.fs_manager.update_metadata(pipeline_name, run_id, {"page_count": len(page_files)})
+        if progress:
+            progress.start(len(page_files))
+
+        done = set()
+        if resume:
+            for page_num, page_data in self.fs_manager.iter_intermediate_results(pipeline_name, run_id):
+                if page_num > len(page_files) or "error" in page_data:
+                    continue
+                done.add(page_num)
+                if progress:
+                    progress.page_done(page_num)
+                if on_page:
+                    on_page(page_num, page_data)
+            logger.info(f"Agent 1: Resuming '{pipeline_name}' run '{run_id}', {len(done)} pages already extracted")
+
+        # Once a page failed outside of extraction (e.g. in on_page), pages not yet started are skipped
+        failed = threading.Event()
+
+        def process(page):
+            page_num, page_path = page
+            if failed.is_set() or (cancel and cancel.cancelled):
+                return
+            try:
+                logger.info(f"Agent 1: Processing page {page_num}/{len(page_files)}")
+                page_data = self.scan_page(
+                    pipeline_name, run_id, page_num, page_path, prompt, metadata_schema, api_key, rate_limiter, cancel
+                )
+                if progress:
+                    progress.page_done(page_num, page_data.get("error"))
+                if on_page:
+                    on_page(page_num, page_data)
+            except BaseException:
+                failed.set()
+                raise
+
+        pages = [page for page in enumerate(page_files, start=1) if page[0] not in done]
+        if job_queue is not None:
+            if api_key:
+                # Keys are not put on the queue; workers use their own GOOGLE_API_KEY
+                logger.warning(f"Agent 1: The API key of run '{run_id}' is not passed to the page workers")
+            self._run_distributed(
+                pipeline_name, run_id, pages, prompt, metadata_schema, job_queue, on_page, progress, cancel
+            )
+        elif executor is not None:
+            futures = [executor.submit(process, page) for page in pages]
+            wait(futures)
+            for future in futures:
+                future.result()
+        elif workers <= 1 or len(pages) <= 1:
+            for page in pages:
+                process(page)
+        else:
+            with ThreadPoolExecutor(max_workers=min(workers, len(pages)), thread_name_prefix="scan") as executor:
+                # list() re-raises the first failure
+                list(executor.map(process, pages))
+
+        if cancel:
+            cancel.raise_if_cancelled()
+        logger.info(f"Agent 1: Completed scanning for '{pipeline_name}'")
 
-        # Extract Data for each page
-        for i, page_path in enumerate(page_files):
-            page_num = i + 1
-            logger.info(f"Agent 1: Processing page {page_num}/{len(page_files)}")
+    def _run_distributed(
+        self,
+        pipeline_name: str,
+        run_id: str,
+        pages: list,
+        prompt: str,
+        metadata_schema: dict,
+        job_queue: JobQueue,
+        on_page: Callable[[int, Dict[str, Any]], None] = None,
+        progress: ProgressTracker = None,
+        cancel: CancelToken = None,
+    ):
+        """
+        Queues one job per page and hands on the page results as the workers finish them.
 
-            try:
-                # Call Gemini
-                raw_response = extract_data_with_gemini(page_path, prompt, metadata_schema, api_key=api_key)
-
-                # Parse to ensure valid structure
-                parsed_result = parse_extraction_response(raw_response)
-
-                tables_data = []
-                for t in parsed_result.tables:
-                    tables_data.append(
-                        {
-                            "id": t.id,
-                            "name": t.name,
-                            "columns": t.columns,
-                            "rows": t.rows,
-                            "metadata": t.metadata,
-                        }
-                    )
-
-                page_data = {
+        Jobs left over from an earlier attempt of the run are dropped first. If the run
+        fails or is cancelled, its remaining jobs are removed from the queue.
+        """
+        group = job_group(pipeline_name, run_id)
+        run_path = self.fs_manager.get_pipeline_path(pipeline_name, run_id)
+        job_queue.cancel(group)
+        self.fs_manager.push_run_files(pipeline_name, run_id, [page_path for _, page_path in pages])
+        job_queue.put(
+            group,
+            [
+                {
+                    "pipeline_name": pipeline_name,
+                    "run_id": run_id,
                     "page_num": page_num,
-                    "tables": tables_data,
-                    "raw_response": parsed_result.raw_response,
-                    "message": parsed_result.message,
+                    "page_file": os.path.relpath(page_path, run_path).replace(os.sep, "/"),
+                    "prompt": prompt,
+                    "metadata_schema": metadata_schema,
                 }
+                for page_num, page_path in pages
+            ],
+        )
+        logger.info(f"Agent 1: Queued {len(pages)} pages of '{pipeline_name}' run '{run_id}' for the workers")
+
+        remaining = {page_num for page_num, _ in pages}
+        try:
+            while remaining:
+                if cancel:
+                    cancel.raise_if_cancelled()
+                finished = [job for job in job_queue.take_finished(group) if job.payload["page_num"] in remaining]
+                for job in finished:
+                    page_num = job.payload["page_num"]
+                    remaining.discard(page_num)
+                    page_data = self._collect_page(pipeline_name, run_id, job)
+                    if progress:
+                        progress.page_done(page_num, page_data.get("error"))
+                    if on_page:
+                        on_page(page_num, page_data)
+                if not finished:
+                    if cancel:
+                        cancel.wait(job_queue.poll_interval)
+                    else:
+                        time.sleep(job_queue.poll_interval)
+        finally:
+            if remaining:
+                job_queue.cancel(group)
+
+    def _collect_page(self, pipeline_name: str, run_id: str, job: Job) -> Dict[str, Any]:
+        """
+        Reads the page result a worker stored for a finished job.
 
-                self.fs_manager.save_intermediate_result(pipeline_name, run_id, page_num, page_data)
-
+        A job that failed without a stored result (e.g. its workers kept dying) is saved
+        as a failed page here.
+        """
+        page_num = job.payload["page_num"]
+        result = job.result or {}
+        if result.get("file"):
+            try:
+                path = self.fs_manager.fetch_run_file(pipeline_name, run_id, result["file"], refresh=True)
+                # Workers leave the run manifest to this process
+                self.fs_manager.record_intermediate_result(pipeline_name, run_id, path)
+                return self.fs_manager.read_page_file(path)
             except Exception as e:
-                logger.error(f"Agent 1: Failed on page {page_num} - {e}")
-                self.fs_manager.save_intermediate_result(pipeline_name, run_id, page_num, {"error": str(e)})
+                logger.error(f"Agent 1: Could not read the result of page {page_num} - {e}")
+                result = {"error": f"Could not read the page result: {e}"}
+        page_data = {"error": result.get("error") or "The page job failed"}
+        self.fs_manager.save_intermediate_result(pipeline_name, run_id, page_num, page_data)
+        return page_data
+
+    def scan_page(
+        self,
+        pipeline_name: str,
+        run_id: str,
+        page_num: int,
+        page_path: str,
+        prompt: str,
+        metadata_schema: dict = None,
+        api_key: str = None,
+        rate_limiter: RateLimiter = None,
+        cancel: CancelToken = None,
+        record: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Extracts the tables of one page and saves the result to the 'intermediate' directory.
 
-        logger.info(f"Agent 1: Completed scanning for '{pipeline_name}'")
+        A failed extraction is saved (and returned) as {"error": message}. A page whose
+        extraction is stopped by `cancel` is not saved, so a resumed run extracts it again.
+        Page workers pass `record=False`: the result is then not recorded in the run
+        manifest, which the process running the run updates when it collects the page.
+
+        Returns:
+            Dict[str, Any]: The saved page result.
+
+        Raises:
+            RunCancelled: If the run is cancelled during the extraction.
+        """
+        try:
+            if rate_limiter:
+                rate_limiter.acquire()
+            if cancel:
+                cancel.raise_if_cancelled()
+
+            # Call Gemini
+            raw_response = extract_data_with_gemini(page_path, prompt, metadata_schema, api_key=api_key, cancel=cancel)
+
+            # Parse to ensure valid structure
+            parsed_result = parse_extraction_response(raw_response)
+
+            tables_data = []
+            for t in parsed_result.tables:
+                tables_data.append(
+                    {
+                        "id": t.id,
+                        "name": t.name,
+                        "columns": t.columns,
+                        "rows": t.rows,
+                        "metadata": t.metadata,
+                    }
+                )
+
+            page_data = {
+                "page_num": page_num,
+                "tables": tables_data,
+                "raw_response": parsed_result.raw_response,
+                "message": parsed_result.message,
+            }
+
+            self.fs_manager.save_intermediate_result(pipeline_name, run_id, page_num, page_data, record=record)
+
+        except RunCancelled:
+            logger.info(f"Agent 1: Page {page_num} dropped, run '{run_id}' was cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Agent 1: Failed on page {page_num} - {e}")
+            page_data = {"error": str(e)}
+            self.fs_manager.save_intermediate_result(pipeline_name, run_id, page_num, page_data, record=record)
+
+        return page_data
 
     def _split_pdf(self, input_path: str, output_dir: str) -> list[str]:
         """
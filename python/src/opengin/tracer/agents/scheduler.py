@@ -0,0 +1,202 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Items a stage may hold in its input queue before the stage feeding it blocks
+DEFAULT_QUEUE_SIZE = 16
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class Stage:
+    """
+    One step of a `StagePipeline`.
+
+    `fn` is called with each input item and returns the items to hand to the next
+    stage (any iterable), or None to hand over nothing.
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any], Optional[Iterable[Any]]], workers: int = 1):
+        """
+        Args:
+            name (str): Used for thread names and log messages.
+            fn (Callable): Processes one item.
+            workers (int): Number of threads running `fn` concurrently. Stages that
+                           need their items in order must use a single worker.
+        """
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+
+
+class StagePipeline:
+    """
+    Runs stages concurrently, connected by bounded queues.
+
+    Items are fed with `put`; each stage takes items from its input queue in its own
+    threads and hands its results to the next stage. A full queue blocks the stage
+    feeding it, so a fast stage cannot run arbitrarily far ahead of a slow one and
+    the items in flight stay bounded.
+
+    If a stage raises, the remaining items are drained without being processed and
+    the first error is raised from `put` or `close`. Use as a context manager:
+
+        with StagePipeline([Stage("aggregate", aggregate), Stage("export", export)]) as pipeline:
+            for page in pages:
+                pipeline.put(page)
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = DEFAULT_QUEUE_SIZE):
+        """
+        Args:
+            stages (List[Stage]): The stages, in order.
+            queue_size (int): Capacity of the queue in front of each stage.
+        """
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self._queues = []
+        self._threads = []
+        self._error = None
+        self._error_lock = threading.Lock()
+        self._failed = threading.Event()
+        self._closed = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._failed.set()
+        self.close(raise_error=exc_type is None)
+
+    def start(self):
+        """
+        Starts the worker threads of all stages.
+        """
+        self._queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        for i, stage in enumerate(self.stages):
+            inbox = self._queues[i]
+            outbox = self._queues[i + 1] if i + 1 < len(self.stages) else None
+            remaining = [stage.workers]
+            lock = threading.Lock()
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(stage, inbox, outbox, remaining, lock),
+                    name=f"{stage.name}-{n}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def put(self, item: Any):
+        """
+        Feeds an item to the first stage, blocking while its queue is full.
+
+        May be called from several threads.
+
+        Raises:
+            Exception: The error of a failed stage.
+        """
+        self._raise_error()
+        self._queues[0].put(item)
+
+    def close(self, raise_error: bool = True):
+        """
+        Signals the end of the input and waits until every stage has finished.
+
+        Args:
+            raise_error (bool): Raise the first error of a failed stage.
+        """
+        if not self._closed:
+            self._closed = True
+            self._queues[0].put(_DONE)
+            for thread in self._threads:
+                thread.join()
+        if raise_error:
+            self._raise_error()
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def _work(self, stage: Stage, inbox: queue.Queue, outbox: Optional[queue.Queue], remaining: list, lock):
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                # Let the other workers of this stage see the end too; the last one passes it on
+                inbox.put(_DONE)
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last and outbox is not None:
+                    outbox.put(_DONE)
+                return
+            if self._failed.is_set():
+                continue
+            try:
+                for result in stage.fn(item) or ():
+                    if outbox is not None:
+                        outbox.put(result)
+            except BaseException as e:
+                logger.error(f"Stage '{stage.name}' failed: {e}")
+                with self._error_lock:
+                    if self._error is None:
+                        self._error = e
+                self._failed.set()
+
+
+class RateLimiter:
+    """
+    A token bucket shared by all threads that call an API.
+
+    Tokens are added at `rate` per second up to `burst`; `acquire` takes one and
+    waits while the bucket is empty.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate (float): Calls per second allowed on average.
+            burst (int): Calls allowed at once after a quiet period.
+
+        Raises:
+            ValueError: If `rate` is not positive.
+        """
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}.")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, calls: float, burst: int = 1) -> "RateLimiter":
+        return cls(calls / 60.0, burst)
+
+    def acquire(self) -> float:
+        """
+        Takes a token, waiting until one is available.
+
+        Returns:
+            float: The seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
@@ -0,0 +1,319 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+from opengin.tracer.agents.columnar import field_names
+from opengin.tracer.agents.normalizer import COLUMN_TYPES, coerce_values
+
+logger = logging.getLogger(__name__)
+
+# Name of the per-run database in the 'output' directory
+SQLITE_FILENAME = "tables.sqlite"
+METADATA_TABLE = "_table_metadata"
+
+_SQL_TYPES = {"integer": "INTEGER", "number": "REAL", "string": "TEXT"}
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+class SqliteTableWriter:
+    """
+    Loads the rows of one table into an SQLite table.
+
+    Rows are coerced on the calling thread and handed to the exporter's loader
+    thread, so tables exported from several threads do not wait for each other.
+    The table is created, loaded and recorded in one transaction; a table that
+    fails to load, or is aborted, is dropped again.
+    """
+
+    def __init__(self, exporter: "SqliteExporter", sql_name: str, table: Dict[str, Any]):
+        self.exporter = exporter
+        self.closed = False
+        self.sql_name = sql_name
+        self.table = table
+        self.row_count = 0
+        self.coercion_failures = 0
+        self.error: Optional[BaseException] = None
+        self.columns = field_names(table.get("columns", []), ignore_case=True)
+
+        column_types = table.get("column_types")
+        if (
+            not column_types
+            or len(column_types) != len(self.columns)
+            or not all(t in COLUMN_TYPES for t in column_types)
+        ):
+            column_types = None
+        self.column_types = column_types
+
+        definitions = [
+            f"{quote_identifier(name)} {_SQL_TYPES[column_types[i]] if column_types else ''}".rstrip()
+            for i, name in enumerate(self.columns)
+        ]
+        self._create = f"CREATE TABLE {quote_identifier(sql_name)} ({', '.join(definitions) or '_empty'})"
+        placeholders = ", ".join("?" for _ in self.columns)
+        self._insert = f"INSERT INTO {quote_identifier(sql_name)} VALUES ({placeholders})" if self.columns else None
+        exporter.submit(self, lambda conn: conn.execute(self._create))
+
+    def write(self, rows: List[List[Any]]):
+        if self.error is not None:
+            raise self.error
+        if self._insert is None:
+            self.row_count += len(rows)
+            return
+
+        width = len(self.columns)
+        values = [
+            (row + [None] * (width - len(row)))[:width] if isinstance(row, list) else [row] + [None] * (width - 1)
+            for row in rows
+        ]
+        if self.column_types:
+            coerced = []
+            for i, column_type in enumerate(self.column_types):
+                # SQLite columns are dynamically typed, so values that do not fit keep their text
+                column, failures = coerce_values([row[i] for row in values], column_type, keep_invalid=True)
+                self.coercion_failures += failures
+                coerced.append(column)
+            values = list(zip(*coerced))
+        else:
+            values = [[v if v is None or isinstance(v, (int, float, str)) else str(v) for v in row] for row in values]
+
+        self.exporter.submit(self, lambda conn: conn.executemany(self._insert, values))
+        self.row_count += len(rows)
+
+    def close(self) -> int:
+        """
+        Creates the configured indexes and records the table metadata, once all rows are loaded.
+
+        Returns:
+            int: The number of data rows written.
+
+        Raises:
+            Exception: The error that stopped the table from loading.
+        """
+        if self.closed:
+            return self.row_count
+        self.closed = True
+        done = Future()
+        self.exporter.submit(self, self._finish, done)
+        done.result()
+        return self.row_count
+
+    def abort(self):
+        """
+        Drops the table, so a table that failed to load leaves nothing in the database.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.exporter.release_name(self)
+
+    def _finish(self, conn: sqlite3.Connection):
+        indexed = self.exporter.create_indexes(self.sql_name, self.table.get("name"), self.columns)
+        conn.execute(
+            f"INSERT INTO {METADATA_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.sql_name,
+                self.table.get("name"),
+                json.dumps(self.table.get("columns", []), ensure_ascii=False),
+                json.dumps(self.column_types) if self.column_types else None,
+                self.row_count,
+                json.dumps(indexed, ensure_ascii=False),
+                json.dumps(self.table.get("metadata"), ensure_ascii=False, default=str),
+            ),
+        )
+
+
+class SqliteExporter:
+    """
+    Writes all tables of a run into one SQLite database.
+
+    A single loader thread owns the connection and runs the statements of all
+    tables in the order they are submitted, while the export threads go on reading
+    and coercing rows. The tables being loaded share one transaction, which is
+    committed once none of them is half-loaded, so readers and a crash never see a
+    partial table (fsync is disabled, as the file is rebuilt from scratch on every
+    export). Every statement runs in a savepoint; a table that fails to load is
+    rolled back and dropped, so it leaves nothing behind. Indexes are created after
+    the rows are loaded. A '_table_metadata' side table lists every exported table
+    with its original name, columns, types, row count and metadata.
+
+    Indexes are configured as column names, which index that column in every table
+    that has it, or as 'table.column' to target one table (matched against the
+    original table name or the SQL table name, case-insensitively).
+    """
+
+    def __init__(self, db_path: str, indexes: Optional[List[str]] = None, max_pending: int = 8):
+        """
+        Creates a fresh database, replacing any existing file.
+
+        Args:
+            db_path (str): The database path.
+            indexes (List[str], optional): Index specifications as described above.
+            max_pending (int): Batches of rows waiting for the loader thread before writers block.
+        """
+        self.db_path = db_path
+        self.indexes = [spec.strip() for spec in indexes or [] if spec.strip()]
+        self._names = set()
+        self._lock = threading.Lock()
+        self._error: Optional[BaseException] = None
+
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        self.conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        # The rollback journal stays on disk, so a crashed export is rolled back when the file is opened
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute(
+            f"CREATE TABLE {METADATA_TABLE} ("
+            "table_name TEXT PRIMARY KEY, source_name TEXT, columns TEXT, column_types TEXT, "
+            "row_count INTEGER, indexes TEXT, metadata TEXT)"
+        )
+        self._pending = queue.Queue(maxsize=max(1, max_pending))
+        self._loader = threading.Thread(target=self._load, name="sqlite-loader", daemon=True)
+        self._loader.start()
+
+    def table_writer(self, name: str, table: Dict[str, Any]) -> SqliteTableWriter:
+        """
+        Starts loading a table. `name` is made unique among the tables in the database.
+        """
+        with self._lock:
+            sql_name = name or "untitled"
+            counter = 1
+            while sql_name.lower() in self._names or sql_name.lower() == METADATA_TABLE:
+                sql_name = f"{name}_{counter}"
+                counter += 1
+            self._names.add(sql_name.lower())
+        return SqliteTableWriter(self, sql_name, table)
+
+    def submit(self, writer: SqliteTableWriter, statement, done: Future = None):
+        """
+        Queues a statement of a table for the loader thread. Blocks while too many are pending.
+
+        Args:
+            writer (SqliteTableWriter): The table the statement belongs to.
+            statement (Callable, optional): Called with the connection. None drops the table.
+            done (Future, optional): Resolved once the statement ran, or with the table's error.
+        """
+        self._pending.put((writer, statement, done))
+
+    def release_name(self, writer: SqliteTableWriter):
+        """
+        Drops the table of an aborted writer, so its name can be used again.
+        """
+        with self._lock:
+            # Queued under the lock, so a new table of the same name is created after the drop
+            self._names.discard(writer.sql_name.lower())
+            self.submit(writer, None)
+
+    def create_indexes(self, sql_name: str, source_name: Optional[str], columns: List[str]) -> List[str]:
+        """
+        Creates the configured indexes that apply to a table.
+
+        Returns:
+            List[str]: The indexed column names.
+        """
+        lookup = {c.lower(): c for c in columns}
+        table_names = {sql_name.lower(), str(source_name or "").lower()}
+        indexed = []
+        for spec in self.indexes:
+            target, _, column = spec.rpartition(".")
+            if target and target.lower() not in table_names:
+                continue
+            column = lookup.get(column.lower())
+            if column is None or column in indexed:
+                continue
+            index_name = quote_identifier(f"idx_{sql_name}_{column}")
+            self.conn.execute(f"CREATE INDEX {index_name} ON {quote_identifier(sql_name)} ({quote_identifier(column)})")
+            indexed.append(column)
+        return indexed
+
+    def close(self):
+        """
+        Waits for the loader thread, drops the tables that were not finished and closes the database.
+
+        Raises:
+            sqlite3.Error: If the shared transaction could not be committed, losing the tables in it.
+        """
+        self._pending.put(None)
+        self._loader.join()
+        self.conn.close()
+        if self._error is not None:
+            raise self._error
+        logger.info(f"Exported {len(self._names)} tables to {self.db_path}")
+
+    def _load(self):
+        # Runs on the loader thread, which alone uses the connection
+        loading = {}
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+            writer, statement, done = item
+            if statement is None:
+                loading.pop(writer.sql_name, None)
+                self._drop(writer)
+            elif writer.error is None and self._error is None:
+                if not self.conn.in_transaction:
+                    self.conn.execute("BEGIN")
+                loading[writer.sql_name] = writer
+                try:
+                    self.conn.execute("SAVEPOINT statement")
+                    statement(self.conn)
+                    self.conn.execute("RELEASE statement")
+                except Exception as e:
+                    logger.error(f"Loading table '{writer.sql_name}' into {self.db_path} failed: {e}")
+                    writer.error = e
+                    loading.pop(writer.sql_name)
+                    self._rollback_statement(writer, loading)
+            elif writer.error is None:
+                writer.error = self._error
+            if done is not None:
+                loading.pop(writer.sql_name, None)
+                if writer.error is not None:
+                    done.set_exception(writer.error)
+                else:
+                    done.set_result(None)
+            if not loading:
+                self._commit()
+        # Tables that were never finished are not committed with the others
+        for writer in loading.values():
+            self._drop(writer)
+        self._commit()
+
+    def _rollback_statement(self, writer: SqliteTableWriter, loading: Dict[str, SqliteTableWriter]):
+        if self.conn.in_transaction:
+            try:
+                self.conn.execute("ROLLBACK TO statement")
+                self.conn.execute("RELEASE statement")
+                self._drop(writer)
+                return
+            except sqlite3.Error:
+                self.conn.execute("ROLLBACK")
+        # Some errors roll back the whole transaction, and with it the tables loaded in it
+        self._error = writer.error
+        for other in loading.values():
+            other.error = writer.error
+        loading.clear()
+
+    def _commit(self):
+        if not self.conn.in_transaction:
+            return
+        try:
+            self.conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            logger.error(f"Committing tables to {self.db_path} failed: {e}")
+            self._error = e
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+
+    def _drop(self, writer: SqliteTableWriter):
+        try:
+            self.conn.execute(f"DROP TABLE IF EXISTS {quote_identifier(writer.sql_name)}")
+        except sqlite3.Error as e:
+            logger.error(f"Could not drop table '{writer.sql_name}' from {self.db_path}: {e}")
@@ -0,0 +1,193 @@
+import logging
+import os
+import socket
+import threading
+from typing import Any, Dict
+
+from opengin.tracer.agents.scanner import Agent1
+from opengin.tracer.agents.scheduler import RateLimiter
+from opengin.tracer.cancellation import CancelToken, RunCancelled
+from opengin.tracer.jobqueue import Job, JobQueue
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class PageWorker:
+    """
+    The page worker of distributed runs (`opengin tracer worker`).
+
+    Leases page jobs queued by a coordinating Agent 0, extracts each page with
+    Agent 1 and writes the page result through the storage layer, where the
+    coordinator reads it. Without a storage backend, the pipelines directory must be
+    a volume shared with the coordinator.
+
+    While a page is extracted, its lease is extended every third of the lease time.
+    If the lease is lost (it expired, or the run was cancelled), the extraction is
+    stopped at its next step and the page is left to whichever worker holds it now.
+    """
+
+    def __init__(
+        self,
+        fs_manager,
+        job_queue: JobQueue,
+        worker_id: str = None,
+        api_key: str = None,
+        workers: int = 1,
+        rate_limiter: RateLimiter = None,
+    ):
+        """
+        Initialize the Page Worker.
+
+        Args:
+            fs_manager (FileSystemManager): Reads the pages and stores the results, with the
+                                            storage backend shared with the coordinator.
+            job_queue (JobQueue): The queue the coordinator puts the page jobs on.
+            worker_id (str, optional): Identifies the worker in the queue. Defaults to 'host:pid'.
+            api_key (str, optional): The Google API Key.
+            workers (int): Number of pages extracted concurrently.
+            rate_limiter (RateLimiter, optional): Limits the rate of extraction requests.
+        """
+        self.fs_manager = fs_manager
+        self.job_queue = job_queue
+        self.worker_id = worker_id or default_worker_id()
+        self.api_key = api_key
+        self.workers = max(1, workers)
+        self.rate_limiter = rate_limiter
+        self.agent1 = Agent1(fs_manager)
+        self.processed = 0
+        self._active: Dict[str, tuple] = {}
+        self._leased = 0
+        self._lock = threading.Lock()
+        self._lease_lock = threading.Lock()
+
+    def run(self, stop: threading.Event = None, max_jobs: int = None, idle_timeout: float = None) -> int:
+        """
+        Processes jobs until stopped.
+
+        Args:
+            stop (threading.Event, optional): Set to stop leasing new jobs; jobs in progress are finished.
+            max_jobs (int, optional): Stop after leasing this many jobs.
+            idle_timeout (float, optional): Stop once no job was queued for this many seconds.
+
+        Returns:
+            int: The number of jobs processed.
+        """
+        stop = stop or threading.Event()
+        heartbeat_stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(heartbeat_stop,), name="lease-heartbeat")
+        heartbeat.start()
+        logger.info(f"Worker '{self.worker_id}': Started with {self.workers} page workers")
+        threads = [
+            threading.Thread(target=self._loop, args=(stop, max_jobs, idle_timeout), name=f"page-worker-{i}")
+            for i in range(self.workers)
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            stop.set()
+            for thread in threads:
+                if thread.is_alive():
+                    thread.join()
+            heartbeat_stop.set()
+            heartbeat.join()
+        logger.info(f"Worker '{self.worker_id}': Stopped after {self.processed} jobs")
+        return self.processed
+
+    def _loop(self, stop: threading.Event, max_jobs: int, idle_timeout: float):
+        idle = 0.0
+        while not stop.is_set():
+            with self._lease_lock:
+                if max_jobs is not None and self._leased >= max_jobs:
+                    return
+                job = self.job_queue.lease(self.worker_id)
+                if job is not None:
+                    self._leased += 1
+            if job is None:
+                if idle_timeout is not None and idle >= idle_timeout:
+                    return
+                stop.wait(self.job_queue.poll_interval)
+                idle += self.job_queue.poll_interval
+                continue
+            idle = 0.0
+            self.process(job)
+
+    def _heartbeat(self, stop: threading.Event):
+        # Extends the leases of the jobs in progress; a job whose lease was lost is stopped
+        interval = self.job_queue.lease_seconds / 3
+        while not stop.wait(interval):
+            with self._lock:
+                active = list(self._active.values())
+            for job, cancel in active:
+                try:
+                    if not self.job_queue.extend(job):
+                        logger.warning(f"Worker '{self.worker_id}': Lost the lease of job {job.job_id}")
+                        cancel.cancel()
+                except Exception as e:
+                    logger.error(f"Worker '{self.worker_id}': Could not extend the lease of job {job.job_id}: {e}")
+
+    def process(self, job: Job) -> bool:
+        """
+        Extracts the page of a leased job and completes the job with the stored result.
+
+        Returns:
+            bool: True if the job was completed, False if its lease was lost.
+        """
+        payload = job.payload
+        pipeline_name, run_id, page_num = payload["pipeline_name"], payload["run_id"], payload["page_num"]
+        cancel = CancelToken()
+        with self._lock:
+            self._active[job.job_id] = (job, cancel)
+        local_files = []
+        try:
+            logger.info(f"Worker '{self.worker_id}': Processing page {page_num} of '{pipeline_name}' run '{run_id}'")
+            try:
+                page_path = self.fs_manager.fetch_run_file(pipeline_name, run_id, payload["page_file"])
+                local_files.append(page_path)
+                page_data = self.agent1.scan_page(
+                    pipeline_name,
+                    run_id,
+                    page_num,
+                    page_path,
+                    payload["prompt"],
+                    payload.get("metadata_schema"),
+                    self.api_key,
+                    self.rate_limiter,
+                    cancel,
+                    record=False,
+                )
+                result_path = self.fs_manager.get_intermediate_result_path(pipeline_name, run_id, page_num)
+                local_files.append(result_path)
+                self.fs_manager.push_run_files(pipeline_name, run_id, [result_path])
+                run_path = self.fs_manager.get_pipeline_path(pipeline_name, run_id)
+                result: Dict[str, Any] = {"file": os.path.relpath(result_path, run_path).replace(os.sep, "/")}
+                if "error" in page_data:
+                    result["error"] = page_data["error"]
+            except RunCancelled:
+                return False
+            except Exception as e:
+                logger.error(f"Worker '{self.worker_id}': Failed on page {page_num} of run '{run_id}' - {e}")
+                result = {"error": str(e)}
+
+            completed = self.job_queue.complete(job, result)
+            if completed:
+                with self._lock:
+                    self.processed += 1
+            else:
+                logger.warning(f"Worker '{self.worker_id}': Lost the lease of job {job.job_id}, result dropped")
+            return completed
+        finally:
+            # With a storage backend the page and its result are stored there, so a
+            # long-running worker does not keep a copy of every page it processed
+            try:
+                self.fs_manager.remove_local_copies(local_files)
+            except OSError as e:
+                logger.warning(f"Worker '{self.worker_id}': Could not remove the local files of job {job.job_id}: {e}")
+            with self._lock:
+                self._active.pop(job.job_id, None)
@@ -0,0 +1,204 @@
+"""
+Single-file archives of run directories.
+
+A completed run is left with hundreds of small files (page PDFs, per-page results,
+exports). Archiving packs them into one zip file, `run.zip`, inside the run
+directory; only `metadata.json` (which is still updated and indexed), the run
+manifest and inputs shared with the blob store stay on disk. Zip keeps a central
+directory of its members, so single members are read in place without unpacking
+the archive.
+
+Members that are already compressed (.gz, .zst, .parquet, ...) are stored as-is,
+everything else is deflated.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from typing import IO, Iterable, List, Optional
+
+from opengin.tracer import formats
+from opengin.tracer.manifest import MANIFEST_FILENAME
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FILENAME = "run.zip"
+
+# Archive members that are already compressed are stored without deflating them again
+STORED_SUFFIXES = (".gz", ".zst", ".parquet", ".zip")
+
+# Files of a run directory that are never archived
+KEEP_ON_DISK = ("metadata.json", MANIFEST_FILENAME, ARCHIVE_FILENAME)
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def compress_type(name: str) -> int:
+    return zipfile.ZIP_STORED if name.endswith(STORED_SUFFIXES) else zipfile.ZIP_DEFLATED
+
+
+def write_archive(
+    source_dir: str, zip_path: str, exclude: Iterable[str] = (), members_from: "RunArchive" = None
+) -> List[str]:
+    """
+    Writes all files of a directory into a zip archive.
+
+    Args:
+        source_dir (str): The directory to archive.
+        zip_path (str): The archive to create.
+        exclude (Iterable[str]): Paths relative to `source_dir` to leave out.
+        members_from (RunArchive, optional): An archive whose members are copied into
+                                             the new one, unless a file on disk has the same name.
+
+    Returns:
+        List[str]: The names of the archived members.
+    """
+    exclude = set(exclude)
+    written = []
+    with zipfile.ZipFile(zip_path, "w") as archive:
+        for root, dirs, files in os.walk(source_dir):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                arcname = os.path.relpath(file_path, source_dir).replace(os.sep, "/")
+                if arcname in exclude:
+                    continue
+                archive.write(file_path, arcname, compress_type=compress_type(name))
+                written.append(arcname)
+
+        if members_from is not None:
+            on_disk = set(written)
+            for member in members_from.names():
+                if member in on_disk or member in exclude:
+                    continue
+                info = zipfile.ZipInfo(member)
+                info.compress_type = compress_type(member)
+                with members_from.open_binary(member) as src, archive.open(info, "w", force_zip64=True) as dest:
+                    shutil.copyfileobj(src, dest, COPY_BUFFER_SIZE)
+                written.append(member)
+    return written
+
+
+class RunArchive:
+    """
+    Read access to the members of a run archive.
+
+    The central directory is read once. Members can be opened from several threads.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Path of the archive file.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._zip = zipfile.ZipFile(path, "r")
+        self._names = [info.filename for info in self._zip.infolist() if not info.is_dir()]
+        self._name_set = set(self._names)
+        self.mtime = os.path.getmtime(path)
+
+    def names(self) -> List[str]:
+        return list(self._names)
+
+    def exists(self, member: str) -> bool:
+        return member in self._name_set
+
+    def isdir(self, member: str) -> bool:
+        prefix = member.rstrip("/") + "/"
+        return any(name.startswith(prefix) for name in self._names)
+
+    def listdir(self, member: str) -> List[str]:
+        """
+        Returns the names of the entries directly under a directory of the archive.
+        """
+        prefix = member.rstrip("/") + "/" if member else ""
+        entries = {name[len(prefix) :].split("/", 1)[0] for name in self._names if name.startswith(prefix)}
+        return sorted(entries)
+
+    def size(self, member: str) -> int:
+        return self._zip.getinfo(member).file_size
+
+    def open_binary(self, member: str) -> IO[bytes]:
+        with self._lock:
+            return self._zip.open(member, "r")
+
+    def open(self, member: str, newline: Optional[str] = None) -> IO[str]:
+        """
+        Opens a member for text reading, decompressing .gz and .zst members.
+        """
+        return formats.wrap_artifact(self.open_binary(member), member, newline=newline)
+
+    def extract_all(self, dest_dir: str):
+        with self._lock:
+            self._zip.extractall(dest_dir)
+
+    def close(self):
+        self._zip.close()
+
+
+def archive_run_directory(run_path: str) -> dict:
+    """
+    Packs a run directory into `run.zip` and removes the archived files.
+
+    The archive is written to a temporary file and moved into place before anything
+    is removed, so an interrupted archiving leaves the run intact. Files with other
+    hard links (inputs shared with the blob store) stay on disk, as archiving them
+    would duplicate their data.
+
+    Returns:
+        dict: The archive file name, member count and sizes before and after.
+    """
+    archive_path = os.path.join(run_path, ARCHIVE_FILENAME)
+    if os.path.exists(archive_path):
+        raise ValueError(f"Run at {run_path} is already archived")
+
+    exclude, size_before = [], 0
+    for root, _, files in os.walk(run_path):
+        for name in files:
+            file_path = os.path.join(root, name)
+            arcname = os.path.relpath(file_path, run_path).replace(os.sep, "/")
+            st = os.lstat(file_path)
+            if arcname in KEEP_ON_DISK or name.endswith(".lock") or st.st_nlink > 1:
+                exclude.append(arcname)
+            else:
+                size_before += st.st_size
+
+    fd, tmp_path = tempfile.mkstemp(dir=run_path, prefix=".archiving.", suffix=".zip")
+    os.close(fd)
+    exclude.append(os.path.basename(tmp_path))
+    try:
+        members = write_archive(run_path, tmp_path, exclude=exclude)
+        os.replace(tmp_path, archive_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    for member in members:
+        os.remove(os.path.join(run_path, member))
+    # Remove the directories left empty
+    for root, dirs, files in os.walk(run_path, topdown=False):
+        if root != run_path and not os.listdir(root):
+            os.rmdir(root)
+
+    archive_size = os.path.getsize(archive_path)
+    logger.info(f"Archived {len(members)} files of {run_path} ({size_before} -> {archive_size} bytes)")
+    return {"file": ARCHIVE_FILENAME, "members": len(members), "size_before": size_before, "size": archive_size}
+
+
+def unarchive_run_directory(run_path: str):
+    """
+    Extracts `run.zip` back into the run directory and removes it.
+    """
+    archive_path = os.path.join(run_path, ARCHIVE_FILENAME)
+    archive = RunArchive(archive_path)
+    try:
+        archive.extract_all(run_path)
+    finally:
+        archive.close()
+    os.remove(archive_path)
+    logger.info(f"Extracted archive of {run_path}")
@@ -0,0 +1,120 @@
+"""
+Batch ingestion of many documents.
+
+`Agent0.run_batch` runs one pipeline run per document. The pages of all documents
+are extracted by one shared thread pool and, optionally, one shared rate limiter, so
+the extraction API is kept busy across document boundaries instead of idling while a
+document is split, aggregated or exported.
+
+`expand_inputs` turns the sources given on the command line (files, directories and
+glob patterns) into the list of documents, and `BatchReport` collects the outcome
+and throughput of each document.
+"""
+
+import glob
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def expand_inputs(sources: Iterable[str], pattern: str = "*.pdf") -> List[str]:
+    """
+    Returns the documents named by a list of sources, in order and without duplicates.
+
+    Args:
+        sources (Iterable[str]): File paths, directories (their files matching `pattern`,
+                                 not recursive) or glob patterns (e.g. 'gazettes/**/*.pdf').
+        pattern (str): The files of a directory to include.
+
+    Raises:
+        FileNotFoundError: If a source is neither an existing file nor a directory or
+                           pattern matching at least one file.
+    """
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            matches = sorted(glob.glob(os.path.join(glob.escape(source), pattern)))
+        elif glob.has_magic(source):
+            matches = sorted(glob.glob(source, recursive=True))
+        elif os.path.isfile(source):
+            matches = [source]
+        else:
+            raise FileNotFoundError(f"Input not found: {source}")
+        matches = [m for m in matches if os.path.isfile(m)]
+        if not matches:
+            raise FileNotFoundError(f"No input files match: {source}")
+        paths.extend(matches)
+    return list(dict.fromkeys(paths))
+
+
+class BatchReport:
+    """
+    The outcome of a batch, with one entry per document.
+
+    Each entry is a dict with 'input', 'run_id', 'status' (COMPLETED, FAILED or CANCELLED),
+    'page_count', 'seconds', 'pages_per_second' and, for failed documents, 'error'.
+    Entries are added from several threads.
+    """
+
+    def __init__(self, pipeline_name: str, inputs: List[str]):
+        """
+        Args:
+            pipeline_name (str): The pipeline the documents are run in.
+            inputs (List[str]): The documents of the batch, in order.
+        """
+        self.pipeline_name = pipeline_name
+        self.inputs = list(inputs)
+        self.documents: List[Dict[str, Any]] = []
+        self.started = time.monotonic()
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(
+        self, input_path: str, run_id: Optional[str], status: str, page_count: int, seconds: float, error: str = None
+    ) -> Dict[str, Any]:
+        entry = {
+            "input": input_path,
+            "run_id": run_id,
+            "status": status,
+            "page_count": page_count,
+            "seconds": round(seconds, 3),
+            "pages_per_second": round(page_count / seconds, 3) if seconds > 0 else 0.0,
+        }
+        if error is not None:
+            entry["error"] = error
+        with self._lock:
+            self.documents.append(entry)
+        return entry
+
+    def finish(self):
+        """
+        Records the wall time of the batch and puts the entries in input order.
+        """
+        self.seconds = time.monotonic() - self.started
+        order = {path: i for i, path in enumerate(self.inputs)}
+        with self._lock:
+            self.documents.sort(key=lambda d: order.get(d["input"], len(order)))
+
+    @property
+    def page_count(self) -> int:
+        return sum(d["page_count"] for d in self.documents)
+
+    @property
+    def failed(self) -> List[Dict[str, Any]]:
+        return [d for d in self.documents if d["status"] != "COMPLETED"]
+
+    @property
+    def pages_per_second(self) -> float:
+        return round(self.page_count / self.seconds, 3) if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pipeline_name": self.pipeline_name,
+            "documents": self.documents,
+            "completed": len(self.documents) - len(self.failed),
+            "failed": len(self.failed),
+            "page_count": self.page_count,
+            "seconds": round(self.seconds, 3),
+            "pages_per_second": self.pages_per_second,
+        }
@@ -0,0 +1,174 @@
+"""
+Content-addressed store for input files.
+
+Every distinct input is stored once under its SHA-256 digest
+(`<root>/ab/abcdef...`) and linked into run directories, so re-running the same
+document with different prompts does not duplicate its bytes. Links are made by
+reflink (copy-on-write clone) where the filesystem supports it, then by hardlink,
+and only fall back to a real copy across filesystems. Blobs are made read-only,
+as a hardlinked run input shares its inode with the blob.
+
+The store itself does not know who uses a blob; reference counts are kept by the
+caller (see `RunRegistry.add_blob_ref`).
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from typing import BinaryIO, Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+BLOBS_DIRNAME = ".blobs"
+CHUNK_SIZE = 1024 * 1024
+
+# ioctl request that clones a file's extents on Linux (btrfs, XFS, ...)
+_FICLONE = 0x40049409
+
+
+def reflink(src: str, dest: str) -> bool:
+    """
+    Clones `src` to `dest` sharing the data blocks copy-on-write.
+
+    Returns:
+        bool: False if the platform or filesystem does not support it.
+    """
+    if fcntl is None or not hasattr(fcntl, "ioctl"):
+        return False
+    try:
+        with open(src, "rb") as s, open(dest, "wb") as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        return True
+    except OSError:
+        if os.path.exists(dest):
+            os.remove(dest)
+        return False
+
+
+class BlobStore:
+    """
+    Stores files by the SHA-256 of their content.
+    """
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root (str): Directory holding the blobs. Created on first write.
+        """
+        self.root = root
+
+    def path(self, digest: str) -> str:
+        """
+        Returns the path of a blob.
+        """
+        return os.path.join(self.root, digest[:2], digest)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def digests(self) -> Iterator[str]:
+        """
+        Iterates over the digests of all stored blobs.
+        """
+        if not os.path.isdir(self.root):
+            return
+        for prefix in sorted(os.listdir(self.root)):
+            prefix_dir = os.path.join(self.root, prefix)
+            if len(prefix) != 2 or not os.path.isdir(prefix_dir):
+                continue
+            for name in sorted(os.listdir(prefix_dir)):
+                if name.startswith(prefix):
+                    yield name
+
+    def put_stream(self, stream: BinaryIO) -> str:
+        """
+        Stores the content of a binary stream, hashing it while it is written.
+
+        Returns:
+            str: The SHA-256 hex digest of the content.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".incoming.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    f.write(chunk)
+            return self._commit(tmp_path, digest.hexdigest())
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def put_file(self, file_path: str) -> str:
+        """
+        Stores a file. If its content is already stored, the file is only read.
+
+        Returns:
+            str: The SHA-256 hex digest of the content.
+        """
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        hexdigest = digest.hexdigest()
+        if self.exists(hexdigest):
+            return hexdigest
+
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".incoming.")
+        os.close(fd)
+        try:
+            if not reflink(file_path, tmp_path):
+                shutil.copyfile(file_path, tmp_path)
+            return self._commit(tmp_path, hexdigest)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def link(self, digest: str, dest: str) -> str:
+        """
+        Materializes a blob at `dest` by reflink, hardlink or, as a last resort, copy.
+
+        Returns:
+            str: How the file was linked: 'reflink', 'hardlink' or 'copy'.
+        """
+        src = self.path(digest)
+        if os.path.exists(dest):
+            os.remove(dest)
+        if reflink(src, dest):
+            return "reflink"
+        try:
+            os.link(src, dest)
+            return "hardlink"
+        except OSError:
+            shutil.copyfile(src, dest)
+            return "copy"
+
+    def remove(self, digest: str):
+        """
+        Deletes a blob. Links already made to it keep their content.
+        """
+        path = self.path(digest)
+        if os.path.exists(path):
+            os.remove(path)
+            logger.info(f"Removed unreferenced blob {digest}")
+
+    def _commit(self, tmp_path: str, digest: str) -> str:
+        path = self.path(digest)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.chmod(tmp_path, 0o444)
+        os.replace(tmp_path, path)
+        return digest
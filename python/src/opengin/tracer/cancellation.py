@@ -0,0 +1,95 @@
+"""
+Cooperative cancellation of pipeline runs.
+
+A running run holds a `CancelToken`. `Agent0.cancel_run` sets it when the run is
+going in the same process (e.g. the API server); another process (e.g. the CLI)
+cancels it by writing the hidden marker file `.cancel` into the run directory,
+which the token checks as well.
+
+Nothing is interrupted forcibly: the threads of the run check the token between
+pages and between the steps of an extraction request and raise `RunCancelled`.
+Pages already extracted are kept, so a cancelled run can be resumed.
+"""
+
+import os
+import threading
+import time
+
+CANCEL_FILENAME = ".cancel"
+
+
+class RunCancelled(Exception):
+    """
+    Raised in the threads of a run once it has been cancelled.
+    """
+
+
+class CancelToken:
+    """
+    The cancellation signal of one run.
+
+    Methods may be called from several threads.
+    """
+
+    def __init__(self, marker_path: str = None, poll_interval: float = 1.0):
+        """
+        Args:
+            marker_path (str, optional): The marker file that cancels the run from another process.
+            poll_interval (float): How often `wait` looks for the marker file, in seconds.
+        """
+        self.marker_path = marker_path
+        self.poll_interval = poll_interval
+        self._event = threading.Event()
+
+    def cancel(self):
+        """
+        Cancels the run in this process.
+        """
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._event.is_set() and self.marker_path and os.path.exists(self.marker_path):
+            self._event.set()
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """
+        Raises:
+            RunCancelled: If the run has been cancelled.
+        """
+        if self.cancelled:
+            raise RunCancelled("Run cancelled")
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Sleeps for up to `timeout` seconds, returning early once the run is cancelled.
+
+        Returns:
+            bool: True if the run has been cancelled.
+        """
+        deadline = time.monotonic() + timeout
+        while not self.cancelled:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self._event.wait(min(remaining, self.poll_interval))
+        return True
+
+    def clear_marker(self):
+        """
+        Removes the marker file, e.g. once the run has stopped.
+        """
+        if self.marker_path:
+            try:
+                os.remove(self.marker_path)
+            except FileNotFoundError:
+                pass
+
+
+def request_cancel(run_path: str):
+    """
+    Writes the marker file that cancels the run in `run_path` from another process.
+    """
+    with open(os.path.join(run_path, CANCEL_FILENAME), "w") as f:
+        f.write(str(time.time()))
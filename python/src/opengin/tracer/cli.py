@@ -2,8 +2,10 @@ import ipaddress
 import json
 import os
 import re
+import signal
 import socket
 import tempfile
+import threading
 from datetime import datetime
 from urllib.parse import urlparse
 
@@ -13,6 +15,15 @@ import yaml
 from tabulate import tabulate
 
 from opengin.tracer.agents.orchestrator import Agent0, FileSystemManager
+from opengin.tracer.agents.scheduler import RateLimiter
+from opengin.tracer.agents.worker import PageWorker
+from opengin.tracer.batch import expand_inputs
+from opengin.tracer.cancellation import RunCancelled
+from opengin.tracer.events import EVENTS_FILENAME, TERMINAL_EVENTS, EventBus, tail_events
+from opengin.tracer.jobqueue import DEFAULT_LEASE_SECONDS, ENV_QUEUE_URL, queue_from_url
+from opengin.tracer.registry import SORT_COLUMNS
+from opengin.tracer.retention import RetentionPolicy, format_bytes
+from opengin.tracer.storage import ENV_STORAGE_URL, StorageError, storage_from_url
 
 
 def validate_url(url):
@@ -56,49 +67,162 @@ def cli():
 
 
 @cli.command()
-def list_runs():
+@click.option("--pipeline", "pipeline_name", default=None, help="Only list runs of this pipeline.")
+@click.option("--status", default=None, help="Only list runs with this status (e.g. COMPLETED, FAILED).")
+@click.option("--since", default=None, help="Only list runs created on or after this date (YYYY-MM-DD[ HH:MM]).")
+@click.option("--until", default=None, help="Only list runs created before this date (YYYY-MM-DD[ HH:MM]).")
+@click.option(
+    "--sort",
+    type=click.Choice(SORT_COLUMNS),
+    default="created_at",
+    show_default=True,
+    help="Column to sort by.",
+)
+@click.option("--asc", is_flag=True, help="Sort in ascending order (default is descending).")
+@click.option("--limit", type=click.IntRange(min=1), default=None, help="Maximum number of runs to show.")
+@click.option("--offset", type=click.IntRange(min=0), default=0, help="Number of runs to skip.")
+def list_runs(pipeline_name, status, since, until, sort, asc, limit, offset):
     """
-    List all pipeline runs.
+    List pipeline runs.
 
-    Scans the 'pipelines' directory and displays a tabular summary of all recorded runs,
-    including their status, page count, and creation timestamp.
+    Runs are served from the run registry (an SQLite index of all runs), which is
+    backfilled from the 'pipelines' directory on first use. The table shows each
+    run's status, page count, and creation timestamp.
     """
     fs_manager = FileSystemManager()
-    pipelines = fs_manager.list_pipelines()
+    try:
+        runs, total = fs_manager.query_runs(
+            pipeline_name=pipeline_name,
+            status=status,
+            since=since,
+            until=until,
+            sort=sort,
+            descending=not asc,
+            limit=limit,
+            offset=offset,
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
 
-    if not pipelines:
+    if not runs:
         click.echo("No runs found.")
         return
 
-    runs_data = []
-
-    for pipeline_name in pipelines:
-        run_ids = fs_manager.list_runs(pipeline_name)
-        for run_id in run_ids:
-            metadata = fs_manager.load_metadata(pipeline_name, run_id)
-            if metadata:
-                runs_data.append(
-                    [
-                        pipeline_name,
-                        run_id,
-                        metadata.get("status", "UNKNOWN"),
-                        metadata.get("page_count", 0),
-                        metadata.get("created_at", "N/A"),
-                    ]
-                )
-            else:
-                runs_data.append([pipeline_name, run_id, "CORRUPT", 0, "N/A"])
-
-    if runs_data:
-        click.echo(
-            tabulate(
-                runs_data,
-                headers=["Pipeline", "Run ID", "Status", "Pages", "Created At"],
-                tablefmt="grid",
-            )
+    runs_data = [
+        [run["pipeline_name"], run["run_id"], run["status"], run["page_count"] or 0, run["created_at"] or "N/A"]
+        for run in runs
+    ]
+    click.echo(
+        tabulate(
+            runs_data,
+            headers=["Pipeline", "Run ID", "Status", "Pages", "Created At"],
+            tablefmt="grid",
         )
-    else:
-        click.echo("No runs found.")
+    )
+    if len(runs) < total:
+        click.echo(f"Showing {offset + 1}-{offset + len(runs)} of {total} runs.")
+
+
+@cli.command()
+def rebuild_registry():
+    """
+    Rebuild the run registry from the 'pipelines' directory.
+
+    Use this after runs were added or removed outside of opengin, e.g. restored from a backup.
+    """
+    fs_manager = FileSystemManager()
+    count = fs_manager.rebuild_registry()
+    click.echo(f"Registry rebuilt with {count} runs.")
+
+
+@cli.command()
+@click.option("--dry-run", is_flag=True, help="Only report what would be removed and the reclaimable bytes.")
+@click.option(
+    "--uploads-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Also remove uploads older than the upload TTL from this directory (e.g. sandbox/uploads).",
+)
+@click.option(
+    "--keep-page-files/--remove-page-files",
+    default=None,
+    help="Keep or remove the split page PDFs of completed runs (removed by default).",
+)
+@click.option(
+    "--compact-after-days",
+    type=click.FloatRange(min=0),
+    default=None,
+    help="Compact the intermediate page files of completed runs older than this.",
+)
+@click.option(
+    "--archive-after-days",
+    type=click.FloatRange(min=0),
+    default=None,
+    help="Pack completed runs older than this into a single archive file.",
+)
+@click.option("--run-ttl-days", type=click.FloatRange(min=0), default=None, help="Delete runs older than this.")
+@click.option(
+    "--upload-ttl-hours",
+    type=click.FloatRange(min=0),
+    default=None,
+    help="Delete uploads and unreferenced input blobs older than this (default 24).",
+)
+def gc(dry_run, uploads_dir, keep_page_files, compact_after_days, archive_after_days, run_ttl_days, upload_ttl_hours):
+    """
+    Apply the retention policy to all runs.
+
+    The policy is read from the OPENGIN_* retention environment variables used by the
+    server's background sweeper; options given here override them. With --dry-run
+    nothing is removed and the reclaimable bytes are reported.
+    """
+    policy = RetentionPolicy.from_env()
+    if keep_page_files is not None:
+        policy.remove_page_files = not keep_page_files
+    if compact_after_days is not None:
+        policy.compact_after_days = compact_after_days
+    if archive_after_days is not None:
+        policy.archive_after_days = archive_after_days
+    if run_ttl_days is not None:
+        policy.run_ttl_days = run_ttl_days
+    if upload_ttl_hours is not None:
+        policy.upload_ttl_hours = upload_ttl_hours
+
+    fs_manager = FileSystemManager(retention=policy)
+    report = fs_manager.collect_garbage(dry_run=dry_run, upload_dir=uploads_dir)
+
+    if not report.actions:
+        click.echo("Nothing to clean up.")
+        return
+
+    click.echo(
+        tabulate(
+            [[a["action"], a["target"], format_bytes(a["bytes"])] for a in report.actions],
+            headers=["Action", "Target", "Size"],
+            tablefmt="grid",
+        )
+    )
+    verb = "Reclaimable" if dry_run else "Reclaimed"
+    click.echo(f"{verb}: {format_bytes(report.total_bytes)} in {len(report.actions)} actions.")
+
+
+def format_timings(timings):
+    """
+    Formats the 'timings' of a run's metadata as a table with a summary line.
+    """
+
+    def rss(value):
+        return format_bytes(value) if value is not None else "-"
+
+    rows = [
+        [name, stage["started_at"], stage["wall_seconds"], stage["cpu_seconds"], rss(stage["peak_rss_bytes"])]
+        for name, stage in timings.get("stages", {}).items()
+    ]
+    table = tabulate(rows, headers=["Stage", "Started At", "Wall (s)", "CPU (s)", "Peak RSS"], tablefmt="grid")
+    summary = f"Total: {timings['wall_seconds']}s wall, {timings['cpu_seconds']}s CPU"
+    summary += f", peak RSS {rss(timings['peak_rss_bytes'])}"
+    if timings.get("pages_per_second"):
+        summary += f", {timings['pages_per_second']} pages/s"
+    return f"{table}\n{summary}"
 
 
 @cli.command()
@@ -108,27 +232,270 @@ def info(pipeline_name, run_id):
     """
     Show details for a specific run.
 
-    Displays the full metadata JSON and lists the generated output files (CSVs)
-    for the specified pipeline run.
+    Displays the full metadata JSON, the time and memory taken by each stage and
+    lists the generated output files (CSVs) for the specified pipeline run.
 
     Args:
         pipeline_name (str): The name of the pipeline.
         run_id (str): The unique identifier for the run.
     """
     fs_manager = FileSystemManager()
-    metadata = fs_manager.load_metadata(pipeline_name, run_id)
+    with fs_manager.reading_run(pipeline_name, run_id):
+        metadata = fs_manager.load_metadata(pipeline_name, run_id)
 
-    if metadata:
-        click.echo(json.dumps(metadata, indent=2))
+        if metadata:
+            click.echo(json.dumps(metadata, indent=2))
 
-        # Also list output files
-        output_dir = fs_manager.get_output_path(pipeline_name, run_id)
-        if os.path.exists(output_dir):
-            click.echo("\nOutput Files:")
-            for f in os.listdir(output_dir):
-                click.echo(f" - {f}")
+            timings = metadata.get("timings")
+            if timings:
+                click.echo("\nStage Timings:")
+                click.echo(format_timings(timings))
+
+            # Also list output files (read from the run archive if the run is archived)
+            output_dir = fs_manager.get_output_path(pipeline_name, run_id)
+            if fs_manager.run_path_exists(output_dir):
+                click.echo("\nOutput Files:")
+                for f in fs_manager.list_run_dir(output_dir):
+                    click.echo(f" - {f}")
+        else:
+            click.echo(f"Run {run_id} not found for pipeline {pipeline_name}.")
+
+
+def format_event(event):
+    """
+    Formats a progress event as one line.
+    """
+    when = datetime.fromtimestamp(event["time"]).strftime("%H:%M:%S")
+    kind = event["type"]
+    if kind in ("page_completed", "page_failed"):
+        done = event["pages_completed"] + event["pages_failed"]
+        line = f"page {event['page_num']} {'failed' if kind == 'page_failed' else 'done'}: "
+        line += f"{done}/{event['page_count']} pages ({event['pages_failed']} failed), "
+        line += f"{event['pages_per_second']} pages/s"
+        if event.get("eta_seconds") is not None:
+            line += f", ETA {event['eta_seconds']}s"
+    elif kind == "scan_started":
+        line = f"scanning {event['page_count']} pages"
+    elif kind == "stage_started":
+        line = f"{event['stage']} started"
+    elif kind == "stage_finished":
+        line = f"{event['stage']} finished in {event['wall_seconds']}s"
+    elif kind == "run_failed":
+        line = f"run failed: {event['error']}"
     else:
-        click.echo(f"Run {run_id} not found for pipeline {pipeline_name}.")
+        line = kind.replace("_", " ")
+    return f"[{when}] {line}"
+
+
+@cli.command()
+@click.argument("pipeline_name")
+@click.argument("run_id")
+@click.option("--after", type=click.IntRange(min=0), default=0, help="Only show events after this sequence number.")
+@click.option("--follow", "-f", is_flag=True, help="Keep printing new events until the run ends.")
+@click.option("--json", "as_json", is_flag=True, help="Print the events as JSON Lines.")
+def events(pipeline_name, run_id, after, follow, as_json):
+    """
+    Show the progress events of a run.
+
+    Events are read from the run's event log. With '--follow', events are printed as
+    the running pipeline writes them, until the run completes, fails or is cancelled.
+
+    Args:
+        pipeline_name (str): The name of the pipeline.
+        run_id (str): The unique identifier for the run.
+    """
+    fs_manager = FileSystemManager()
+    if not fs_manager.load_metadata(pipeline_name, run_id):
+        raise click.ClickException(f"Run {run_id} not found for pipeline {pipeline_name}.")
+
+    def show(event):
+        click.echo(json.dumps(event) if as_json else format_event(event))
+
+    past = EventBus(fs_manager).events(pipeline_name, run_id, after)
+    for event in past:
+        show(event)
+    if not follow or (past and past[-1]["type"] in TERMINAL_EVENTS):
+        return
+    if fs_manager.load_metadata(pipeline_name, run_id).get("status") in ("COMPLETED", "FAILED", "CANCELLED"):
+        return
+
+    path = os.path.join(fs_manager.get_pipeline_path(pipeline_name, run_id), EVENTS_FILENAME)
+    for event in tail_events(path, past[-1]["seq"] if past else after):
+        show(event)
+
+
+@cli.command()
+@click.argument("pipeline_name")
+@click.argument("run_id")
+def cancel(pipeline_name, run_id):
+    """
+    Cancel a run that is ready or running.
+
+    The run may be running in another process, e.g. the server. It stops at its next
+    page, keeps the pages extracted so far and is marked CANCELLED; continue it with
+    'resume'.
+
+    Args:
+        pipeline_name (str): The name of the pipeline.
+        run_id (str): The unique identifier for the run.
+    """
+    try:
+        cancelled = Agent0().cancel_run(pipeline_name, run_id)
+    except FileNotFoundError:
+        raise click.ClickException(f"Run {run_id} not found for pipeline {pipeline_name}.")
+    if not cancelled:
+        raise click.ClickException(f"Run {run_id} of pipeline {pipeline_name} is not running.")
+    click.echo(f"Cancellation of run {run_id} requested.")
+
+
+@cli.command()
+@click.argument("pipeline_name")
+@click.argument("run_id")
+def resume(pipeline_name, run_id):
+    """
+    Resume a cancelled or failed run.
+
+    Only the pages the run has not extracted yet (or failed on) are extracted, with the
+    prompt, metadata schema and options the run was started with.
+
+    Args:
+        pipeline_name (str): The name of the pipeline.
+        run_id (str): The unique identifier for the run.
+    """
+    agent0 = Agent0()
+    agent0.events.subscribe(lambda pipeline_name, run_id, event: click.echo(format_event(event)))
+    try:
+        agent0.resume_pipeline(pipeline_name, run_id)
+    except FileNotFoundError:
+        raise click.ClickException(f"Run {run_id} not found for pipeline {pipeline_name}.")
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    except RunCancelled:
+        raise click.ClickException(f"Run {run_id} cancelled.")
+    except Exception as e:
+        raise click.ClickException(f"Pipeline failed: {e}")
+    click.echo("\nPipeline completed successfully!")
+
+
+@cli.command()
+@click.argument("pipeline_name")
+@click.argument("run_id")
+def archive(pipeline_name, run_id):
+    """
+    Pack a completed run into a single archive file.
+
+    All files of the run except its metadata are moved into 'run.zip' in the run
+    directory. They can still be read by 'info', the server and the library.
+
+    Args:
+        pipeline_name (str): The name of the pipeline.
+        run_id (str): The unique identifier for the run.
+    """
+    fs_manager = FileSystemManager()
+    try:
+        info = fs_manager.archive_run(pipeline_name, run_id)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(
+        f"Archived {info['members']} files of run {run_id} into {info['file']} "
+        f"({format_bytes(info['size_before'])} -> {format_bytes(info['size'])})."
+    )
+
+
+@cli.command()
+@click.argument("pipeline_name")
+@click.argument("run_id")
+def unarchive(pipeline_name, run_id):
+    """
+    Extract an archived run back into its directory.
+
+    Args:
+        pipeline_name (str): The name of the pipeline.
+        run_id (str): The unique identifier for the run.
+    """
+    fs_manager = FileSystemManager()
+    if not fs_manager.is_run_archived(pipeline_name, run_id):
+        raise click.ClickException(f"Run {run_id} of pipeline {pipeline_name} is not archived.")
+    fs_manager.unarchive_run(pipeline_name, run_id)
+    click.echo(f"Extracted run {run_id} of pipeline {pipeline_name}.")
+
+
+@cli.command()
+@click.argument("pipeline_name")
+@click.argument("run_id", required=False)
+@click.option("--full", is_flag=True, help="Rehash every file instead of trusting matching sizes and mtimes.")
+@click.option("--update", is_flag=True, help="Rewrite the manifest from the files on disk instead of checking it.")
+def verify(pipeline_name, run_id, full, update):
+    """
+    Check runs against their manifests.
+
+    Each run keeps a manifest of its files with their size, mtime and SHA-256.
+    Files whose size and mtime match are not read unless '--full' is given. Checks
+    all runs of the pipeline if no run ID is given, and fails if any file is
+    missing, modified or not in the manifest.
+
+    Args:
+        pipeline_name (str): The name of the pipeline.
+        run_id (str, optional): The unique identifier for the run.
+    """
+    fs_manager = FileSystemManager()
+    run_ids = [run_id] if run_id else sorted(fs_manager.list_runs(pipeline_name))
+    if not run_ids:
+        raise click.ClickException(f"No runs found for pipeline {pipeline_name}.")
+
+    failed = False
+    for rid in run_ids:
+        if not fs_manager.load_metadata(pipeline_name, rid):
+            raise click.ClickException(f"Run {rid} not found for pipeline {pipeline_name}.")
+        if update:
+            changed = fs_manager.refresh_manifest(pipeline_name, rid)
+            click.echo(f"{rid}: manifest updated ({len(changed)} files changed).")
+            continue
+        try:
+            report = fs_manager.verify_run(pipeline_name, rid, full=full)
+        except FileNotFoundError:
+            click.echo(f"{rid}: no manifest, create one with 'verify --update'.")
+            failed = True
+            continue
+        if report.ok:
+            click.echo(f"{rid}: OK ({report.checked} files).")
+            continue
+        failed = True
+        click.echo(f"{rid}: FAILED")
+        for kind in ("missing", "modified", "untracked"):
+            for path in getattr(report, kind):
+                click.echo(f"  {kind}: {path}")
+    if failed:
+        raise click.ClickException("Verification failed.")
+
+
+@cli.command()
+@click.argument("pipeline_name")
+@click.argument("run_id")
+@click.argument("destination")
+@click.option("--endpoint-url", default=None, help="Endpoint of an S3-compatible service for s3:// destinations.")
+def sync(pipeline_name, run_id, destination, endpoint_url):
+    """
+    Copy a run to another storage location, transferring only changed files.
+
+    The destination is a directory (e.g. a mount of another host) or an
+    s3://bucket/prefix URL. The run manifests on both sides are compared, so
+    syncing a run again copies only the artifacts that changed since.
+
+    Args:
+        pipeline_name (str): The name of the pipeline.
+        run_id (str): The unique identifier for the run.
+        destination (str): The storage location to copy the run to.
+    """
+    fs_manager = FileSystemManager()
+    if not os.path.isdir(fs_manager.get_pipeline_path(pipeline_name, run_id)):
+        raise click.ClickException(f"Run {run_id} not found for pipeline {pipeline_name}.")
+    try:
+        storage = storage_from_url(destination, endpoint_url=endpoint_url)
+        copied = fs_manager.sync_run(pipeline_name, run_id, storage=storage)
+    except (ImportError, ValueError, StorageError) as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Copied {copied} changed files of run {run_id} to {destination}.")
 
 
 @cli.command()
@@ -191,44 +558,223 @@ def clear_all():
         click.echo(f"Error clearing all pipelines: {e}")
 
 
+def extraction_options(f):
+    """
+    Adds the extraction prompt, metadata schema and per-run options shared by `run` and `run-batch`.
+    """
+    options = [
+        click.option("--prompt", default="Extract all tables.", help="Extraction prompt or path to a text file."),
+        click.option("--metadata-schema", default=None, help="Path to a YAML file defining the metadata schema."),
+        click.option("--normalize", is_flag=True, help="Pad/truncate rows and coerce column types before aggregation."),
+        click.option(
+            "--detect-continuations",
+            is_flag=True,
+            help="Merge tables continued on the next page under a different name.",
+        ),
+        click.option(
+            "--dedup",
+            type=click.Choice(["exact", "key"]),
+            default=None,
+            help="Drop duplicate rows per table, comparing whole rows or only the --dedup-key columns.",
+        ),
+        click.option("--dedup-key", multiple=True, help="Key column used by '--dedup key'. Can be repeated."),
+        click.option(
+            "--out-of-core",
+            is_flag=True,
+            help="Stream aggregated rows into per-table files instead of holding them in memory.",
+        ),
+        click.option(
+            "--storage-format",
+            type=click.Choice(["json", "jsonl"]),
+            default="json",
+            help="Format of intermediate and aggregated files. 'jsonl' is compact and streamable.",
+        ),
+        click.option(
+            "--compression",
+            type=click.Choice(["gzip", "zstd"]),
+            default=None,
+            help="Compress intermediate, aggregated and exported CSV/metadata files while writing them.",
+        ),
+        click.option(
+            "--export-format",
+            "export_formats",
+            type=click.Choice(["csv", "parquet", "arrow", "sqlite"]),
+            multiple=True,
+            help="Output format for each table. Can be repeated. Defaults to csv.",
+        ),
+        click.option(
+            "--parquet-compression",
+            type=click.Choice(["none", "snappy", "gzip", "zstd", "brotli", "lz4"]),
+            default=None,
+            help="Parquet compression codec. Defaults to snappy.",
+        ),
+        click.option(
+            "--row-group-size", type=click.IntRange(min=1), default=None, help="Rows per Parquet/Arrow row group."
+        ),
+        click.option(
+            "--sqlite-index",
+            "sqlite_indexes",
+            multiple=True,
+            help="Column ('col' or 'table.col') to index in the SQLite export. Can be repeated.",
+        ),
+        click.option(
+            "--export-workers", type=click.IntRange(min=1), default=None, help="Number of tables to export in parallel."
+        ),
+        click.option(
+            "--scan-workers", type=click.IntRange(min=1), default=None, help="Number of pages to extract in parallel."
+        ),
+        click.option(
+            "--early-export/--no-early-export",
+            default=False,
+            help="Export tables that are complete while later pages are still being extracted.",
+        ),
+        click.option(
+            "--settle-pages",
+            type=click.IntRange(min=1),
+            default=None,
+            help="Pages without new rows after which a table is exported early.",
+        ),
+    ]
+    for option in reversed(options):
+        f = option(f)
+    return f
+
+
+def _load_prompt(prompt):
+    # If the prompt argument is a path to an existing file, read content.
+    if os.path.exists(prompt):
+        click.echo(f"Loading prompt from file: {prompt}")
+        with open(prompt, "r") as f:
+            return f.read()
+    return prompt
+
+
+def _load_metadata_schema(metadata_schema):
+    if not metadata_schema:
+        return None
+    if not os.path.exists(metadata_schema):
+        raise click.ClickException(f"Metadata schema file not found: {metadata_schema}")
+
+    try:
+        with open(metadata_schema, "r") as f:
+            schema_content = yaml.safe_load(f)
+
+        # Simple Validation
+        if not isinstance(schema_content, dict) or "fields" not in schema_content:
+            raise click.ClickException("Invalid schema format. Must typically contain a 'fields' list.")
+
+    except Exception as e:
+        raise click.ClickException(f"Error parsing metadata schema: {e}")
+    return schema_content
+
+
+def distribution_options(f):
+    """
+    Adds the job queue and storage options shared by `run`, `run-batch` and `worker`.
+    """
+    options = [
+        click.option(
+            "--queue",
+            "queue_url",
+            envvar=ENV_QUEUE_URL,
+            default=None,
+            help="Job queue of page workers: 'redis://host:port/db' or the path of a SQLite database "
+            "on a shared volume. Defaults to $OPENGIN_QUEUE_URL.",
+        ),
+        click.option(
+            "--storage",
+            "storage_url",
+            envvar=ENV_STORAGE_URL,
+            default=None,
+            help="Storage shared with the page workers, e.g. 's3://bucket/prefix'. Defaults to $OPENGIN_STORAGE_URL.",
+        ),
+    ]
+    for option in reversed(options):
+        f = option(f)
+    return f
+
+
+def _create_agent0(queue_url=None, storage_url=None):
+    # With a queue, pages are extracted by workers and this process only coordinates
+    try:
+        return Agent0(storage=storage_from_url(storage_url), job_queue=queue_from_url(queue_url))
+    except (ImportError, ValueError) as e:
+        raise click.ClickException(str(e))
+
+
+def _collect_options(
+    normalize=False,
+    detect_continuations=False,
+    dedup=None,
+    dedup_key=(),
+    out_of_core=False,
+    storage_format="json",
+    compression=None,
+    export_formats=(),
+    parquet_compression=None,
+    row_group_size=None,
+    sqlite_indexes=(),
+    export_workers=None,
+    scan_workers=None,
+    early_export=False,
+    settle_pages=None,
+):
+    # Collect per-run options, leaving out defaults
+    options = {}
+    if normalize:
+        options["normalize"] = True
+    if detect_continuations:
+        options["detect_continuations"] = True
+    if dedup:
+        if dedup == "key" and not dedup_key:
+            raise click.ClickException("'--dedup key' requires at least one --dedup-key column.")
+        options["dedup"] = dedup
+        options["dedup_key_columns"] = list(dedup_key)
+    if out_of_core:
+        options["out_of_core"] = True
+    if storage_format != "json":
+        options["storage_format"] = storage_format
+    if compression:
+        options["compression"] = compression
+    if export_formats:
+        options["export_formats"] = list(dict.fromkeys(export_formats))
+    if parquet_compression:
+        options["parquet_compression"] = parquet_compression
+    if row_group_size:
+        options["row_group_size"] = row_group_size
+    if sqlite_indexes:
+        options["sqlite_indexes"] = list(sqlite_indexes)
+    if export_workers:
+        options["export_workers"] = export_workers
+    if scan_workers:
+        options["scan_workers"] = scan_workers
+    if early_export:
+        options["early_export"] = True
+    if settle_pages:
+        options["settle_pages"] = settle_pages
+    return options
+
+
 @cli.command()
 @click.argument("input_source")
 @click.option("--name", default=None, help="Name of the pipeline run. Defaults to 'run_<timestamp>'.")
-@click.option("--prompt", default="Extract all tables.", help="Extraction prompt or path to a text file.")
-@click.option("--metadata-schema", default=None, help="Path to a YAML file defining the metadata schema.")
-def run(input_source, name, prompt, metadata_schema):
+@extraction_options
+@distribution_options
+def run(input_source, name, prompt, metadata_schema, queue_url, storage_url, **option_values):
     """
     Run an extraction pipeline.
 
     INPUT_SOURCE can be a local file path (e.g., ./data/doc.pdf) or a URL (e.g., https://example.com/doc.pdf).
 
     If INPUT_SOURCE starts with 'http://' or 'https://', it will be downloaded to a temporary location.
+
+    With '--queue', the pages are extracted by page workers ('worker') instead of this process.
     """
     # 1. Handle Prompt Input (String vs File)
-    # If the prompt argument is a path to an existing file, read content.
-    if os.path.exists(prompt):
-        click.echo(f"Loading prompt from file: {prompt}")
-        with open(prompt, "r") as f:
-            prompt_text = f.read()
-    else:
-        prompt_text = prompt
+    prompt_text = _load_prompt(prompt)
 
     # 1.5 Handle Metadata Schema
-    schema_content = None
-    if metadata_schema:
-        if not os.path.exists(metadata_schema):
-            raise click.ClickException(f"Metadata schema file not found: {metadata_schema}")
-
-        try:
-            with open(metadata_schema, "r") as f:
-                schema_content = yaml.safe_load(f)
-
-            # Simple Validation
-            if not isinstance(schema_content, dict) or "fields" not in schema_content:
-                raise click.ClickException("Invalid schema format. Must typically contain a 'fields' list.")
-
-        except Exception as e:
-            raise click.ClickException(f"Error parsing metadata schema: {e}")
+    schema_content = _load_metadata_schema(metadata_schema)
 
     # 2. Handle Input Source (Local vs URL)
     is_url = input_source.startswith("http://") or input_source.startswith("https://")
@@ -286,17 +832,21 @@ def run(input_source, name, prompt, metadata_schema):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         name = f"run_{timestamp}"
 
+    # 3.5 Collect per-run options
+    options = _collect_options(**option_values)
+
     # 4. Initialize and Run Agent0
     try:
-        agent0 = Agent0()
+        agent0 = _create_agent0(queue_url, storage_url)
 
         click.echo(f"Initializing pipeline '{name}' for file '{filename}'...")
         run_id, metadata = agent0.create_pipeline(name, input_path, filename)
 
         click.echo(f"Run ID: {run_id}")
         click.echo("Starting extraction...")
+        agent0.events.subscribe(lambda pipeline_name, run_id, event: click.echo(format_event(event)))
 
-        agent0.run_pipeline(name, run_id, prompt_text, metadata_schema=schema_content)
+        agent0.run_pipeline(name, run_id, prompt_text, metadata_schema=schema_content, options=options)
 
         # 5. Success Output
         click.echo("\nPipeline completed successfully!")
@@ -309,6 +859,8 @@ def run(input_source, name, prompt, metadata_schema):
             for f in os.listdir(output_dir):
                 click.echo(f" - {os.path.join(output_dir, f)}")
 
+    except RunCancelled:
+        raise click.ClickException(f"Run {run_id} cancelled. Continue it with 'resume {name} {run_id}'.")
     except Exception as e:
         raise click.ClickException(f"Pipeline failed: {e}")
 
@@ -318,5 +870,148 @@ def run(input_source, name, prompt, metadata_schema):
             os.remove(temp_file)
 
 
+@cli.command()
+@click.argument("sources", nargs=-1, required=True)
+@click.option(
+    "--name", default=None, help="Name of the pipeline the runs are created in. Defaults to 'batch_<timestamp>'."
+)
+@click.option(
+    "--max-documents",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Documents in progress at once. Defaults to the number of scan workers.",
+)
+@click.option(
+    "--requests-per-minute",
+    type=click.FloatRange(min=0, min_open=True),
+    default=None,
+    help="Limit on extraction requests across the whole batch.",
+)
+@extraction_options
+@distribution_options
+def run_batch(
+    sources, name, max_documents, requests_per_minute, prompt, metadata_schema, queue_url, storage_url, **option_values
+):
+    """
+    Run an extraction pipeline on many documents.
+
+    SOURCES are PDF files, directories (all PDFs in them) or glob patterns (e.g. 'gazettes/**/*.pdf').
+    Each document gets its own run in the pipeline. The pages of all documents share one pool of
+    '--scan-workers' threads and one rate limit, so extraction continues across document boundaries.
+    """
+    try:
+        input_paths = expand_inputs(sources)
+    except FileNotFoundError as e:
+        raise click.ClickException(str(e))
+
+    prompt_text = _load_prompt(prompt)
+    schema_content = _load_metadata_schema(metadata_schema)
+    options = _collect_options(**option_values)
+
+    if not name:
+        name = f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+    def on_document(entry):
+        click.echo(f"{entry['status']}: {entry['input']} ({entry['page_count']} pages in {entry['seconds']:.1f}s)")
+
+    click.echo(f"Running {len(input_paths)} documents in pipeline '{name}'...")
+    report = _create_agent0(queue_url, storage_url).run_batch(
+        name,
+        input_paths,
+        prompt_text,
+        metadata_schema=schema_content,
+        options=options,
+        max_documents=max_documents,
+        requests_per_minute=requests_per_minute,
+        on_document=on_document,
+    )
+
+    click.echo(
+        tabulate(
+            [
+                [d["input"], d["run_id"] or "-", d["status"], d["page_count"], d["seconds"], d["pages_per_second"]]
+                for d in report.documents
+            ],
+            headers=["Input", "Run ID", "Status", "Pages", "Seconds", "Pages/s"],
+            tablefmt="grid",
+        )
+    )
+    click.echo(
+        f"{len(report.documents) - len(report.failed)} of {len(report.documents)} documents completed, "
+        f"{report.page_count} pages in {report.seconds:.1f}s ({report.pages_per_second} pages/s)."
+    )
+    for d in report.failed:
+        click.echo(f"  {d['input']}: {d.get('error', d['status'])}")
+    if report.failed:
+        raise click.ClickException(f"{len(report.failed)} documents failed.")
+
+
+@cli.command()
+@distribution_options
+@click.option("--workers", type=click.IntRange(min=1), default=1, help="Number of pages extracted at the same time.")
+@click.option("--worker-id", default=None, help="Identifies the worker in the queue. Defaults to '<host>:<pid>'.")
+@click.option(
+    "--lease-seconds",
+    type=click.FloatRange(min=0, min_open=True),
+    default=DEFAULT_LEASE_SECONDS,
+    show_default=True,
+    help="Lease time of a page job; the job is re-queued if the worker does not extend it in time.",
+)
+@click.option(
+    "--requests-per-minute",
+    type=click.FloatRange(min=0, min_open=True),
+    default=None,
+    help="Limit on extraction requests of this worker.",
+)
+@click.option("--max-jobs", type=click.IntRange(min=1), default=None, help="Stop after this many page jobs.")
+@click.option(
+    "--idle-timeout",
+    type=click.FloatRange(min=0),
+    default=None,
+    help="Stop once no page job was queued for this many seconds. By default the worker runs until interrupted.",
+)
+def worker(queue_url, storage_url, workers, worker_id, lease_seconds, requests_per_minute, max_jobs, idle_timeout):
+    """
+    Extract pages of runs queued by other processes.
+
+    Page workers on any number of nodes lease page jobs from the shared queue and
+    write the page results to the shared storage (or a shared pipelines volume),
+    from where the process that started the run aggregates them. Jobs of a worker
+    that stops responding are re-queued once their lease expires.
+
+    Workers call Gemini with their own GOOGLE_API_KEY: API keys given to a run are
+    not sent through the queue. On Ctrl+C or SIGTERM the worker leases no more jobs
+    and stops once the pages in progress are done.
+    """
+    if not queue_url:
+        raise click.ClickException("No job queue given. Use --queue or set OPENGIN_QUEUE_URL.")
+    try:
+        job_queue = queue_from_url(queue_url, lease_seconds=lease_seconds)
+        storage = storage_from_url(storage_url)
+    except (ImportError, ValueError) as e:
+        raise click.ClickException(str(e))
+
+    rate_limiter = RateLimiter.per_minute(requests_per_minute, burst=workers) if requests_per_minute else None
+    page_worker = PageWorker(
+        FileSystemManager(storage=storage), job_queue, worker_id=worker_id, workers=workers, rate_limiter=rate_limiter
+    )
+    click.echo(f"Worker {page_worker.worker_id} waiting for page jobs...")
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        if not stop.is_set():
+            click.echo("Stopping after the pages in progress...")
+        stop.set()
+
+    handlers = {signum: signal.signal(signum, request_stop) for signum in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        processed = page_worker.run(stop, max_jobs=max_jobs, idle_timeout=idle_timeout)
+    finally:
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+        job_queue.close()
+    click.echo(f"Worker {page_worker.worker_id} stopped after {processed} page jobs.")
+
+
 if __name__ == "__main__":
     cli()
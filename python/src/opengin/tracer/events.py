@@ -0,0 +1,320 @@
+"""
+Progress events of pipeline runs.
+
+`EventBus.publish` hands an event to the in-process subscribers and appends it to
+the run's `events.jsonl`, so progress can be followed while the run is going and
+replayed afterwards. Every event is a dict with:
+
+- 'seq': its position in the run's event log, starting at 1;
+- 'time': the Unix time it was published;
+- 'type': one of 'run_started', 'stage_started', 'stage_finished', 'scan_started',
+  'page_completed', 'page_failed', 'run_completed', 'run_failed' or 'run_cancelled';
+
+plus fields depending on the type. Page events carry the counts of completed and
+failed pages, the page count, the current throughput and an ETA (see `ProgressTracker`).
+
+Clients follow a run with a cursor: `EventBus.events(..., after=seq)` returns only the
+events after the last one seen, and `EventBus.wait` blocks until there are new ones
+instead of polling (`EventBus.wait_async` waits on the event loop instead). Events
+of runs in progress in this process are served from memory; other runs are read
+from their event log.
+"""
+
+import asyncio
+import collections
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EVENTS_FILENAME = "events.jsonl"
+
+# Events after which a run publishes nothing more
+TERMINAL_EVENTS = ("run_completed", "run_failed", "run_cancelled")
+PAGE_EVENTS = ("page_completed", "page_failed")
+
+
+def parse_events(lines, after: int = 0) -> List[Dict[str, Any]]:
+    """
+    Parses the lines of an event log, skipping events up to `after` and a partly written last line.
+    """
+    events = []
+    for line in lines:
+        if not line.endswith("\n"):
+            break
+        event = json.loads(line)
+        if event["seq"] > after:
+            events.append(event)
+    return events
+
+
+def tail_events(path: str, after: int = 0, poll_interval: float = 0.5) -> Iterator[Dict[str, Any]]:
+    """
+    Follows an event log written by another process, like `tail -f`.
+
+    Only the bytes appended since the last read are parsed. Yields the events after
+    `after` as they are written and returns after the run's terminal event.
+    """
+    offset = 0
+    pending = ""
+    while True:
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                f.seek(offset)
+                pending += f.read()
+                offset = f.tell()
+            lines = pending.splitlines(keepends=True)
+            pending = lines.pop() if lines and not lines[-1].endswith("\n") else ""
+            for event in parse_events(lines, after):
+                after = event["seq"]
+                yield event
+                if event["type"] in TERMINAL_EVENTS:
+                    return
+        time.sleep(poll_interval)
+
+
+class _RunEvents:
+    """
+    The events of one run in progress: its log file and the events published so far.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.events: List[Dict[str, Any]] = []
+        # A run that is run again continues the sequence of its existing log
+        self.seq = 0
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.seq = sum(1 for line in f if line.endswith("\n"))
+
+    def append(self, event: Dict[str, Any]):
+        self.seq += 1
+        event["seq"] = self.seq
+        with open(self.path, "a") as f:
+            f.write(json.dumps(event) + "\n")
+        self.events.append(event)
+
+
+class EventBus:
+    """
+    Publishes the progress events of runs to subscribers and to each run's event log.
+
+    A run's events are held in memory from its first event until its terminal event.
+    Methods may be called from several threads.
+    """
+
+    def __init__(self, fs_manager):
+        """
+        Args:
+            fs_manager (FileSystemManager): Locates and reads the run directories.
+        """
+        self.fs_manager = fs_manager
+        self._runs: Dict[Tuple[str, str], _RunEvents] = {}
+        self._subscribers: List[Callable[[str, str, Dict[str, Any]], None]] = []
+        self._changed = threading.Condition()
+
+    def subscribe(self, callback: Callable[[str, str, Dict[str, Any]], None]) -> Callable[[], None]:
+        """
+        Calls `callback` with (pipeline_name, run_id, event) for every event published.
+
+        Callbacks run on the publishing thread and must be quick; errors are logged.
+
+        Returns:
+            Callable: Removes the subscription.
+        """
+        with self._changed:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._changed:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def publish(self, pipeline_name: str, run_id: str, event_type: str, **data) -> Dict[str, Any]:
+        """
+        Records an event of a run and notifies subscribers and waiting readers.
+
+        Returns:
+            Dict[str, Any]: The event, with its 'seq' and 'time'.
+        """
+        event = {"seq": 0, "time": round(time.time(), 3), "type": event_type, **data}
+        key = (pipeline_name, run_id)
+        with self._changed:
+            run = self._runs.get(key)
+            if run is None:
+                path = os.path.join(self.fs_manager.get_pipeline_path(pipeline_name, run_id), EVENTS_FILENAME)
+                run = self._runs[key] = _RunEvents(path)
+            try:
+                run.append(event)
+            except OSError as e:
+                # Progress reporting must not fail the run
+                logger.error(f"Could not record event '{event_type}' of run '{run_id}': {e}")
+            if event_type in TERMINAL_EVENTS:
+                del self._runs[key]
+            subscribers = list(self._subscribers)
+            self._changed.notify_all()
+
+        for callback in subscribers:
+            try:
+                callback(pipeline_name, run_id, event)
+            except Exception as e:
+                logger.error(f"Event subscriber failed on '{event_type}': {e}")
+        return event
+
+    def is_active(self, pipeline_name: str, run_id: str) -> bool:
+        """
+        Returns True while a run in this process can still publish events.
+        """
+        with self._changed:
+            return (pipeline_name, run_id) in self._runs
+
+    def events(self, pipeline_name: str, run_id: str, after: int = 0) -> List[Dict[str, Any]]:
+        """
+        Returns the events of a run after the cursor `after` (the 'seq' of the last event seen).
+        """
+        with self._changed:
+            run = self._runs.get((pipeline_name, run_id))
+            if run is not None and (not run.events or run.events[0]["seq"] <= after + 1):
+                return [e for e in run.events if e["seq"] > after]
+        return self._read_log(pipeline_name, run_id, after)
+
+    def wait(self, pipeline_name: str, run_id: str, after: int = 0, timeout: float = None) -> List[Dict[str, Any]]:
+        """
+        Returns the events after `after`, waiting up to `timeout` seconds for one if there are none yet.
+
+        Returns at once for runs not in progress in this process.
+        """
+        key = (pipeline_name, run_id)
+
+        def ready():
+            run = self._runs.get(key)
+            return run is None or run.seq > after
+
+        with self._changed:
+            self._changed.wait_for(ready, timeout)
+        return self.events(pipeline_name, run_id, after)
+
+    async def wait_async(
+        self, pipeline_name: str, run_id: str, after: int = 0, timeout: float = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Like `wait`, but waits on the running event loop instead of blocking a thread,
+        so servers can hold many followers open without tying up their thread pool.
+        """
+        key = (pipeline_name, run_id)
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+
+        def notify(event_pipeline: str, event_run_id: str, event: Dict[str, Any]):
+            if (event_pipeline, event_run_id) == key:
+                loop.call_soon_threadsafe(changed.set)
+
+        unsubscribe = self.subscribe(notify)
+        try:
+            # Checked after subscribing, so an event published in between is not missed
+            with self._changed:
+                run = self._runs.get(key)
+                ready = run is None or run.seq > after
+            if not ready:
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            unsubscribe()
+        # Events of runs not in progress here are read from their log, off the event loop
+        return await asyncio.to_thread(self.events, pipeline_name, run_id, after)
+
+    def progress(self, pipeline_name: str, run_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the last page event of a run in progress in this process, or None.
+        """
+        with self._changed:
+            run = self._runs.get((pipeline_name, run_id))
+            if run is not None:
+                for event in reversed(run.events):
+                    if event["type"] in PAGE_EVENTS:
+                        return event
+        return None
+
+    def _read_log(self, pipeline_name: str, run_id: str, after: int) -> List[Dict[str, Any]]:
+        path = os.path.join(self.fs_manager.get_pipeline_path(pipeline_name, run_id), EVENTS_FILENAME)
+        if not self.fs_manager.run_path_exists(path):
+            return []
+        with self.fs_manager.open_run_file(path) as f:
+            return parse_events(f, after)
+
+
+class ProgressTracker:
+    """
+    Turns the pages finished by Agent 1 into page events of one run.
+
+    The throughput is measured over the last `window` pages, so it follows changes
+    in extraction speed (e.g. from rate limiting); the ETA is the time the remaining
+    pages take at that throughput.
+    """
+
+    def __init__(self, bus: EventBus, pipeline_name: str, run_id: str, window: int = 10):
+        self.bus = bus
+        self.pipeline_name = pipeline_name
+        self.run_id = run_id
+        self.page_count = 0
+        self.completed = 0
+        self.failed = 0
+        self._started = time.monotonic()
+        self._finished: Deque[float] = collections.deque(maxlen=max(2, window))
+        self._lock = threading.Lock()
+
+    def start(self, page_count: int):
+        """
+        Called once the document is split, before the first page is extracted.
+        """
+        with self._lock:
+            self.page_count = page_count
+            self._started = time.monotonic()
+            self._finished.clear()
+        self.bus.publish(self.pipeline_name, self.run_id, "scan_started", page_count=page_count)
+
+    def page_done(self, page_num: int, error: str = None) -> Dict[str, Any]:
+        """
+        Publishes the event of a finished page, failed if `error` is given.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._finished.append(now)
+            if error is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+            done = self.completed + self.failed
+            throughput = self._throughput(now, done)
+            remaining = max(0, self.page_count - done)
+            data = {
+                "page_num": page_num,
+                "pages_completed": self.completed,
+                "pages_failed": self.failed,
+                "page_count": self.page_count,
+                "pages_per_second": round(throughput, 3),
+                "eta_seconds": round(remaining / throughput, 1) if throughput > 0 else None,
+            }
+        if error is not None:
+            data["error"] = error
+        return self.bus.publish(
+            self.pipeline_name, self.run_id, "page_failed" if error is not None else "page_completed", **data
+        )
+
+    def _throughput(self, now: float, done: int) -> float:
+        # Pages per second over the window, or since the start while the window is filling
+        if len(self._finished) == self._finished.maxlen:
+            elapsed = now - self._finished[0]
+            pages = len(self._finished) - 1
+        else:
+            elapsed = now - self._started
+            pages = done
+        return pages / elapsed if elapsed > 0 else 0.0
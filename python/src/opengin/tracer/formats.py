@@ -0,0 +1,214 @@
+"""
+Storage formats for intermediate and aggregated pipeline artifacts.
+
+Two formats are supported:
+
+- 'json': one pretty-printed JSON document per file (the original format).
+- 'jsonl': compact JSON Lines. Intermediate page files hold a page header line
+  followed by one line per table. Aggregated files hold, for every table, a
+  header line followed by lines with batches of rows, so tables of any size can
+  be written and read as a stream.
+
+Either format can additionally be compressed ('gzip', or 'zstd' with the
+zstandard package installed); the compression is recorded in the file suffix so
+readers never need to be told about it. Exported CSV and metadata files are
+compressed the same way.
+"""
+
+import gzip
+import io
+import json
+import os
+import re
+from itertools import islice
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+STORAGE_FORMATS = ("json", "jsonl")
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+# HTTP Content-Encoding for each compression suffix
+CONTENT_ENCODINGS = {".gz": "gzip", ".zst": "zstd"}
+
+# page_12.json, page_12.jsonl, page_12.jsonl.gz, page_12.json.zst, ...
+PAGE_FILE_PATTERN = re.compile(r"^page_(\d+)\.(json|jsonl)(\.gz|\.zst)?$")
+AGGREGATED_BASENAME = "tables"
+# Page results of a run combined into one file by retention compaction
+COMPACTED_PAGES_FILENAME = "pages.jsonl.gz"
+
+DEFAULT_ROW_BATCH_SIZE = 1000
+
+
+def artifact_suffix(storage_format: str = "json", compression: Optional[str] = None) -> str:
+    """
+    Returns the file suffix for a storage format and compression, e.g. '.jsonl.gz'.
+
+    Raises:
+        ValueError: If the format or compression is not supported.
+    """
+    if storage_format not in STORAGE_FORMATS:
+        raise ValueError(f"Unknown storage format '{storage_format}'. Expected one of {STORAGE_FORMATS}.")
+    return f".{storage_format}" + compression_suffix(compression)
+
+
+def compression_suffix(compression: Optional[str]) -> str:
+    """
+    Returns the file suffix for a compression ('' for none).
+
+    Raises:
+        ValueError: If the compression is not supported.
+    """
+    if not compression:
+        return ""
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown compression '{compression}'. Expected one of {tuple(COMPRESSION_SUFFIXES)}.")
+    return COMPRESSION_SUFFIXES[compression]
+
+
+def split_compression_suffix(path: str) -> Tuple[str, Optional[str]]:
+    """
+    Splits a compression suffix off a path, e.g. 'a.csv.gz' -> ('a.csv', '.gz').
+    """
+    for suffix in CONTENT_ENCODINGS:
+        if path.endswith(suffix):
+            return path[: -len(suffix)], suffix
+    return path, None
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("zstd compression requires zstandard. Install it with: pip install 'opengin[zstd]'") from e
+    return zstandard
+
+
+def open_artifact(path: str, mode: str = "r", newline: Optional[str] = None, buffering: int = -1) -> IO[str]:
+    """
+    Opens an artifact for text reading or writing, compressing or decompressing
+    based on its suffix. Compression happens while the file is streamed.
+
+    Args:
+        path (str): The file path.
+        mode (str): 'r', 'w' or 'a'.
+        newline (str, optional): Passed to the text layer, e.g. '' for CSV files.
+        buffering (int): Buffer size for uncompressed files (-1 for the default).
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", newline=newline)
+    if path.endswith(".zst"):
+        return _zstandard().open(path, mode + "t", encoding="utf-8", newline=newline)
+    return open(path, mode, encoding="utf-8", newline=newline, buffering=buffering)
+
+
+def wrap_artifact(raw: IO[bytes], name: str, newline: Optional[str] = None) -> IO[str]:
+    """
+    Opens an already open binary stream (e.g. an archive member) for text reading,
+    decompressing it based on the suffix of `name`.
+    """
+    if name.endswith(".gz"):
+        return gzip.open(raw, "rt", encoding="utf-8", newline=newline)
+    if name.endswith(".zst"):
+        return _zstandard().open(raw, "rt", encoding="utf-8", newline=newline)
+    return io.TextIOWrapper(raw, encoding="utf-8", newline=newline)
+
+
+def is_jsonl(path: str) -> bool:
+    """
+    Returns whether a page file is JSON Lines, judged by its file name alone.
+    """
+    return split_compression_suffix(os.path.basename(path))[0].endswith(".jsonl")
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def write_page(f: IO[str], data: Dict[str, Any]):
+    """
+    Writes a page result as JSON Lines: a header line, then one line per table.
+    """
+    header = {k: v for k, v in data.items() if k != "tables"}
+    header["table_count"] = len(data.get("tables", [])) if "tables" in data else None
+    f.write(_dumps(header) + "\n")
+    for table in data.get("tables", []):
+        f.write(_dumps(table) + "\n")
+
+
+def read_page(f: IO[str]) -> Dict[str, Any]:
+    """
+    Reads a page result written by `write_page`.
+    """
+    lines = iter(f)
+    header = json.loads(next(lines))
+    table_count = header.pop("table_count", None)
+    if table_count is not None:
+        header["tables"] = [json.loads(line) for line in lines]
+    return header
+
+
+def write_compacted_page(f: IO[str], page_num: int, data: Any):
+    """
+    Appends one page result to a compacted pages file as a {"page", "data"} line.
+    """
+    f.write(_dumps({"page": page_num, "data": data}) + "\n")
+
+
+def iter_compacted_pages(f: IO[str]) -> Iterator[Tuple[int, Any]]:
+    """
+    Reads the (page number, data) pairs of a compacted pages file.
+    """
+    for line in f:
+        record = json.loads(line)
+        yield record["page"], record["data"]
+
+
+def write_tables(f: IO[str], tables: Iterable[Tuple[Dict[str, Any], Iterable[Any]]], batch_size: int = None):
+    """
+    Writes aggregated tables as JSON Lines.
+
+    Each table becomes a {"table": header} line followed by {"rows": [...]} lines
+    holding at most `batch_size` rows each.
+
+    Args:
+        f (IO[str]): The open output file.
+        tables (Iterable): Pairs of (table header, row iterable).
+        batch_size (int, optional): Rows per line. Defaults to DEFAULT_ROW_BATCH_SIZE.
+    """
+    batch_size = batch_size or DEFAULT_ROW_BATCH_SIZE
+    for header, rows in tables:
+        f.write(_dumps({"table": header}) + "\n")
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            f.write(_dumps({"rows": batch}) + "\n")
+
+
+def iter_tables(f: IO[str]) -> Iterator[Tuple[Dict[str, Any], Iterator[List[Any]]]]:
+    """
+    Streams aggregated tables written by `write_tables`.
+
+    Yields (header, rows) pairs. `rows` is a lazy iterator over the table's rows that
+    reads from the shared file, so it must be consumed (or abandoned) before the
+    next pair is requested.
+    """
+    lines = iter(f)
+    pending = [next(lines, None)]
+
+    def rows_of_current_table():
+        for line in lines:
+            record = json.loads(line)
+            if "table" in record:
+                pending[0] = line
+                return
+            yield from record["rows"]
+        pending[0] = None
+
+    while pending[0] is not None:
+        header = json.loads(pending[0])["table"]
+        pending[0] = None
+        rows = rows_of_current_table()
+        yield header, rows
+        # Skip whatever the consumer left unread
+        for _ in rows:
+            pass
@@ -0,0 +1,610 @@
+"""
+Job queues shared by distributed page workers.
+
+With a job queue, the coordinating `Agent0` does not extract pages itself: it splits
+the document, puts one job per page on the queue and aggregates the page results as
+the jobs finish. Worker processes (`opengin tracer worker`) on any number of nodes
+lease the jobs, extract the pages and write the page results through the storage
+layer, where the coordinator picks them up.
+
+A leased job belongs to its worker until the lease expires. Workers extend the
+leases of the jobs they are working on; the job of a worker that died is put back
+on the queue once its lease expires, and fails after `max_attempts` leases. A worker
+that lost its lease (e.g. because the run was cancelled) cannot complete the job.
+
+Jobs are grouped by run, so a coordinator only collects the jobs of its own run.
+Two queues are provided:
+
+- `SQLiteJobQueue`: a SQLite database, on a volume shared by the nodes. Leasing is
+  a single write transaction, so any number of processes can share the file.
+- `RedisJobQueue`: a Redis-compatible server. Requires redis-py, installed with
+  `pip install 'opengin[redis]'`. Leasing and completing jobs are Lua scripts, so
+  they are atomic on the server.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Environment variable read by `queue_from_env`
+ENV_QUEUE_URL = "OPENGIN_QUEUE_URL"
+
+DEFAULT_LEASE_SECONDS = 120.0
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Job statuses
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+def job_group(pipeline_name: str, run_id: str) -> str:
+    """
+    Returns the group of the page jobs of a run.
+    """
+    return f"{pipeline_name}/{run_id}"
+
+
+class Job:
+    """
+    A job leased from or collected from a queue.
+
+    Attributes:
+        job_id (str): The unique identifier of the job.
+        group (str): The group the job was put in (see `job_group`).
+        payload (Dict[str, Any]): The data the job was put with.
+        attempts (int): How many times the job has been leased.
+        status (str): QUEUED, LEASED, DONE or FAILED.
+        lease_token (str): Identifies the current lease of a leased job.
+        result (Dict[str, Any]): The result of a finished job.
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        group: str,
+        payload: Dict[str, Any],
+        attempts: int = 0,
+        status: str = QUEUED,
+        lease_token: str = None,
+        result: Dict[str, Any] = None,
+    ):
+        self.job_id = job_id
+        self.group = group
+        self.payload = payload
+        self.attempts = attempts
+        self.status = status
+        self.lease_token = lease_token
+        self.result = result
+
+    def __repr__(self):
+        return f"Job({self.job_id!r}, {self.group!r}, status={self.status!r}, attempts={self.attempts})"
+
+
+def _lease_expired_error(attempts: int) -> Dict[str, Any]:
+    return {"error": f"Lease expired {attempts} times; the workers processing the job stopped responding"}
+
+
+class JobQueue:
+    """
+    Base class of job queues.
+
+    Methods may be called from several threads and processes at once.
+    """
+
+    def __init__(
+        self,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ):
+        """
+        Args:
+            lease_seconds (float): How long a lease lasts unless it is extended.
+            max_attempts (int): Leases of a job before it fails for good.
+            poll_interval (float): How often workers and coordinators look for new jobs, in seconds.
+        """
+        if lease_seconds <= 0 or max_attempts < 1:
+            raise ValueError("lease_seconds must be positive and max_attempts at least 1")
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+
+    def put(self, group: str, payloads: List[Dict[str, Any]]) -> List[str]:
+        """
+        Queues one job per payload, in order.
+
+        Returns:
+            List[str]: The IDs of the new jobs.
+        """
+        raise NotImplementedError
+
+    def lease(self, worker_id: str, lease_seconds: float = None) -> Optional[Job]:
+        """
+        Leases the oldest queued job, first putting back the jobs whose lease expired.
+
+        Returns:
+            Job: The leased job, or None if no job is queued.
+        """
+        raise NotImplementedError
+
+    def extend(self, job: Job, lease_seconds: float = None) -> bool:
+        """
+        Extends the lease of a job.
+
+        Returns:
+            bool: False if the lease was lost, e.g. because it expired or the job was cancelled.
+        """
+        raise NotImplementedError
+
+    def complete(self, job: Job, result: Dict[str, Any]) -> bool:
+        """
+        Marks a leased job as done with its result.
+
+        Returns:
+            bool: False if the lease was lost; the result is then dropped.
+        """
+        raise NotImplementedError
+
+    def release(self, job: Job) -> bool:
+        """
+        Puts a leased job back on the queue without counting the attempt, e.g. when a worker stops.
+
+        Returns:
+            bool: False if the lease was lost.
+        """
+        raise NotImplementedError
+
+    def take_finished(self, group: str) -> List[Job]:
+        """
+        Removes the done and failed jobs of a group from the queue and returns them.
+
+        Jobs whose lease expired are put back or failed first, so a group makes progress
+        even when no worker is leasing jobs.
+        """
+        raise NotImplementedError
+
+    def cancel(self, group: str) -> int:
+        """
+        Removes all jobs of a group. Workers holding one of its jobs lose their lease.
+
+        Returns:
+            int: The number of jobs removed.
+        """
+        raise NotImplementedError
+
+    def counts(self, group: str) -> Dict[str, int]:
+        """
+        Returns the number of jobs of a group per status.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def _lease_seconds(self, lease_seconds: Optional[float]) -> float:
+        return lease_seconds if lease_seconds is not None else self.lease_seconds
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    grp TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_token TEXT,
+    lease_expires REAL,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires);
+CREATE INDEX IF NOT EXISTS jobs_group ON jobs (grp, status);
+"""
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Keeps jobs in a SQLite database.
+
+    Every change is a short `BEGIN IMMEDIATE` transaction, so processes on several
+    nodes can share a database on a network volume, provided the volume supports
+    file locking. Each thread uses its own connection.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0, **kwargs):
+        """
+        Args:
+            path (str): The database file. Created if it does not exist.
+            timeout (float): How long to wait for another process's transaction, in seconds.
+            **kwargs: See `JobQueue`.
+        """
+        super().__init__(**kwargs)
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connect().executescript(SQLITE_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Autocommit mode; transactions are opened explicitly. Only `close` uses the
+            # connection outside of its thread.
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _requeue_expired(self, db: sqlite3.Connection, now: float) -> int:
+        expired = db.execute(
+            "SELECT id, attempts FROM jobs WHERE status = ? AND lease_expires < ?", (LEASED, now)
+        ).fetchall()
+        for job_id, attempts in expired:
+            if attempts >= self.max_attempts:
+                db.execute(
+                    "UPDATE jobs SET status = ?, result = ?, lease_token = NULL, worker = NULL WHERE id = ?",
+                    (FAILED, json.dumps(_lease_expired_error(attempts)), job_id),
+                )
+            else:
+                db.execute(
+                    "UPDATE jobs SET status = ?, lease_token = NULL, worker = NULL WHERE id = ?", (QUEUED, job_id)
+                )
+        if expired:
+            logger.warning(f"Job queue: {len(expired)} leases expired")
+        return len(expired)
+
+    def put(self, group: str, payloads: List[Dict[str, Any]]) -> List[str]:
+        job_ids = [uuid.uuid4().hex for _ in payloads]
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT INTO jobs (id, grp, payload, status) VALUES (?, ?, ?, ?)",
+                [(job_id, group, json.dumps(payload), QUEUED) for job_id, payload in zip(job_ids, payloads)],
+            )
+        return job_ids
+
+    def lease(self, worker_id: str, lease_seconds: float = None) -> Optional[Job]:
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self._transaction() as db:
+            self._requeue_expired(db, now)
+            row = db.execute(
+                "SELECT id, grp, payload, attempts FROM jobs WHERE status = ? ORDER BY rowid LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, group, payload, attempts = row
+            db.execute(
+                "UPDATE jobs SET status = ?, attempts = ?, worker = ?, lease_token = ?, lease_expires = ? "
+                "WHERE id = ?",
+                (LEASED, attempts + 1, worker_id, token, now + self._lease_seconds(lease_seconds), job_id),
+            )
+        return Job(job_id, group, json.loads(payload), attempts + 1, LEASED, token)
+
+    def _update_leased(self, job: Job, assignments: str, values: tuple) -> bool:
+        with self._transaction() as db:
+            cursor = db.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND status = ? AND lease_token = ?",
+                values + (job.job_id, LEASED, job.lease_token),
+            )
+            return cursor.rowcount == 1
+
+    def extend(self, job: Job, lease_seconds: float = None) -> bool:
+        return self._update_leased(job, "lease_expires = ?", (time.time() + self._lease_seconds(lease_seconds),))
+
+    def complete(self, job: Job, result: Dict[str, Any]) -> bool:
+        return self._update_leased(
+            job, "status = ?, result = ?, lease_token = NULL, worker = NULL", (DONE, json.dumps(result))
+        )
+
+    def release(self, job: Job) -> bool:
+        return self._update_leased(
+            job, "status = ?, attempts = attempts - 1, lease_token = NULL, worker = NULL", (QUEUED,)
+        )
+
+    def take_finished(self, group: str) -> List[Job]:
+        with self._transaction() as db:
+            self._requeue_expired(db, time.time())
+            rows = db.execute(
+                "SELECT id, payload, attempts, status, result FROM jobs WHERE grp = ? AND status IN (?, ?) "
+                "ORDER BY rowid",
+                (group, DONE, FAILED),
+            ).fetchall()
+            db.executemany("DELETE FROM jobs WHERE id = ?", [(row[0],) for row in rows])
+        return [
+            Job(job_id, group, json.loads(payload), attempts, status, result=json.loads(result) if result else None)
+            for job_id, payload, attempts, status, result in rows
+        ]
+
+    def cancel(self, group: str) -> int:
+        with self._transaction() as db:
+            return db.execute("DELETE FROM jobs WHERE grp = ?", (group,)).rowcount
+
+    def counts(self, group: str) -> Dict[str, int]:
+        rows = self._connect().execute("SELECT status, COUNT(*) FROM jobs WHERE grp = ? GROUP BY status", (group,))
+        return dict(rows.fetchall())
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+
+# Puts back (or fails) the jobs whose lease expired, then pops and leases the oldest
+# queued job. The queue is a list pushed on the left and popped on the right; jobs
+# put back go to the right, so they are retried first.
+# KEYS: queue, leases. ARGV: prefix, now, expires, worker ('' to only put back), token,
+# max_attempts, error of jobs that ran out of attempts.
+REDIS_LEASE_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', '(' .. ARGV[2])
+for _, id in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], id)
+    local key = ARGV[1] .. ':job:' .. id
+    local group = redis.call('HGET', key, 'group')
+    if group then
+        local attempts = tonumber(redis.call('HGET', key, 'attempts'))
+        if attempts >= tonumber(ARGV[6]) then
+            redis.call('HSET', key, 'status', 'failed', 'lease_token', '', 'result', ARGV[7])
+            redis.call('RPUSH', ARGV[1] .. ':finished:' .. group, id)
+        else
+            redis.call('HSET', key, 'status', 'queued', 'lease_token', '')
+            redis.call('RPUSH', KEYS[1], id)
+        end
+    end
+end
+if ARGV[4] == '' then
+    return false
+end
+while true do
+    local id = redis.call('RPOP', KEYS[1])
+    if not id then
+        return false
+    end
+    local key = ARGV[1] .. ':job:' .. id
+    if redis.call('EXISTS', key) == 1 then
+        local attempts = redis.call('HINCRBY', key, 'attempts', 1)
+        redis.call('HSET', key, 'status', 'leased', 'worker', ARGV[4], 'lease_token', ARGV[5])
+        redis.call('ZADD', KEYS[2], ARGV[3], id)
+        return {id, redis.call('HGET', key, 'group'), redis.call('HGET', key, 'payload'), attempts}
+    end
+end
+"""
+
+# Changes a job only while the caller holds its lease.
+# KEYS: queue, leases. ARGV: prefix, id, token, action ('extend', 'complete' or 'release'),
+# new lease expiry or result.
+REDIS_UPDATE_SCRIPT = """
+local key = ARGV[1] .. ':job:' .. ARGV[2]
+if redis.call('HGET', key, 'status') ~= 'leased' or redis.call('HGET', key, 'lease_token') ~= ARGV[3] then
+    return 0
+end
+if ARGV[4] == 'extend' then
+    redis.call('ZADD', KEYS[2], ARGV[5], ARGV[2])
+    return 1
+end
+redis.call('ZREM', KEYS[2], ARGV[2])
+if ARGV[4] == 'complete' then
+    redis.call('HSET', key, 'status', 'done', 'lease_token', '', 'result', ARGV[5])
+    redis.call('RPUSH', ARGV[1] .. ':finished:' .. redis.call('HGET', key, 'group'), ARGV[2])
+else
+    redis.call('HSET', key, 'status', 'queued', 'lease_token', '')
+    redis.call('HINCRBY', key, 'attempts', -1)
+    redis.call('RPUSH', KEYS[1], ARGV[2])
+end
+return 1
+"""
+
+# Removes the finished jobs of a group and returns them as flat (id, payload, attempts, status, result) tuples.
+# KEYS: finished list of the group, job set of the group. ARGV: prefix.
+REDIS_TAKE_FINISHED_SCRIPT = """
+local ids = redis.call('LRANGE', KEYS[1], 0, -1)
+redis.call('DEL', KEYS[1])
+local jobs = {}
+for _, id in ipairs(ids) do
+    local key = ARGV[1] .. ':job:' .. id
+    local job = redis.call('HMGET', key, 'payload', 'attempts', 'status', 'result')
+    if job[1] then
+        table.insert(jobs, id)
+        for i = 1, 4 do
+            table.insert(jobs, job[i] or '')
+        end
+        redis.call('DEL', key)
+        redis.call('SREM', KEYS[2], id)
+    end
+end
+return jobs
+"""
+
+# Removes all jobs of a group. KEYS: queue, leases, job set, finished list. ARGV: prefix.
+REDIS_CANCEL_SCRIPT = """
+local ids = redis.call('SMEMBERS', KEYS[3])
+for _, id in ipairs(ids) do
+    redis.call('LREM', KEYS[1], 0, id)
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('DEL', ARGV[1] .. ':job:' .. id)
+end
+redis.call('DEL', KEYS[3], KEYS[4])
+return #ids
+"""
+
+
+def _require_redis():
+    try:
+        import redis
+    except ImportError as e:
+        raise ImportError("The Redis job queue requires redis-py. Install it with: pip install 'opengin[redis]'") from e
+    return redis
+
+
+class RedisJobQueue(JobQueue):
+    """
+    Keeps jobs in a Redis-compatible server.
+
+    Keys start with `prefix`: '<prefix>:queue' lists the queued job IDs,
+    '<prefix>:leases' holds the lease expiry of each leased job, '<prefix>:job:<id>'
+    the fields of a job, and '<prefix>:group:<group>' and '<prefix>:finished:<group>'
+    the jobs and finished jobs of a group. The scripts address job keys they derive
+    from IDs, so the keys of one queue must live on one server (no Redis Cluster).
+    """
+
+    def __init__(self, url: str = None, client=None, prefix: str = "opengin:jobs", **kwargs):
+        """
+        Args:
+            url (str, optional): The server URL, e.g. 'redis://localhost:6379/0'.
+            client (optional): A client with the redis-py interface to use instead of `url`,
+                               e.g. one of a local stand-in for the server.
+            prefix (str): Prefix of all keys of the queue.
+            **kwargs: See `JobQueue`.
+        """
+        super().__init__(**kwargs)
+        if client is None:
+            client = _require_redis().Redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.prefix = prefix
+        self._lease_script = client.register_script(REDIS_LEASE_SCRIPT)
+        self._update_script = client.register_script(REDIS_UPDATE_SCRIPT)
+        self._take_finished_script = client.register_script(REDIS_TAKE_FINISHED_SCRIPT)
+        self._cancel_script = client.register_script(REDIS_CANCEL_SCRIPT)
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.prefix,) + parts)
+
+    @staticmethod
+    def _str(value) -> str:
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def put(self, group: str, payloads: List[Dict[str, Any]]) -> List[str]:
+        job_ids = [uuid.uuid4().hex for _ in payloads]
+        pipeline = self.client.pipeline(transaction=True)
+        for job_id, payload in zip(job_ids, payloads):
+            fields = {"group": group, "payload": json.dumps(payload), "status": QUEUED, "attempts": 0}
+            pipeline.hset(self._key("job", job_id), mapping=fields)
+            pipeline.sadd(self._key("group", group), job_id)
+            pipeline.lpush(self._key("queue"), job_id)
+        pipeline.execute()
+        return job_ids
+
+    def _lease(self, worker_id: str, token: str, expires: float):
+        return self._lease_script(
+            keys=[self._key("queue"), self._key("leases")],
+            args=[
+                self.prefix,
+                time.time(),
+                expires,
+                worker_id,
+                token,
+                self.max_attempts,
+                json.dumps(_lease_expired_error(self.max_attempts)),
+            ],
+        )
+
+    def lease(self, worker_id: str, lease_seconds: float = None) -> Optional[Job]:
+        token = uuid.uuid4().hex
+        leased = self._lease(worker_id, token, time.time() + self._lease_seconds(lease_seconds))
+        if not leased:
+            return None
+        job_id, group, payload, attempts = leased
+        return Job(self._str(job_id), self._str(group), json.loads(payload), int(attempts), LEASED, token)
+
+    def _update(self, job: Job, action: str, value="") -> bool:
+        updated = self._update_script(
+            keys=[self._key("queue"), self._key("leases")],
+            args=[self.prefix, job.job_id, job.lease_token, action, value],
+        )
+        return int(updated) == 1
+
+    def extend(self, job: Job, lease_seconds: float = None) -> bool:
+        return self._update(job, "extend", time.time() + self._lease_seconds(lease_seconds))
+
+    def complete(self, job: Job, result: Dict[str, Any]) -> bool:
+        return self._update(job, "complete", json.dumps(result))
+
+    def release(self, job: Job) -> bool:
+        return self._update(job, "release")
+
+    def take_finished(self, group: str) -> List[Job]:
+        # Only puts back expired leases
+        self._lease("", "", 0)
+        flat = self._take_finished_script(
+            keys=[self._key("finished", group), self._key("group", group)], args=[self.prefix]
+        )
+        jobs = []
+        for i in range(0, len(flat), 5):
+            job_id, payload, attempts, status, result = (self._str(value) for value in flat[i : i + 5])
+            result = json.loads(result) if result else None
+            jobs.append(Job(job_id, group, json.loads(payload), int(attempts), status, result=result))
+        return jobs
+
+    def cancel(self, group: str) -> int:
+        keys = [self._key("queue"), self._key("leases"), self._key("group", group), self._key("finished", group)]
+        return int(self._cancel_script(keys=keys, args=[self.prefix]))
+
+    def counts(self, group: str) -> Dict[str, int]:
+        job_ids = self.client.smembers(self._key("group", group))
+        pipeline = self.client.pipeline(transaction=False)
+        for job_id in job_ids:
+            pipeline.hget(self._key("job", self._str(job_id)), "status")
+        counts: Dict[str, int] = {}
+        for status in pipeline.execute():
+            if status:
+                status = self._str(status)
+                counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def close(self):
+        self.client.close()
+
+
+def queue_from_url(url: Optional[str], **kwargs) -> Optional[JobQueue]:
+    """
+    Creates a job queue from a URL.
+
+    Args:
+        url (str, optional): 'redis://host:port/db' (or 'rediss://'), 'sqlite:///path/to/queue.db'
+                             or a plain path of a SQLite database. None or '' for no queue.
+        **kwargs: See `JobQueue`.
+
+    Returns:
+        JobQueue: The queue, or None.
+    """
+    if not url:
+        return None
+    if url.startswith(("redis://", "rediss://")):
+        return RedisJobQueue(url, **kwargs)
+    if url.startswith("sqlite://"):
+        url = url[len("sqlite://") :]
+    return SQLiteJobQueue(url, **kwargs)
+
+
+def queue_from_env(**kwargs) -> Optional[JobQueue]:
+    """
+    Creates the job queue configured by OPENGIN_QUEUE_URL.
+    """
+    return queue_from_url(os.getenv(ENV_QUEUE_URL), **kwargs)
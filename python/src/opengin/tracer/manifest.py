@@ -0,0 +1,240 @@
+"""
+Manifests of run directories.
+
+A run's `manifest.json` lists every artifact of the run with its size, modification
+time and SHA-256. `metadata.json` is not listed: it changes with every status update
+and is written through on its own.
+
+Checking a run against its manifest is cheap: a file whose size and mtime match its
+entry is taken as unchanged without being read, and only files whose mtime moved are
+hashed again (as a copied file keeps its content but not its mtime). A full check
+rehashes every file. Comparing the manifests of two copies of a run gives the
+artifacts that differ, so a sync copies only those.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from opengin.tracer.run_state import read_json_locked, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Files of a run directory that are not listed in its manifest
+UNLISTED = ("metadata.json", MANIFEST_FILENAME)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: str) -> str:
+    """
+    Returns the hex SHA-256 of a file's content.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_listed(rel: str) -> bool:
+    """
+    Returns True if a path relative to the run directory belongs in the manifest.
+
+    Metadata, lock files and hidden temporary files and directories are left out.
+    """
+    parts = rel.split("/")
+    return rel not in UNLISTED and not parts[-1].endswith(".lock") and not any(p.startswith(".") for p in parts)
+
+
+def scan_files(run_path: str) -> Dict[str, os.stat_result]:
+    """
+    Returns the stat of every listed file of a run directory, by '/'-separated relative path.
+    """
+    files = {}
+    for root, dirs, names in os.walk(run_path):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in names:
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, run_path).replace(os.sep, "/")
+            if is_listed(rel):
+                files[rel] = os.stat(path)
+    return files
+
+
+def changed_entries(source: Dict[str, Dict[str, Any]], target: Dict[str, Dict[str, Any]]) -> List[str]:
+    """
+    Returns the sorted paths of `source` entries that are missing from `target` or differ in content.
+    """
+    return sorted(
+        rel for rel, entry in source.items() if rel not in target or target[rel].get("sha256") != entry["sha256"]
+    )
+
+
+class VerifyReport:
+    """
+    The result of checking a run directory against its manifest.
+
+    'missing' files are listed but gone, 'modified' files differ from their entry and
+    'untracked' files exist on disk but are not listed.
+    """
+
+    def __init__(self, full: bool = False):
+        self.full = full
+        self.checked = 0
+        self.missing: List[str] = []
+        self.modified: List[str] = []
+        self.untracked: List[str] = []
+
+    @property
+    def ok(self) -> bool:
+        return not (self.missing or self.modified or self.untracked)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "full": self.full,
+            "checked": self.checked,
+            "missing": self.missing,
+            "modified": self.modified,
+            "untracked": self.untracked,
+        }
+
+
+class RunManifest:
+    """
+    The manifest of one run directory.
+
+    Entries are updated in memory with `record`, `forget` and `refresh` and written
+    with `save`. Methods may be called from several threads.
+    """
+
+    def __init__(self, run_path: str, entries: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Args:
+            run_path (str): The run directory.
+            entries (Dict[str, Dict[str, Any]], optional): Entries by relative path,
+                                                          each with 'size', 'mtime' and 'sha256'.
+        """
+        self.run_path = run_path
+        self.entries = dict(entries or {})
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.run_path, MANIFEST_FILENAME)
+
+    @classmethod
+    def load(cls, run_path: str) -> Optional["RunManifest"]:
+        """
+        Reads the manifest of a run directory.
+
+        Returns:
+            RunManifest: The manifest, or None if the run has none.
+        """
+        path = os.path.join(run_path, MANIFEST_FILENAME)
+        if not os.path.exists(path):
+            return None
+        return cls(run_path, read_json_locked(path).get("files", {}))
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"version": MANIFEST_VERSION, "files": dict(sorted(self.entries.items()))}
+
+    def save(self):
+        write_json_atomic(self.path, self.to_dict())
+        self.dirty = False
+
+    def _entry(self, rel: str, st: os.stat_result) -> Dict[str, Any]:
+        path = os.path.join(self.run_path, *rel.split("/"))
+        return {"size": st.st_size, "mtime": st.st_mtime, "sha256": hash_file(path)}
+
+    def record(self, rel: str) -> Dict[str, Any]:
+        """
+        Hashes a file that was just written and updates its entry.
+
+        Args:
+            rel (str): The file's path relative to the run directory.
+        """
+        path = os.path.join(self.run_path, *rel.split("/"))
+        entry = self._entry(rel, os.stat(path))
+        with self._lock:
+            self.entries[rel] = entry
+            self.dirty = True
+        return entry
+
+    def forget(self, rel: str):
+        with self._lock:
+            if self.entries.pop(rel, None) is not None:
+                self.dirty = True
+
+    def _is_current(self, rel: str, entry: Dict[str, Any], st: os.stat_result) -> bool:
+        # Unchanged if size and mtime match; a moved mtime alone is confirmed by hashing
+        if entry["size"] != st.st_size:
+            return False
+        if entry["mtime"] == st.st_mtime:
+            return True
+        return self._entry(rel, st)["sha256"] == entry["sha256"]
+
+    def refresh(self) -> List[str]:
+        """
+        Brings the entries in line with the files on disk.
+
+        Only files that are new or whose size or mtime changed are hashed.
+
+        Returns:
+            List[str]: The paths added, changed or removed.
+        """
+        files = scan_files(self.run_path)
+        changed = []
+        with self._lock:
+            entries = dict(self.entries)
+        for rel in sorted(set(entries) - set(files)):
+            del entries[rel]
+            changed.append(rel)
+        for rel, st in sorted(files.items()):
+            entry = entries.get(rel)
+            if entry is not None and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime:
+                continue
+            new_entry = self._entry(rel, st)
+            if entry is None or new_entry["sha256"] != entry["sha256"]:
+                changed.append(rel)
+            entries[rel] = new_entry
+        with self._lock:
+            if entries != self.entries:
+                self.entries = entries
+                self.dirty = True
+        return changed
+
+    def verify(self, full: bool = False) -> VerifyReport:
+        """
+        Checks the files on disk against the entries.
+
+        Args:
+            full (bool): Rehash every file instead of trusting matching sizes and mtimes.
+
+        Returns:
+            VerifyReport: The files that are missing, modified or not listed.
+        """
+        report = VerifyReport(full=full)
+        files = scan_files(self.run_path)
+        with self._lock:
+            entries = dict(self.entries)
+        for rel, entry in sorted(entries.items()):
+            st = files.get(rel)
+            report.checked += 1
+            if st is None:
+                report.missing.append(rel)
+            elif full:
+                if st.st_size != entry["size"] or self._entry(rel, st)["sha256"] != entry["sha256"]:
+                    report.modified.append(rel)
+            elif not self._is_current(rel, entry, st):
+                report.modified.append(rel)
+        report.untracked = sorted(set(files) - set(entries))
+        return report
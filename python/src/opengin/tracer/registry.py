@@ -0,0 +1,260 @@
+"""
+SQLite registry of pipelines and runs.
+
+The registry mirrors the summary fields of every run's `metadata.json` into one
+indexed table, so listing, filtering, sorting and paginating runs does not have
+to walk the `pipelines/` tree and open every metadata file. `metadata.json`
+remains the source of truth: the registry is updated whenever metadata is
+written, and can be rebuilt from the directory tree at any time.
+"""
+
+import logging
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_FILENAME = ".registry.sqlite"
+
+# Columns that runs can be sorted by
+SORT_COLUMNS = ("created_at", "updated_at", "pipeline_name", "run_id", "status", "page_count")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    pipeline_name TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    status TEXT,
+    current_stage TEXT,
+    page_count INTEGER,
+    created_at TEXT,
+    updated_at TEXT,
+    input_file TEXT,
+    input_sha256 TEXT,
+    error TEXT,
+    PRIMARY KEY (pipeline_name, run_id)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_created_at ON runs (created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_input_sha256 ON runs (input_sha256);
+CREATE TABLE IF NOT EXISTS registry_info (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS blob_refs (
+    digest TEXT NOT NULL,
+    pipeline_name TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    PRIMARY KEY (digest, pipeline_name, run_id)
+);
+CREATE INDEX IF NOT EXISTS idx_blob_refs_run ON blob_refs (pipeline_name, run_id);
+"""
+
+
+def _as_stored_time(value: str) -> str:
+    # Runs record created_at as str(datetime.now()), local time with a space separator,
+    # which ISO inputs like '2026-10-19T00:00' do not compare correctly with as text
+    moment = datetime.fromisoformat(value.strip())
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return str(moment)
+
+
+def _row_values(pipeline_name: str, run_id: str, metadata: Dict[str, Any]) -> Tuple:
+    if not metadata:
+        return (pipeline_name, run_id, "CORRUPT", 0, None, None, str(datetime.now()), None, None, None)
+    return (
+        pipeline_name,
+        run_id,
+        metadata.get("status", "UNKNOWN"),
+        metadata.get("current_stage"),
+        metadata.get("page_count", 0),
+        metadata.get("created_at"),
+        str(datetime.now()),
+        metadata.get("input_file"),
+        metadata.get("input_sha256"),
+        metadata.get("error"),
+    )
+
+
+class RunRegistry:
+    """
+    Indexed SQLite table of all runs under a pipelines directory.
+
+    A short-lived connection is used per operation, so the registry can be shared by
+    threads and by separate processes (CLI and server) working on the same directory.
+    The schema and the WAL journal mode (which persists in the database file) are set
+    up once, when the registry is created.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Creates the database and its schema if they do not exist yet.
+
+        Args:
+            db_path (str): Path of the registry database.
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.row_factory = sqlite3.Row
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def upsert(self, pipeline_name: str, run_id: str, metadata: Dict[str, Any]):
+        """
+        Records the current metadata of a run.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                _row_values(pipeline_name, run_id, metadata),
+            )
+
+    def remove(self, pipeline_name: str, run_id: Optional[str] = None):
+        """
+        Removes one run, or all runs of a pipeline if `run_id` is None.
+        """
+        with self._connect() as conn:
+            if run_id is None:
+                conn.execute("DELETE FROM runs WHERE pipeline_name = ?", (pipeline_name,))
+            else:
+                conn.execute("DELETE FROM runs WHERE pipeline_name = ? AND run_id = ?", (pipeline_name, run_id))
+
+    def add_blob_ref(self, digest: str, pipeline_name: str, run_id: str):
+        """
+        Records that a run uses a blob of the input store.
+        """
+        with self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO blob_refs VALUES (?, ?, ?)", (digest, pipeline_name, run_id))
+
+    def remove_blob_refs(self, pipeline_name: str, run_id: Optional[str] = None) -> List[str]:
+        """
+        Drops the blob references of one run (or of a whole pipeline if `run_id` is None).
+
+        Returns:
+            List[str]: Digests that are no longer referenced by any run.
+        """
+        where = "pipeline_name = ?" + ("" if run_id is None else " AND run_id = ?")
+        params = (pipeline_name,) if run_id is None else (pipeline_name, run_id)
+        with self._connect() as conn:
+            digests = [row[0] for row in conn.execute(f"SELECT DISTINCT digest FROM blob_refs WHERE {where}", params)]
+            conn.execute(f"DELETE FROM blob_refs WHERE {where}", params)
+            return [
+                digest
+                for digest in digests
+                if conn.execute("SELECT 1 FROM blob_refs WHERE digest = ? LIMIT 1", (digest,)).fetchone() is None
+            ]
+
+    def blob_ref_count(self, digest: str) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM blob_refs WHERE digest = ?", (digest,)).fetchone()[0]
+
+    def rebuild(self, runs: Iterable[Tuple[str, str, Dict[str, Any]]]) -> int:
+        """
+        Replaces the registry contents with the given runs in one transaction.
+
+        Blob references are rebuilt from the 'input_sha256' recorded in each run's metadata.
+
+        Args:
+            runs (Iterable): (pipeline_name, run_id, metadata) for every run on disk.
+
+        Returns:
+            int: The number of runs registered.
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM runs")
+            conn.execute("DELETE FROM blob_refs")
+            count = 0
+            for pipeline_name, run_id, metadata in runs:
+                conn.execute(
+                    "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    _row_values(pipeline_name, run_id, metadata),
+                )
+                if metadata and metadata.get("input_sha256"):
+                    conn.execute(
+                        "INSERT OR IGNORE INTO blob_refs VALUES (?, ?, ?)",
+                        (metadata["input_sha256"], pipeline_name, run_id),
+                    )
+                count += 1
+            conn.execute(
+                "INSERT OR REPLACE INTO registry_info VALUES ('rebuilt_at', ?)",
+                (str(datetime.now()),),
+            )
+        return count
+
+    def is_built(self) -> bool:
+        """
+        Returns True once the registry has been backfilled from the directory tree.
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM registry_info WHERE key = 'rebuilt_at'").fetchone()
+        return row is not None
+
+    def query(
+        self,
+        pipeline_name: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        sort: str = "created_at",
+        descending: bool = True,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Lists runs matching the filters.
+
+        Args:
+            pipeline_name (str, optional): Only runs of this pipeline.
+            status (str, optional): Only runs with this status (case-insensitive).
+            since (str, optional): Only runs created at or after this ISO date/time.
+            until (str, optional): Only runs created before this ISO date/time.
+            sort (str): One of SORT_COLUMNS.
+            descending (bool): Sort order.
+            limit (int, optional): Page size. All matching runs if None.
+            offset (int): Number of matching runs to skip.
+
+        Returns:
+            tuple: (runs, total) where runs is the requested page as dicts and total
+                   is the number of runs matching the filters.
+
+        Raises:
+            ValueError: If `sort` is not a known column, or `since` or `until` is not an ISO date/time.
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by '{sort}'. Expected one of {SORT_COLUMNS}.")
+
+        clauses, params = [], []
+        if pipeline_name:
+            clauses.append("pipeline_name = ?")
+            params.append(pipeline_name)
+        if status:
+            clauses.append("status = ? COLLATE NOCASE")
+            params.append(status)
+        if since:
+            clauses.append("created_at >= ?")
+            params.append(_as_stored_time(since))
+        if until:
+            clauses.append("created_at < ?")
+            params.append(_as_stored_time(until))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = f"ORDER BY {sort} {'DESC' if descending else 'ASC'}, pipeline_name, run_id"
+        page = "LIMIT ? OFFSET ?" if limit is not None else ""
+
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM runs {where}", params).fetchone()[0]
+            page_params = params + ([limit, offset] if limit is not None else [])
+            rows = conn.execute(f"SELECT * FROM runs {where} {order} {page}", page_params).fetchall()
+        return [dict(row) for row in rows], total
@@ -0,0 +1,358 @@
+"""
+Retention policies and garbage collection of run data.
+
+Runs accumulate data that is only needed for a while: the single-page PDFs split
+from the input are only read during scanning, per-page intermediate results only
+matter if a run is aggregated again, and uploads in the server's upload directory
+are orphaned when `/api/upload` is never followed by `/api/extract`.
+
+`GarbageCollector.sweep` applies a `RetentionPolicy` in one pass:
+
+- runs created more than `run_ttl_days` ago are deleted;
+- page files of COMPLETED runs are removed (`remove_page_files`);
+- intermediate page files of COMPLETED runs older than `compact_after_days` are
+  combined into one compressed file;
+- COMPLETED runs older than `archive_after_days` are packed into one archive;
+- uploads older than `upload_ttl_hours` are deleted, as are input blobs no run
+  references anymore.
+
+With `dry_run` nothing is changed and the report lists the bytes each action
+would reclaim. `RetentionSweeper` runs the same sweep periodically in a thread.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Mapping, Optional
+
+from opengin.tracer import formats
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UPLOAD_TTL_HOURS = 24.0
+DEFAULT_SWEEP_INTERVAL = 3600.0
+
+# Environment variables read by `RetentionPolicy.from_env`
+ENV_REMOVE_PAGE_FILES = "OPENGIN_REMOVE_PAGE_FILES"
+ENV_COMPACT_AFTER_DAYS = "OPENGIN_COMPACT_AFTER_DAYS"
+ENV_ARCHIVE_AFTER_DAYS = "OPENGIN_ARCHIVE_AFTER_DAYS"
+ENV_RUN_TTL_DAYS = "OPENGIN_RUN_TTL_DAYS"
+ENV_UPLOAD_TTL_HOURS = "OPENGIN_UPLOAD_TTL_HOURS"
+ENV_SWEEP_INTERVAL = "OPENGIN_GC_INTERVAL"
+
+_FALSE_VALUES = ("0", "false", "no", "off")
+
+
+def disk_usage(path: str) -> int:
+    """
+    Returns the bytes held by a file or directory tree.
+
+    Files with other hard links (such as run inputs linked from the blob store) are
+    not counted, as removing this link does not free their data.
+    """
+    if not os.path.isdir(path):
+        try:
+            st = os.lstat(path)
+        except FileNotFoundError:
+            return 0
+        return st.st_size if st.st_nlink <= 1 else 0
+
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                st = os.lstat(os.path.join(root, name))
+            except FileNotFoundError:
+                continue
+            if st.st_nlink <= 1:
+                total += st.st_size
+    return total
+
+
+def format_bytes(size: int) -> str:
+    """
+    Formats a byte count for humans, e.g. 1536 -> '1.5 KB'.
+    """
+    value = float(size)
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(value) < 1024 or unit == "GB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TB"  # pragma: no cover
+
+
+def _parse_float(environ: Mapping[str, str], name: str, default: Optional[float]) -> Optional[float]:
+    value = environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"Invalid value for {name}: '{value}' is not a number.")
+
+
+class RetentionPolicy:
+    """
+    How long run data is kept. A limit of None disables that part of the sweep.
+    """
+
+    def __init__(
+        self,
+        remove_page_files: bool = True,
+        compact_after_days: Optional[float] = None,
+        archive_after_days: Optional[float] = None,
+        run_ttl_days: Optional[float] = None,
+        upload_ttl_hours: Optional[float] = DEFAULT_UPLOAD_TTL_HOURS,
+    ):
+        """
+        Args:
+            remove_page_files (bool): Remove the split page PDFs of COMPLETED runs.
+            compact_after_days (float, optional): Compact the intermediate page files
+                                                  of COMPLETED runs this many days old.
+            archive_after_days (float, optional): Pack COMPLETED runs this many days old
+                                                  into a single archive file.
+            run_ttl_days (float, optional): Delete runs this many days old, whatever their status.
+            upload_ttl_hours (float, optional): Delete uploads not turned into a pipeline
+                                                after this many hours.
+        """
+        self.remove_page_files = remove_page_files
+        self.compact_after_days = compact_after_days
+        self.archive_after_days = archive_after_days
+        self.run_ttl_days = run_ttl_days
+        self.upload_ttl_hours = upload_ttl_hours
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = None) -> "RetentionPolicy":
+        """
+        Builds a policy from OPENGIN_* environment variables, using the defaults for unset ones.
+
+        Raises:
+            ValueError: If a variable is not a number.
+        """
+        environ = os.environ if environ is None else environ
+        return cls(
+            remove_page_files=environ.get(ENV_REMOVE_PAGE_FILES, "1").strip().lower() not in _FALSE_VALUES,
+            compact_after_days=_parse_float(environ, ENV_COMPACT_AFTER_DAYS, None),
+            archive_after_days=_parse_float(environ, ENV_ARCHIVE_AFTER_DAYS, None),
+            run_ttl_days=_parse_float(environ, ENV_RUN_TTL_DAYS, None),
+            upload_ttl_hours=_parse_float(environ, ENV_UPLOAD_TTL_HOURS, DEFAULT_UPLOAD_TTL_HOURS),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "remove_page_files": self.remove_page_files,
+            "compact_after_days": self.compact_after_days,
+            "archive_after_days": self.archive_after_days,
+            "run_ttl_days": self.run_ttl_days,
+            "upload_ttl_hours": self.upload_ttl_hours,
+        }
+
+
+class SweepReport:
+    """
+    The actions of one sweep, each as a dict with 'action', 'target' and 'bytes'.
+
+    In a dry run, 'bytes' is what the action would free. For compaction and archiving
+    that is an upper bound, since the compacted file or archive itself takes some space.
+    """
+
+    def __init__(self, dry_run: bool = False):
+        self.dry_run = dry_run
+        self.actions: List[Dict[str, Any]] = []
+
+    def add(self, action: str, target: str, size: int):
+        self.actions.append({"action": action, "target": target, "bytes": size})
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(a["bytes"] for a in self.actions)
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """
+        Returns the number of actions and bytes per action type.
+        """
+        summary = {}
+        for a in self.actions:
+            entry = summary.setdefault(a["action"], {"count": 0, "bytes": 0})
+            entry["count"] += 1
+            entry["bytes"] += a["bytes"]
+        return summary
+
+
+class GarbageCollector:
+    """
+    Applies a retention policy to the runs of a `FileSystemManager`.
+
+    Runs are selected through the run registry. Runs held open by a pipeline in this
+    process are never touched.
+    """
+
+    def __init__(self, fs_manager, policy: RetentionPolicy, upload_dir: Optional[str] = None):
+        """
+        Args:
+            fs_manager (FileSystemManager): The runs to sweep.
+            policy (RetentionPolicy): What to remove.
+            upload_dir (str, optional): Directory of pending uploads to sweep as well.
+        """
+        self.fs_manager = fs_manager
+        self.policy = policy
+        self.upload_dir = upload_dir
+
+    def sweep(self, dry_run: bool = False, now: datetime = None) -> SweepReport:
+        """
+        Runs all parts of the policy once.
+
+        Args:
+            dry_run (bool): Report without removing anything.
+            now (datetime, optional): The reference time. Defaults to the current time.
+
+        Returns:
+            SweepReport: What was (or would be) removed.
+        """
+        now = now or datetime.now()
+        report = SweepReport(dry_run=dry_run)
+        expired = self._expire_runs(report, now)
+        if self.policy.remove_page_files:
+            self._remove_page_files(report, expired)
+        if self.policy.compact_after_days is not None:
+            self._compact_intermediates(report, expired, now)
+        if self.policy.archive_after_days is not None:
+            self._archive_runs(report, expired, now)
+        if self.policy.upload_ttl_hours is not None:
+            self._remove_uploads(report, now)
+            self._remove_unreferenced_blobs(report, now)
+
+        verb = "Would reclaim" if dry_run else "Reclaimed"
+        logger.info(f"Retention sweep: {verb} {format_bytes(report.total_bytes)} in {len(report.actions)} actions")
+        return report
+
+    def _runs(self, **filters) -> List[Dict[str, Any]]:
+        runs, _ = self.fs_manager.query_runs(sort="created_at", descending=False, **filters)
+        return [run for run in runs if not self.fs_manager.is_run_open(run["pipeline_name"], run["run_id"])]
+
+    def _expire_runs(self, report: SweepReport, now: datetime) -> set:
+        expired = set()
+        if self.policy.run_ttl_days is None:
+            return expired
+
+        cutoff = str(now - timedelta(days=self.policy.run_ttl_days))
+        for run in self._runs(until=cutoff):
+            pipeline_name, run_id = run["pipeline_name"], run["run_id"]
+            run_path = self.fs_manager.get_pipeline_path(pipeline_name, run_id)
+            size = disk_usage(run_path)
+            if report.dry_run or self.fs_manager.delete_run(pipeline_name, run_id):
+                report.add("expire_run", f"{pipeline_name}/{run_id}", size)
+                expired.add((pipeline_name, run_id))
+        return expired
+
+    def _remove_page_files(self, report: SweepReport, skip: set):
+        for run in self._runs(status="COMPLETED"):
+            key = (run["pipeline_name"], run["run_id"])
+            pages_dir = self.fs_manager.get_input_pages_dir(*key)
+            if key in skip or not os.path.isdir(pages_dir):
+                continue
+            size = disk_usage(pages_dir) if report.dry_run else self.fs_manager.remove_page_files(*key)
+            report.add("remove_page_files", f"{key[0]}/{key[1]}", size)
+
+    def _compact_intermediates(self, report: SweepReport, skip: set, now: datetime):
+        cutoff = str(now - timedelta(days=self.policy.compact_after_days))
+        for run in self._runs(status="COMPLETED", until=cutoff):
+            key = (run["pipeline_name"], run["run_id"])
+            intermediate_path = os.path.join(self.fs_manager.get_pipeline_path(*key), "intermediate")
+            if key in skip or not os.path.isdir(intermediate_path):
+                continue
+            page_files = [name for name in os.listdir(intermediate_path) if formats.PAGE_FILE_PATTERN.match(name)]
+            if not page_files:
+                continue
+            if report.dry_run:
+                size = sum(disk_usage(os.path.join(intermediate_path, name)) for name in page_files)
+            else:
+                size = self.fs_manager.compact_intermediate_results(*key)
+            report.add("compact_intermediate", f"{key[0]}/{key[1]}", size)
+
+    def _archive_runs(self, report: SweepReport, skip: set, now: datetime):
+        cutoff = str(now - timedelta(days=self.policy.archive_after_days))
+        for run in self._runs(status="COMPLETED", until=cutoff):
+            key = (run["pipeline_name"], run["run_id"])
+            if key in skip or self.fs_manager.is_run_archived(*key):
+                continue
+            if report.dry_run:
+                run_path = self.fs_manager.get_pipeline_path(*key)
+                size = disk_usage(run_path) - disk_usage(os.path.join(run_path, "metadata.json"))
+            else:
+                info = self.fs_manager.archive_run(*key)
+                size = info["size_before"] - info["size"]
+            report.add("archive_run", f"{key[0]}/{key[1]}", size)
+
+    def _remove_uploads(self, report: SweepReport, now: datetime):
+        if not self.upload_dir or not os.path.isdir(self.upload_dir):
+            return
+        cutoff = (now - timedelta(hours=self.policy.upload_ttl_hours)).timestamp()
+        for name in sorted(os.listdir(self.upload_dir)):
+            path = os.path.join(self.upload_dir, name)
+            st = os.lstat(path)
+            if not os.path.isfile(path) or st.st_mtime >= cutoff:
+                continue
+            # An upload linked from the blob store frees its data with the blob
+            size = st.st_size if st.st_nlink <= 1 else 0
+            if not report.dry_run:
+                os.remove(path)
+            report.add("remove_upload", path, size)
+
+    def _remove_unreferenced_blobs(self, report: SweepReport, now: datetime):
+        # Blobs of pending uploads have no run reference yet, so they get the upload grace period
+        cutoff = (now - timedelta(hours=self.policy.upload_ttl_hours)).timestamp()
+        blobs = self.fs_manager.blobs
+        for digest in blobs.digests():
+            path = blobs.path(digest)
+            st = os.lstat(path)
+            if st.st_mtime >= cutoff or self.fs_manager.registry.blob_ref_count(digest):
+                continue
+            if not report.dry_run:
+                blobs.remove(digest)
+            report.add("remove_blob", digest, st.st_size)
+
+
+class RetentionSweeper:
+    """
+    Runs a retention sweep in a background thread, once at start and then every `interval` seconds.
+    """
+
+    def __init__(self, fs_manager, upload_dir: Optional[str] = None, interval: float = DEFAULT_SWEEP_INTERVAL):
+        """
+        Args:
+            fs_manager (FileSystemManager): The runs to sweep, with their retention policy.
+            upload_dir (str, optional): Directory of pending uploads to sweep as well.
+            interval (float): Seconds between two sweeps.
+        """
+        self.fs_manager = fs_manager
+        self.upload_dir = upload_dir
+        self.interval = interval
+        self.last_report: Optional[SweepReport] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="retention-sweeper", daemon=True)
+        self._thread.start()
+        logger.info(f"Retention sweeper started, sweeping every {self.interval:.0f}s")
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.last_report = self.fs_manager.collect_garbage(upload_dir=self.upload_dir)
+            except Exception as e:
+                logger.error(f"Retention sweep failed: {e}", exc_info=True)
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
@@ -0,0 +1,183 @@
+"""
+Run state held in memory for the duration of a pipeline run.
+
+A run's `metadata.json` is rewritten by every stage. `RunState` keeps the metadata
+in memory and writes it through to disk:
+
+- atomically: the JSON is written to a temporary file in the same directory,
+  fsynced and moved over the old file with `os.replace`, so a reader sees either
+  the old or the new file, never a partial one;
+- coalesced: updates arriving within `flush_interval` of the last write are
+  collected and written once, while status changes are always written at once;
+- under an advisory file lock (`metadata.json.lock`), so writers in different
+  processes are serialized and readers using `read_json_locked` never race them.
+"""
+
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+LOCK_SUFFIX = ".lock"
+DEFAULT_FLUSH_INTERVAL = 0.25
+
+
+@contextmanager
+def file_lock(path: str, exclusive: bool = True):
+    """
+    Holds an advisory lock on `<path>.lock` for the duration of the block.
+
+    The lock lives in a separate file because `os.replace` swaps the inode of `path`
+    itself. On platforms without `fcntl` this is a no-op.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(path + LOCK_SUFFIX, "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def write_json_atomic(path: str, data: Any):
+    """
+    Writes JSON to `path` through a temporary file and an atomic rename.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        with file_lock(path):
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_json_locked(path: str) -> Any:
+    """
+    Reads a JSON file written by `write_json_atomic`, holding a shared lock.
+    """
+    with file_lock(path, exclusive=False):
+        with open(path, "r") as f:
+            return json.load(f)
+
+
+class RunState:
+    """
+    In-memory metadata of a run, written through to disk atomically.
+
+    All methods are thread-safe. Call `close` (or `flush`) to make sure the last
+    coalesced update has reached the disk.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        on_write: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        """
+        Loads the current metadata from `path`, if it exists.
+
+        Args:
+            path (str): Path of the metadata file.
+            flush_interval (float): Minimum seconds between two writes of coalesced updates.
+            on_write (Callable, optional): Called with the metadata after every write to disk.
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.on_write = on_write
+        self.writes = 0
+        self._data = read_json_locked(path) if os.path.exists(path) else {}
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._last_write = 0.0
+        self._timer: Optional[threading.Timer] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns a deep copy of the current metadata.
+        """
+        with self._lock:
+            return copy.deepcopy(self._data)
+
+    def replace(self, data: Dict[str, Any], immediate: bool = False):
+        """
+        Replaces the whole metadata dictionary.
+        """
+        with self._lock:
+            status_changed = data.get("status") != self._data.get("status")
+            self._data = copy.deepcopy(data)
+            self._changed(immediate or status_changed)
+
+    def update(self, changes: Dict[str, Any], immediate: bool = False) -> Dict[str, Any]:
+        """
+        Merges `changes` into the metadata as one atomic read-modify-write.
+
+        Returns:
+            Dict[str, Any]: A copy of the updated metadata.
+        """
+        with self._lock:
+            status_changed = "status" in changes and changes["status"] != self._data.get("status")
+            self._data.update(copy.deepcopy(changes))
+            self._changed(immediate or status_changed)
+            return copy.deepcopy(self._data)
+
+    def flush(self):
+        """
+        Writes pending changes to disk now.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            write_json_atomic(self.path, self._data)
+            self._dirty = False
+            self._last_write = time.monotonic()
+            self.writes += 1
+            if self.on_write is not None:
+                self.on_write(self._data)
+
+    def close(self):
+        """
+        Flushes pending changes and stops the coalescing timer.
+        """
+        self.flush()
+
+    def _changed(self, immediate: bool):
+        self._dirty = True
+        wait = self._last_write + self.flush_interval - time.monotonic()
+        if immediate or wait <= 0:
+            self.flush()
+        elif self._timer is None:
+            self._timer = threading.Timer(wait, self._flush_quietly)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except OSError as e:
+            # The run directory may have been deleted in the meantime
+            logger.warning(f"Could not write run state to {self.path}: {e}")
@@ -161,10 +161,9 @@ class Mutation:
 
             tables = []
             if os.path.exists(aggregated_path):
-                with open(aggregated_path, "r") as f:
-                    raw_tables = json.load(f)
+                raw_tables = fs_manager.iter_aggregated_tables(pipeline_name, run_id_val)
 
-                for idx, t in enumerate(raw_tables):
+                for idx, (t, rows) in enumerate(raw_tables):
                     # Generate a unique ID using run_id and index
                     unique_id = f"{run_id_val}_{idx}"
                     tables.append(
@@ -172,7 +171,7 @@ class Mutation:
                             id=unique_id,
                             name=t.get("name", "Untitled"),
                             columns=t.get("columns", []),
-                            rows=t.get("rows", []),
+                            rows=list(rows),
                             metadata=t.get("metadata", None),
                         )
                     )
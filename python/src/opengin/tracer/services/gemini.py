@@ -6,6 +6,8 @@ import time
 from dotenv import load_dotenv
 from google import genai
 
+from opengin.tracer.cancellation import CancelToken, RunCancelled
+
 load_dotenv()
 logger = logging.getLogger(__name__)
 
@@ -66,7 +68,7 @@ def upload_file_to_gemini(file_path: str, api_key: str = None, mime_type: str =
     return uploaded_file
 
 
-def wait_for_files_active(files, client=None):
+def wait_for_files_active(files, client=None, cancel: CancelToken = None):
     """
     Waits for the given files to be active on the Gemini API.
 
@@ -77,9 +79,11 @@ def wait_for_files_active(files, client=None):
     Args:
         files (list): A list of uploaded file objects.
         client (genai.Client, optional): The client instance to use.
+        cancel (CancelToken, optional): Stops the wait once the run is cancelled.
 
     Raises:
         Exception: If a file fails to process.
+        RunCancelled: If the run is cancelled while waiting.
     """
     logger.info("Waiting for file processing...")
     # Fallback to global if not provided
@@ -94,7 +98,11 @@ def wait_for_files_active(files, client=None):
         while remote_file.state == "PROCESSING":
             # logger.debug("Waiting for file processing...")
 
-            time.sleep(10)
+            if cancel:
+                if cancel.wait(10):
+                    raise RunCancelled(f"Run cancelled while waiting for file {name}")
+            else:
+                time.sleep(10)
             remote_file = client.files.get(name=name)
 
         if remote_file.state != "ACTIVE":
@@ -102,7 +110,9 @@ def wait_for_files_active(files, client=None):
     logger.info("...all files ready")
 
 
-def extract_data_with_gemini(file_path: str, user_prompt: str, metadata_schema: dict = None, api_key: str = None):
+def extract_data_with_gemini(
+    file_path: str, user_prompt: str, metadata_schema: dict = None, api_key: str = None, cancel: CancelToken = None
+):
     """
     Uploads a file to Gemini and performs data extraction.
 
@@ -118,9 +128,14 @@ def extract_data_with_gemini(file_path: str, user_prompt: str, metadata_schema:
         user_prompt (str): Specific instructions on what to extract.
         metadata_schema (dict, optional): Schema for metadata extraction.
         api_key (str, optional): The Google API Key.
+        cancel (CancelToken, optional): Checked between the steps of the request. The
+                                        uploaded file is deleted when the run is cancelled.
 
     Returns:
         str: The raw text response from the model (expected to be JSON).
+
+    Raises:
+        RunCancelled: If the run is cancelled before the response is generated.
     """
     local_client = _get_or_init_client(api_key)
 
@@ -145,11 +160,15 @@ def extract_data_with_gemini(file_path: str, user_prompt: str, metadata_schema:
     myfile = None
     try:
         # 1. Upload File
+        if cancel:
+            cancel.raise_if_cancelled()
         myfile = upload_file_to_gemini(file_path, api_key=api_key)
 
         # 2. Wait for processing
 
-        wait_for_files_active([myfile], client=local_client)
+        wait_for_files_active([myfile], client=local_client, cancel=cancel)
+        if cancel:
+            cancel.raise_if_cancelled()
 
         # 3. Generate Content
         # System/Structural Prompt to guide the output format
@@ -0,0 +1,468 @@
+"""
+Storage backends for run data.
+
+The pipeline stages work on a local run directory (see `FileSystemManager`). A
+storage backend is the durable home of that data: metadata is written through to
+it on every change, runs are pushed to it when a stage sequence ends, and a run
+missing from the local directory is fetched from it on first access. Server
+replicas sharing one backend can therefore serve any run, whichever replica ran it.
+
+Two backends are provided:
+
+- `LocalStorage`: a directory on a local or network filesystem.
+- `S3Storage`: S3-compatible object storage (AWS S3, MinIO, ...). Requires boto3,
+  installed with `pip install 'opengin[s3]'`. Large files are transferred with
+  multipart uploads and downloads, connections come from a bounded pool, and whole
+  runs are pushed and prefetched with parallel transfers.
+
+Objects are addressed by '/'-separated keys, '<pipeline>/<run_id>/<path in run>'.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Environment variables read by `storage_from_env`
+ENV_STORAGE_URL = "OPENGIN_STORAGE_URL"
+ENV_S3_ENDPOINT_URL = "OPENGIN_S3_ENDPOINT_URL"
+
+DEFAULT_TRANSFER_WORKERS = 8
+DEFAULT_MAX_POOL_CONNECTIONS = 16
+DEFAULT_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+DEFAULT_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+
+
+class StorageError(Exception):
+    """
+    Raised when the storage backend fails, e.g. on a network or permission error.
+    """
+
+
+def is_transient(name: str) -> bool:
+    """
+    Returns True for local files that are never stored: lock files and hidden temporary files.
+    """
+    return name.endswith(".lock") or name.startswith(".")
+
+
+def join_key(*parts: str) -> str:
+    return "/".join(part.strip("/") for part in parts if part and part.strip("/"))
+
+
+class StorageBackend:
+    """
+    Base class of storage backends.
+
+    Subclasses implement the single-object operations; pushing and pulling whole
+    directory trees is built on top of them with `workers` parallel transfers.
+    """
+
+    workers = DEFAULT_TRANSFER_WORKERS
+
+    def read_bytes(self, key: str) -> bytes:
+        """
+        Raises:
+            FileNotFoundError: If the object does not exist.
+        """
+        raise NotImplementedError
+
+    def write_bytes(self, key: str, data: bytes):
+        raise NotImplementedError
+
+    def upload_file(self, local_path: str, key: str):
+        raise NotImplementedError
+
+    def download_file(self, key: str, local_path: str):
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def list_keys(self, prefix: str) -> List[str]:
+        """
+        Returns the keys of all objects under a prefix, recursively.
+        """
+        raise NotImplementedError
+
+    def list_children(self, prefix: str) -> List[str]:
+        """
+        Returns the sorted names of the entries directly under a prefix, like `os.listdir`.
+        """
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix: str):
+        """
+        Deletes all objects under a prefix.
+        """
+        raise NotImplementedError
+
+    def delete_keys(self, keys: List[str]):
+        """
+        Deletes single objects. Keys that do not exist are ignored.
+        """
+        raise NotImplementedError
+
+    def push_tree(self, local_dir: str, prefix: str) -> int:
+        """
+        Uploads all files of a local directory under a prefix, in parallel.
+
+        Lock files and hidden temporary files are skipped.
+
+        Returns:
+            int: The number of files uploaded.
+        """
+        rels = []
+        for root, dirs, files in os.walk(local_dir):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for name in files:
+                if not is_transient(name):
+                    rels.append(os.path.relpath(os.path.join(root, name), local_dir).replace(os.sep, "/"))
+        return self.push_files(local_dir, prefix, rels)
+
+    def push_files(self, local_dir: str, prefix: str, rels: List[str]) -> int:
+        """
+        Uploads the given files of a local directory under a prefix, in parallel.
+
+        Args:
+            local_dir (str): The local directory.
+            prefix (str): The key prefix the directory maps to.
+            rels (List[str]): '/'-separated paths relative to `local_dir`.
+
+        Returns:
+            int: The number of files uploaded.
+        """
+        transfers = [(os.path.join(local_dir, *rel.split("/")), join_key(prefix, rel)) for rel in rels]
+        self._run_parallel(lambda t: self.upload_file(*t), transfers)
+        return len(transfers)
+
+    def pull_tree(self, prefix: str, local_dir: str) -> int:
+        """
+        Downloads all objects under a prefix into a local directory, in parallel.
+
+        Returns:
+            int: The number of files downloaded.
+        """
+        base = join_key(prefix)
+        rels = [key[len(base) :].lstrip("/") if base else key for key in self.list_keys(prefix)]
+        return self.pull_files(prefix, local_dir, [rel for rel in rels if rel])
+
+    def pull_files(self, prefix: str, local_dir: str, rels: List[str]) -> int:
+        """
+        Downloads the given objects under a prefix into a local directory, in parallel.
+
+        Args:
+            prefix (str): The key prefix the directory maps to.
+            local_dir (str): The local directory.
+            rels (List[str]): '/'-separated keys relative to `prefix`.
+
+        Returns:
+            int: The number of files downloaded.
+        """
+        transfers = [(join_key(prefix, rel), os.path.join(local_dir, *rel.split("/"))) for rel in rels]
+        self._run_parallel(lambda t: self.download_file(*t), transfers)
+        return len(transfers)
+
+    def _run_parallel(self, fn, items: List[Tuple[str, str]]):
+        if len(items) <= 1 or self.workers <= 1:
+            for item in items:
+                fn(item)
+            return
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(items))) as executor:
+            # list() re-raises the first failure
+            list(executor.map(fn, items))
+
+
+class LocalStorage(StorageBackend):
+    """
+    Stores objects as files under a root directory.
+    """
+
+    def __init__(self, root: str, workers: int = DEFAULT_TRANSFER_WORKERS):
+        """
+        Args:
+            root (str): The root directory. Created on first write.
+            workers (int): Parallel file copies when pushing or pulling a tree.
+        """
+        self.root = root
+        self.workers = workers
+
+    def path(self, key: str) -> str:
+        parts = [part for part in key.split("/") if part]
+        if any(part == ".." for part in parts):
+            raise ValueError(f"Invalid storage key '{key}'")
+        return os.path.join(self.root, *parts)
+
+    def read_bytes(self, key: str) -> bytes:
+        with open(self.path(key), "rb") as f:
+            return f.read()
+
+    def write_bytes(self, key: str, data: bytes):
+        self._write(key, lambda f: f.write(data))
+
+    def upload_file(self, local_path: str, key: str):
+        with open(local_path, "rb") as src:
+            self._write(key, lambda f: shutil.copyfileobj(src, f))
+
+    def download_file(self, key: str, local_path: str):
+        os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+        _copy_atomic(self.path(key), local_path)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def list_keys(self, prefix: str) -> List[str]:
+        base = self.path(prefix)
+        if os.path.isfile(base):
+            return [join_key(prefix)]
+        keys = []
+        for root, dirs, files in os.walk(base):
+            dirs.sort()
+            for name in sorted(files):
+                if name.startswith(".incoming."):
+                    continue
+                rel = os.path.relpath(os.path.join(root, name), self.root).replace(os.sep, "/")
+                keys.append(rel)
+        return keys
+
+    def list_children(self, prefix: str) -> List[str]:
+        base = self.path(prefix)
+        if not os.path.isdir(base):
+            return []
+        return sorted(name for name in os.listdir(base) if not name.startswith(".incoming."))
+
+    def delete_prefix(self, prefix: str):
+        base = self.path(prefix)
+        if os.path.isdir(base):
+            shutil.rmtree(base)
+        elif os.path.exists(base):
+            os.remove(base)
+
+    def delete_keys(self, keys: List[str]):
+        for key in keys:
+            path = self.path(key)
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def _write(self, key: str, write):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".incoming.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def _copy_atomic(src: str, dest: str):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest) or ".", prefix=".incoming.")
+    os.close(fd)
+    try:
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _require_boto3():
+    try:
+        import boto3
+        import boto3.exceptions
+        import botocore.config
+        import botocore.exceptions
+        from boto3.s3.transfer import TransferConfig
+    except ImportError as e:
+        raise ImportError("S3 storage requires boto3. Install it with: pip install 'opengin[s3]'") from e
+    return boto3, botocore, TransferConfig
+
+
+class S3Storage(StorageBackend):
+    """
+    Stores objects in an S3-compatible bucket.
+
+    Files above `multipart_threshold` are uploaded and downloaded in
+    `multipart_chunksize` parts, `max_concurrency` parts at a time. All requests
+    share one client whose connection pool is bounded by `max_pool_connections`;
+    tree transfers run at most `workers` files at a time, so
+    `workers * max_concurrency` should not exceed the pool size.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        client=None,
+        workers: int = DEFAULT_TRANSFER_WORKERS,
+        max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+        multipart_threshold: int = DEFAULT_MULTIPART_THRESHOLD,
+        multipart_chunksize: int = DEFAULT_MULTIPART_CHUNKSIZE,
+        max_concurrency: int = 2,
+    ):
+        """
+        Args:
+            bucket (str): The bucket name.
+            prefix (str): Key prefix of all objects, e.g. 'opengin/pipelines'.
+            endpoint_url (str, optional): Endpoint of an S3-compatible service such as MinIO.
+            client (optional): A boto3 S3 client to use instead of creating one.
+            workers (int): Parallel file transfers when pushing or prefetching a run.
+            max_pool_connections (int): Size of the client's HTTP connection pool.
+            multipart_threshold (int): File size in bytes from which multipart transfers are used.
+            multipart_chunksize (int): Size in bytes of each part.
+            max_concurrency (int): Parallel parts per file transfer.
+        """
+        boto3, botocore, TransferConfig = _require_boto3()
+        self._client_errors = (
+            botocore.exceptions.BotoCoreError,
+            botocore.exceptions.ClientError,
+            boto3.exceptions.Boto3Error,
+        )
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.workers = workers
+        self.client = client or boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            config=botocore.config.Config(
+                max_pool_connections=max_pool_connections,
+                retries={"max_attempts": 5, "mode": "standard"},
+            ),
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=max_concurrency,
+            use_threads=max_concurrency > 1,
+        )
+
+    def _key(self, key: str) -> str:
+        return join_key(self.prefix, key)
+
+    def _is_not_found(self, error) -> bool:
+        code = getattr(error, "response", {}).get("Error", {}).get("Code")
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    def read_bytes(self, key: str) -> bytes:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"].read()
+        except self._client_errors as e:
+            if self._is_not_found(e):
+                raise FileNotFoundError(key) from e
+            raise StorageError(f"Could not read s3://{self.bucket}/{self._key(key)}: {e}") from e
+
+    def write_bytes(self, key: str, data: bytes):
+        try:
+            self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+        except self._client_errors as e:
+            raise StorageError(f"Could not write s3://{self.bucket}/{self._key(key)}: {e}") from e
+
+    def upload_file(self, local_path: str, key: str):
+        try:
+            self.client.upload_file(local_path, self.bucket, self._key(key), Config=self.transfer_config)
+        except self._client_errors as e:
+            raise StorageError(f"Could not upload {local_path} to s3://{self.bucket}/{self._key(key)}: {e}") from e
+
+    def download_file(self, key: str, local_path: str):
+        directory = os.path.dirname(local_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".incoming.")
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, self._key(key), tmp_path, Config=self.transfer_config)
+            os.replace(tmp_path, local_path)
+        except self._client_errors as e:
+            raise StorageError(f"Could not download s3://{self.bucket}/{self._key(key)}: {e}") from e
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except self._client_errors as e:
+            if self._is_not_found(e):
+                return False
+            raise StorageError(f"Could not stat s3://{self.bucket}/{self._key(key)}: {e}") from e
+
+    def _paginate(self, prefix: str, **kwargs):
+        try:
+            paginator = self.client.get_paginator("list_objects_v2")
+            yield from paginator.paginate(Bucket=self.bucket, Prefix=prefix, **kwargs)
+        except self._client_errors as e:
+            raise StorageError(f"Could not list s3://{self.bucket}/{prefix}: {e}") from e
+
+    def list_keys(self, prefix: str) -> List[str]:
+        full_prefix = self._key(prefix)
+        keys = []
+        for page in self._paginate(full_prefix + "/" if full_prefix else ""):
+            for obj in page.get("Contents", []):
+                keys.append(obj["Key"][len(self.prefix) :].lstrip("/") if self.prefix else obj["Key"])
+        return keys
+
+    def list_children(self, prefix: str) -> List[str]:
+        full_prefix = self._key(prefix)
+        full_prefix = full_prefix + "/" if full_prefix else ""
+        names = set()
+        for page in self._paginate(full_prefix, Delimiter="/"):
+            for common in page.get("CommonPrefixes", []):
+                names.add(common["Prefix"][len(full_prefix) :].rstrip("/"))
+            for obj in page.get("Contents", []):
+                names.add(obj["Key"][len(full_prefix) :])
+        return sorted(name for name in names if name)
+
+    def delete_prefix(self, prefix: str):
+        self._delete_objects([self._key(key) for key in self.list_keys(prefix)], self._key(prefix))
+
+    def delete_keys(self, keys: List[str]):
+        self._delete_objects([self._key(key) for key in keys], self.prefix)
+
+    def _delete_objects(self, full_keys: List[str], what: str):
+        try:
+            # DeleteObjects accepts at most 1000 keys per request
+            for start in range(0, len(full_keys), 1000):
+                batch = [{"Key": key} for key in full_keys[start : start + 1000]]
+                self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": batch, "Quiet": True})
+        except self._client_errors as e:
+            raise StorageError(f"Could not delete from s3://{self.bucket}/{what}: {e}") from e
+
+
+def storage_from_url(url: Optional[str], endpoint_url: Optional[str] = None) -> Optional[StorageBackend]:
+    """
+    Creates a storage backend from a URL.
+
+    Args:
+        url (str, optional): 's3://bucket/prefix', 'file:///path' or a plain directory path.
+                             None or '' for no backend.
+        endpoint_url (str, optional): Endpoint of an S3-compatible service.
+
+    Returns:
+        StorageBackend: The backend, or None.
+    """
+    if not url:
+        return None
+    if url.startswith("s3://"):
+        bucket, _, prefix = url[len("s3://") :].partition("/")
+        if not bucket:
+            raise ValueError(f"Invalid storage URL '{url}': missing bucket name.")
+        return S3Storage(bucket, prefix, endpoint_url=endpoint_url)
+    if url.startswith("file://"):
+        url = url[len("file://") :]
+    return LocalStorage(url)
+
+
+def storage_from_env() -> Optional[StorageBackend]:
+    """
+    Creates the storage backend configured by OPENGIN_STORAGE_URL (and OPENGIN_S3_ENDPOINT_URL).
+    """
+    return storage_from_url(os.getenv(ENV_STORAGE_URL), endpoint_url=os.getenv(ENV_S3_ENDPOINT_URL) or None)
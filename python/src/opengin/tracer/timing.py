@@ -0,0 +1,109 @@
+"""
+Timing and resource accounting of pipeline stages.
+
+`StageTimer` measures each stage of a run (splitting, scanning, aggregating,
+exporting) and keeps, per stage, its start and end timestamps, wall time, CPU
+time and the peak resident set size of the process at its end. The measurements
+are stored in the run metadata under 'timings':
+
+    {
+        "stages": {"scanning": {"started_at": ..., "finished_at": ..., "wall_seconds": 12.3,
+                                "cpu_seconds": 1.2, "peak_rss_bytes": 104857600}, ...},
+        "wall_seconds": 15.1,
+        "cpu_seconds": 2.0,
+        "peak_rss_bytes": 104857600,
+        "pages_per_second": 3.97
+    }
+
+CPU time and peak RSS are those of the whole process, so runs sharing a process
+(e.g. in a batch or the server) are counted together. The peak RSS is the high-water
+mark since the process started; it is not reset between stages. It is None where
+the platform does not report it.
+"""
+
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Order in which stages are listed
+STAGES = ("splitting", "scanning", "aggregating", "exporting")
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    Returns the peak resident set size of the process in bytes, or None if unknown.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class StageTimer:
+    """
+    Measures the stages of one run.
+
+    Stages may be timed from several threads. `on_change` is called with the
+    current timings (as returned by `to_dict`) each time a stage ends.
+    """
+
+    def __init__(self, on_change: Callable[[Dict[str, Any]], None] = None):
+        self.on_change = on_change
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.page_count = 0
+        self._started_wall = time.perf_counter()
+        self._started_cpu = time.process_time()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Times the code in the `with` block as the stage `name`.
+
+        A stage that raises is recorded with the time it took until then.
+        """
+        started_at = str(datetime.now())
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            record = {
+                "started_at": started_at,
+                "finished_at": str(datetime.now()),
+                "wall_seconds": round(time.perf_counter() - wall, 3),
+                "cpu_seconds": round(time.process_time() - cpu, 3),
+                "peak_rss_bytes": peak_rss_bytes(),
+            }
+            with self._lock:
+                self.stages[name] = record
+            if self.on_change:
+                self.on_change(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the timings of the stages so far and of the run as a whole.
+        """
+        wall = time.perf_counter() - self._started_wall
+        with self._lock:
+            stages = {name: dict(self.stages[name]) for name in sorted(self.stages, key=_stage_order)}
+        return {
+            "stages": stages,
+            "wall_seconds": round(wall, 3),
+            "cpu_seconds": round(time.process_time() - self._started_cpu, 3),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "pages_per_second": round(self.page_count / wall, 3) if self.page_count and wall > 0 else None,
+        }
+
+
+def _stage_order(name: str):
+    return (STAGES.index(name), name) if name in STAGES else (len(STAGES), name)
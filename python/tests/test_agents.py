@@ -1,9 +1,12 @@
 import json
 import os
+import sqlite3
 from unittest.mock import patch
 
-from opengin.tracer.agents.aggregator import Agent2
-from opengin.tracer.agents.exporter import Agent3
+import pytest
+
+from opengin.tracer.agents.aggregator import Agent2, IncrementalAggregator
+from opengin.tracer.agents.exporter import Agent3, FilenamePlanner, write_csv
 from opengin.tracer.agents.scanner import Agent1
 
 
@@ -193,3 +196,182 @@ def test_agent2_aggregator_schema_mismatch(fs_manager):
     assert t2["columns"] == ["Item", "Price", "Qty"]
     assert len(t2["rows"]) == 1
     assert t2["rows"][0][0] == "Banana"
+
+
+def test_incremental_aggregator_orders_pages():
+    aggregator = IncrementalAggregator()
+
+    page = {"tables": [{"name": "Invoice", "columns": ["Item"], "rows": []}]}
+    aggregator.add_page(2, {"tables": [{"name": "Invoice", "columns": ["Item"], "rows": [["B"]]}]})
+    # Page 2 is held back until page 1 arrives
+    assert aggregator.pages_consumed == 0
+
+    aggregator.add_page(1, {"tables": [{"name": "Invoice", "columns": ["Item"], "rows": [["A"]]}]})
+    assert aggregator.pages_consumed == 2
+
+    aggregator.add_page(3, {"error": "failed page"})
+    aggregator.add_page(5, page)
+    tables = aggregator.finish()
+
+    assert aggregator.pages_consumed == 4
+    assert len(tables) == 1
+    assert tables[0]["rows"] == [["A"], ["B"]]
+
+
+def test_agent2_finalizes_streamed_aggregator(fs_manager):
+    pipeline_name = "test_pipeline"
+    run_id = "run_streamed"
+    fs_manager.initialize_pipeline(pipeline_name, run_id)
+
+    agent2 = Agent2(fs_manager)
+    aggregator = agent2.create_aggregator(pipeline_name, run_id)
+    aggregator.add_page(1, {"tables": [{"name": "Invoice", "columns": ["Item"], "rows": [["A"]]}]})
+
+    # Nothing is on disk: the aggregator state is used as-is
+    agent2.run(pipeline_name, run_id, aggregator=aggregator)
+
+    with open(fs_manager.get_aggregated_results_path(pipeline_name, run_id), "r") as f:
+        data = json.load(f)
+    assert data[0]["rows"] == [["A"]]
+
+
+def test_incremental_aggregator_many_schema_variants():
+    aggregator = IncrementalAggregator()
+
+    # Alternate between many schemas of the same table name
+    for page_num in range(1, 201):
+        variant = page_num % 50
+        columns = [f"Col{i}" for i in range(variant + 1)]
+        table = {"name": "Sales", "columns": columns, "rows": [[str(page_num)] * len(columns)]}
+        aggregator.add_page(page_num, {"tables": [table]})
+
+    tables = aggregator.finish()
+
+    assert len(tables) == 50
+    # First-seen order: page 1 has variant 1, so it keeps the plain name
+    assert tables[0]["name"] == "Sales"
+    assert tables[0]["columns"] == ["Col0", "Col1"]
+    assert tables[1]["name"] == "Sales (1)"
+    assert tables[-1]["name"] == "Sales (49)"
+    assert [row[0] for row in tables[0]["rows"]] == ["1", "51", "101", "151"]
+
+
+def test_incremental_aggregator_variant_name_collision():
+    aggregator = IncrementalAggregator()
+    aggregator.add_page(1, {"tables": [{"name": "Sales", "columns": ["A"], "rows": [["1"]]}]})
+    aggregator.add_page(2, {"tables": [{"name": "sales_1", "columns": ["B"], "rows": [["2"]]}]})
+    aggregator.add_page(3, {"tables": [{"name": "Sales", "columns": ["C"], "rows": [["3"]]}]})
+
+    names = [t["name"] for t in aggregator.finish()]
+    assert names == ["Sales", "sales_1", "Sales (1)"]
+
+
+def test_out_of_core_aggregation_and_export(fs_manager):
+    pipeline_name = "test_pipeline"
+    run_id = "run_out_of_core"
+    fs_manager.initialize_pipeline(pipeline_name, run_id)
+
+    metadata = fs_manager.load_metadata(pipeline_name, run_id)
+    metadata["options"] = {"out_of_core": True}
+    fs_manager.save_metadata(pipeline_name, run_id, metadata)
+
+    for page_num in range(1, 4):
+        page = {"tables": [{"name": "Invoice", "columns": ["Item", "Cost"], "rows": [[f"item{page_num}", "10"]]}]}
+        fs_manager.save_intermediate_result(pipeline_name, run_id, page_num, page)
+
+    Agent2(fs_manager).run(pipeline_name, run_id)
+
+    tables = fs_manager.load_aggregated_result(pipeline_name, run_id)
+    assert len(tables) == 1
+    # Only the header is kept in tables.json; rows live in an append-only file
+    assert "rows" not in tables[0]
+    assert tables[0]["row_count"] == 3
+    rows_path = os.path.join(fs_manager.get_aggregated_dir(pipeline_name, run_id), tables[0]["rows_file"])
+    assert os.path.exists(rows_path)
+    assert list(fs_manager.iter_table_rows(pipeline_name, run_id, tables[0])) == [
+        ["item1", "10"],
+        ["item2", "10"],
+        ["item3", "10"],
+    ]
+
+    Agent3(fs_manager).run(pipeline_name, run_id)
+    with open(os.path.join(fs_manager.get_output_path(pipeline_name, run_id), "invoice.csv"), "r") as f:
+        assert f.read().splitlines() == ["Item,Cost", "item1,10", "item2,10", "item3,10"]
+
+
+def test_write_csv_streams_rows(tmp_path):
+    def rows():
+        for i in range(1000):
+            yield [f"item{i}", i]
+
+    path = str(tmp_path / "big.csv")
+    assert write_csv(path, ["Item", "Qty"], rows(), buffer_size=4096) == 1000
+
+    with open(path, "r", newline="") as f:
+        lines = f.read().split("\r\n")
+    assert lines[0] == "Item,Qty"
+    assert lines[1000] == "item999,999"
+
+
+def test_filename_planner_matches_probe_naming():
+    planner = FilenamePlanner(["report.csv"], [".csv", ".parquet"])
+
+    assert planner.reserve("Report") == "report_1"
+    assert planner.reserve("My Table") == "my_table"
+    assert planner.reserve("my_table") == "my_table_1"
+    assert planner.reserve("My Table!") == "my_table_2"
+
+
+def test_agent3_parallel_export(fs_manager):
+    pipeline_name = "test_pipeline"
+    run_id = "run_parallel_export"
+    fs_manager.initialize_pipeline(pipeline_name, run_id)
+
+    metadata = fs_manager.load_metadata(pipeline_name, run_id)
+    metadata["options"] = {"export_workers": 4, "export_formats": ["csv", "sqlite"], "storage_format": "jsonl"}
+    fs_manager.save_metadata(pipeline_name, run_id, metadata)
+
+    agg_data = [{"name": f"Table {i % 10}", "columns": ["N"], "rows": [[str(i)]] * (i + 1)} for i in range(50)]
+    fs_manager.save_aggregated_result(pipeline_name, run_id, agg_data)
+
+    Agent3(fs_manager).run(pipeline_name, run_id)
+
+    output_dir = fs_manager.get_output_path(pipeline_name, run_id)
+    csv_files = [f for f in os.listdir(output_dir) if f.endswith(".csv")]
+    assert len(csv_files) == 50
+    # Names are planned in table order: the 13th table is the second 'Table 2'
+    with open(os.path.join(output_dir, "table_2_1.csv"), "r") as f:
+        assert f.read().splitlines() == ["N"] + ["12"] * 13
+
+    conn = sqlite3.connect(os.path.join(output_dir, "tables.sqlite"))
+    assert conn.execute("SELECT COUNT(*) FROM _table_metadata").fetchone() == (50,)
+    assert conn.execute("SELECT SUM(row_count) FROM _table_metadata").fetchone() == (sum(range(1, 51)),)
+    conn.close()
+    assert fs_manager.load_metadata(pipeline_name, run_id)["status"] == "COMPLETED"
+
+
+def test_agent3_parallel_export_stops_after_a_failure(fs_manager):
+    pipeline_name = "test_pipeline"
+    run_id = "run_parallel_failure"
+    fs_manager.initialize_pipeline(pipeline_name, run_id)
+
+    metadata = fs_manager.load_metadata(pipeline_name, run_id)
+    metadata["options"] = {"export_workers": 2, "storage_format": "jsonl"}
+    fs_manager.save_metadata(pipeline_name, run_id, metadata)
+    fs_manager.save_aggregated_result(
+        pipeline_name, run_id, [{"name": f"T{i}", "columns": ["N"], "rows": [["1"]]} for i in range(50)]
+    )
+
+    exported = []
+
+    def export_table(table, *args, **kwargs):
+        exported.append(table["name"])
+        if table["name"] == "T0":
+            raise OSError("disk full")
+        return 1
+
+    agent3 = Agent3(fs_manager)
+    with patch.object(agent3, "_export_table", side_effect=export_table):
+        with pytest.raises(OSError):
+            agent3.run(pipeline_name, run_id)
+    assert len(exported) < 10
@@ -0,0 +1,88 @@
+import gzip
+import os
+import zipfile
+
+import pytest
+from click.testing import CliRunner
+
+from opengin.tracer.agents.exporter import Agent3
+from opengin.tracer.agents.orchestrator import FileSystemManager
+from opengin.tracer.archive import ARCHIVE_FILENAME
+from opengin.tracer.cli import cli
+
+
+def _completed_run(fs_manager, pipeline_name="p", run_id="run_1"):
+    fs_manager.initialize_pipeline(pipeline_name, run_id)
+    fs_manager.update_metadata(pipeline_name, run_id, {"options": {"storage_format": "jsonl", "compression": "gzip"}})
+    for page_num in (1, 2):
+        fs_manager.save_intermediate_result(
+            pipeline_name, run_id, page_num, {"tables": [{"name": "T", "columns": ["A"], "rows": [[str(page_num)]]}]}
+        )
+    fs_manager.save_aggregated_result(pipeline_name, run_id, [{"name": "T", "columns": ["A"], "rows": [["1"], ["2"]]}])
+    Agent3(fs_manager).run(pipeline_name, run_id)
+    return pipeline_name, run_id
+
+
+def test_archived_run_is_read_transparently(fs_manager):
+    pipeline_name, run_id = _completed_run(fs_manager)
+    pages = fs_manager.load_intermediate_results(pipeline_name, run_id)
+    tables = fs_manager.load_aggregated_result(pipeline_name, run_id)
+    outputs = fs_manager.list_run_dir(fs_manager.get_output_path(pipeline_name, run_id))
+
+    info = fs_manager.archive_run(pipeline_name, run_id)
+    run_path = fs_manager.get_pipeline_path(pipeline_name, run_id)
+    assert sorted(os.listdir(run_path)) == [
+        "manifest.json",
+        "manifest.json.lock",
+        "metadata.json",
+        "metadata.json.lock",
+        ARCHIVE_FILENAME,
+    ]
+    assert info["members"] == len(fs_manager.archived_members(pipeline_name, run_id))
+    assert fs_manager.load_metadata(pipeline_name, run_id)["archive"]["file"] == ARCHIVE_FILENAME
+
+    # Compressed members are stored, not compressed twice
+    with zipfile.ZipFile(os.path.join(run_path, ARCHIVE_FILENAME)) as archive:
+        assert archive.getinfo("output/t.csv.gz").compress_type == zipfile.ZIP_STORED
+
+    assert fs_manager.load_intermediate_results(pipeline_name, run_id) == pages
+    assert fs_manager.load_aggregated_result(pipeline_name, run_id) == tables
+    output_dir = fs_manager.get_output_path(pipeline_name, run_id)
+    assert fs_manager.list_run_dir(output_dir) == outputs
+    with fs_manager.open_run_file(os.path.join(output_dir, "t.csv.gz")) as f:
+        assert f.read() == "A\n1\n2\n"
+
+    with pytest.raises(ValueError):
+        fs_manager.archive_run(pipeline_name, run_id)
+
+    fs_manager.unarchive_run(pipeline_name, run_id)
+    assert not fs_manager.is_run_archived(pipeline_name, run_id)
+    assert "archive" not in fs_manager.load_metadata(pipeline_name, run_id)
+    assert fs_manager.load_intermediate_results(pipeline_name, run_id) == pages
+    with gzip.open(os.path.join(output_dir, "t.csv.gz"), "rt") as f:
+        assert f.read() == "A\n1\n2\n"
+
+
+def test_only_completed_runs_are_archived(fs_manager):
+    fs_manager.initialize_pipeline("p", "pending")
+    with pytest.raises(ValueError, match="Only completed runs"):
+        fs_manager.archive_run("p", "pending")
+
+
+def test_archive_and_info_commands(temp_pipeline_dir):
+    pipeline_name, run_id = _completed_run(FileSystemManager(temp_pipeline_dir))
+    os.chdir(os.path.dirname(temp_pipeline_dir))
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["archive", pipeline_name, run_id])
+    assert result.exit_code == 0
+    assert f"into {ARCHIVE_FILENAME}" in result.output
+
+    result = runner.invoke(cli, ["info", pipeline_name, run_id])
+    assert result.exit_code == 0
+    assert " - t.csv.gz" in result.output
+
+    result = runner.invoke(cli, ["unarchive", pipeline_name, run_id])
+    assert result.exit_code == 0
+    result = runner.invoke(cli, ["unarchive", pipeline_name, run_id])
+    assert result.exit_code != 0
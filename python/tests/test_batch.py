@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from opengin.tracer.agents.orchestrator import Agent0
+from opengin.tracer.agents.scanner import Agent1
+from opengin.tracer.agents.scheduler import RateLimiter
+from opengin.tracer.batch import expand_inputs
+from opengin.tracer.cli import cli
+
+
+def _documents(tmp_path, names):
+    docs = tmp_path / "docs"
+    docs.mkdir(exist_ok=True)
+    for name in names:
+        (docs / name).write_bytes(b"%PDF-1.4")
+    return docs
+
+
+def test_expand_inputs(tmp_path):
+    docs = _documents(tmp_path, ["b.pdf", "a.pdf", "notes.txt"])
+    (docs / "sub").mkdir()
+    (docs / "sub" / "c.pdf").write_bytes(b"%PDF-1.4")
+
+    assert expand_inputs([str(docs)]) == [str(docs / "a.pdf"), str(docs / "b.pdf")]
+    assert expand_inputs([str(docs / "b.pdf"), str(docs / "**" / "*.pdf")]) == [
+        str(docs / "b.pdf"),
+        str(docs / "a.pdf"),
+        str(docs / "sub" / "c.pdf"),
+    ]
+    with pytest.raises(FileNotFoundError):
+        expand_inputs([str(docs / "missing.pdf")])
+    with pytest.raises(FileNotFoundError):
+        expand_inputs([str(docs / "*.docx")])
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(rate=50, burst=2)
+    started = time.monotonic()
+    for _ in range(7):
+        limiter.acquire()
+    # Two calls go through at once, the other five wait 1/50s each
+    assert time.monotonic() - started >= 0.09
+    with pytest.raises(ValueError):
+        RateLimiter(rate=0)
+
+
+def _split(input_path, output_dir):
+    if "broken" in input_path:
+        raise ValueError("not a PDF")
+    name = os.path.splitext(os.path.basename(input_path))[0]
+    return [os.path.join(output_dir, f"{name}_page_{i}.pdf") for i in (1, 2)]
+
+
+def test_run_batch_shares_page_workers(tmp_path):
+    docs = _documents(tmp_path, ["a.pdf", "b.pdf", "broken.pdf", "c.pdf"])
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def extract(page_path, *args, **kwargs):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return json.dumps({"tables": [{"name": "T", "columns": ["Page"], "rows": [[os.path.basename(page_path)]]}]})
+
+    agent0 = Agent0(base_path=str(tmp_path / "pipelines"))
+    finished = []
+    with (
+        patch.object(Agent1, "_split_pdf", side_effect=_split),
+        patch("opengin.tracer.agents.scanner.extract_data_with_gemini", side_effect=extract),
+    ):
+        report = agent0.run_batch(
+            "gazettes",
+            expand_inputs([str(docs)]),
+            options={"scan_workers": 6},
+            requests_per_minute=60_000,
+            on_document=finished.append,
+        )
+
+    # The pages of several documents were extracted at the same time
+    assert peak[0] > 2
+    assert len(finished) == 4
+    summary = report.to_dict()
+    assert [(d["input"], d["status"], d["page_count"]) for d in summary["documents"]] == [
+        (str(docs / "a.pdf"), "COMPLETED", 2),
+        (str(docs / "b.pdf"), "COMPLETED", 2),
+        (str(docs / "broken.pdf"), "FAILED", 0),
+        (str(docs / "c.pdf"), "COMPLETED", 2),
+    ]
+    assert summary["completed"] == 3 and summary["failed"] == 1
+    assert summary["page_count"] == 6
+    assert summary["pages_per_second"] > 0
+    assert "not a PDF" in report.failed[0]["error"]
+
+    fs_manager = agent0.fs_manager
+    assert len(fs_manager.list_runs("gazettes")) == 4
+    run_id = summary["documents"][0]["run_id"]
+    assert fs_manager.load_metadata("gazettes", run_id)["status"] == "COMPLETED"
+    with open(os.path.join(fs_manager.get_output_path("gazettes", run_id), "t.csv")) as f:
+        assert f.read().splitlines() == ["Page", "a_page_1.pdf", "a_page_2.pdf"]
+
+
+def test_run_batch_command(tmp_path):
+    docs = _documents(tmp_path, ["a.pdf", "b.pdf"])
+    os.chdir(tmp_path)
+    response = json.dumps({"tables": [{"name": "T", "columns": ["X"], "rows": [["1"]]}]})
+    with (
+        patch.object(Agent1, "_split_pdf", side_effect=_split),
+        patch("opengin.tracer.agents.scanner.extract_data_with_gemini", return_value=response),
+    ):
+        result = CliRunner().invoke(cli, ["run-batch", str(docs), "--name", "batch", "--scan-workers", "2"])
+
+    assert result.exit_code == 0, result.output
+    assert "2 of 2 documents completed, 4 pages" in result.output
+    assert len(os.listdir(tmp_path / "pipelines" / "batch")) == 2
+
+    result = CliRunner().invoke(cli, ["run-batch", str(tmp_path / "missing")])
+    assert result.exit_code == 1
+    assert "Input not found" in result.output
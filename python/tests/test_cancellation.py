@@ -0,0 +1,193 @@
+import json
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+from fastapi.testclient import TestClient
+
+from opengin.server.main import app
+from opengin.tracer.agents.orchestrator import Agent0
+from opengin.tracer.agents.scanner import Agent1
+from opengin.tracer.cancellation import CANCEL_FILENAME, CancelToken, RunCancelled, request_cancel
+from opengin.tracer.cli import cli
+
+client = TestClient(app)
+
+
+def test_cancel_token_marker(tmp_path):
+    token = CancelToken(str(tmp_path / CANCEL_FILENAME), poll_interval=0.01)
+    assert not token.wait(0.02)
+    token.raise_if_cancelled()
+
+    request_cancel(str(tmp_path))
+    assert token.wait(5)
+    with pytest.raises(RunCancelled):
+        token.raise_if_cancelled()
+    token.clear_marker()
+    token.clear_marker()
+    assert not os.path.exists(tmp_path / CANCEL_FILENAME)
+
+
+def _pages(tmp_path, count):
+    return [str(tmp_path / f"page_{i}.pdf") for i in range(1, count + 1)]
+
+
+def _response(page_path):
+    name = os.path.basename(page_path)
+    return json.dumps({"tables": [{"name": "T", "columns": ["Page"], "rows": [[name]]}]})
+
+
+def test_cancel_and_resume_run(tmp_path):
+    input_file = tmp_path / "doc.pdf"
+    input_file.touch()
+    agent0 = Agent0(base_path=str(tmp_path / "pipelines"))
+    extracted = []
+    cancel_after = [2]
+
+    def extract(page_path, *args, **kwargs):
+        extracted.append(os.path.basename(page_path))
+        if len(extracted) == cancel_after[0]:
+            assert agent0.cancel_run("p", run_id)
+        return _response(page_path)
+
+    with (
+        patch.object(Agent1, "_split_pdf", return_value=_pages(tmp_path, 4)),
+        patch("opengin.tracer.agents.scanner.extract_data_with_gemini", side_effect=extract),
+    ):
+        run_id, _ = agent0.create_pipeline("p", str(input_file), "doc.pdf")
+        with pytest.raises(RunCancelled):
+            agent0.run_pipeline("p", run_id, "Extract pages.", options={"scan_workers": 1})
+
+        # Pending pages were dropped, extracted ones kept
+        assert extracted == ["page_1.pdf", "page_2.pdf"]
+        metadata = agent0.fs_manager.load_metadata("p", run_id)
+        assert (metadata["status"], metadata["prompt"]) == ("CANCELLED", "Extract pages.")
+        assert [n for n, _ in agent0.fs_manager.iter_intermediate_results("p", run_id)] == [1, 2]
+        events = agent0.events.events("p", run_id)
+        assert events[-1]["type"] == "run_cancelled"
+        assert events[-1]["pages_completed"] == 2
+        assert not agent0.cancel_run("p", run_id)
+
+        # Resuming extracts only the remaining pages, with the original prompt
+        cancel_after[0] = None
+        extracted.clear()
+        agent0.resume_pipeline("p", run_id)
+        assert extracted == ["page_3.pdf", "page_4.pdf"]
+
+    assert agent0.fs_manager.load_metadata("p", run_id)["status"] == "COMPLETED"
+    with open(os.path.join(agent0.fs_manager.get_output_path("p", run_id), "t.csv")) as f:
+        assert f.read().splitlines() == ["Page"] + [f"page_{i}.pdf" for i in range(1, 5)]
+    with pytest.raises(ValueError):
+        agent0.resume_pipeline("p", run_id)
+
+
+def test_resumed_run_rewrites_its_early_exports(tmp_path):
+    input_file = tmp_path / "doc.pdf"
+    input_file.touch()
+    agent0 = Agent0(base_path=str(tmp_path / "pipelines"))
+    cancel = [True]
+
+    def extract(page_path, *args, **kwargs):
+        name = os.path.basename(page_path)
+        if name == "page_4.pdf" and cancel[0]:
+            # Table A settled after page 2 and is exported while later pages are extracted
+            deadline = time.monotonic() + 5
+            while not os.path.exists(os.path.join(output_dir, "a.csv")) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert agent0.cancel_run("p", run_id)
+        table = "A" if name == "page_1.pdf" else "B"
+        return json.dumps({"tables": [{"name": table, "columns": ["Page"], "rows": [[name]]}]})
+
+    options = {"scan_workers": 1, "early_export": True}
+    with (
+        patch.object(Agent1, "_split_pdf", return_value=_pages(tmp_path, 4)),
+        patch("opengin.tracer.agents.scanner.extract_data_with_gemini", side_effect=extract),
+    ):
+        run_id, _ = agent0.create_pipeline("p", str(input_file), "doc.pdf")
+        output_dir = agent0.fs_manager.get_output_path("p", run_id)
+        with open(os.path.join(output_dir, "notes.csv"), "w") as f:
+            f.write("kept\n")
+        with pytest.raises(RunCancelled):
+            agent0.run_pipeline("p", run_id, options=options)
+        assert sorted(os.listdir(output_dir)) == ["a.csv", "notes.csv"]
+
+        cancel[0] = False
+        agent0.resume_pipeline("p", run_id)
+
+    # The files of the cancelled attempt are written again instead of next to new copies
+    assert sorted(os.listdir(output_dir)) == ["a.csv", "b.csv", "notes.csv"]
+    output_files = agent0.fs_manager.load_metadata("p", run_id)["output_files"]
+    assert output_files == ["a.csv", "a_metadata.json", "b.csv", "b_metadata.json"]
+    with open(os.path.join(output_dir, "a.csv")) as f:
+        assert f.read().splitlines() == ["Page", "page_1.pdf"]
+
+
+def test_cancel_from_another_process(tmp_path):
+    input_file = tmp_path / "doc.pdf"
+    input_file.touch()
+    base_path = str(tmp_path / "pipelines")
+    agent0 = Agent0(base_path=base_path)
+    started, release = threading.Event(), threading.Event()
+
+    def extract(page_path, *args, **kwargs):
+        started.set()
+        release.wait(5)
+        return _response(page_path)
+
+    with (
+        patch.object(Agent1, "_split_pdf", return_value=_pages(tmp_path, 3)),
+        patch("opengin.tracer.agents.scanner.extract_data_with_gemini", side_effect=extract),
+    ):
+        run_id, _ = agent0.create_pipeline("p", str(input_file), "doc.pdf")
+        errors = []
+
+        def run():
+            try:
+                agent0.run_pipeline("p", run_id, options={"scan_workers": 1})
+            except RunCancelled as e:
+                errors.append(e)
+
+        runner = threading.Thread(target=run)
+        runner.start()
+        assert started.wait(5)
+
+        # The CLI runs in its own process and only shares the pipelines directory
+        os.chdir(tmp_path)
+        result = CliRunner().invoke(cli, ["cancel", "p", run_id])
+        assert result.exit_code == 0, result.output
+        release.set()
+        runner.join(5)
+
+    assert len(errors) == 1
+    run_path = agent0.fs_manager.get_pipeline_path("p", run_id)
+    assert not os.path.exists(os.path.join(run_path, CANCEL_FILENAME))
+    assert agent0.fs_manager.load_metadata("p", run_id)["status"] == "CANCELLED"
+    assert [n for n, _ in agent0.fs_manager.iter_intermediate_results("p", run_id)] == [1]
+
+    result = CliRunner().invoke(cli, ["cancel", "p", run_id])
+    assert result.exit_code == 1
+    assert "is not running" in result.output
+
+
+def test_cancel_and_resume_endpoints():
+    with patch("opengin.server.api.agent0") as mock_agent0:
+        mock_agent0.cancel_run.return_value = True
+        response = client.post("/api/cancel/job-1")
+        assert response.status_code == 200
+        assert response.json()["status"] == "cancelling"
+        mock_agent0.cancel_run.assert_called_once_with("ui_extraction", "job-1")
+
+        mock_agent0.cancel_run.return_value = False
+        assert client.post("/api/cancel/job-1").status_code == 409
+        mock_agent0.cancel_run.side_effect = FileNotFoundError()
+        assert client.post("/api/cancel/missing").status_code == 404
+
+        mock_agent0.fs_manager.load_metadata.return_value = {"status": "COMPLETED"}
+        assert client.post("/api/resume/job-1", data={"api_key": "key"}).status_code == 409
+        mock_agent0.fs_manager.load_metadata.return_value = {"status": "CANCELLED"}
+        response = client.post("/api/resume/job-1", data={"api_key": "key"})
+        assert response.status_code == 200
+        mock_agent0.resume_pipeline.assert_called_once_with("ui_extraction", "job-1", api_key="key")
@@ -0,0 +1,137 @@
+import json
+import os
+
+import pytest
+
+from opengin.tracer.agents.columnar import METADATA_KEY, TABLE_KEY, ColumnarWriter, field_names
+from opengin.tracer.agents.exporter import Agent3
+from opengin.tracer.agents.normalizer import coerce_values
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def _set_options(fs_manager, pipeline_name, run_id, options):
+    metadata = fs_manager.load_metadata(pipeline_name, run_id)
+    metadata["options"] = options
+    fs_manager.save_metadata(pipeline_name, run_id, metadata)
+
+
+def test_coerce_values_to_fixed_type():
+    assert coerce_values(["1,200", "3.0", "x", "", 7], "integer") == ([1200, 3, None, None, 7], 1)
+    assert coerce_values(["1.5", "(2)", "N/A"], "number") == ([1.5, -2.0, None], 0)
+    assert coerce_values([" a ", 3, "-"], "string") == (["a", "3", None], 0)
+
+
+def test_field_names_are_unique_and_non_empty():
+    assert field_names(["Item", "", "Item", None, "Item"]) == ["Item", "column_2", "Item_1", "column_4", "Item_2"]
+
+
+def test_columnar_writer_infers_types_and_row_groups(tmp_path):
+    path = str(tmp_path / "sales.parquet")
+    table = {"name": "Sales", "columns": ["Item", "Qty", "Price"], "metadata": {"year": "2024"}}
+
+    with ColumnarWriter(path, "parquet", table, row_group_size=2) as writer:
+        writer.write([["A", "1", "1.5"], ["B", "2", "2"]])
+        writer.write([["C", "three", "3.25"]])
+
+    assert writer.row_count == 3
+
+    parquet_file = pq.ParquetFile(path)
+    assert parquet_file.metadata.num_row_groups == 2
+    schema = parquet_file.schema_arrow
+    assert [str(field.type) for field in schema] == ["string", "string", "double"]
+    assert json.loads(schema.metadata[METADATA_KEY]) == {"year": "2024"}
+    assert json.loads(schema.metadata[TABLE_KEY])["name"] == "Sales"
+
+    assert parquet_file.read().to_pylist() == [
+        {"Item": "A", "Qty": "1", "Price": 1.5},
+        {"Item": "B", "Qty": "2", "Price": 2.0},
+        {"Item": "C", "Qty": "three", "Price": 3.25},
+    ]
+
+
+@pytest.mark.parametrize("export_format", ["parquet", "arrow"])
+def test_columnar_writer_widens_types_of_later_row_groups(tmp_path, export_format):
+    path = str(tmp_path / f"t.{export_format}")
+    with ColumnarWriter(path, export_format, {"name": "T", "columns": ["a"]}, row_group_size=2) as writer:
+        writer.write([[1], [2], [3.5], [4]])
+        assert writer.column_types == ["number"]
+        writer.write([["abc"]])
+
+    assert writer.column_types == ["string"]
+    table = pq.read_table(path) if export_format == "parquet" else pa.ipc.open_file(path).read_all()
+    assert table.column("a").to_pylist() == ["1", "2", "3.5", "4", "abc"]
+    assert os.listdir(tmp_path) == [f"t.{export_format}"]
+
+
+def test_columnar_writer_empty_table(tmp_path):
+    path = str(tmp_path / "empty.arrow")
+    writer = ColumnarWriter(path, "arrow", {"name": "Empty", "columns": ["A"]})
+    assert writer.close() == 0
+
+    with pa.ipc.open_file(path) as reader:
+        assert reader.read_all().num_rows == 0
+
+
+def test_columnar_writer_rejects_bad_compression(tmp_path):
+    with pytest.raises(ValueError):
+        ColumnarWriter(str(tmp_path / "t.arrow"), "arrow", {"columns": []}, compression="snappy")
+
+
+def test_agent3_exports_all_formats_in_one_pass(fs_manager):
+    pipeline_name = "test_pipeline"
+    run_id = "run_columnar"
+    fs_manager.initialize_pipeline(pipeline_name, run_id)
+    _set_options(
+        fs_manager,
+        pipeline_name,
+        run_id,
+        {"export_formats": ["csv", "parquet", "arrow"], "out_of_core": True, "parquet_compression": "zstd"},
+    )
+
+    agg_data = [
+        {
+            "name": "Invoice",
+            "columns": ["Item", "Cost"],
+            "column_types": ["string", "number"],
+            "rows": [["A", 10], ["B", None]],
+            "metadata": {"vendor": "ACME"},
+        }
+    ]
+    fs_manager.save_aggregated_result(pipeline_name, run_id, agg_data)
+    Agent3(fs_manager).run(pipeline_name, run_id)
+
+    output_dir = fs_manager.get_output_path(pipeline_name, run_id)
+    assert sorted(os.listdir(output_dir)) == [
+        "invoice.arrow",
+        "invoice.csv",
+        "invoice.parquet",
+        "invoice_metadata.json",
+    ]
+
+    parquet_table = pq.read_table(os.path.join(output_dir, "invoice.parquet"))
+    assert parquet_table.schema.field("Cost").type == pa.float64()
+    assert parquet_table.to_pylist() == [{"Item": "A", "Cost": 10.0}, {"Item": "B", "Cost": None}]
+    assert pq.ParquetFile(os.path.join(output_dir, "invoice.parquet")).metadata.row_group(0).column(0).compression == (
+        "ZSTD"
+    )
+
+    with pa.ipc.open_file(os.path.join(output_dir, "invoice.arrow")) as reader:
+        arrow_table = reader.read_all()
+    assert arrow_table.to_pylist() == parquet_table.to_pylist()
+    assert json.loads(arrow_table.schema.metadata[METADATA_KEY]) == {"vendor": "ACME"}
+
+    with open(os.path.join(output_dir, "invoice.csv"), "r") as f:
+        assert f.read().splitlines() == ["Item,Cost", "A,10", "B,"]
+
+
+def test_agent3_rejects_unknown_export_format(fs_manager):
+    pipeline_name = "test_pipeline"
+    run_id = "run_bad_format"
+    fs_manager.initialize_pipeline(pipeline_name, run_id)
+    _set_options(fs_manager, pipeline_name, run_id, {"export_formats": ["xlsx"]})
+    fs_manager.save_aggregated_result(pipeline_name, run_id, [{"name": "T", "columns": ["A"], "rows": [["1"]]}])
+
+    with pytest.raises(ValueError):
+        Agent3(fs_manager).run(pipeline_name, run_id)
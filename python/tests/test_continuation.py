@@ -0,0 +1,59 @@
+from opengin.tracer.agents.aggregator import IncrementalAggregator
+from opengin.tracer.agents.continuation import ContinuationIndex, column_signature
+
+
+def test_column_signature_ignores_case_and_punctuation():
+    assert column_signature(["Amount (Rs.)", " Item "]) == column_signature(["amount rs", "ITEM"])
+
+
+def test_continuation_index_only_matches_previous_page():
+    index = ContinuationIndex()
+    index.update("a", ["Item", "Quantity", "Price"], 1)
+    index.update("b", ["Name", "Address"], 1)
+
+    assert index.find(["item", "Qty", "price"], 2) == "a"
+    assert index.find(["Name", "Address"], 2) == "b"
+    assert index.find(["Name", "Address"], 3) is None
+    assert index.find(["Colour", "Size", "Weight"], 2) is None
+
+    index.prune(3)
+    assert len(index) == 0
+
+
+def test_aggregator_merges_renamed_continuation_and_strips_header():
+    aggregator = IncrementalAggregator(detect_continuations=True)
+    aggregator.add_page(
+        1, {"tables": [{"name": "Gazette Appointments", "columns": ["Name", "Post"], "rows": [["A", "Chair"]]}]}
+    )
+    aggregator.add_page(
+        2,
+        {
+            "tables": [
+                {
+                    "name": "Appointments (continued)",
+                    "columns": ["Name", "Post."],
+                    "rows": [["Name", "Post"], ["B", "Member"]],
+                }
+            ]
+        },
+    )
+    # Not adjacent to page 2's table any more: stays separate
+    aggregator.add_page(4, {"tables": [{"name": "Other", "columns": ["Name", "Post"], "rows": [["C", "Member"]]}]})
+    aggregator.add_page(3, {"tables": []})
+
+    tables = aggregator.finish()
+
+    assert [t["name"] for t in tables] == ["Gazette Appointments", "Other"]
+    assert tables[0]["rows"] == [["A", "Chair"], ["B", "Member"]]
+    assert aggregator.continuations_merged == 1
+    assert aggregator.header_rows_stripped == 1
+
+
+def test_aggregator_without_detection_keeps_tables_apart():
+    aggregator = IncrementalAggregator()
+    aggregator.add_page(1, {"tables": [{"name": "A", "columns": ["Name", "Post"], "rows": [["x", "y"]]}]})
+    aggregator.add_page(2, {"tables": [{"name": "B", "columns": ["Name", "Post"], "rows": [["Name", "Post"]]}]})
+
+    tables = aggregator.finish()
+    assert len(tables) == 2
+    assert tables[1]["rows"] == [["Name", "Post"]]
@@ -0,0 +1,88 @@
+import json
+import os
+
+import pytest
+
+from opengin.tracer.agents.aggregator import Agent2, IncrementalAggregator
+from opengin.tracer.agents.dedup import RowDeduplicator, RowHashSet, row_digest
+
+
+def test_row_hash_set_spills_to_disk(tmp_path):
+    spill_path = str(tmp_path / "hashes.sqlite")
+    hashes = RowHashSet(spill_path=spill_path, max_in_memory=3)
+
+    assert all(hashes.add(row_digest([i])) for i in range(3))
+    assert hashes.spilled
+    assert os.path.exists(spill_path)
+
+    assert hashes.add(row_digest([3]))
+    assert not hashes.add(row_digest([1]))
+    assert not hashes.add(row_digest([3]))
+
+    hashes.close()
+    assert not os.path.exists(spill_path)
+
+
+def test_deduplicator_key_mode():
+    dedup = RowDeduplicator(mode="key", key_columns=["ID"])
+    rows = dedup.filter("t", ["id", "Name"], [["1", "A"], ["2", "B"], ["1", "A (retry)"]])
+
+    assert rows == [["1", "A"], ["2", "B"]]
+    assert dedup.dropped == {"t": 1}
+
+
+def test_deduplicator_key_mode_keeps_rows_with_blank_keys():
+    dedup = RowDeduplicator(mode="key", key_columns=["ID"])
+    rows = [["", "Subtotal"], [None, "Total"], [" ", "Notes"], ["", "Subtotal"], ["3"]]
+
+    assert dedup.filter("t", ["ID", "Name"], rows) == [["", "Subtotal"], [None, "Total"], [" ", "Notes"], ["3"]]
+    assert dedup.dropped == {"t": 1}
+
+
+def test_deduplicator_requires_key_columns():
+    with pytest.raises(ValueError):
+        RowDeduplicator(mode="key")
+    with pytest.raises(ValueError):
+        RowDeduplicator(mode="fuzzy")
+
+
+def test_aggregator_drops_duplicate_rows_across_pages():
+    aggregator = IncrementalAggregator(deduplicator=RowDeduplicator())
+    page = {"tables": [{"name": "Invoice", "columns": ["Item", "Cost"], "rows": [["A", "10"], ["B", "20"]]}]}
+    aggregator.add_page(1, page)
+    # An overlapping extraction of the same page content
+    aggregator.add_page(2, page)
+    aggregator.add_page(3, {"tables": [{"name": "Other", "columns": ["Item", "Cost"], "rows": [["A", "10"]]}]})
+
+    tables = aggregator.finish()
+
+    assert tables[0]["rows"] == [["A", "10"], ["B", "20"]]
+    assert tables[0]["duplicate_rows_dropped"] == 2
+    # Dedup is scoped per table
+    assert tables[1]["rows"] == [["A", "10"]]
+    assert aggregator.stats()["duplicate_rows_dropped"] == 2
+
+
+def test_agent2_records_dropped_rows_in_metadata(fs_manager):
+    pipeline_name = "test_pipeline"
+    run_id = "run_dedup"
+    fs_manager.initialize_pipeline(pipeline_name, run_id)
+
+    metadata = fs_manager.load_metadata(pipeline_name, run_id)
+    metadata["options"] = {"dedup": "exact", "dedup_spill": True, "dedup_max_in_memory": 1}
+    fs_manager.save_metadata(pipeline_name, run_id, metadata)
+
+    page = {"tables": [{"name": "Invoice", "columns": ["Item"], "rows": [["A"], ["B"]]}]}
+    fs_manager.save_intermediate_result(pipeline_name, run_id, 1, page)
+    fs_manager.save_intermediate_result(pipeline_name, run_id, 2, page)
+
+    Agent2(fs_manager).run(pipeline_name, run_id)
+
+    agg_path = fs_manager.get_aggregated_results_path(pipeline_name, run_id)
+    with open(agg_path, "r") as f:
+        data = json.load(f)
+    assert data[0]["rows"] == [["A"], ["B"]]
+
+    assert fs_manager.load_metadata(pipeline_name, run_id)["aggregation"]["duplicate_rows_dropped"] == 2
+    # Spill files are cleaned up once aggregation is done
+    assert os.listdir(os.path.dirname(agg_path)) == ["tables.json"]
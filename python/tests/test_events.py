@@ -0,0 +1,175 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from unittest.mock import patch
+
+from click.testing import CliRunner
+from fastapi.testclient import TestClient
+
+from opengin.server.main import app
+from opengin.tracer.agents.orchestrator import Agent0, FileSystemManager
+from opengin.tracer.agents.scanner import Agent1
+from opengin.tracer.cli import cli
+from opengin.tracer.events import EVENTS_FILENAME, EventBus, ProgressTracker, tail_events
+
+client = TestClient(app)
+
+
+def test_event_bus_cursor_and_log(fs_manager):
+    fs_manager.initialize_pipeline("p", "run_1")
+    bus = EventBus(fs_manager)
+    received = []
+    unsubscribe = bus.subscribe(lambda p, r, event: received.append((r, event["type"])))
+
+    bus.publish("p", "run_1", "run_started")
+    bus.publish("p", "run_1", "stage_started", stage="scanning")
+    assert bus.is_active("p", "run_1")
+    assert [e["seq"] for e in bus.events("p", "run_1")] == [1, 2]
+    assert [e["type"] for e in bus.events("p", "run_1", after=1)] == ["stage_started"]
+
+    # A waiting reader is woken by the next event
+    waiter = threading.Timer(0.05, lambda: bus.publish("p", "run_1", "run_completed"))
+    waiter.start()
+    events = bus.wait("p", "run_1", after=2, timeout=5)
+    waiter.join()
+    assert [e["type"] for e in events] == ["run_completed"]
+    assert not bus.is_active("p", "run_1")
+    assert received == [("run_1", "run_started"), ("run_1", "stage_started"), ("run_1", "run_completed")]
+
+    # Finished runs are read from their log, also by a new process
+    assert [e["seq"] for e in EventBus(fs_manager).events("p", "run_1", after=1)] == [2, 3]
+    assert bus.wait("p", "run_1", after=3, timeout=5) == []
+
+    # Running the run again continues the sequence
+    unsubscribe()
+    assert bus.publish("p", "run_1", "run_started")["seq"] == 4
+    assert len(received) == 3
+    assert [e["seq"] for e in bus.events("p", "run_1")] == [1, 2, 3, 4]
+
+
+def test_event_bus_wait_async(fs_manager):
+    fs_manager.initialize_pipeline("p", "run_1")
+    bus = EventBus(fs_manager)
+    bus.publish("p", "run_1", "run_started")
+
+    async def follow():
+        # Many followers wait at once on the event loop, and wake on an event from another thread
+        followers = [bus.wait_async("p", "run_1", after=1, timeout=5) for _ in range(50)]
+        publisher = threading.Timer(0.05, lambda: bus.publish("p", "run_1", "stage_started", stage="scanning"))
+        publisher.start()
+        results = await asyncio.gather(*followers)
+        publisher.join()
+        timed_out = await bus.wait_async("p", "run_1", after=2, timeout=0.01)
+        return results, timed_out
+
+    results, timed_out = asyncio.run(follow())
+    assert all([e["type"] for e in events] == ["stage_started"] for events in results)
+    assert timed_out == []
+    assert not bus._subscribers
+
+
+def test_progress_tracker_reports_throughput_and_eta(fs_manager):
+    fs_manager.initialize_pipeline("p", "run_1")
+    bus = EventBus(fs_manager)
+    tracker = ProgressTracker(bus, "p", "run_1", window=3)
+    tracker.start(10)
+    for page_num in range(1, 5):
+        time.sleep(0.01)
+        event = tracker.page_done(page_num, error="timeout" if page_num == 2 else None)
+
+    assert event["type"] == "page_completed"
+    assert (event["pages_completed"], event["pages_failed"], event["page_count"]) == (3, 1, 10)
+    assert event["pages_per_second"] > 0
+    assert 0 < event["eta_seconds"] < 6 / event["pages_per_second"] + 1
+    failed = bus.events("p", "run_1")[2]
+    assert (failed["type"], failed["page_num"], failed["error"]) == ("page_failed", 2, "timeout")
+
+
+def test_tail_events_follows_appended_lines(tmp_path):
+    path = str(tmp_path / EVENTS_FILENAME)
+
+    def write():
+        with open(path, "a") as f:
+            for seq, kind in enumerate(["run_started", "stage_started", "run_completed"], start=1):
+                f.write(json.dumps({"seq": seq, "time": 0, "type": kind})[:10])
+                f.flush()
+                time.sleep(0.02)
+                f.write(json.dumps({"seq": seq, "time": 0, "type": kind})[10:] + "\n")
+                f.flush()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    events = list(tail_events(path, after=1, poll_interval=0.01))
+    writer.join()
+    assert [e["type"] for e in events] == ["stage_started", "run_completed"]
+
+
+def _run_pipeline(base_path, tmp_path, pipeline_name="p"):
+    input_file = tmp_path / "doc.pdf"
+    input_file.touch()
+    page_files = [str(tmp_path / f"page_{i}.pdf") for i in (1, 2, 3)]
+
+    def extract(page_path, *args, **kwargs):
+        if page_path.endswith("page_2.pdf"):
+            raise RuntimeError("quota exceeded")
+        return json.dumps({"tables": [{"name": "T", "columns": ["X"], "rows": [["1"]]}]})
+
+    agent0 = Agent0(base_path=base_path)
+    with (
+        patch.object(Agent1, "_split_pdf", return_value=page_files),
+        patch("opengin.tracer.agents.scanner.extract_data_with_gemini", side_effect=extract),
+    ):
+        run_id, _ = agent0.create_pipeline(pipeline_name, str(input_file), "doc.pdf")
+        agent0.run_pipeline(pipeline_name, run_id, options={"scan_workers": 1})
+    return agent0, run_id
+
+
+def test_run_publishes_progress_events(tmp_path):
+    agent0, run_id = _run_pipeline(str(tmp_path / "pipelines"), tmp_path)
+
+    events = agent0.events.events("p", run_id)
+    kinds = [e["type"] for e in events]
+    assert kinds[:3] == ["run_started", "stage_started", "scan_started"]
+    assert kinds.count("page_completed") == 2 and kinds.count("page_failed") == 1
+    assert kinds[-1] == "run_completed"
+    assert [e["stage"] for e in events if e["type"] == "stage_finished"] == ["scanning", "aggregating", "exporting"]
+    last_page = [e for e in events if e["type"] in ("page_completed", "page_failed")][-1]
+    assert last_page["eta_seconds"] == 0
+    assert events[-1]["pages_failed"] == 1
+
+    os.chdir(tmp_path)
+    result = CliRunner().invoke(cli, ["events", "p", run_id])
+    assert result.exit_code == 0
+    assert "page 2 failed: 2/3 pages (1 failed)" in result.output
+    assert result.output.strip().endswith("run completed")
+    result = CliRunner().invoke(cli, ["events", "p", run_id, "--json", "--after", str(len(events) - 1), "--follow"])
+    assert json.loads(result.output)["type"] == "run_completed"
+
+
+def test_events_endpoints(tmp_path):
+    agent0, run_id = _run_pipeline(str(tmp_path / "pipelines"), tmp_path, pipeline_name="ui_extraction")
+    fs_manager = FileSystemManager(str(tmp_path / "pipelines"))
+
+    with patch("opengin.server.api.agent0") as mock_agent0:
+        mock_agent0.fs_manager = fs_manager
+        mock_agent0.events = EventBus(fs_manager)
+
+        response = client.get(f"/api/events/{run_id}")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["done"] is True
+        assert data["events"][0]["type"] == "run_started"
+        cursor = data["cursor"]
+
+        data = client.get(f"/api/events/{run_id}", params={"after": cursor, "wait": 1}).json()
+        assert data == {"events": [], "cursor": cursor, "done": True}
+
+        with client.stream("GET", f"/api/events/{run_id}/stream", headers={"Last-Event-ID": str(cursor - 1)}) as r:
+            assert r.headers["content-type"].startswith("text/event-stream")
+            body = "".join(r.iter_text())
+        last = mock_agent0.events.events("ui_extraction", run_id, cursor - 1)[0]
+        assert body == f"id: {cursor}\nevent: run_completed\ndata: {json.dumps(last)}\n\n"
+
+        assert client.get("/api/events/missing").status_code == 404
@@ -0,0 +1,160 @@
+import io
+import os
+
+import pytest
+
+from opengin.tracer import formats
+from opengin.tracer.agents.aggregator import Agent2
+from opengin.tracer.agents.exporter import Agent3
+
+
+def test_artifact_suffix():
+    assert formats.artifact_suffix() == ".json"
+    assert formats.artifact_suffix("jsonl", "gzip") == ".jsonl.gz"
+    with pytest.raises(ValueError):
+        formats.artifact_suffix("xml")
+    with pytest.raises(ValueError):
+        formats.artifact_suffix("jsonl", "lz4")
+
+
+def test_page_round_trip():
+    page = {"page_num": 1, "message": "ok", "tables": [{"name": "A", "columns": ["x"], "rows": [["1"]]}]}
+    buffer = io.StringIO()
+    formats.write_page(buffer, page)
+
+    # One header line plus one line per table
+    assert len(buffer.getvalue().splitlines()) == 2
+    buffer.seek(0)
+    assert formats.read_page(buffer) == page
+
+    buffer = io.StringIO()
+    formats.write_page(buffer, {"error": "boom"})
+    buffer.seek(0)
+    assert formats.read_page(buffer) == {"error": "boom"}
+
+
+def test_tables_stream_in_row_batches():
+    buffer = io.StringIO()
+    tables = [({"name": "A", "columns": ["x"]}, iter([[i] for i in range(5)])), ({"name": "B", "columns": []}, [])]
+    formats.write_tables(buffer, tables, batch_size=2)
+
+    # A: header + 3 batches, B: header only
+    assert len(buffer.getvalue().splitlines()) == 5
+
+    buffer.seek(0)
+    streamed = formats.iter_tables(buffer)
+    header, rows = next(streamed)
+    assert header["name"] == "A"
+    assert next(rows) == [0]
+    # Leaving rows unread still moves on to the next table
+    header, rows = next(streamed)
+    assert header["name"] == "B"
+    assert list(rows) == []
+    assert next(streamed, None) is None
+
+
+def test_fs_manager_compact_storage(fs_manager):
+    pipeline_name = "test_pipeline"
+    run_id = "run_jsonl"
+    fs_manager.initialize_pipeline(pipeline_name, run_id)
+    metadata = fs_manager.load_metadata(pipeline_name, run_id)
+    metadata["options"] = {"storage_format": "jsonl", "compression": "gzip"}
+    fs_manager.save_metadata(pipeline_name, run_id, metadata)
+
+    page = {"page_num": 1, "tables": [{"name": "A", "columns": ["x"], "rows": [["1"], ["2"]]}]}
+    fs_manager.save_intermediate_result(pipeline_name, run_id, 1, page)
+    intermediate_dir = os.path.join(fs_manager.get_pipeline_path(pipeline_name, run_id), "intermediate")
+    assert os.listdir(intermediate_dir) == ["page_1.jsonl.gz"]
+    assert fs_manager.load_intermediate_results(pipeline_name, run_id) == [page]
+
+    fs_manager.save_aggregated_result(pipeline_name, run_id, page["tables"])
+    assert fs_manager.get_aggregated_results_path(pipeline_name, run_id).endswith("tables.jsonl.gz")
+    assert fs_manager.load_aggregated_result(pipeline_name, run_id) == page["tables"]
+
+
+def test_fs_manager_reads_existing_json_runs(fs_manager):
+    pipeline_name = "test_pipeline"
+    run_id = "run_json"
+    fs_manager.initialize_pipeline(pipeline_name, run_id)
+
+    # Written in the default format before switching the run to JSON Lines
+    fs_manager.save_intermediate_result(pipeline_name, run_id, 1, {"tables": []})
+    fs_manager.save_aggregated_result(pipeline_name, run_id, [{"name": "A", "columns": [], "rows": []}])
+
+    metadata = fs_manager.load_metadata(pipeline_name, run_id)
+    metadata["options"] = {"storage_format": "jsonl"}
+    fs_manager.save_metadata(pipeline_name, run_id, metadata)
+
+    assert fs_manager.load_intermediate_results(pipeline_name, run_id) == [{"tables": []}]
+    assert fs_manager.load_aggregated_result(pipeline_name, run_id)[0]["name"] == "A"
+
+    # Re-saving a page replaces the old file instead of leaving two copies
+    fs_manager.save_intermediate_result(pipeline_name, run_id, 1, {"tables": []})
+    intermediate_dir = os.path.join(fs_manager.get_pipeline_path(pipeline_name, run_id), "intermediate")
+    assert os.listdir(intermediate_dir) == ["page_1.jsonl"]
+
+
+def test_out_of_core_rows_are_merged_into_jsonl(fs_manager):
+    pipeline_name = "test_pipeline"
+    run_id = "run_jsonl_ooc"
+    fs_manager.initialize_pipeline(pipeline_name, run_id)
+    metadata = fs_manager.load_metadata(pipeline_name, run_id)
+    metadata["options"] = {"storage_format": "jsonl", "out_of_core": True, "row_batch_size": 2}
+    fs_manager.save_metadata(pipeline_name, run_id, metadata)
+
+    for page_num in range(1, 4):
+        page = {"tables": [{"name": "T", "columns": ["n"], "rows": [[page_num]]}]}
+        fs_manager.save_intermediate_result(pipeline_name, run_id, page_num, page)
+
+    Agent2(fs_manager).run(pipeline_name, run_id)
+    Agent3(fs_manager).run(pipeline_name, run_id)
+
+    assert os.listdir(fs_manager.get_aggregated_dir(pipeline_name, run_id)) == ["tables.jsonl"]
+    with open(os.path.join(fs_manager.get_output_path(pipeline_name, run_id), "t.csv"), "r") as f:
+        assert f.read().splitlines() == ["n", "1", "2", "3"]
+
+
+def test_split_compression_suffix():
+    assert formats.split_compression_suffix("a/t.csv.gz") == ("a/t.csv", ".gz")
+    assert formats.split_compression_suffix("t.json.zst") == ("t.json", ".zst")
+    assert formats.split_compression_suffix("t.csv") == ("t.csv", None)
+
+
+def test_is_jsonl_checks_the_file_name():
+    assert formats.is_jsonl("runs/intermediate/page_1.jsonl.gz")
+    assert not formats.is_jsonl("base.jsonl.d/p/run_1/intermediate/page_1.json")
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+def test_compressed_run_artifacts(fs_manager, compression):
+    if compression == "zstd":
+        zstandard = pytest.importorskip("zstandard")
+    pipeline_name = "test_pipeline"
+    run_id = f"run_{compression}"
+    suffix = formats.COMPRESSION_SUFFIXES[compression]
+    fs_manager.initialize_pipeline(pipeline_name, run_id)
+    metadata = fs_manager.load_metadata(pipeline_name, run_id)
+    metadata["options"] = {"compression": compression, "out_of_core": True}
+    fs_manager.save_metadata(pipeline_name, run_id, metadata)
+
+    for page_num in range(1, 3):
+        page = {"tables": [{"name": "T", "columns": ["n"], "rows": [[page_num]], "metadata": {"p": "x"}}]}
+        fs_manager.save_intermediate_result(pipeline_name, run_id, page_num, page)
+
+    Agent2(fs_manager).run(pipeline_name, run_id)
+    table = fs_manager.load_aggregated_result(pipeline_name, run_id)[0]
+    assert table["rows_file"].endswith(".jsonl" + suffix)
+    assert list(fs_manager.iter_table_rows(pipeline_name, run_id, table)) == [[1], [2]]
+
+    Agent3(fs_manager).run(pipeline_name, run_id)
+    output_dir = fs_manager.get_output_path(pipeline_name, run_id)
+    assert sorted(os.listdir(output_dir)) == ["t.csv" + suffix, "t_metadata.json" + suffix]
+
+    with open(os.path.join(output_dir, "t.csv" + suffix), "rb") as f:
+        raw = f.read()
+    if compression == "gzip":
+        assert raw[:2] == b"\x1f\x8b"
+    else:
+        assert zstandard.ZstdDecompressor().decompressobj().decompress(raw) == b"n\r\n1\r\n2\r\n"
+    with formats.open_artifact(os.path.join(output_dir, "t.csv" + suffix), "r", newline="") as f:
+        assert f.read() == "n\r\n1\r\n2\r\n"
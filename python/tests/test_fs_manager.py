@@ -1,4 +1,11 @@
+import json
 import os
+import shutil
+import sqlite3
+import threading
+from unittest.mock import patch
+
+import pytest
 
 
 def test_pipeline_initialization(fs_manager, temp_pipeline_dir):
@@ -71,3 +78,186 @@ def test_path_helpers(fs_manager, temp_pipeline_dir):
 
     expected_pages = os.path.join(temp_pipeline_dir, pipeline_name, run_id, "input", "pages")
     assert fs_manager.get_input_pages_dir(pipeline_name, run_id) == expected_pages
+
+
+def test_metadata_writes_are_atomic(fs_manager):
+    pipeline_name = "test_pipeline"
+    run_id = "run_atomic"
+    fs_manager.initialize_pipeline(pipeline_name, run_id)
+
+    fs_manager.update_metadata(pipeline_name, run_id, {"page_count": 3})
+
+    run_path = fs_manager.get_pipeline_path(pipeline_name, run_id)
+    # No temporary files are left behind
+    assert not [f for f in os.listdir(run_path) if f.endswith(".tmp")]
+    assert fs_manager.load_metadata(pipeline_name, run_id)["page_count"] == 3
+
+
+def test_run_state_coalesces_and_flushes(fs_manager):
+    pipeline_name = "test_pipeline"
+    run_id = "run_state"
+    fs_manager.initialize_pipeline(pipeline_name, run_id)
+    path = os.path.join(fs_manager.get_pipeline_path(pipeline_name, run_id), "metadata.json")
+
+    state = fs_manager.open_run_state(pipeline_name, run_id)
+    state.flush_interval = 60
+
+    fs_manager.update_metadata(pipeline_name, run_id, {"status": "RUNNING"})
+    for i in range(100):
+        fs_manager.update_metadata(pipeline_name, run_id, {"pages_done": i})
+
+    # Status changes are written at once, the page updates are coalesced
+    assert state.writes == 1
+    with open(path, "r") as f:
+        on_disk = json.load(f)
+    assert on_disk["status"] == "RUNNING"
+    assert "pages_done" not in on_disk
+    assert fs_manager.load_metadata(pipeline_name, run_id)["pages_done"] == 99
+
+    fs_manager.close_run_state(pipeline_name, run_id)
+    with open(path, "r") as f:
+        assert json.load(f)["pages_done"] == 99
+    assert state.writes == 2
+
+
+def test_concurrent_metadata_updates_are_not_lost(fs_manager):
+    pipeline_name = "test_pipeline"
+    run_id = "run_concurrent"
+    fs_manager.initialize_pipeline(pipeline_name, run_id)
+    fs_manager.open_run_state(pipeline_name, run_id)
+
+    def worker(n):
+        for i in range(50):
+            fs_manager.update_metadata(pipeline_name, run_id, {f"worker_{n}": i})
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    fs_manager.close_run_state(pipeline_name, run_id)
+
+    metadata = fs_manager.load_metadata(pipeline_name, run_id)
+    assert all(metadata[f"worker_{n}"] == 49 for n in range(8))
+
+
+def test_run_registry_queries(fs_manager):
+    for i, status in enumerate(["COMPLETED", "FAILED", "COMPLETED"]):
+        run_id = f"run_{i}"
+        fs_manager.initialize_pipeline("registry_pipeline", run_id)
+        fs_manager.update_metadata(
+            "registry_pipeline", run_id, {"status": status, "page_count": i, "created_at": f"2024-01-0{i + 1} 10:00"}
+        )
+
+    runs, total = fs_manager.query_runs(status="completed", sort="page_count", descending=False)
+    assert total == 2
+    assert [r["run_id"] for r in runs] == ["run_0", "run_2"]
+
+    runs, total = fs_manager.query_runs(since="2024-01-02", limit=1)
+    assert total == 2
+    assert [r["run_id"] for r in runs] == ["run_2"]
+
+    # ISO date/times compare with the stored timestamps, which use a space separator
+    runs, total = fs_manager.query_runs(since="2024-01-02T00:00", until="2024-01-03T00:00")
+    assert [r["run_id"] for r in runs] == ["run_1"]
+    with pytest.raises(ValueError):
+        fs_manager.query_runs(since="last week")
+
+    fs_manager.delete_run("registry_pipeline", "run_1")
+    assert fs_manager.query_runs()[1] == 2
+
+
+def test_run_registry_sets_up_schema_once(fs_manager):
+    statements = []
+    connect = sqlite3.connect
+
+    def traced_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    with patch("opengin.tracer.registry.sqlite3.connect", side_effect=traced_connect):
+        fs_manager.registry.upsert("p", "run_1", {"status": "PENDING"})
+        fs_manager.registry.query()
+    assert statements
+    assert not [s for s in statements if s.startswith(("PRAGMA", "CREATE"))]
+
+
+def test_run_registry_rebuild(fs_manager, temp_pipeline_dir):
+    fs_manager.initialize_pipeline("p", "run_a")
+    # A run that appeared on disk without going through this manager
+    os.makedirs(os.path.join(temp_pipeline_dir, "p", "run_b"))
+    # A run that was removed from disk behind the registry's back
+    fs_manager.initialize_pipeline("p", "run_c")
+    shutil.rmtree(os.path.join(temp_pipeline_dir, "p", "run_c"))
+
+    assert fs_manager.rebuild_registry() == 2
+    runs, _ = fs_manager.query_runs(sort="run_id", descending=False)
+    assert [(r["run_id"], r["status"]) for r in runs] == [("run_a", "INITIALIZED"), ("run_b", "CORRUPT")]
+
+
+def test_inputs_are_stored_once_and_refcounted(fs_manager, tmp_path):
+    source = tmp_path / "gazette.pdf"
+    source.write_bytes(b"%PDF-1.4 same bytes")
+
+    paths = []
+    for run_id in ("run_1", "run_2"):
+        fs_manager.initialize_pipeline("p", run_id)
+        paths.append(fs_manager.save_input_file("p", run_id, str(source), "gazette.pdf"))
+
+    digest = fs_manager.load_metadata("p", "run_1")["input_sha256"]
+    assert digest == fs_manager.load_metadata("p", "run_2")["input_sha256"]
+    blob_path = fs_manager.blobs.path(digest)
+    assert open(blob_path, "rb").read() == b"%PDF-1.4 same bytes"
+    assert all(open(p, "rb").read() == b"%PDF-1.4 same bytes" for p in paths)
+    assert fs_manager.registry.blob_ref_count(digest) == 2
+    # The blob store is not mistaken for a pipeline
+    assert fs_manager.list_pipelines() == ["p"]
+
+    fs_manager.delete_run("p", "run_1")
+    assert os.path.exists(blob_path)
+    assert open(paths[1], "rb").read() == b"%PDF-1.4 same bytes"
+
+    fs_manager.delete_run("p", "run_2")
+    assert not os.path.exists(blob_path)
+
+
+def test_input_blob_removed_while_linking(fs_manager, tmp_path):
+    source = tmp_path / "gazette.pdf"
+    source.write_bytes(b"%PDF-1.4 bytes")
+    with open(source, "rb") as f:
+        digest = fs_manager.blobs.put_stream(f)
+    fs_manager.initialize_pipeline("p", "run_1")
+    link = fs_manager.blobs.link
+    calls = []
+
+    def racing_link(blob_digest, dest):
+        # The reference is recorded before linking, so no later delete can remove the blob
+        assert fs_manager.registry.blob_ref_count(blob_digest) == 1
+        if not calls:
+            # A delete that checked the references just before they were recorded
+            fs_manager.blobs.remove(blob_digest)
+        calls.append(dest)
+        return link(blob_digest, dest)
+
+    with (
+        patch.object(fs_manager.blobs, "put_file", wraps=fs_manager.blobs.put_file) as put_file,
+        patch.object(fs_manager.blobs, "link", side_effect=racing_link),
+    ):
+        path = fs_manager.save_input_file("p", "run_1", str(source), "gazette.pdf", digest=digest)
+
+    # The known digest was not hashed again, but the removed blob was stored again
+    put_file.assert_called_once()
+    assert len(calls) == 2
+    assert open(path, "rb").read() == b"%PDF-1.4 bytes"
+    assert fs_manager.blobs.exists(digest)
+
+    fs_manager.initialize_pipeline("p", "run_2")
+    with patch.object(fs_manager.blobs, "put_file") as put_file:
+        fs_manager.save_input_file("p", "run_2", str(source), "gazette.pdf", digest=digest)
+    put_file.assert_not_called()
+    fs_manager.delete_run("p", "run_2")
+
+    with patch.object(fs_manager.blobs, "remove", side_effect=PermissionError("read-only")):
+        fs_manager.delete_run("p", "run_1")
+    assert "run_1" not in fs_manager.list_runs("p")
@@ -1,7 +1,9 @@
+import threading
 from unittest.mock import MagicMock, patch
 
 import pytest
 
+from opengin.tracer.cancellation import CancelToken, RunCancelled
 from opengin.tracer.services.gemini import extract_data_with_gemini
 
 # Since gemini.py initializes 'client' at module level based on env var,
@@ -74,3 +76,20 @@ def test_extract_data_cleanup_on_failure(mock_gemini_client):
 
         # Verify cleanup still happened
         mock_gemini_client.files.delete.assert_called_once_with(name="files/fail_file")
+
+
+def test_extract_data_cancelled_while_processing(mock_gemini_client):
+    """
+    Test that a cancelled run stops waiting for the upload and still deletes it.
+    """
+    mock_gemini_client.files.get.return_value.state = "PROCESSING"
+    cancel = CancelToken()
+    timer = threading.Timer(0.05, cancel.cancel)
+    timer.start()
+
+    with pytest.raises(RunCancelled):
+        extract_data_with_gemini("dummy_path.pdf", "prompt", cancel=cancel)
+    timer.join()
+
+    mock_gemini_client.models.generate_content.assert_not_called()
+    mock_gemini_client.files.delete.assert_called_once_with(name="files/123")
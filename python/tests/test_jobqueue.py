@@ -0,0 +1,196 @@
+import json
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from opengin.tracer.agents.orchestrator import Agent0, FileSystemManager
+from opengin.tracer.agents.scanner import Agent1
+from opengin.tracer.agents.worker import PageWorker
+from opengin.tracer.cli import cli
+from opengin.tracer.jobqueue import (
+    DONE,
+    FAILED,
+    LEASED,
+    QUEUED,
+    RedisJobQueue,
+    SQLiteJobQueue,
+    job_group,
+    queue_from_url,
+)
+from opengin.tracer.manifest import MANIFEST_FILENAME, RunManifest
+from opengin.tracer.storage import LocalStorage
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def open_queue(request, tmp_path):
+    """
+    Returns a function opening a client of one queue, as another process would.
+    """
+    if request.param == "sqlite":
+        return lambda **kwargs: queue_from_url(f"sqlite://{tmp_path / 'queue.db'}", **kwargs)
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    server = fakeredis.FakeServer()
+    return lambda **kwargs: RedisJobQueue(client=fakeredis.FakeRedis(server=server, decode_responses=True), **kwargs)
+
+
+def test_queue_leases(open_queue):
+    queue = open_queue(lease_seconds=60, max_attempts=2)
+    queue.put("p/run_1", [{"page_num": 1}, {"page_num": 2}])
+    queue.put("p/run_2", [{"page_num": 1}])
+
+    first = queue.lease("w1")
+    second = queue.lease("w2")
+    assert (first.payload, first.attempts, first.status) == ({"page_num": 1}, 1, LEASED)
+    assert second.payload == {"page_num": 2}
+    assert queue.counts("p/run_1") == {LEASED: 2}
+
+    assert queue.complete(first, {"file": "intermediate/page_1.json"})
+    # A completed job's lease cannot be used again
+    assert not queue.complete(first, {})
+    assert not queue.extend(first)
+    assert queue.release(second)
+    assert queue.counts("p/run_1") == {DONE: 1, QUEUED: 1}
+    assert queue.lease("w1").payload == {"page_num": 2}
+
+    finished = queue.take_finished("p/run_1")
+    assert [(job.payload, job.status, job.result) for job in finished] == [
+        ({"page_num": 1}, DONE, {"file": "intermediate/page_1.json"})
+    ]
+    assert queue.take_finished("p/run_1") == []
+
+    # Another process sees the same queue
+    other = open_queue()
+    assert other.counts("p/run_1") == {LEASED: 1}
+    assert other.cancel("p/run_2") == 1
+    assert other.counts("p/run_2") == {}
+    assert other.lease("w2") is None
+    other.close()
+    queue.close()
+
+
+def test_queue_requeues_expired_leases(open_queue):
+    queue = open_queue(lease_seconds=0.05, max_attempts=2)
+    queue.put("g", [{"page_num": 1}])
+
+    lost = queue.lease("w1")
+    time.sleep(0.1)
+    retried = queue.lease("w2")
+    assert (retried.job_id, retried.attempts) == (lost.job_id, 2)
+    assert not queue.complete(lost, {})
+    assert queue.extend(retried, lease_seconds=0.05)
+
+    # After max_attempts leases the job fails, and its group learns of it without a worker
+    time.sleep(0.1)
+    [failed] = queue.take_finished("g")
+    assert failed.status == FAILED
+    assert "Lease expired 2 times" in failed.result["error"]
+    assert queue.lease("w3") is None
+    queue.close()
+
+
+def _split(input_path, output_dir):
+    paths = []
+    for i in (1, 2, 3):
+        path = os.path.join(output_dir, f"page_{i}.pdf")
+        with open(path, "wb") as f:
+            f.write(f"page {i}".encode())
+        paths.append(path)
+    return paths
+
+
+def test_distributed_run(tmp_path):
+    input_file = tmp_path / "doc.pdf"
+    input_file.touch()
+    storage = LocalStorage(str(tmp_path / "storage"))
+    queue_path = str(tmp_path / "queue.db")
+    coordinator = Agent0(
+        base_path=str(tmp_path / "coordinator"),
+        storage=storage,
+        job_queue=SQLiteJobQueue(queue_path, poll_interval=0.01),
+    )
+    extracted = []
+
+    def extract(page_path, *args, **kwargs):
+        # Pages are read from the worker's own copy
+        assert page_path.startswith(str(tmp_path / "worker"))
+        with open(page_path) as f:
+            content = f.read()
+        extracted.append(content)
+        if content == "page 2":
+            raise RuntimeError("quota exceeded")
+        return json.dumps({"tables": [{"name": "T", "columns": ["Page"], "rows": [[content]]}]})
+
+    with (
+        patch.object(Agent1, "_split_pdf", side_effect=_split),
+        patch("opengin.tracer.agents.scanner.extract_data_with_gemini", side_effect=extract),
+    ):
+        run_id, _ = coordinator.create_pipeline("p", str(input_file), "doc.pdf")
+        stop = threading.Event()
+        worker = PageWorker(
+            FileSystemManager(str(tmp_path / "worker"), storage=storage),
+            SQLiteJobQueue(queue_path, poll_interval=0.01),
+            worker_id="w1",
+            workers=2,
+        )
+        worker_thread = threading.Thread(target=worker.run, args=(stop,))
+        worker_thread.start()
+        try:
+            coordinator.run_pipeline("p", run_id, options={"storage_format": "jsonl"})
+        finally:
+            stop.set()
+            worker_thread.join(5)
+
+    assert sorted(extracted) == ["page 1", "page 2", "page 3"]
+    assert worker.processed == 3
+    fs_manager = coordinator.fs_manager
+    assert fs_manager.load_metadata("p", run_id)["status"] == "COMPLETED"
+    pages = dict(fs_manager.iter_intermediate_results("p", run_id))
+    assert pages[2] == {"error": "quota exceeded"}
+    assert os.path.exists(os.path.join(fs_manager.get_pipeline_path("p", run_id), "intermediate", "page_1.jsonl"))
+    with open(os.path.join(fs_manager.get_output_path("p", run_id), "t.csv")) as f:
+        assert f.read().splitlines() == ["Page", "page 1", "page 3"]
+    assert coordinator.job_queue.counts(job_group("p", run_id)) == {}
+    # The worker keeps no copies of the pages and results it stored
+    worker_run_path = worker.fs_manager.get_pipeline_path("p", run_id)
+    assert os.listdir(os.path.join(worker_run_path, "input", "pages")) == []
+    assert os.listdir(os.path.join(worker_run_path, "intermediate")) == []
+    # Only the coordinator records the pages in the run manifest
+    assert not os.path.exists(os.path.join(worker_run_path, MANIFEST_FILENAME))
+    assert fs_manager.verify_run("p", run_id).ok
+    manifest = RunManifest.load(fs_manager.get_pipeline_path("p", run_id))
+    assert {f"intermediate/page_{i}.jsonl" for i in (1, 2, 3)} <= set(manifest.entries)
+
+
+def test_worker_command(tmp_path):
+    queue_path = str(tmp_path / "queue.db")
+    queue = SQLiteJobQueue(queue_path)
+    fs_manager = FileSystemManager(str(tmp_path / "pipelines"))
+    fs_manager.initialize_pipeline("p", "run_1")
+    pages_dir = fs_manager.get_input_pages_dir("p", "run_1")
+    os.makedirs(pages_dir, exist_ok=True)
+    (tmp_path / "pipelines" / "p" / "run_1" / "input" / "pages" / "page_1.pdf").write_bytes(b"%PDF-1.4")
+    payload = {"pipeline_name": "p", "run_id": "run_1", "page_num": 1, "page_file": "input/pages/page_1.pdf"}
+    queue.put("p/run_1", [dict(payload, prompt="Extract all tables.")])
+
+    os.chdir(tmp_path)
+    response = json.dumps({"tables": [{"name": "T", "columns": ["X"], "rows": [["1"]]}]})
+    with patch("opengin.tracer.agents.scanner.extract_data_with_gemini", return_value=response):
+        result = CliRunner().invoke(cli, ["worker", "--queue", queue_path, "--idle-timeout", "0"])
+
+    assert result.exit_code == 0, result.output
+    assert "stopped after 1 page jobs" in result.output
+    [job] = queue.take_finished("p/run_1")
+    assert job.result == {"file": "intermediate/page_1.json"}
+    assert fs_manager.read_page_file(str(tmp_path / "pipelines" / "p" / "run_1" / job.result["file"]))["tables"]
+
+    result = CliRunner().invoke(cli, ["worker"], env={"OPENGIN_QUEUE_URL": ""})
+    assert result.exit_code == 1
+    assert "No job queue given" in result.output
+    with pytest.raises(ValueError):
+        SQLiteJobQueue(queue_path, max_attempts=0)
+    assert queue.counts("p/run_1") == {}
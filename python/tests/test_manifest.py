@@ -0,0 +1,123 @@
+import json
+import os
+
+from click.testing import CliRunner
+
+from opengin.tracer.agents.orchestrator import FileSystemManager
+from opengin.tracer.cli import cli
+from opengin.tracer.manifest import MANIFEST_FILENAME, hash_file
+from opengin.tracer.storage import LocalStorage
+
+
+def _run_with_pages(fs_manager, pipeline_name="p", run_id="run_1", pages=3):
+    fs_manager.initialize_pipeline(pipeline_name, run_id)
+    for page_num in range(1, pages + 1):
+        fs_manager.save_intermediate_result(pipeline_name, run_id, page_num, {"tables": [], "page": page_num})
+    return fs_manager.get_pipeline_path(pipeline_name, run_id)
+
+
+def _read_manifest(run_path):
+    with open(os.path.join(run_path, MANIFEST_FILENAME)) as f:
+        return json.load(f)["files"]
+
+
+def test_manifest_is_updated_as_results_are_saved(fs_manager):
+    run_path = _run_with_pages(fs_manager)
+    files = _read_manifest(run_path)
+    assert sorted(files) == ["intermediate/page_1.json", "intermediate/page_2.json", "intermediate/page_3.json"]
+    page_1 = os.path.join(run_path, "intermediate", "page_1.json")
+    assert files["intermediate/page_1.json"]["sha256"] == hash_file(page_1)
+    assert files["intermediate/page_1.json"]["size"] == os.path.getsize(page_1)
+
+    # Results held open by a run are recorded when the run state is closed
+    fs_manager.open_run_state("p", "run_1")
+    fs_manager.save_intermediate_result("p", "run_1", 4, {"tables": []})
+    assert "intermediate/page_4.json" not in _read_manifest(run_path)
+    fs_manager.close_run_state("p", "run_1")
+
+    assert "intermediate/page_4.json" in _read_manifest(run_path)
+    assert fs_manager.verify_run("p", "run_1").ok
+
+
+def test_verify_reports_changed_files(fs_manager):
+    run_path = _run_with_pages(fs_manager)
+    page_1 = os.path.join(run_path, "intermediate", "page_1.json")
+    page_2 = os.path.join(run_path, "intermediate", "page_2.json")
+
+    # A new mtime alone is confirmed by hashing and not reported
+    os.utime(page_1, (1, 1))
+    assert fs_manager.verify_run("p", "run_1").ok
+
+    # Same size and mtime but different content is only caught by a full check
+    st = os.stat(page_2)
+    with open(page_2, "r+") as f:
+        content = f.read()
+        f.seek(0)
+        f.write(content.replace('"page": 2', '"page": 9'))
+    os.utime(page_2, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert fs_manager.verify_run("p", "run_1").ok
+    assert fs_manager.verify_run("p", "run_1", full=True).modified == ["intermediate/page_2.json"]
+
+    os.remove(os.path.join(run_path, "intermediate", "page_3.json"))
+    with open(os.path.join(run_path, "output", "extra.csv"), "w") as f:
+        f.write("a\n")
+    report = fs_manager.verify_run("p", "run_1")
+    assert report.to_dict() == {
+        "ok": False,
+        "full": False,
+        "checked": 3,
+        "missing": ["intermediate/page_3.json"],
+        "modified": [],
+        "untracked": ["output/extra.csv"],
+    }
+
+    assert fs_manager.refresh_manifest("p", "run_1") == ["intermediate/page_3.json", "output/extra.csv"]
+    assert fs_manager.verify_run("p", "run_1").ok
+
+
+def test_sync_copies_only_changed_artifacts(fs_manager, tmp_path):
+    run_path = _run_with_pages(fs_manager)
+    fs_manager.update_metadata("p", "run_1", {"status": "COMPLETED"})
+    remote = LocalStorage(str(tmp_path / "remote"))
+
+    assert fs_manager.sync_run("p", "run_1", storage=remote) == 3
+    assert fs_manager.sync_run("p", "run_1", storage=remote) == 0
+
+    fs_manager.save_intermediate_result("p", "run_1", 2, {"tables": [], "page": "changed"})
+    os.remove(os.path.join(run_path, "intermediate", "page_3.json"))
+    assert fs_manager.sync_run("p", "run_1", storage=remote) == 1
+    assert sorted(remote.list_keys("p/run_1")) == [
+        "p/run_1/intermediate/page_1.json",
+        "p/run_1/intermediate/page_2.json",
+        "p/run_1/manifest.json",
+        "p/run_1/metadata.json",
+    ]
+
+    # A second host holding an older copy downloads only what changed
+    other = FileSystemManager(str(tmp_path / "other"), storage=remote)
+    assert other.load_intermediate_results("p", "run_1")[1]["page"] == "changed"
+    fs_manager.save_intermediate_result("p", "run_1", 1, {"tables": [], "page": "again"})
+    fs_manager.sync_run("p", "run_1", storage=remote)
+    # The newer sync is fetched when the run is read again
+    assert other.load_intermediate_results("p", "run_1")[0]["page"] == "again"
+    assert other.verify_run("p", "run_1", full=True).ok
+
+
+def test_verify_and_sync_commands(temp_pipeline_dir, tmp_path):
+    run_path = _run_with_pages(FileSystemManager(temp_pipeline_dir))
+    os.chdir(os.path.dirname(temp_pipeline_dir))
+
+    result = CliRunner().invoke(cli, ["verify", "p"])
+    assert result.exit_code == 0
+    assert "run_1: OK (3 files)." in result.output
+
+    os.remove(os.path.join(run_path, "intermediate", "page_1.json"))
+    result = CliRunner().invoke(cli, ["verify", "p", "run_1"])
+    assert result.exit_code == 1
+    assert "missing: intermediate/page_1.json" in result.output
+
+    result = CliRunner().invoke(cli, ["sync", "p", "run_1", str(tmp_path / "backup")])
+    assert result.exit_code == 0
+    assert "Copied 2 changed files of run run_1" in result.output
+    result = CliRunner().invoke(cli, ["sync", "p", "run_1", str(tmp_path / "backup")])
+    assert "Copied 0 changed files" in result.output
@@ -0,0 +1,95 @@
+import json
+import os
+
+from opengin.tracer.agents.aggregator import Agent2
+from opengin.tracer.agents.normalizer import RowNormalizer, coerce_column, normalize_table
+
+
+def test_coerce_column_numeric_with_separators():
+    column_type, values, stats = coerce_column(["1,200", "$3.50", "(40)", "", "N/A"])
+
+    assert column_type == "number"
+    assert values == [1200, 3.5, -40, None, None]
+    assert stats == {"nulls": 2, "coercion_failures": 0}
+
+
+def test_coerce_column_records_failures():
+    values = [str(i) for i in range(19)] + ["twenty"]
+    column_type, coerced, stats = coerce_column(values)
+
+    assert column_type == "integer"
+    assert coerced[:3] == [0, 1, 2]
+    assert coerced[-1] == "twenty"
+    assert stats == {"nulls": 0, "coercion_failures": 1}
+
+
+def test_coerce_column_keeps_long_ids_as_strings():
+    column_type, values, stats = coerce_column(["12345678901234567890123", "1", "2"])
+
+    assert column_type == "string"
+    assert values == ["12345678901234567890123", "1", "2"]
+    assert stats["coercion_failures"] == 0
+
+
+def test_coerce_column_does_not_merge_values_or_drop_leading_zeros():
+    column_type, values, stats = coerce_column(["0771234567", "0112345678", "0"])
+    assert column_type == "string"
+    assert values == ["0771234567", "0112345678", "0"]
+
+    column_type, values, stats = coerce_column(["3, 4", "1 2", "1,2345", "12,000", "0.5"])
+    assert column_type == "string"
+    assert values == ["3, 4", "1 2", "1,2345", "12,000", "0.5"]
+
+
+def test_coerce_column_falls_back_to_string():
+    column_type, values, stats = coerce_column(["Apple", "12", " Banana "])
+
+    assert column_type == "string"
+    assert values == ["Apple", "12", "Banana"]
+    assert stats["coercion_failures"] == 0
+
+
+def test_normalize_table_pads_and_truncates():
+    table = {
+        "name": "Sales",
+        "columns": ["Item", "Qty"],
+        "rows": [["Apple"], ["Banana", "2", "extra"], ["Cherry", "1,000"]],
+    }
+    normalized = normalize_table(table)
+
+    assert normalized["rows"] == [["Apple", None], ["Banana", 2], ["Cherry", 1000]]
+    assert normalized["column_types"] == ["string", "integer"]
+    assert normalized["column_stats"][1] == {"nulls": 1, "coercion_failures": 0}
+    assert normalized["normalization"] == {"padded_rows": 1, "truncated_rows": 1}
+    # The input table is left untouched
+    assert table["rows"][0] == ["Apple"]
+
+
+def test_normalizer_stage_feeds_aggregator(fs_manager):
+    pipeline_name = "test_pipeline"
+    run_id = "run_normalize"
+    fs_manager.initialize_pipeline(pipeline_name, run_id)
+
+    page1 = {"tables": [{"name": "Sales", "columns": ["Item", "Price"], "rows": [["A", "10"], ["B", ""]]}]}
+    page2 = {"tables": [{"name": "Sales", "columns": ["Item", "Price"], "rows": [["C", "2.5"]]}]}
+    fs_manager.save_intermediate_result(pipeline_name, run_id, 1, page1)
+    fs_manager.save_intermediate_result(pipeline_name, run_id, 2, page2)
+    fs_manager.save_intermediate_result(pipeline_name, run_id, 3, {"error": "boom"})
+
+    RowNormalizer(fs_manager).run(pipeline_name, run_id)
+    Agent2(fs_manager).run(pipeline_name, run_id)
+
+    with open(fs_manager.get_aggregated_results_path(pipeline_name, run_id), "r") as f:
+        data = json.load(f)
+
+    assert len(data) == 1
+    table = data[0]
+    assert table["rows"] == [["A", 10], ["B", None], ["C", 2.5]]
+    # integer on page 1 and number on page 2 widen to number
+    assert table["column_types"] == ["string", "number"]
+    assert table["column_stats"][1] == {"nulls": 1, "coercion_failures": 0}
+
+    # Error pages are preserved as-is
+    path = os.path.join(fs_manager.get_pipeline_path(pipeline_name, run_id), "intermediate", "page_3.json")
+    with open(path, "r") as f:
+        assert json.load(f) == {"error": "boom"}
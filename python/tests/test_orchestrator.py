@@ -30,9 +30,18 @@ def test_orchestrator_pipeline_flow(fs_manager, tmp_path):
 
         # Verify call order
         # Access the return value (instance) of the mocks
-        agent0.agent1.run.assert_called_once_with(pipeline_name, run_id, "Extract all tables.", None, api_key=None)
-        agent0.agent2.run.assert_called_once_with(pipeline_name, run_id)
-        agent0.agent3.run.assert_called_once_with(pipeline_name, run_id)
+        agent0.agent1.run.assert_called_once()
+        args, kwargs = agent0.agent1.run.call_args
+        assert args == (pipeline_name, run_id, "Extract all tables.", None)
+        assert kwargs["api_key"] is None
+        assert callable(kwargs["on_page"])
+        # Pages are extracted one at a time, and tables exported at the end, unless the run asks otherwise
+        assert kwargs["workers"] == 1
+        agent0.agent2.create_aggregator.assert_called_once_with(pipeline_name, run_id, {}, settle_after=None)
+        aggregator = agent0.agent2.create_aggregator.return_value
+        agent0.agent2.run.assert_called_once_with(pipeline_name, run_id, aggregator=aggregator)
+        agent0.agent3.run.assert_called_once_with(pipeline_name, run_id, session=None)
+        agent0.agent3.open_session.assert_not_called()
 
 
 def test_orchestrator_failure_handling(fs_manager, tmp_path):
@@ -0,0 +1,130 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+from click.testing import CliRunner
+
+from opengin.tracer import formats
+from opengin.tracer.agents.orchestrator import FileSystemManager
+from opengin.tracer.cli import cli
+from opengin.tracer.retention import GarbageCollector, RetentionPolicy
+
+
+def _completed_run(fs_manager, pipeline_name, run_id, pages=3, created_at=None):
+    fs_manager.initialize_pipeline(pipeline_name, run_id)
+    pages_dir = fs_manager.get_input_pages_dir(pipeline_name, run_id)
+    os.makedirs(pages_dir)
+    for page_num in range(1, pages + 1):
+        with open(os.path.join(pages_dir, f"page_{page_num}.pdf"), "wb") as f:
+            f.write(b"%PDF" + b"x" * 100)
+        fs_manager.save_intermediate_result(
+            pipeline_name, run_id, page_num, {"tables": [{"name": "T", "columns": ["A"], "rows": [[str(page_num)]]}]}
+        )
+    changes = {"status": "COMPLETED"}
+    if created_at:
+        changes["created_at"] = str(created_at)
+    fs_manager.update_metadata(pipeline_name, run_id, changes)
+
+
+def test_policy_from_env():
+    policy = RetentionPolicy.from_env(
+        {"OPENGIN_REMOVE_PAGE_FILES": "false", "OPENGIN_RUN_TTL_DAYS": "30", "OPENGIN_UPLOAD_TTL_HOURS": ""}
+    )
+    assert policy.to_dict() == {
+        "remove_page_files": False,
+        "compact_after_days": None,
+        "archive_after_days": None,
+        "run_ttl_days": 30.0,
+        "upload_ttl_hours": 24.0,
+    }
+
+
+def test_sweep_removes_page_files_of_completed_runs_only(fs_manager):
+    _completed_run(fs_manager, "p", "done")
+    fs_manager.initialize_pipeline("p", "pending")
+    os.makedirs(fs_manager.get_input_pages_dir("p", "pending"))
+
+    dry = fs_manager.collect_garbage(dry_run=True)
+    assert [(a["action"], a["target"], a["bytes"]) for a in dry.actions] == [("remove_page_files", "p/done", 312)]
+    assert os.path.isdir(fs_manager.get_input_pages_dir("p", "done"))
+
+    report = fs_manager.collect_garbage()
+    assert report.total_bytes == 312
+    assert not os.path.exists(fs_manager.get_input_pages_dir("p", "done"))
+    assert os.path.isdir(fs_manager.get_input_pages_dir("p", "pending"))
+
+    # Runs held open by a pipeline are left alone
+    _completed_run(fs_manager, "p", "open")
+    fs_manager.open_run_state("p", "open")
+    try:
+        assert fs_manager.collect_garbage().actions == []
+    finally:
+        fs_manager.close_run_state("p", "open")
+
+
+def test_compacted_intermediates_remain_readable(temp_pipeline_dir):
+    fs_manager = FileSystemManager(temp_pipeline_dir, retention=RetentionPolicy(compact_after_days=7))
+    old = datetime.now() - timedelta(days=10)
+    _completed_run(fs_manager, "p", "old", created_at=old)
+    _completed_run(fs_manager, "p", "recent")
+    expected = fs_manager.load_intermediate_results("p", "old")
+
+    report = fs_manager.collect_garbage()
+    compacted = [a["target"] for a in report.actions if a["action"] == "compact_intermediate"]
+    assert compacted == ["p/old"]
+    assert report.summary()["remove_page_files"]["count"] == 2
+    intermediate = os.path.join(fs_manager.get_pipeline_path("p", "old"), "intermediate")
+    assert os.listdir(intermediate) == [formats.COMPACTED_PAGES_FILENAME]
+    assert fs_manager.load_intermediate_results("p", "old") == expected
+
+    # A page saved again after compaction takes precedence over its compacted copy
+    fs_manager.save_intermediate_result("p", "old", 2, {"tables": []})
+    pages = list(fs_manager.iter_intermediate_results("p", "old"))
+    assert [n for n, _ in pages] == [1, 2, 3]
+    assert pages[1][1] == {"tables": []}
+
+
+def test_sweep_expires_runs_and_orphaned_uploads(fs_manager, tmp_path):
+    now = datetime.now()
+    _completed_run(fs_manager, "p", "expired", created_at=now - timedelta(days=40))
+    _completed_run(fs_manager, "p", "kept", created_at=now - timedelta(days=5))
+
+    upload_dir = tmp_path / "uploads"
+    upload_dir.mkdir()
+    stale, fresh = upload_dir / "stale.pdf", upload_dir / "fresh.pdf"
+    stale.write_bytes(b"old upload")
+    fresh.write_bytes(b"new upload")
+    two_days_ago = time.time() - 2 * 86400
+    os.utime(stale, (two_days_ago, two_days_ago))
+
+    # An input blob nobody references anymore
+    with open(stale, "rb") as f:
+        digest = fs_manager.blobs.put_stream(f)
+    os.utime(fs_manager.blobs.path(digest), (two_days_ago, two_days_ago))
+
+    policy = RetentionPolicy(remove_page_files=False, run_ttl_days=30, upload_ttl_hours=24)
+    report = GarbageCollector(fs_manager, policy, upload_dir=str(upload_dir)).sweep()
+
+    assert [(a["action"], a["target"]) for a in report.actions] == [
+        ("expire_run", "p/expired"),
+        ("remove_upload", str(stale)),
+        ("remove_blob", digest),
+    ]
+    assert fs_manager.list_runs("p") == ["kept"]
+    assert os.listdir(upload_dir) == ["fresh.pdf"]
+    assert not fs_manager.blobs.exists(digest)
+
+
+def test_gc_command_dry_run(temp_pipeline_dir):
+    _completed_run(FileSystemManager(temp_pipeline_dir), "p", "done")
+    os.chdir(os.path.dirname(temp_pipeline_dir))
+
+    result = CliRunner().invoke(cli, ["gc", "--dry-run"])
+    assert result.exit_code == 0
+    assert "remove_page_files" in result.output
+    assert "Reclaimable: 312 B in 1 actions." in result.output
+    assert os.path.isdir(FileSystemManager(temp_pipeline_dir).get_input_pages_dir("p", "done"))
+
+    result = CliRunner().invoke(cli, ["gc", "--keep-page-files"])
+    assert result.exit_code == 0
+    assert "Nothing to clean up." in result.output
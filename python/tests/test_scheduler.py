@@ -0,0 +1,155 @@
+import gzip
+import json
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from opengin.tracer.agents.aggregator import IncrementalAggregator
+from opengin.tracer.agents.orchestrator import Agent0
+from opengin.tracer.agents.scanner import Agent1
+from opengin.tracer.agents.scheduler import Stage, StagePipeline
+
+# Tables found on each page; 'Alpha' turns up again on page 4 after it settled
+PAGES = {
+    1: [("Alpha", ["A"], [["1"], ["2"]])],
+    2: [("Beta", ["B"], [["3"]])],
+    3: [("Beta", ["B"], [["4"]]), ("Gamma", ["C"], [["5"]])],
+    4: [("Alpha", ["A"], [["6"]])],
+    5: [("Delta", ["D"], [["7"]])],
+}
+
+
+def _page(page_num):
+    return {"tables": [{"name": n, "columns": c, "rows": r} for n, c, r in PAGES[page_num]]}
+
+
+def test_stage_pipeline_runs_stages_concurrently_in_order():
+    seen = []
+    with StagePipeline(
+        [Stage("double", lambda x: [x, x]), Stage("collect", lambda x: seen.append(x))], queue_size=2
+    ) as pipeline:
+        for i in range(20):
+            pipeline.put(i)
+    assert seen == [i for i in range(20) for _ in range(2)]
+
+
+def test_stage_pipeline_raises_first_stage_error():
+    def fail(x):
+        if x == 3:
+            raise ValueError("bad item")
+        return [x]
+
+    processed = []
+    pipeline = StagePipeline([Stage("check", fail, workers=2), Stage("collect", processed.append)], queue_size=1)
+    with pytest.raises(ValueError, match="bad item"):
+        with pipeline:
+            for i in range(10):
+                pipeline.put(i)
+    assert 3 not in processed
+
+
+def test_agent1_extracts_pages_concurrently(fs_manager, tmp_path):
+    fs_manager.initialize_pipeline("p", "run_1")
+    input_file = tmp_path / "doc.pdf"
+    input_file.touch()
+    fs_manager.update_metadata("p", "run_1", {"input_file": str(input_file)})
+    page_files = [str(tmp_path / f"page_{i}.pdf") for i in range(1, 9)]
+
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def extract(page_path, *args, **kwargs):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return json.dumps({"tables": [{"name": os.path.basename(page_path), "columns": ["X"], "rows": []}]})
+
+    pages = []
+    with (
+        patch.object(Agent1, "_split_pdf", return_value=page_files),
+        patch("opengin.tracer.agents.scanner.extract_data_with_gemini", side_effect=extract),
+    ):
+        Agent1(fs_manager).run("p", "run_1", "prompt", on_page=lambda n, d: pages.append(n), workers=4)
+
+    assert peak[0] == 4
+    assert sorted(pages) == list(range(1, 9))
+    results = fs_manager.load_intermediate_results("p", "run_1")
+    assert [r["tables"][0]["name"] for r in results] == [f"page_{i}.pdf" for i in range(1, 9)]
+
+
+def test_aggregator_settles_and_reopens_tables():
+    aggregator = IncrementalAggregator(settle_after=1)
+    aggregator.add_page(2, _page(2))
+    assert aggregator.take_settled() == []
+
+    aggregator.add_page(1, _page(1))
+    # Page 2 did not extend 'Alpha', so it settled; 'Beta' may still continue
+    settled = aggregator.take_settled()
+    assert [(position, table["name"], names) for position, table, names in settled] == [(0, "Alpha", ["Alpha"])]
+    assert settled[0][1]["rows"] == [["1"], ["2"]]
+
+    for page_num in (3, 4, 5):
+        aggregator.add_page(page_num, _page(page_num))
+    settled = [(position, table["name"]) for position, table, _ in aggregator.take_settled()]
+    assert settled == [(1, "Beta"), (2, "Gamma"), (0, "Alpha")]
+    assert aggregator.reopened == {0}
+
+    tables = aggregator.finish()
+    assert tables[0]["rows"] == [["1"], ["2"], ["6"]]
+    assert aggregator.stats()["tables_settled_early"] == 3
+    assert aggregator.stats()["tables_reopened"] == 1
+
+
+def _run(tmp_path, base, options):
+    input_file = tmp_path / "doc.pdf"
+    input_file.touch()
+    page_files = [str(tmp_path / f"page_{i}.pdf") for i in PAGES]
+
+    def extract(page_path, *args, **kwargs):
+        page_num = int(os.path.basename(page_path)[5:-4])
+        # Later pages finish first, so results arrive out of order
+        time.sleep(0.01 * (len(PAGES) - page_num))
+        return json.dumps(_page(page_num))
+
+    agent0 = Agent0(base_path=str(tmp_path / base))
+    with (
+        patch.object(Agent1, "_split_pdf", return_value=page_files),
+        patch("opengin.tracer.agents.scanner.extract_data_with_gemini", side_effect=extract),
+    ):
+        run_id, _ = agent0.create_pipeline("p", str(input_file), "doc.pdf")
+        agent0.run_pipeline("p", run_id, options=options)
+
+    output_dir = agent0.fs_manager.get_output_path("p", run_id)
+    outputs = {}
+    for filename in sorted(os.listdir(output_dir)):
+        with open(os.path.join(output_dir, filename), "rb") as f:
+            outputs[filename] = f.read()
+    return outputs, agent0.fs_manager.load_metadata("p", run_id)
+
+
+def test_pipelined_run_matches_sequential_run(tmp_path):
+    sequential, _ = _run(tmp_path, "sequential", {})
+    pipelined, metadata = _run(tmp_path, "pipelined", {"early_export": True, "scan_workers": 5})
+
+    assert sorted(pipelined) == ["alpha.csv", "beta.csv", "delta.csv", "gamma.csv"]
+    assert pipelined == sequential
+    assert pipelined["alpha.csv"].decode().splitlines() == ["A", "1", "2", "6"]
+    assert metadata["status"] == "COMPLETED"
+    assert metadata["aggregation"]["tables_settled_early"] == 3
+    assert metadata["aggregation"]["tables_reopened"] == 1
+
+
+def test_pipelined_out_of_core_run_matches_sequential_run(tmp_path):
+    options = {"out_of_core": True, "compression": "gzip", "export_formats": ["csv", "sqlite"]}
+    sequential, _ = _run(tmp_path, "sequential", options)
+    pipelined, _ = _run(tmp_path, "pipelined", {**options, "early_export": True, "scan_workers": 3})
+
+    assert sorted(pipelined) == sorted(sequential)
+    for filename in ["alpha.csv.gz", "beta.csv.gz", "delta.csv.gz", "gamma.csv.gz"]:
+        assert gzip.decompress(pipelined[filename]) == gzip.decompress(sequential[filename])
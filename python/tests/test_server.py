@@ -1,4 +1,8 @@
+import gzip
+import hashlib
+import io
 import os
+import zipfile
 from unittest.mock import patch
 
 import pytest
@@ -43,12 +47,15 @@ def test_upload_pdf(mock_upload_dir):
     saved_path = mock_upload_dir / f"{data['file_id']}.pdf"
     assert saved_path.exists()
     assert saved_path.read_bytes() == file_content
+    digest = (mock_upload_dir / f"{data['file_id']}.sha256").read_text()
+    assert digest == hashlib.sha256(file_content).hexdigest()
 
 
 def test_extract_document(mock_upload_dir, mock_agent0):
     # Setup mock file
     file_id = "test-file-id"
     (mock_upload_dir / f"{file_id}.pdf").touch()
+    (mock_upload_dir / f"{file_id}.sha256").write_text("abc123")
 
     # Mock agent0.create_pipeline
     mock_agent0.create_pipeline.return_value = ("job-123", {"status": "READY"})
@@ -64,18 +71,30 @@ def test_extract_document(mock_upload_dir, mock_agent0):
 
     # Verify agent0 calls
     mock_agent0.create_pipeline.assert_called_once()
+    # The digest computed on upload is reused, and the upload is removed once linked
+    assert mock_agent0.create_pipeline.call_args.kwargs["input_sha256"] == "abc123"
+    assert os.listdir(mock_upload_dir) == []
     # run_pipeline is called in background task. TestClient handles this synchronously.
     mock_agent0.run_pipeline.assert_called_once()
     args, kwargs = mock_agent0.run_pipeline.call_args
     assert kwargs["api_key"] == "test-key"
+    # Parallel extraction and early export are only used when asked for
+    assert kwargs["options"] == {}
+
+    (mock_upload_dir / f"{file_id}.pdf").touch()
+    response = client.post("/api/extract", data=dict(form_data, scan_workers="4", early_export="true"))
+    assert response.status_code == 200
+    assert mock_agent0.run_pipeline.call_args.kwargs["options"] == {"scan_workers": 4, "early_export": True}
 
 
 def test_get_results_success(mock_agent0):
     job_id = "job-123"
 
     # Mock metadata
-    mock_agent0.fs_manager.load_metadata.return_value = {"status": "COMPLETED"}
+    timings = {"stages": {"scanning": {"wall_seconds": 1.5}}, "wall_seconds": 2.0, "pages_per_second": 1.0}
+    mock_agent0.fs_manager.load_metadata.return_value = {"status": "COMPLETED", "timings": timings}
     mock_agent0.fs_manager.get_pipeline_path.return_value = "/tmp/mock_pipeline/job-123"
+    mock_agent0.events.progress.return_value = {"type": "page_completed", "pages_completed": 3, "eta_seconds": 4.0}
 
     # Mock structure
     with (
@@ -89,6 +108,8 @@ def test_get_results_success(mock_agent0):
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "COMPLETED"
+    assert data["timings"] == timings
+    assert data["progress"]["pages_completed"] == 3
     assert "files" in data
 
 
@@ -141,6 +162,45 @@ def test_get_file_content_path_traversal(tmp_path):
         assert response.status_code == 403
 
 
+def test_get_file_content_compressed(tmp_path):
+    fs_root = tmp_path / "pipelines"
+    fs_root.mkdir()
+    target_file = fs_root / "output.csv.gz"
+    payload = gzip.compress(b"col1,col2\nval1,val2")
+    target_file.write_bytes(payload)
+
+    with patch("opengin.server.api.base_pipeline_path", str(fs_root)):
+        # Sent as stored, and decoded by the client through Content-Encoding
+        response = client.get(f"/api/file?path={str(target_file)}", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"].startswith("text/csv")
+        assert response.content == b"col1,col2\nval1,val2"
+
+        # Clients that do not accept gzip download the compressed file itself
+        response = client.get(f"/api/file?path={str(target_file)}", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert response.content == payload
+
+
+def test_download_all_stores_compressed_members(mock_agent0, tmp_path):
+    job_id = "job-456"
+    run_dir = tmp_path / "run"
+    (run_dir / "output").mkdir(parents=True)
+    (run_dir / "output" / "table.csv.gz").write_bytes(gzip.compress(b"a,b\n1,2\n"))
+    (run_dir / "metadata.json").write_text("{}")
+
+    mock_agent0.fs_manager.load_metadata.return_value = {"status": "COMPLETED"}
+    mock_agent0.fs_manager.get_pipeline_path.return_value = str(run_dir)
+
+    response = client.get(f"/api/download-all/{job_id}")
+    assert response.status_code == 200
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        members = {info.filename: info.compress_type for info in archive.infolist()}
+    assert members == {"metadata.json": zipfile.ZIP_DEFLATED, "output/table.csv.gz": zipfile.ZIP_STORED}
+
+
 def test_download_all_success(mock_agent0, tmp_path):
     job_id = "job-123"
     run_dir = tmp_path / "sandbox" / "pipelines" / "ui_extraction" / job_id
@@ -208,3 +268,45 @@ def test_quick_setup_not_found(mock_upload_dir):
         response = client.get("/api/quick-setup")
 
     assert response.status_code == 404
+
+
+def test_get_file_content_from_archived_run(tmp_path):
+    from opengin.tracer.agents.orchestrator import Agent0
+
+    fs_root = tmp_path / "pipelines"
+    local_agent0 = Agent0(base_path=str(fs_root))
+    fs_manager = local_agent0.fs_manager
+    fs_manager.initialize_pipeline("ui_extraction", "job-789")
+    output_dir = fs_manager.get_output_path("ui_extraction", "job-789")
+    with open(os.path.join(output_dir, "table.csv"), "w") as f:
+        f.write("col1,col2\nval1,val2")
+    fs_manager.update_metadata("ui_extraction", "job-789", {"status": "COMPLETED"})
+    fs_manager.archive_run("ui_extraction", "job-789")
+    target_file = os.path.join(output_dir, "table.csv")
+    assert not os.path.exists(target_file)
+
+    with (
+        patch("opengin.server.api.base_pipeline_path", str(fs_root)),
+        patch("opengin.server.api.agent0", local_agent0),
+    ):
+        response = client.get(f"/api/file?path={target_file}")
+        assert response.status_code == 200
+        assert response.text == "col1,col2\nval1,val2"
+
+        response = client.get(f"/api/file?path={os.path.join(output_dir, 'missing.csv')}")
+        assert response.status_code == 404
+
+        data = client.get("/api/results/job-789").json()
+        assert [f["name"] for f in data["files"]["csv"]] == ["table.csv"]
+        output = next(c for c in data["files"]["system"]["children"] if c["name"] == "output")
+        assert [c["name"] for c in output["children"]] == ["table.csv"]
+
+        response = client.get("/api/download-all/job-789")
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            assert sorted(archive.namelist()) == [
+                "manifest.json",
+                "manifest.json.lock",
+                "metadata.json",
+                "metadata.json.lock",
+                "output/table.csv",
+            ]
@@ -0,0 +1,124 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from opengin.tracer.agents.exporter import Agent3
+from opengin.tracer.agents.sqlite_export import SQLITE_FILENAME, SqliteExporter
+
+
+def _set_options(fs_manager, pipeline_name, run_id, options):
+    metadata = fs_manager.load_metadata(pipeline_name, run_id)
+    metadata["options"] = options
+    fs_manager.save_metadata(pipeline_name, run_id, metadata)
+
+
+def test_sqlite_exporter_loads_tables_and_indexes(tmp_path):
+    db_path = str(tmp_path / "run.sqlite")
+    exporter = SqliteExporter(db_path, indexes=["id", "orders.customer"])
+
+    table = {
+        "name": "Orders",
+        "columns": ["ID", "Customer", "Total"],
+        "column_types": ["integer", "string", "number"],
+        "metadata": {"source": "page 1"},
+    }
+    writer = exporter.table_writer("orders", table)
+    writer.write([["1", "alice", "10.5"], ["2", "bob"]])
+    assert writer.close() == 2
+
+    # Same name again gets a suffix, and has no typed columns; so do column names differing only in case
+    writer = exporter.table_writer("ORDERS", {"name": "Archive", "columns": ["Customer", "customer"]})
+    writer.write([["carol", "Carol"]])
+    writer.close()
+    exporter.close()
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('SELECT * FROM "orders"').fetchall() == [(1, "alice", 10.5), (2, "bob", None)]
+    assert conn.execute('SELECT Customer, customer_1 FROM "ORDERS_1"').fetchall() == [("carol", "Carol")]
+
+    indexes = {
+        row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")
+    }
+    assert indexes == {"idx_orders_ID", "idx_orders_Customer"}
+
+    rows = conn.execute("SELECT table_name, source_name, row_count, indexes, metadata FROM _table_metadata").fetchall()
+    assert rows[0] == ("orders", "Orders", 2, json.dumps(["ID", "Customer"]), json.dumps({"source": "page 1"}))
+    assert rows[1][0] == "ORDERS_1"
+    conn.close()
+
+
+def test_agent3_sqlite_export(fs_manager):
+    pipeline_name = "test_pipeline"
+    run_id = "run_sqlite"
+    fs_manager.initialize_pipeline(pipeline_name, run_id)
+    _set_options(fs_manager, pipeline_name, run_id, {"export_formats": ["sqlite"], "sqlite_indexes": ["item"]})
+
+    agg_data = [
+        {"name": "My Table", "columns": ["Item", "Qty"], "rows": [["A", "1"], ["B", "2"]]},
+        {"name": "My Table", "columns": ["Item"], "rows": [["C"]]},
+    ]
+    fs_manager.save_aggregated_result(pipeline_name, run_id, agg_data)
+    Agent3(fs_manager).run(pipeline_name, run_id)
+
+    output_dir = fs_manager.get_output_path(pipeline_name, run_id)
+    assert os.listdir(output_dir) == [SQLITE_FILENAME]
+
+    conn = sqlite3.connect(os.path.join(output_dir, SQLITE_FILENAME))
+    assert conn.execute("SELECT * FROM my_table").fetchall() == [("A", "1"), ("B", "2")]
+    assert conn.execute("SELECT * FROM my_table_1").fetchall() == [("C",)]
+    assert conn.execute("SELECT COUNT(*) FROM _table_metadata").fetchone() == (2,)
+    conn.close()
+
+    # Exporting again rebuilds the database instead of failing on existing tables
+    Agent3(fs_manager).run(pipeline_name, run_id)
+    assert fs_manager.load_metadata(pipeline_name, run_id)["status"] == "COMPLETED"
+
+
+def test_failed_table_is_rolled_back(tmp_path, fs_manager):
+    db_path = str(tmp_path / "tables.sqlite")
+    exporter = SqliteExporter(db_path)
+
+    def rows():
+        yield ["1"]
+        yield ["2"]
+        raise RuntimeError("row file truncated")
+
+    with pytest.raises(RuntimeError):
+        Agent3(fs_manager)._export_table(
+            {"name": "T", "columns": ["n"]}, rows(), str(tmp_path), "t", ["sqlite"], {"row_group_size": 1}, exporter
+        )
+    # The database is still usable for the other tables
+    writer = exporter.table_writer("t", {"name": "T", "columns": ["n"]})
+    writer.write([["3"]])
+    writer.close()
+    exporter.close()
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('SELECT * FROM "t"').fetchall() == [("3",)]
+    assert conn.execute("SELECT table_name FROM _table_metadata").fetchall() == [("t",)]
+    conn.close()
+
+
+def test_tables_load_concurrently(tmp_path):
+    db_path = str(tmp_path / "tables.sqlite")
+    exporter = SqliteExporter(db_path, max_pending=1)
+
+    # Both tables are open at once, which used to block until the first was closed
+    first = exporter.table_writer("a", {"name": "A", "columns": ["n"], "column_types": ["integer"]})
+    second = exporter.table_writer("b", {"name": "B", "columns": ["s"]})
+    for i in range(3):
+        first.write([[str(i)]])
+        second.write([[f"s{i}"]])
+    assert second.close() == 3
+
+    # Nothing is committed while a table is still half-loaded
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall() == [("_table_metadata",)]
+    assert first.close() == 3
+    exporter.close()
+
+    assert conn.execute('SELECT * FROM "a"').fetchall() == [(0,), (1,), (2,)]
+    assert conn.execute('SELECT * FROM "b"').fetchall() == [("s0",), ("s1",), ("s2",)]
+    conn.close()
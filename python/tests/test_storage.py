@@ -0,0 +1,145 @@
+import os
+
+import pytest
+
+from opengin.tracer.agents.exporter import Agent3
+from opengin.tracer.agents.orchestrator import FileSystemManager
+from opengin.tracer.storage import LocalStorage, S3Storage, storage_from_url
+
+
+@pytest.fixture
+def s3_storage():
+    pytest.importorskip("boto3")
+    moto = pytest.importorskip("moto")
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        import boto3
+
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="runs")
+        yield S3Storage(
+            "runs",
+            prefix="opengin",
+            multipart_threshold=5 * 1024 * 1024,
+            multipart_chunksize=5 * 1024 * 1024,
+            workers=4,
+        )
+
+
+@pytest.fixture(params=["local", "s3"])
+def storage(request, tmp_path):
+    if request.param == "local":
+        return LocalStorage(str(tmp_path / "storage"))
+    return request.getfixturevalue("s3_storage")
+
+
+def test_backend_objects_and_trees(storage, tmp_path):
+    storage.write_bytes("p/run_1/metadata.json", b"{}")
+    assert storage.read_bytes("p/run_1/metadata.json") == b"{}"
+    assert storage.exists("p/run_1/metadata.json")
+    assert not storage.exists("p/run_1/missing.json")
+    with pytest.raises(FileNotFoundError):
+        storage.read_bytes("p/run_1/missing.json")
+
+    local = tmp_path / "local"
+    (local / "output").mkdir(parents=True)
+    (local / "output" / "a.csv").write_text("a\n1\n")
+    (local / "metadata.json.lock").write_text("")
+    # Large enough for a multipart upload on S3
+    (local / "output" / "big.bin").write_bytes(os.urandom(11 * 1024 * 1024))
+
+    assert storage.push_tree(str(local), "p/run_2") == 2
+    assert storage.list_children("") == ["p"]
+    assert storage.list_children("p") == ["run_1", "run_2"]
+    assert storage.list_keys("p/run_2") == ["p/run_2/output/a.csv", "p/run_2/output/big.bin"]
+
+    pulled = tmp_path / "pulled"
+    assert storage.pull_tree("p/run_2", str(pulled)) == 2
+    assert (pulled / "output" / "big.bin").read_bytes() == (local / "output" / "big.bin").read_bytes()
+
+    storage.delete_prefix("p/run_2")
+    assert storage.list_children("p") == ["run_1"]
+
+
+def test_storage_from_url(tmp_path):
+    assert storage_from_url(None) is None
+    assert isinstance(storage_from_url(f"file://{tmp_path}"), LocalStorage)
+    with pytest.raises(ValueError):
+        storage_from_url("s3:///prefix")
+
+
+def test_runs_are_shared_between_replicas(storage, tmp_path):
+    replica_a = FileSystemManager(str(tmp_path / "a"), storage=storage)
+    replica_a.initialize_pipeline("p", "run_1")
+    replica_a.save_intermediate_result("p", "run_1", 1, {"tables": []})
+    replica_a.save_aggregated_result("p", "run_1", [{"name": "T", "columns": ["A"], "rows": [["1"]]}])
+    Agent3(replica_a).run("p", "run_1")
+    replica_a.sync_run("p", "run_1")
+
+    # A replica with an empty local directory sees the run and reads it from storage
+    replica_b = FileSystemManager(str(tmp_path / "b"), storage=storage)
+    assert replica_b.load_metadata("p", "run_1")["status"] == "COMPLETED"
+    runs, total = replica_b.query_runs()
+    assert total == 1 and runs[0]["run_id"] == "run_1"
+
+    output_dir = replica_b.get_output_path("p", "run_1")
+    assert replica_b.list_run_dir(output_dir) == ["t.csv"]
+    with replica_b.open_run_file(os.path.join(output_dir, "t.csv")) as f:
+        assert f.read() == "A\n1\n"
+    assert replica_b.load_intermediate_results("p", "run_1") == [{"tables": []}]
+
+    # Status changes are written through without a sync
+    replica_a.update_metadata("p", "run_1", {"status": "FAILED"})
+    assert replica_b.load_metadata("p", "run_1")["status"] == "FAILED"
+
+    assert replica_b.delete_run("p", "run_1")
+    assert replica_a.list_runs("p") == ["run_1"]  # still on A's local disk
+    assert storage.list_keys("p/run_1") == []
+
+
+def test_replicas_do_not_copy_runs_in_progress(storage, tmp_path):
+    replica_a = FileSystemManager(str(tmp_path / "a"), storage=storage)
+    replica_a.initialize_pipeline("p", "run_1")
+    replica_a.update_metadata("p", "run_1", {"status": "RUNNING"})
+    replica_a.save_aggregated_result("p", "run_1", [{"name": "T", "columns": ["A"], "rows": [["1"]]}])
+    replica_a.sync_run("p", "run_1")
+
+    # Reading a run in progress elsewhere leaves the local working copy alone
+    replica_b = FileSystemManager(str(tmp_path / "b"), storage=storage)
+    output_dir = replica_b.get_output_path("p", "run_1")
+    assert not replica_b.run_path_exists(output_dir)
+    assert not os.path.exists(replica_b.get_pipeline_path("p", "run_1"))
+
+    Agent3(replica_a).run("p", "run_1")
+    assert replica_b.load_metadata("p", "run_1")["status"] == "COMPLETED"
+    replica_a.sync_run("p", "run_1")
+    with replica_b.open_run_file(os.path.join(output_dir, "t.csv")) as f:
+        assert f.read() == "A\n1\n"
+
+
+def test_reading_a_run_checks_storage_once(tmp_path):
+    storage = LocalStorage(str(tmp_path / "storage"))
+    replica_a = FileSystemManager(str(tmp_path / "a"), storage=storage)
+    replica_a.initialize_pipeline("p", "run_1")
+    for page_num in range(1, 6):
+        replica_a.save_intermediate_result("p", "run_1", page_num, {"tables": [], "page": page_num})
+    replica_a.update_metadata("p", "run_1", {"status": "COMPLETED"})
+    replica_a.sync_run("p", "run_1")
+
+    replica_b = FileSystemManager(str(tmp_path / "b"), storage=storage)
+    reads = []
+    read_bytes = storage.read_bytes
+    storage.read_bytes = lambda key: reads.append(key) or read_bytes(key)
+
+    # Metadata and manifest are read once for all pages, not once per page file
+    assert [page for page, _ in replica_b.iter_intermediate_results("p", "run_1")] == [1, 2, 3, 4, 5]
+    assert sorted(reads) == ["p/run_1/manifest.json", "p/run_1/metadata.json"]
+
+    reads.clear()
+    with replica_b.reading_run("p", "run_1"):
+        assert replica_b.load_metadata("p", "run_1")["status"] == "COMPLETED"
+        replica_b.update_metadata("p", "run_1", {"note": "checked"})
+        assert replica_b.load_metadata("p", "run_1")["note"] == "checked"
+        assert len(replica_b.load_intermediate_results("p", "run_1")) == 5
+    assert sorted(reads) == ["p/run_1/manifest.json", "p/run_1/metadata.json"]
@@ -0,0 +1,64 @@
+import json
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from opengin.tracer.agents.orchestrator import Agent0
+from opengin.tracer.agents.scanner import Agent1
+from opengin.tracer.cli import cli
+from opengin.tracer.timing import StageTimer
+
+
+def test_stage_timer_records_stages():
+    updates = []
+    timer = StageTimer(on_change=updates.append)
+    with timer.stage("exporting"):
+        pass
+    with pytest.raises(ValueError):
+        with timer.stage("scanning"):
+            sum(range(100_000))
+            time.sleep(0.02)
+            raise ValueError("failed")
+    timer.page_count = 4
+
+    timings = timer.to_dict()
+    # Stages are listed in pipeline order, failed stages included
+    assert list(timings["stages"]) == ["scanning", "exporting"]
+    scanning = timings["stages"]["scanning"]
+    assert scanning["wall_seconds"] >= 0.02
+    assert scanning["cpu_seconds"] >= 0
+    assert scanning["started_at"] <= scanning["finished_at"]
+    assert timings["wall_seconds"] >= scanning["wall_seconds"]
+    assert timings["pages_per_second"] > 0
+    if scanning["peak_rss_bytes"] is not None:
+        assert scanning["peak_rss_bytes"] > 1024 * 1024
+    assert len(updates) == 2
+
+
+def test_run_records_stage_timings(tmp_path):
+    input_file = tmp_path / "doc.pdf"
+    input_file.touch()
+    page_files = [str(tmp_path / f"page_{i}.pdf") for i in (1, 2, 3)]
+    response = json.dumps({"tables": [{"name": "T", "columns": ["X"], "rows": [["1"]]}]})
+
+    agent0 = Agent0(base_path=str(tmp_path / "pipelines"))
+    with (
+        patch.object(Agent1, "_split_pdf", return_value=page_files),
+        patch("opengin.tracer.agents.scanner.extract_data_with_gemini", return_value=response),
+    ):
+        run_id, _ = agent0.create_pipeline("p", str(input_file), "doc.pdf")
+        agent0.run_pipeline("p", run_id)
+
+    timings = agent0.fs_manager.load_metadata("p", run_id)["timings"]
+    assert list(timings["stages"]) == ["splitting", "scanning", "aggregating", "exporting"]
+    assert timings["pages_per_second"] > 0
+
+    os.chdir(tmp_path)
+    result = CliRunner().invoke(cli, ["info", "p", run_id])
+    assert result.exit_code == 0
+    assert "Stage Timings:" in result.output
+    assert "| aggregating" in result.output
+    assert "pages/s" in result.output